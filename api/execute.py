@@ -1,9 +1,13 @@
 import json
 import os
+import sys
 import requests
 from datetime import datetime
 import time
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from request_coalescer import coalescer, succeeded
+
 # API Keys from environment variables (set in Vercel dashboard)
 REAL_API_KEYS = {
     "tilda": os.environ.get("TILDA_API_KEY", "b9j7w8eka0dwsizitkix"),
@@ -89,8 +93,15 @@ def execute_real_command(command):
     else:
         return {"message": f"Unknown command: {command}"}
 
+# Seconds Tilda results are shared between invocations
+TILDA_CACHE_TTL = int(os.environ.get("TILDA_CACHE_TTL", 60))
+
 def get_tilda_projects():
-    """Get real Tilda projects using discovered API key"""
+    """Get real Tilda projects, sharing one upstream call between requests"""
+    return coalescer.call("tilda:projects", fetch_tilda_projects, ttl=TILDA_CACHE_TTL, should_cache=succeeded)
+
+def fetch_tilda_projects():
+    """Fetch real Tilda projects using discovered API key"""
     try:
         url = f"https://builder.tildacdn.com/v1/getprojectslist/?key={REAL_API_KEYS['tilda']}"
         response = requests.get(url, timeout=10)
@@ -110,7 +121,11 @@ def get_tilda_projects():
         return {"error": f"Tilda API error: {str(e)}"}
 
 def get_tilda_pages():
-    """Get pages from Tilda projects"""
+    """Get pages from Tilda projects, sharing one upstream fetch between requests"""
+    return coalescer.call("tilda:pages", fetch_tilda_pages, ttl=TILDA_CACHE_TTL, should_cache=succeeded)
+
+def fetch_tilda_pages():
+    """Fetch pages from Tilda projects"""
     try:
         # First get projects
         projects = get_tilda_projects()
@@ -0,0 +1,634 @@
+# Index Advisor
+# Index suggestions from the observed workload and index usage statistics
+#
+# Missing indexes: the top query shapes from query analytics (or the
+# cumulative pg_stat_statements / statement digest counters when no
+# snapshots exist) are scanned for the columns they filter, join and sort
+# on. Per table a candidate takes the equality columns, then one range
+# column (or else the ORDER BY columns), the usual B-tree column order.
+# Candidates already served by the leading columns of an existing index,
+# and tables under DB_ADVISOR_MIN_TABLE_ROWS, are skipped; a candidate
+# that is a leading prefix of another is folded into it. The parsing is a
+# heuristic over query text (no subquery scoping), so proposals are a
+# starting point for EXPLAIN, not DDL to run blindly.
+#
+# On PostgreSQL with the hypopg extension each candidate is costed: the
+# queries it serves are planned without and with a hypothetical index
+# (EXPLAIN GENERIC_PLAN on PostgreSQL 16+ for $n-parameterized text) and
+# the cost reduction is weighted by the time each query consumed.
+#
+# Unused indexes have had no scans since statistics were reset
+# (PostgreSQL) or the server started (MySQL) and back no constraint.
+# Duplicates have the definition of, or are a leading prefix of, another
+# index. Both slow every write for nothing. Usage counters are per server,
+# so check replicas before dropping.
+
+import os
+import re
+import json
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from db_config import DatabaseConfig
+from db_utils import DatabaseUtils
+from db_backfill import quote_identifier
+
+
+logger = logging.getLogger(__name__)
+
+SQL_KEYWORDS = {
+    "and", "or", "not", "exists", "null", "true", "false", "case", "when", "then", "else", "end",
+    "select", "from", "where", "join", "on", "as", "is", "in", "like", "between", "any", "all",
+    "distinct", "interval", "current_date", "current_timestamp", "now", "date", "time", "timestamp",
+}
+NOT_ALIASES = {
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "on", "using", "set",
+    "group", "order", "limit", "offset", "having", "union", "returning", "window", "for", "lateral",
+    "values", "select", "outer", "as", "straight_join", "force", "use", "ignore",
+}
+EQUALITY_OPS = ("=", "in", "is")
+RANGE_OPS = ("<", ">", "<=", ">=", "between", "like")
+
+STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+COMMENT_RE = re.compile(r"/\*.*?\*/|--[^\n]*", re.DOTALL)
+PG_PARAM_RE = re.compile(r"\$\d+")
+IDENT = r"[a-z_][\w$]*"
+TABLE_REF_RE = re.compile(rf"\b(?:join|update)\s+(?!\()({IDENT}(?:\.{IDENT})?)(?:\s+(?:as\s+)?({IDENT}))?")
+FROM_RE = re.compile(
+    r"\bfrom\s+(.*?)(?=\b(?:where|group|order|limit|having|join|inner|left|right|full|cross|natural|"
+    r"union|returning|window|for|straight_join)\b|\)|;|$)",
+    re.DOTALL,
+)
+FROM_ITEM_RE = re.compile(rf"^\s*({IDENT}(?:\.{IDENT})?)(?:\s+(?:as\s+)?({IDENT}))?\s*$")
+WHERE_RE = re.compile(
+    r"\b(?:where|on)\b(.*?)(?=\b(?:join|inner|left|right|full|cross|natural|where|group\s+by|order\s+by|"
+    r"limit|offset|having|returning|union|window|for\s+update|for\s+share)\b|;|$)",
+    re.DOTALL,
+)
+PREDICATE_RE = re.compile(
+    rf"(?<![\w$.:])(?:({IDENT})\.)?({IDENT})\s*"
+    r"(<=|>=|<>|!=|=|<|>|\bnot\s+in\b|\bin\b|\bnot\s+like\b|\blike\b|\bilike\b|\bbetween\b|\bis\s+not\b|\bis\b)"
+    rf"\s*(?:({IDENT})\.({IDENT})(?![\w$(]))?"
+)
+ORDER_RE = re.compile(r"\border\s+by\s+(.*?)(?=\b(?:limit|offset|for|union)\b|\)|;|$)", re.DOTALL)
+ORDER_ITEM_RE = re.compile(rf"^\s*(?:({IDENT})\.)?({IDENT})(?:\s+(?:asc|desc))?(?:\s+nulls\s+(?:first|last))?\s*$")
+
+PG_TABLES_SQL = """
+SELECT s.schemaname || '.' || s.relname AS name, s.n_live_tup AS rows, s.seq_scan, s.seq_tup_read,
+       COALESCE(s.idx_scan, 0) AS idx_scan, s.n_tup_ins + s.n_tup_upd + s.n_tup_del AS writes,
+       pg_total_relation_size(s.relid) AS size_bytes
+FROM pg_stat_user_tables s
+"""
+
+PG_COLUMNS_SQL = """
+SELECT table_schema || '.' || table_name AS table_name, column_name
+FROM information_schema.columns
+WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
+"""
+
+PG_INDEXES_SQL = """
+SELECT n.nspname || '.' || t.relname AS table_name, n.nspname || '.' || i.relname AS name,
+       x.indisunique AS is_unique, x.indisprimary AS is_primary,
+       EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid) AS is_constraint,
+       pg_get_expr(x.indexprs, x.indrelid) AS exprs, pg_get_expr(x.indpred, x.indrelid) AS pred,
+       am.amname AS method, pg_relation_size(x.indexrelid) AS size_bytes,
+       COALESCE(s.idx_scan, 0) AS scans, pg_get_indexdef(x.indexrelid) AS definition,
+       ARRAY(SELECT COALESCE(a.attname, '(expression)') FROM unnest(x.indkey) WITH ORDINALITY k(attnum, ord)
+             LEFT JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+             WHERE k.ord <= x.indnkeyatts ORDER BY k.ord) AS columns
+FROM pg_index x
+JOIN pg_class i ON i.oid = x.indexrelid
+JOIN pg_class t ON t.oid = x.indrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+JOIN pg_am am ON am.oid = i.relam
+LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = x.indexrelid
+WHERE n.nspname NOT IN ('pg_catalog', 'information_schema') AND n.nspname NOT LIKE 'pg_toast%'
+"""
+
+MYSQL_TABLES_SQL = """
+SELECT CONCAT(t.TABLE_SCHEMA, '.', t.TABLE_NAME) AS name, t.TABLE_ROWS AS `rows`,
+       t.DATA_LENGTH + t.INDEX_LENGTH AS size_bytes,
+       COALESCE(w.COUNT_INSERT + w.COUNT_UPDATE + w.COUNT_DELETE, 0) AS writes
+FROM information_schema.TABLES t
+LEFT JOIN performance_schema.table_io_waits_summary_by_table w
+  ON w.OBJECT_SCHEMA = t.TABLE_SCHEMA AND w.OBJECT_NAME = t.TABLE_NAME
+WHERE t.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE'
+"""
+
+MYSQL_COLUMNS_SQL = """
+SELECT CONCAT(TABLE_SCHEMA, '.', TABLE_NAME) AS table_name, COLUMN_NAME AS column_name
+FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE()
+"""
+
+MYSQL_INDEXES_SQL = """
+SELECT CONCAT(s.TABLE_SCHEMA, '.', s.TABLE_NAME) AS table_name, s.INDEX_NAME AS name,
+       s.NON_UNIQUE AS non_unique, s.INDEX_TYPE AS method, s.COLUMN_NAME AS column_name,
+       s.EXPRESSION AS expression, u.COUNT_STAR AS scans
+FROM information_schema.STATISTICS s
+LEFT JOIN performance_schema.table_io_waits_summary_by_index_usage u
+  ON u.OBJECT_SCHEMA = s.TABLE_SCHEMA AND u.OBJECT_NAME = s.TABLE_NAME AND u.INDEX_NAME = s.INDEX_NAME
+WHERE s.TABLE_SCHEMA = DATABASE()
+ORDER BY s.TABLE_NAME, s.INDEX_NAME, s.SEQ_IN_INDEX
+"""
+
+
+def clean_query(query: str) -> str:
+    """Lower-case query text without comments, string literals or identifier quotes"""
+    query = COMMENT_RE.sub(" ", query)
+    query = STRING_RE.sub("?", query)
+    query = query.replace('"', "").replace("`", "")
+    return " ".join(query.lower().split())
+
+
+def table_refs(query: str) -> Dict[str, str]:
+    """Alias (and bare name) -> table name of every table a cleaned query reads"""
+    refs: Dict[str, str] = {}
+
+    def add(name: str, alias: Optional[str]) -> None:
+        refs[name] = name
+        refs[name.split(".")[-1]] = name
+        if alias and alias not in NOT_ALIASES:
+            refs[alias] = name
+
+    for clause in FROM_RE.findall(query):
+        for item in clause.split(","):
+            match = FROM_ITEM_RE.match(item)
+            if match:
+                add(match.group(1), match.group(2))
+    for match in TABLE_REF_RE.finditer(query):
+        add(match.group(1), match.group(2))
+    return refs
+
+
+def query_columns(query: str) -> Tuple[Dict[str, str], List[Tuple[Optional[str], str, str]]]:
+    """Table references and (qualifier, column, kind) uses of a query
+
+    kind is "eq" (=, IN, IS NULL), "range" (<, >, BETWEEN, LIKE), "join"
+    (a = b.c) or "sort" (ORDER BY). Negations and expressions are ignored.
+    """
+    query = clean_query(query)
+    uses: List[Tuple[Optional[str], str, str]] = []
+    for region in WHERE_RE.findall(query):
+        for qualifier, column, op, other_qualifier, other_column in PREDICATE_RE.findall(region):
+            op = " ".join(op.split())
+            if column in SQL_KEYWORDS:
+                continue
+            if op == "=" and other_column:
+                uses.append((qualifier or None, column, "join"))
+                uses.append((other_qualifier, other_column, "join"))
+            elif op in EQUALITY_OPS:
+                uses.append((qualifier or None, column, "eq"))
+            elif op in RANGE_OPS:
+                uses.append((qualifier or None, column, "range"))
+    for clause in ORDER_RE.findall(query):
+        for item in clause.split(","):
+            match = ORDER_ITEM_RE.match(item)
+            if match and match.group(2) not in SQL_KEYWORDS:
+                uses.append((match.group(1), match.group(2), "sort"))
+    return table_refs(query), uses
+
+
+def find_duplicates(indexes: List[Dict]) -> List[Dict]:
+    """Indexes identical to, or a leading prefix of, another index on the same table"""
+    duplicates = []
+    by_table: Dict[str, List[Dict]] = {}
+    for index in indexes:
+        by_table.setdefault(index["table"], []).append(index)
+
+    def keeps(index: Dict) -> Tuple:
+        # Prefer keeping constraint-backing indexes, then the oldest name
+        return (not (index["primary"] or index["constraint"]), not index["unique"], index["name"])
+
+    for table_indexes in by_table.values():
+        dropped = set()
+        for index in sorted(table_indexes, key=keeps, reverse=True):
+            if index["primary"] or index["constraint"]:
+                continue
+            for other in sorted(table_indexes, key=keeps):
+                if other is index or other["name"] in dropped or other["method"] != index["method"]:
+                    continue
+                same_shape = (other["exprs"], other["pred"]) == (index["exprs"], index["pred"])
+                if same_shape and other["columns"] == index["columns"] and (other["unique"] or not index["unique"]):
+                    reason = "same definition as"
+                elif (
+                    not index["unique"]
+                    and not index["exprs"]
+                    and not index["pred"]
+                    and not other["pred"]
+                    and index["method"] == "btree"
+                    and len(index["columns"]) < len(other["columns"])
+                    and other["columns"][: len(index["columns"])] == index["columns"]
+                ):
+                    reason = "leading prefix of"
+                else:
+                    continue
+                dropped.add(index["name"])
+                duplicates.append({**index, "reason": reason, "covered_by": other["name"]})
+                break
+    return duplicates
+
+
+class IndexAdvisor:
+    """Missing, unused and duplicate indexes of one PostgreSQL or MySQL database"""
+
+    def __init__(self, db, db_type: str = "postgresql", config: Optional[Dict] = None):
+        """Initialize advisor for a connected PostgreSQLManager or MySQLManager"""
+        self.config = config or DatabaseConfig.get_advisor_config()
+        self.db = db
+        self.db_type = db_type
+        self.tables: Dict[str, Dict] = {}
+        self.indexes: List[Dict] = []
+        self.stats_since: Optional[float] = None
+
+    # Catalog
+
+    def load_catalog(self) -> None:
+        """Read tables, columns, indexes and their usage counters"""
+        if self.db_type == "postgresql":
+            tables = DatabaseUtils.query_rows(self.db, PG_TABLES_SQL)
+            columns = DatabaseUtils.query_rows(self.db, PG_COLUMNS_SQL)
+            indexes = DatabaseUtils.query_rows(self.db, PG_INDEXES_SQL)
+            reset = DatabaseUtils.query_rows(
+                self.db,
+                "SELECT EXTRACT(EPOCH FROM COALESCE(d.stats_reset, pg_postmaster_start_time())) AS since "
+                "FROM pg_stat_database d WHERE d.datname = current_database()",
+            )
+            for index in indexes:
+                index["table"] = index.pop("table_name")
+                index["unique"] = index.pop("is_unique")
+                index["primary"] = index.pop("is_primary")
+                index["constraint"] = index.pop("is_constraint")
+                index["columns"] = list(index["columns"])
+        else:
+            tables = DatabaseUtils.query_rows(self.db, MYSQL_TABLES_SQL)
+            columns = DatabaseUtils.query_rows(self.db, MYSQL_COLUMNS_SQL)
+            indexes = self._mysql_indexes(DatabaseUtils.query_rows(self.db, MYSQL_INDEXES_SQL))
+            reset = DatabaseUtils.query_rows(
+                self.db,
+                "SELECT UNIX_TIMESTAMP() - VARIABLE_VALUE AS since "
+                "FROM performance_schema.global_status WHERE VARIABLE_NAME = 'Uptime'",
+            )
+
+        self.tables = {}
+        for table in tables:
+            table["rows"] = int(table["rows"] or 0)
+            table["columns"] = set()
+            self.tables[table["name"].lower()] = table
+        for column in columns:
+            table = self.tables.get(column["table_name"].lower())
+            if table is not None:
+                table["columns"].add(column["column_name"].lower())
+        self.indexes = indexes
+        self.stats_since = float(reset[0]["since"]) if reset and reset[0]["since"] is not None else None
+
+    @staticmethod
+    def _mysql_indexes(rows: List[Dict]) -> List[Dict]:
+        """One dict per index from information_schema.STATISTICS rows"""
+        indexes: Dict[Tuple[str, str], Dict] = {}
+        for row in rows:
+            key = (row["table_name"], row["name"])
+            index = indexes.get(key)
+            if index is None:
+                index = indexes[key] = {
+                    "table": row["table_name"],
+                    "name": row["name"],
+                    "unique": not row["non_unique"],
+                    "primary": row["name"] == "PRIMARY",
+                    "constraint": row["name"] == "PRIMARY",
+                    "exprs": None,
+                    "pred": None,
+                    "method": "btree" if row["method"] == "BTREE" else row["method"].lower(),
+                    "size_bytes": None,
+                    "scans": row["scans"],
+                    "definition": None,
+                    "columns": [],
+                }
+            if row["column_name"] is None:
+                index["exprs"] = row["expression"]
+                index["columns"].append("(expression)")
+            else:
+                index["columns"].append(row["column_name"])
+        return list(indexes.values())
+
+    def resolve_table(self, name: str) -> Optional[str]:
+        """Catalog name of a (possibly unqualified) table name"""
+        name = name.lower()
+        if name in self.tables:
+            return name
+        matches = [t for t in self.tables if t.split(".")[-1] == name.split(".")[-1]]
+        if len(matches) > 1:
+            matches = [t for t in matches if t.startswith("public.")] or matches
+        return matches[0] if len(matches) == 1 else None
+
+    # Workload
+
+    def workload(self, hours: Optional[float] = None, limit: Optional[int] = None) -> Tuple[str, List[Dict]]:
+        """Top query shapes by time: query analytics, else cumulative server counters"""
+        from db_query_stats import QueryStats
+
+        hours = hours or self.config["hours"]
+        limit = limit or self.config["max_queries"]
+        path = DatabaseConfig.get_query_stats_config()["path"]
+        if os.path.exists(path):
+            stats = QueryStats(path)
+            try:
+                queries = stats.top(db=self.db_type, since=time.time() - hours * 3600, limit=limit)
+            finally:
+                stats.close()
+            if queries:
+                return f"query analytics, last {hours:g}h", queries
+
+        read = QueryStats.read_postgresql if self.db_type == "postgresql" else QueryStats.read_mysql
+        try:
+            rows = read(self.db)
+        except Exception as e:
+            logger.warning(f"⚠️  No workload statistics available: {e}")
+            return "none", []
+        by_fingerprint: Dict[str, Dict] = {}
+        for row in rows:
+            fingerprint = DatabaseUtils.fingerprint_query(row["query"] or "")
+            entry = by_fingerprint.setdefault(
+                fingerprint, {"fingerprint": fingerprint, "query": row["query"], "calls": 0, "total_ms": 0.0}
+            )
+            entry["calls"] += row["calls"] or 0
+            entry["total_ms"] += float(row["total_ms"] or 0)
+        queries = sorted(by_fingerprint.values(), key=lambda q: q["total_ms"], reverse=True)[:limit]
+        source = "pg_stat_statements" if self.db_type == "postgresql" else "statement digests"
+        return f"{source} since last reset", queries
+
+    def _seq_scan_evidence(self) -> Dict[str, List[str]]:
+        """Table -> seq scans flagged in captured slow-query plans"""
+        from db_explain import ExplainStore
+
+        path = DatabaseConfig.get_explain_config()["path"]
+        if not os.path.exists(path):
+            return {}
+        evidence: Dict[str, List[str]] = {}
+        store = ExplainStore(path)
+        try:
+            for plan in store.latest(db=self.db_type, limit=200, flagged=True):
+                for flag in plan["flags"]:
+                    table = flag["type"] == "seq_scan" and flag["relation"] and self.resolve_table(flag["relation"])
+                    if table:
+                        evidence.setdefault(table, []).append(
+                            f"seq scan of {flag['rows']:,} rows in captured plan {plan['fingerprint']}"
+                        )
+        finally:
+            store.close()
+        return evidence
+
+    # Missing indexes
+
+    def candidates_for(self, query: str) -> List[Tuple[str, Tuple[str, ...]]]:
+        """(table, columns) index candidates for one query"""
+        refs, uses = query_columns(query)
+        tables = {alias: self.resolve_table(name) for alias, name in refs.items()}
+        query_tables = {t for t in tables.values() if t}
+        per_table: Dict[str, Dict[str, List[str]]] = {}
+        for qualifier, column, kind in uses:
+            if qualifier:
+                table = tables.get(qualifier)
+            else:
+                owners = [t for t in query_tables if column in self.tables[t]["columns"]]
+                table = owners[0] if len(owners) == 1 else None
+            if not table or column not in self.tables[table]["columns"]:
+                continue
+            columns = per_table.setdefault(table, {"eq": [], "range": [], "join": [], "sort": []})[kind]
+            if column not in columns:
+                columns.append(column)
+
+        candidates = []
+        max_columns = self.config["max_columns"]
+        for table, uses_by_kind in per_table.items():
+            # Join keys matter when the table is the probed (inner) side,
+            # i.e. the query does not filter it otherwise
+            filtered = uses_by_kind["eq"] or uses_by_kind["range"]
+            columns = (uses_by_kind["eq"] if filtered else uses_by_kind["join"][:1])[:max_columns]
+            ranges = [c for c in uses_by_kind["range"] if c not in columns]
+            if ranges:
+                columns.append(ranges[0])
+            else:
+                columns.extend(c for c in uses_by_kind["sort"] if c not in columns)
+            columns = columns[:max_columns]
+            if columns:
+                candidates.append((table, tuple(columns)))
+        return candidates
+
+    def missing_indexes(self, queries: List[Dict]) -> List[Dict]:
+        """Proposed indexes with the workload each would serve"""
+        total_ms = sum(q["total_ms"] or 0 for q in queries) or 1.0
+        proposals: Dict[Tuple[str, Tuple[str, ...]], Dict] = {}
+        for query in queries:
+            for table, columns in self.candidates_for(query["query"] or ""):
+                info = self.tables[table]
+                if info["rows"] < self.config["min_table_rows"]:
+                    continue
+                if self._covering_index(table, columns):
+                    continue
+                proposal = proposals.setdefault(
+                    (table, columns), {"table": table, "columns": list(columns), "queries": []}
+                )
+                proposal["queries"].append(query)
+
+        # A proposal that is a leading prefix of another is served by it
+        for table, columns in sorted(proposals, key=lambda k: len(k[1])):
+            wider = next(
+                (
+                    key
+                    for key in proposals
+                    if key[0] == table and len(key[1]) > len(columns) and key[1][: len(columns)] == columns
+                ),
+                None,
+            )
+            if wider:
+                proposals[wider]["queries"].extend(proposals.pop((table, columns))["queries"])
+
+        evidence = self._seq_scan_evidence()
+        results = []
+        for proposal in proposals.values():
+            table = self.tables[proposal["table"]]
+            served = {q["fingerprint"]: q for q in proposal["queries"]}.values()
+            proposal["queries"] = sorted(served, key=lambda q: q["total_ms"] or 0, reverse=True)
+            proposal["calls"] = sum(q["calls"] or 0 for q in proposal["queries"])
+            proposal["total_ms"] = round(sum(q["total_ms"] or 0 for q in proposal["queries"]), 1)
+            proposal["percent_time"] = round(100 * proposal["total_ms"] / total_ms, 1)
+            proposal["table_rows"] = table["rows"]
+            # PostgreSQL only: share of the table's scans that were sequential
+            scans = (table.get("seq_scan") or 0) + (table.get("idx_scan") or 0)
+            proposal["seq_scan_share"] = round(table["seq_scan"] / scans, 3) if scans else None
+            proposal["extends"] = self._extended_index(proposal["table"], proposal["columns"])
+            proposal["evidence"] = evidence.get(proposal["table"], [])[:3]
+            proposal["definition"] = self.create_sql(proposal["table"], proposal["columns"])
+            proposal["estimate"] = None
+            results.append(proposal)
+        return sorted(results, key=lambda p: p["total_ms"], reverse=True)
+
+    def _covering_index(self, table: str, columns: Tuple[str, ...]) -> Optional[str]:
+        """Existing index whose leading columns are exactly these columns"""
+        for index in self.indexes:
+            if index["table"].lower() != table or index["pred"]:
+                continue
+            leading = [c.lower() for c in index["columns"][: len(columns)]]
+            if leading == list(columns):
+                return index["name"]
+        return None
+
+    def _extended_index(self, table: str, columns: List[str]) -> Optional[str]:
+        """Existing plain index that is a leading prefix of the proposal (it becomes redundant)"""
+        for index in self.indexes:
+            names = [c.lower() for c in index["columns"]]
+            if (
+                index["table"].lower() == table
+                and not index["unique"]
+                and not index["pred"]
+                and len(names) < len(columns)
+                and columns[: len(names)] == names
+            ):
+                return index["name"]
+        return None
+
+    def create_sql(self, table: str, columns: List[str]) -> str:
+        """DDL that builds an index without blocking writes"""
+        name = f"{table.split('.')[-1]}_{'_'.join(columns)}_idx"[:63]
+        column_sql = ", ".join(quote_identifier(c, self.db_type) for c in columns)
+        if self.db_type == "postgresql":
+            return (
+                f"CREATE INDEX CONCURRENTLY {quote_identifier(name, self.db_type)} "
+                f"ON {quote_identifier(table, self.db_type)} ({column_sql});"
+            )
+        return (
+            f"ALTER TABLE {quote_identifier(table, self.db_type)} ADD INDEX {quote_identifier(name, self.db_type)} "
+            f"({column_sql}), ALGORITHM=INPLACE, LOCK=NONE;"
+        )
+
+    def drop_sql(self, index: Dict) -> str:
+        """DDL that drops an index without blocking writes"""
+        if self.db_type == "postgresql":
+            return f"DROP INDEX CONCURRENTLY {quote_identifier(index['name'], self.db_type)};"
+        return (
+            f"ALTER TABLE {quote_identifier(index['table'], self.db_type)} "
+            f"DROP INDEX {quote_identifier(index['name'], self.db_type)}, ALGORITHM=INPLACE, LOCK=NONE;"
+        )
+
+    # Hypothetical indexes (PostgreSQL + hypopg)
+
+    def hypothetical_available(self) -> bool:
+        """Whether hypopg is installed in this PostgreSQL database"""
+        if self.db_type != "postgresql":
+            return False
+        try:
+            return bool(DatabaseUtils.query_rows(self.db, "SELECT 1 FROM pg_extension WHERE extname = 'hypopg'"))
+        except Exception:
+            return False
+
+    def _plan_cost(self, cursor, query: str, version: int) -> Optional[Tuple[float, str]]:
+        """Planner total cost and plan JSON of a query, or None if it cannot be planned"""
+        options = "FORMAT JSON"
+        if PG_PARAM_RE.search(query):
+            if version < 160000:
+                return None
+            options += ", GENERIC_PLAN"
+        try:
+            cursor.execute(f"EXPLAIN ({options}) {query}")
+            plan = cursor.fetchone()[0]
+        except Exception as e:
+            logger.debug(f"Cannot plan query for costing: {e}")
+            self.db.connection.rollback()
+            return None
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return float(plan[0]["Plan"]["Total Cost"]), json.dumps(plan)
+
+    def estimate(self, proposals: List[Dict]) -> int:
+        """Cost each proposal with hypothetical indexes; returns proposals costed"""
+        connection = self.db.connection
+        cursor = connection.cursor()
+        costed = 0
+        try:
+            cursor.execute("SHOW server_version_num")
+            version = int(cursor.fetchone()[0])
+            cursor.execute("SELECT hypopg_reset()")
+            before: Dict[str, Optional[Tuple[float, str]]] = {}
+            for proposal in proposals:
+                for query in proposal["queries"]:
+                    if query["fingerprint"] not in before:
+                        before[query["fingerprint"]] = self._plan_cost(cursor, query["query"], version)
+
+            for proposal in proposals:
+                columns = ", ".join(quote_identifier(c, self.db_type) for c in proposal["columns"])
+                ddl = f"CREATE INDEX ON {quote_identifier(proposal['table'], self.db_type)} ({columns})"
+                cursor.execute("SELECT indexname FROM hypopg_create_index(%s)", (ddl,))
+                index_name = cursor.fetchone()[0]
+                try:
+                    cost_before = cost_after = saving_ms = 0.0
+                    used = 0
+                    for query in proposal["queries"]:
+                        planned = before[query["fingerprint"]]
+                        after = self._plan_cost(cursor, query["query"], version) if planned else None
+                        if not planned or not after:
+                            continue
+                        cost_before += planned[0]
+                        if index_name in after[1]:
+                            used += 1
+                            cost_after += after[0]
+                            saving_ms += (query["total_ms"] or 0) * max(0.0, 1 - after[0] / planned[0])
+                        else:
+                            cost_after += planned[0]
+                    if cost_before:
+                        proposal["estimate"] = {
+                            "cost_before": round(cost_before, 1),
+                            "cost_after": round(cost_after, 1),
+                            "improvement": round(1 - cost_after / cost_before, 3),
+                            "saving_ms": round(saving_ms, 1),
+                            "queries_using": used,
+                        }
+                        costed += 1
+                finally:
+                    cursor.execute("SELECT hypopg_reset()")
+        finally:
+            connection.rollback()
+            cursor.close()
+        return costed
+
+    # Unused and duplicate indexes
+
+    def unused_indexes(self) -> List[Dict]:
+        """Indexes without scans that back no constraint, largest first"""
+        unused = []
+        for index in self.indexes:
+            if index["scans"] is None or index["scans"] > 0:
+                continue
+            if index["unique"] or index["primary"] or index["constraint"]:
+                continue
+            table = self.tables.get(index["table"].lower(), {})
+            unused.append({**index, "table_writes": table.get("writes"), "drop": self.drop_sql(index)})
+        return sorted(unused, key=lambda i: (i["size_bytes"] or 0, i["table_writes"] or 0), reverse=True)
+
+    def duplicate_indexes(self) -> List[Dict]:
+        """Indexes made redundant by another index on the same table"""
+        return [{**index, "drop": self.drop_sql(index)} for index in find_duplicates(self.indexes)]
+
+    def advise(self, hours: Optional[float] = None, limit: Optional[int] = None, estimate: bool = True) -> Dict:
+        """Full report: missing (costed when possible), unused and duplicate indexes"""
+        self.load_catalog()
+        source, queries = self.workload(hours, limit)
+        missing = self.missing_indexes(queries)
+        hypothetical = estimate and bool(missing) and self.hypothetical_available()
+        rejected = 0
+        if hypothetical:
+            self.estimate(missing)
+            # Proposals the planner would not use for any query they target
+            kept = [p for p in missing if not p["estimate"] or p["estimate"]["queries_using"]]
+            rejected = len(missing) - len(kept)
+            missing = sorted(kept, key=lambda p: (p["estimate"] or {}).get("saving_ms", -1), reverse=True)
+        return {
+            "db": self.db_type,
+            "workload": {"source": source, "queries": len(queries)},
+            "stats_since": self.stats_since,
+            "hypothetical": hypothetical,
+            "missing": missing,
+            "rejected": rejected,
+            "unused": self.unused_indexes(),
+            "duplicates": self.duplicate_indexes(),
+        }
@@ -0,0 +1,435 @@
+# Async Database Manager
+# Non-blocking counterparts of the managers in db_manager.py
+
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from db_config import DatabaseConfig
+from db_codecs import ValueSerializer
+from db_manager import elasticsearch_connection_params, to_numeric_placeholders
+from db_metrics import timed, failed, sql_label, key_label, index_label
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMySQLManager:
+    """Async MySQL/MariaDB manager on aiomysql"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """Initialize async MySQL manager"""
+        self.config = config or DatabaseConfig.get_mysql_config()
+        self.pool = None
+
+    async def connect(self) -> bool:
+        """Create the MySQL connection pool"""
+        try:
+            import aiomysql
+
+            self.pool = await aiomysql.create_pool(
+                host=self.config["host"],
+                port=self.config["port"],
+                user=self.config["user"],
+                password=self.config["password"],
+                db=self.config["database"],
+                charset=self.config.get("charset", "utf8mb4"),
+                autocommit=self.config.get("autocommit", True),
+                minsize=1,
+                maxsize=self.config.get("pool_size", 5) + self.config.get("max_overflow", 0),
+                pool_recycle=self.config.get("pool_recycle", 3600),
+            )
+            logger.info("✅ Connected to MySQL (async) successfully")
+            return True
+        except Exception as e:
+            logger.error(f"❌ MySQL async connection failed: {e}")
+            return False
+
+    @timed("mysql", "execute", label=sql_label)
+    async def execute(self, query: str, params: Optional[Tuple] = None) -> List[Dict]:
+        """Execute a SELECT query"""
+        try:
+            import aiomysql
+
+            async with self.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(query, params)
+                    return list(await cursor.fetchall())
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Query execution failed: {e}")
+            return []
+
+    @timed("mysql", "execute_update", label=sql_label)
+    async def execute_update(self, query: str, params: Optional[Tuple] = None) -> int:
+        """Execute INSERT/UPDATE/DELETE query"""
+        try:
+            async with self.pool.acquire() as conn:
+                try:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(query, params)
+                        await conn.commit()
+                        return cursor.rowcount
+                except Exception:
+                    await conn.rollback()
+                    raise
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Update failed: {e}")
+            return 0
+
+    async def close(self):
+        """Close the connection pool"""
+        if self.pool:
+            self.pool.close()
+            await self.pool.wait_closed()
+        logger.info("MySQL async pool closed")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncPostgreSQLManager:
+    """Async PostgreSQL manager on asyncpg"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """Initialize async PostgreSQL manager"""
+        self.config = config or DatabaseConfig.get_postgresql_config()
+        self.pool = None
+
+    async def connect(self) -> bool:
+        """Create the PostgreSQL connection pool"""
+        try:
+            import asyncpg
+
+            # asyncpg prepares and caches statements per connection itself
+            self.pool = await asyncpg.create_pool(
+                host=self.config["host"],
+                port=self.config["port"],
+                database=self.config["database"],
+                user=self.config["user"],
+                password=self.config["password"],
+                min_size=1,
+                max_size=self.config.get("pool_size", 5) + self.config.get("max_overflow", 0),
+                max_inactive_connection_lifetime=self.config.get("pool_recycle", 3600),
+                statement_cache_size=self.config.get("prepared_cache_size", 100),
+                timeout=self.config.get("connect_timeout", 10),
+                ssl=self.config.get("sslmode"),
+            )
+            logger.info("✅ Connected to PostgreSQL (async) successfully")
+            return True
+        except Exception as e:
+            logger.error(f"❌ PostgreSQL async connection failed: {e}")
+            return False
+
+    @timed("postgresql", "execute", label=sql_label)
+    async def execute(self, query: str, params: Optional[Tuple] = None) -> List[Dict]:
+        """Execute a SELECT query"""
+        try:
+            query, _ = to_numeric_placeholders(query)
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(query, *(params or ()))
+            return [dict(row) for row in rows]
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Query execution failed: {e}")
+            return []
+
+    @timed("postgresql", "execute_update", label=sql_label)
+    async def execute_update(self, query: str, params: Optional[Tuple] = None) -> int:
+        """Execute INSERT/UPDATE/DELETE query"""
+        try:
+            query, _ = to_numeric_placeholders(query)
+            async with self.pool.acquire() as conn:
+                status = await conn.execute(query, *(params or ()))
+            # Command tag, e.g. "UPDATE 3" or "INSERT 0 1"
+            count = status.rsplit(" ", 1)[-1]
+            return int(count) if count.isdigit() else 0
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Update failed: {e}")
+            return 0
+
+    async def close(self):
+        """Close the connection pool"""
+        if self.pool:
+            await self.pool.close()
+        logger.info("PostgreSQL async pool closed")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncRedisManager:
+    """Async Redis cache manager on redis.asyncio"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """Initialize async Redis manager"""
+        self.config = config or DatabaseConfig.get_redis_config()
+        self.client = None
+        self.serializer = ValueSerializer.from_config(self.config)
+
+    async def connect(self) -> bool:
+        """Connect to Redis"""
+        try:
+            import redis.asyncio as aioredis
+
+            self.client = aioredis.Redis(
+                host=self.config["host"],
+                port=self.config["port"],
+                db=self.config.get("db", 0),
+                password=self.config.get("password"),
+                ssl=self.config.get("ssl", False),
+                ssl_certfile=self.config.get("ssl_certfile"),
+                ssl_keyfile=self.config.get("ssl_keyfile"),
+                ssl_ca_certs=self.config.get("ssl_ca_certs"),
+                max_connections=self.config.get("max_connections", 50),
+                socket_keepalive=self.config.get("socket_keepalive", True),
+                socket_connect_timeout=self.config.get("socket_connect_timeout", 5),
+                socket_timeout=self.config.get("socket_timeout", 5),
+                retry_on_timeout=self.config.get("retry_on_timeout", True),
+                decode_responses=False,
+            )
+            # Test connection
+            await self.client.ping()
+            logger.info("✅ Connected to Redis (async) successfully")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Redis async connection failed: {e}")
+            return False
+
+    @timed("redis", "set", label=key_label, rows=None)
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Set a value in Redis"""
+        try:
+            if ttl:
+                await self.client.setex(key, ttl, self.serializer.dumps(key, value))
+            else:
+                await self.client.set(key, self.serializer.dumps(key, value))
+            return True
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Set failed: {e}")
+            return False
+
+    @timed("redis", "get", label=key_label, rows=None)
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a value from Redis"""
+        try:
+            return self.serializer.loads(key, await self.client.get(key))
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Get failed: {e}")
+            return None
+
+    @timed("redis", "delete", label=key_label, rows=None)
+    async def delete(self, key: str) -> bool:
+        """Delete a key from Redis"""
+        try:
+            await self.client.delete(key)
+            return True
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Delete failed: {e}")
+            return False
+
+    async def get_stats(self) -> Dict:
+        """Get Redis statistics"""
+        try:
+            info = await self.client.info()
+            return {
+                "memory_used": info.get("used_memory_human"),
+                "connected_clients": info.get("connected_clients"),
+                "total_commands": info.get("total_commands_processed"),
+                "uptime": info.get("uptime_in_seconds"),
+            }
+        except Exception as e:
+            logger.error(f"❌ Get stats failed: {e}")
+            return {}
+
+    async def close(self):
+        """Close Redis connection pool"""
+        if self.client:
+            await self.client.aclose()
+        logger.info("Redis async connection closed")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncElasticsearchManager:
+    """Async ElasticSearch manager on AsyncElasticsearch"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """Initialize async ElasticSearch manager"""
+        self.config = config or DatabaseConfig.get_elasticsearch_config()
+        self.client = None
+
+    async def connect(self) -> bool:
+        """Connect to ElasticSearch"""
+        try:
+            from elasticsearch import AsyncElasticsearch
+
+            self.client = AsyncElasticsearch(**elasticsearch_connection_params(self.config))
+            # Test connection
+            await self.client.info()
+            logger.info("✅ Connected to ElasticSearch (async) successfully")
+            return True
+        except Exception as e:
+            logger.error(f"❌ ElasticSearch async connection failed: {e}")
+            return False
+
+    async def create_index(self, index_name: str, mapping: Optional[Dict] = None) -> bool:
+        """Create an index"""
+        try:
+            if mapping:
+                await self.client.indices.create(index=index_name, body=mapping)
+            else:
+                await self.client.indices.create(index=index_name)
+            logger.info(f"✅ Index '{index_name}' created")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Create index failed: {e}")
+            return False
+
+    async def delete_index(self, index_name: str) -> bool:
+        """Delete an index"""
+        try:
+            await self.client.indices.delete(index=index_name)
+            logger.info(f"✅ Index '{index_name}' deleted")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Delete index failed: {e}")
+            return False
+
+    @timed("elasticsearch", "index_document", label=index_label, rows=None)
+    async def index_document(self, index_name: str, doc_id: str, document: Dict) -> bool:
+        """Index a document"""
+        try:
+            await self.client.index(index=index_name, id=doc_id, body=document)
+            return True
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Index document failed: {e}")
+            return False
+
+    @timed("elasticsearch", "search", label=index_label)
+    async def search(self, index_name: str, query: Dict) -> List[Dict]:
+        """Search documents"""
+        try:
+            results = await self.client.search(index=index_name, body=query)
+            return [hit["_source"] for hit in results["hits"]["hits"]]
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Search failed: {e}")
+            return []
+
+    async def get_stats(self) -> Dict:
+        """Get ElasticSearch statistics"""
+        try:
+            stats = await self.client.cluster.health()
+            return {
+                "status": stats.get("status"),
+                "nodes": stats.get("number_of_nodes"),
+                "active_shards": stats.get("active_shards"),
+                "relocating_shards": stats.get("relocating_shards"),
+                "initializing_shards": stats.get("initializing_shards"),
+                "unassigned_shards": stats.get("unassigned_shards"),
+            }
+        except Exception as e:
+            logger.error(f"❌ Get stats failed: {e}")
+            return {}
+
+    async def close(self):
+        """Close ElasticSearch connection"""
+        if self.client:
+            # Prefer aclose() where the client has it; older clients only have close()
+            await getattr(self.client, "aclose", self.client.close)()
+        logger.info("ElasticSearch async connection closed")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncDatabaseManager:
+    """Universal async database manager for all supported databases"""
+
+    def __init__(self):
+        """Initialize async database manager"""
+        self.mysql = None
+        self.postgresql = None
+        self.redis = None
+        self.elasticsearch = None
+
+    async def init_mysql(self, config: Optional[Dict] = None) -> AsyncMySQLManager:
+        """Initialize async MySQL manager"""
+        self.mysql = AsyncMySQLManager(config)
+        await self.mysql.connect()
+        return self.mysql
+
+    async def init_postgresql(self, config: Optional[Dict] = None) -> AsyncPostgreSQLManager:
+        """Initialize async PostgreSQL manager"""
+        self.postgresql = AsyncPostgreSQLManager(config)
+        await self.postgresql.connect()
+        return self.postgresql
+
+    async def init_redis(self, config: Optional[Dict] = None) -> AsyncRedisManager:
+        """Initialize async Redis manager"""
+        self.redis = AsyncRedisManager(config)
+        await self.redis.connect()
+        return self.redis
+
+    async def init_elasticsearch(
+        self, config: Optional[Dict] = None
+    ) -> AsyncElasticsearchManager:
+        """Initialize async ElasticSearch manager"""
+        self.elasticsearch = AsyncElasticsearchManager(config)
+        await self.elasticsearch.connect()
+        return self.elasticsearch
+
+    async def health_check(self) -> Dict[str, bool]:
+        """Check health of all databases concurrently"""
+        managers = {
+            "mysql": AsyncMySQLManager(),
+            "postgresql": AsyncPostgreSQLManager(),
+            "redis": AsyncRedisManager(),
+            "elasticsearch": AsyncElasticsearchManager(),
+        }
+
+        async def probe(manager) -> bool:
+            try:
+                return await manager.connect()
+            finally:
+                await manager.close()
+
+        results = await asyncio.gather(
+            *(probe(m) for m in managers.values()), return_exceptions=True
+        )
+        return {name: result is True for name, result in zip(managers, results)}
+
+    async def close_all(self):
+        """Close all database connections"""
+        managers = [self.mysql, self.postgresql, self.redis, self.elasticsearch]
+        await asyncio.gather(*(m.close() for m in managers if m))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close_all()
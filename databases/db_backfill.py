@@ -0,0 +1,370 @@
+# Batched Data Backfills
+# Walks a table by primary-key ranges and commits one short UPDATE per range
+#
+# Each batch finds its upper key with an index scan (OFFSET batch_size - 1
+# past the last key) and updates key > last AND key <= upper, so no batch
+# holds locks for long, WAL is written in small pieces and key gaps do not
+# shrink batches. The batch size adapts AIMD-style: it grows by a fixed
+# step while batches finish under BACKFILL_TARGET_MS and halves when a batch
+# is slow or replicas lag more than BACKFILL_MAX_LAG (the run then waits for
+# them to catch up). After every commit the last key is written to a JSON
+# checkpoint, so an interrupted backfill resumes where it stopped; at most
+# the last batch is repeated, which is why updates must be idempotent
+# (e.g. WHERE new_column IS NULL).
+
+import os
+import re
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from db_config import DatabaseConfig
+
+
+logger = logging.getLogger(__name__)
+
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+# SHOW REPLICA STATUS needs MySQL 8.0.22+; older servers only know the SLAVE form
+REPLICA_STATUS_QUERIES = ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS")
+
+
+def quote_identifier(name: str, db_type: str) -> str:
+    """Quote a (schema-qualified) identifier for PostgreSQL or MySQL"""
+    if not IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid identifier: {name}")
+    quote = "`" if db_type == "mysql" else '"'
+    return ".".join(f"{quote}{part}{quote}" for part in name.split("."))
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Format seconds as 1h02m03s"""
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def replica_config(spec: str) -> Dict:
+    """MySQL manager config for a replica given as host[:port] or a mysql:// DSN
+
+    Credentials and database not in the spec come from the primary's config.
+    """
+    config = DatabaseConfig.get_mysql_config()
+    parsed = urlparse(spec if "://" in spec else f"mysql://{spec}")
+    if not parsed.hostname:
+        raise ValueError(f"Invalid replica: {spec}")
+    config["host"] = parsed.hostname
+    config["port"] = parsed.port or config["port"]
+    if parsed.username:
+        config["user"] = parsed.username
+    if parsed.password is not None:
+        config["password"] = parsed.password
+    if parsed.path.strip("/"):
+        config["database"] = parsed.path.strip("/")
+    # One connection is enough to poll replication status
+    config["pool_size"] = 1
+    config["prepared_cache_size"] = 0
+    return config
+
+
+def checkpoint_path(name: str, directory: Optional[str] = None) -> str:
+    """Checkpoint file of a named backfill"""
+    if not re.match(r"^[\w.-]+$", name):
+        raise ValueError(f"Invalid backfill name: {name}")
+    return os.path.join(directory or DatabaseConfig.get_backfill_config()["dir"], f"{name}.json")
+
+
+def list_checkpoints(directory: Optional[str] = None) -> List[Dict]:
+    """All backfill checkpoints, newest first"""
+    directory = directory or DatabaseConfig.get_backfill_config()["dir"]
+    if not os.path.isdir(directory):
+        return []
+    checkpoints = []
+    for filename in os.listdir(directory):
+        if filename.endswith(".json"):
+            with open(os.path.join(directory, filename)) as f:
+                checkpoints.append(json.load(f))
+    return sorted(checkpoints, key=lambda c: c.get("updated_at", ""), reverse=True)
+
+
+class Backfill:
+    """Resumable, throttled UPDATE of one table in primary-key ranges"""
+
+    def __init__(
+        self,
+        name: str,
+        manager,
+        table: str,
+        set_clause: str,
+        where: Optional[str] = None,
+        key: str = "id",
+        db_type: str = "postgresql",
+        replica=None,
+        batch_size: Optional[int] = None,
+        target_ms: Optional[float] = None,
+        max_lag: Optional[float] = None,
+        sleep: Optional[float] = None,
+        checkpoint_dir: Optional[str] = None,
+    ):
+        """Initialize backfill
+
+        manager is a connected PostgreSQLManager or MySQLManager. set_clause
+        and where are SQL fragments, e.g. "status_norm = lower(status)" and
+        "status_norm IS NULL". replica is an optional MySQL replica manager
+        used to read replication lag (PostgreSQL reads pg_stat_replication).
+        """
+        config = DatabaseConfig.get_backfill_config()
+        self.name = name
+        self.manager = manager
+        self.db_type = db_type
+        self.replica = replica
+        self.table = table
+        self.key = key
+        self.set_clause = set_clause
+        self.where = where
+        self.batch_size = batch_size or config["batch_size"]
+        self.min_batch = min(config["min_batch"], self.batch_size)
+        self.max_batch = max(config["max_batch"], self.batch_size)
+        self.batch_step = config["batch_step"]
+        self.target_ms = target_ms if target_ms is not None else config["target_ms"]
+        self.max_lag = max_lag if max_lag is not None else config["max_lag"]
+        self.sleep = sleep if sleep is not None else config["sleep"]
+        self.checkpoint_path = checkpoint_path(name, checkpoint_dir)
+        self._lag_supported = True
+        self._replica_status_queries = list(REPLICA_STATUS_QUERIES)
+
+        table_sql = quote_identifier(table, db_type)
+        key_sql = quote_identifier(key, db_type)
+        filter_sql = f" AND ({where})" if where else ""
+        self._bounds_sql = f"SELECT MIN({key_sql}), MAX({key_sql}) FROM {table_sql}"
+        # {op} is >= for the first batch (from the minimum key), > afterwards
+        self._upper_sql = (
+            f"SELECT {key_sql} FROM {table_sql} WHERE {key_sql} {{op}} %s AND {key_sql} <= %s "
+            f"ORDER BY {key_sql} LIMIT 1 OFFSET %s"
+        )
+        self._update_sql = (
+            f"UPDATE {table_sql} SET {set_clause} "
+            f"WHERE {key_sql} {{op}} %s AND {key_sql} <= %s{filter_sql}"
+        )
+
+    def load_checkpoint(self) -> Optional[Dict]:
+        """Saved state of this backfill, if any"""
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        if (state["table"], state["key"], state["set"], state.get("where")) != (
+            self.table,
+            self.key,
+            self.set_clause,
+            self.where,
+        ):
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} belongs to a different backfill; use another name or reset"
+            )
+        return state
+
+    def save_checkpoint(self, state: Dict) -> None:
+        """Write the checkpoint atomically"""
+        state["updated_at"] = datetime.now().isoformat()
+        os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+        partial = self.checkpoint_path + ".partial"
+        with open(partial, "w") as f:
+            json.dump(state, f, indent=2, default=str)
+        os.replace(partial, self.checkpoint_path)
+
+    def reset(self) -> None:
+        """Forget the checkpoint so the next run starts from the lowest key"""
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def replication_lag(self) -> float:
+        """Seconds the slowest replica is behind (0 when unknown)"""
+        if not self._lag_supported or self.max_lag <= 0:
+            return 0.0
+        try:
+            if self.db_type == "postgresql":
+                cursor = self.manager.connection.cursor()
+                try:
+                    cursor.execute(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM MAX(replay_lag)), 0) FROM pg_stat_replication"
+                    )
+                    lag = cursor.fetchone()[0]
+                finally:
+                    cursor.close()
+                self.manager.connection.commit()
+                return float(lag or 0)
+            if self.replica is None:
+                self._lag_supported = False
+                return 0.0
+            row = self._replica_status()
+            lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+            return float(lag or 0)
+        except Exception as e:
+            if self.db_type == "postgresql":
+                self.manager.connection.rollback()
+            logger.warning(f"⚠️  Replication lag unavailable, not throttling on it: {e}")
+            self._lag_supported = False
+            return 0.0
+
+    def _replica_status(self) -> Dict:
+        """Read the replica's status row, falling back to SHOW SLAVE STATUS"""
+        while True:
+            cursor = self.replica.connection.cursor(dictionary=True)
+            try:
+                cursor.execute(self._replica_status_queries[0])
+                return cursor.fetchone() or {}
+            except Exception as e:
+                if len(self._replica_status_queries) == 1:
+                    raise
+                logger.info(f"{self._replica_status_queries.pop(0)} unsupported ({e}), trying the older form")
+            finally:
+                cursor.close()
+
+    def _wait_for_replicas(self, lag: float) -> float:
+        """Block until replicas are back under max_lag"""
+        while lag > self.max_lag:
+            logger.warning(f"⚠️  Replicas {lag:.1f}s behind (max {self.max_lag}s), waiting")
+            time.sleep(min(lag - self.max_lag, 5.0) + 0.5)
+            lag = self.replication_lag()
+        return lag
+
+    def _next_batch(self, cursor, state: Dict, size: int) -> int:
+        """Update the next range of up to size keys; returns rows changed"""
+        if state["last_key"] is None:
+            op, lower = ">=", state["min_key"]
+        else:
+            op, lower = ">", state["last_key"]
+        cursor.execute(self._upper_sql.format(op=op), (lower, state["max_key"], size - 1))
+        row = cursor.fetchone()
+        upper = row[0] if row else state["max_key"]
+        cursor.execute(self._update_sql.format(op=op), (lower, upper))
+        state["last_key"] = upper
+        state["done"] = upper == state["max_key"]
+        return max(cursor.rowcount, 0)
+
+    @staticmethod
+    def progress(state: Dict) -> Optional[float]:
+        """Fraction of the key range done (None for non-numeric keys)"""
+        if state.get("done"):
+            return 1.0
+        if state.get("last_key") is None:
+            return 0.0
+        try:
+            span = float(state["max_key"]) - float(state["min_key"])
+            done = float(state["last_key"]) - float(state["min_key"])
+        except (TypeError, ValueError):
+            return None
+        return 1.0 if span <= 0 else max(0.0, min(1.0, done / span))
+
+    def run(
+        self,
+        max_seconds: Optional[float] = None,
+        on_progress: Optional[Callable[[Dict], None]] = None,
+    ) -> Dict:
+        """Backfill until the maximum key seen at the start is reached
+
+        Resumes from the checkpoint. Stops early after max_seconds (the
+        checkpoint keeps the position). on_progress receives the state plus
+        progress, rows_per_second and eta_seconds after every batch.
+        Returns the final state with the same fields.
+        """
+        connection = self.manager.connection
+        autocommit = connection.autocommit
+        connection.autocommit = False
+        cursor = connection.cursor()
+        started = time.time()
+        run_rows = 0
+        try:
+            state = self.load_checkpoint()
+            if state is None or state.get("done"):
+                cursor.execute(self._bounds_sql)
+                min_key, max_key = cursor.fetchone()
+                connection.commit()
+                state = {
+                    "name": self.name,
+                    "table": self.table,
+                    "key": self.key,
+                    "set": self.set_clause,
+                    "where": self.where,
+                    "min_key": min_key,
+                    "max_key": max_key,
+                    "last_key": None,
+                    "rows": 0,
+                    "batches": 0,
+                    "batch_size": self.batch_size,
+                    "started_at": datetime.now().isoformat(),
+                    "done": max_key is None,
+                }
+                self.save_checkpoint(state)
+            else:
+                logger.info(f"▶️  Resuming {self.name} after {self.key}={state['last_key']}")
+
+            start_progress = self.progress(state) or 0.0
+            size = state["batch_size"]
+
+            def report() -> Dict:
+                elapsed = time.time() - started
+                progress = self.progress(state)
+                run_progress = (progress or 0.0) - start_progress
+                eta = None
+                if progress is not None and run_progress > 0:
+                    eta = elapsed * (1 - progress) / run_progress
+                return {
+                    **state,
+                    "progress": progress,
+                    "elapsed_seconds": round(elapsed, 1),
+                    "rows_per_second": round(run_rows / elapsed, 1) if elapsed > 0 else 0.0,
+                    "eta_seconds": eta,
+                }
+
+            while not state["done"]:
+                batch_started = time.time()
+                rows = self._next_batch(cursor, state, size)
+                connection.commit()
+                batch_ms = (time.time() - batch_started) * 1000
+                run_rows += rows
+                state["rows"] += rows
+                state["batches"] += 1
+
+                # AIMD: grow slowly while fast, halve when slow or replicas lag
+                lag = self.replication_lag()
+                if batch_ms > self.target_ms or lag > self.max_lag:
+                    size = max(self.min_batch, size // 2)
+                else:
+                    size = min(self.max_batch, size + self.batch_step)
+                state["batch_size"] = size
+                state["last_batch_ms"] = round(batch_ms, 1)
+                state["replication_lag"] = round(lag, 2)
+                self.save_checkpoint(state)
+
+                if on_progress:
+                    on_progress(report())
+                if state["done"] or (max_seconds and time.time() - started >= max_seconds):
+                    break
+                if lag > self.max_lag:
+                    self._wait_for_replicas(lag)
+                time.sleep(self.sleep)
+
+            result = report()
+            if state["done"]:
+                logger.info(f"✅ Backfill {self.name}: {state['rows']} rows in {state['batches']} batches")
+            else:
+                logger.info(f"⏸️  Backfill {self.name} paused after {self.key}={state['last_key']}")
+            return result
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            connection.autocommit = autocommit
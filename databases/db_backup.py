@@ -0,0 +1,1031 @@
+# Database Backup Engine
+# Streaming, compressed, checksummed backups for MySQL and PostgreSQL
+#
+# Plain backups stream mysqldump / pg_dump output through a pool of
+# compressor threads. Each chunk is compressed independently (a gzip member
+# or a zstd frame) and appended to one file, so the result still reads with
+# zcat / zstd -dc. A manifest next to the file records every chunk's offset,
+# sizes and sha256; restores verify it before anything reaches the database
+# and decompress chunks in parallel.
+#
+# PostgreSQL can also use pg_dump's directory format, which dumps and
+# restores tables in parallel (pg_dump -j / pg_restore -j).
+
+import os
+import re
+import gzip
+import json
+import time
+import shutil
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, BinaryIO, Iterable, Iterator
+
+from db_config import DatabaseConfig
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+READ_SIZE = 1024 * 1024
+
+# Redis backups are a stream of (key, pttl, DUMP payload) records
+REDIS_MAGIC = b"MOAIRDB\x01"
+REDIS_LENGTH = struct.Struct(">I")
+REDIS_PTTL = struct.Struct(">q")
+
+CODEC_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz", "none": ""}
+
+# pg_dump -Fd writes its files itself, so the I/O limit has nothing to throttle
+DIRECTORY_IO_LIMIT_ERROR = "An I/O limit can't throttle PostgreSQL directory dumps; use the plain format"
+DEFAULT_LEVELS = {"zstd": 3, "gzip": 6, "none": 0}
+
+
+class Codec:
+    """Compresses and decompresses independent backup chunks"""
+
+    def __init__(self, name: str, level: int = 0):
+        if name not in CODEC_EXTENSIONS:
+            raise ValueError(f"Unsupported compression: {name}")
+        self.name = name
+        self.level = level or DEFAULT_LEVELS[name]
+        self.extension = CODEC_EXTENSIONS[name]
+        self.zstandard = None
+        if name == "zstd":
+            try:
+                import zstandard
+
+                self.zstandard = zstandard
+            except ImportError:
+                pass  # use the zstd command line tool
+
+    @staticmethod
+    def available(name: str) -> bool:
+        """Whether a codec can run here (zstd needs zstandard or the zstd binary)"""
+        if name != "zstd":
+            return name in CODEC_EXTENSIONS
+        try:
+            import zstandard  # noqa: F401
+
+            return True
+        except ImportError:
+            return shutil.which("zstd") is not None
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress one chunk (thread-safe; zlib and zstd release the GIL)"""
+        if self.name == "gzip":
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        if self.name == "zstd":
+            if self.zstandard is not None:
+                return self.zstandard.ZstdCompressor(level=self.level).compress(data)
+            return self._zstd_cli([f"-{self.level}"], data)
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress one chunk"""
+        if self.name == "gzip":
+            return gzip.decompress(data)
+        if self.name == "zstd":
+            if self.zstandard is not None:
+                return self.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+            return self._zstd_cli(["-d"], data)
+        return data
+
+    @staticmethod
+    def _zstd_cli(options: List[str], data: bytes) -> bytes:
+        result = subprocess.run(
+            ["zstd", "-q", "-c", *options, "-"], input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        if result.returncode:
+            raise RuntimeError(f"zstd failed: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout
+
+
+def get_codec(name: str, level: int = 0) -> Codec:
+    """Get a codec, falling back to gzip when zstd is not installed"""
+    name = (name or "none").lower()
+    if name == "zstd" and not Codec.available("zstd"):
+        logger.warning("⚠️  zstd not available (pip install zstandard), using gzip")
+        return Codec("gzip", level if 1 <= level <= 9 else 0)
+    return Codec(name, level)
+
+
+def file_sha256(path: str, offset: int = 0, length: Optional[int] = None) -> str:
+    """sha256 of a file, or of length bytes starting at offset"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining is None or remaining > 0:
+            block = f.read(READ_SIZE if remaining is None else min(READ_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def manifest_path(backup_path: str) -> str:
+    """Path of the manifest that describes a backup file or directory"""
+    return backup_path.rstrip("/") + MANIFEST_SUFFIX
+
+
+def load_manifest(backup_path: str) -> Optional[Dict]:
+    """Read a backup's manifest, or None for backups written without one"""
+    path = manifest_path(backup_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def pack_redis_record(key: bytes, pttl: int, payload: bytes) -> bytes:
+    """Encode one key as length-prefixed key, TTL in ms (0 = none) and DUMP payload"""
+    return b"".join(
+        (REDIS_LENGTH.pack(len(key)), key, REDIS_PTTL.pack(pttl), REDIS_LENGTH.pack(len(payload)), payload)
+    )
+
+
+def iter_redis_records(blocks: Iterable[bytes]) -> Iterator[Tuple[bytes, int, bytes]]:
+    """Parse (key, pttl, payload) records from a Redis backup stream"""
+    buffer = bytearray()
+    header = False
+    for block in blocks:
+        buffer += block
+        offset = 0
+        if not header:
+            if len(buffer) < len(REDIS_MAGIC):
+                continue
+            if bytes(buffer[: len(REDIS_MAGIC)]) != REDIS_MAGIC:
+                raise RuntimeError("Not a Redis record backup")
+            offset = len(REDIS_MAGIC)
+            header = True
+        while len(buffer) - offset >= REDIS_LENGTH.size:
+            (key_length,) = REDIS_LENGTH.unpack_from(buffer, offset)
+            payload_at = offset + REDIS_LENGTH.size + key_length + REDIS_PTTL.size
+            if len(buffer) < payload_at + REDIS_LENGTH.size:
+                break
+            (payload_length,) = REDIS_LENGTH.unpack_from(buffer, payload_at)
+            end = payload_at + REDIS_LENGTH.size + payload_length
+            if len(buffer) < end:
+                break
+            key = bytes(buffer[offset + REDIS_LENGTH.size : offset + REDIS_LENGTH.size + key_length])
+            (pttl,) = REDIS_PTTL.unpack_from(buffer, payload_at - REDIS_PTTL.size)
+            yield key, pttl, bytes(buffer[payload_at + REDIS_LENGTH.size : end])
+            offset = end
+        del buffer[:offset]
+    if buffer or not header:
+        raise RuntimeError("Redis backup is truncated")
+
+
+class RateLimiter:
+    """Token bucket shared by concurrent backups to cap bytes per second"""
+
+    def __init__(self, bytes_per_second: float):
+        self.rate = float(bytes_per_second)
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount: int) -> float:
+        """Take amount tokens, sleeping while the bucket is in debt; returns the wait"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def priority_prefix() -> List[str]:
+    """nice / ionice prefix that runs dump tools at low CPU and I/O priority"""
+    prefix = ["nice", "-n", "10"] if shutil.which("nice") else []
+    if shutil.which("ionice"):
+        prefix += ["ionice", "-c2", "-n7"]
+    return prefix
+
+
+class BackupEngine:
+    """Streaming backups with parallel chunked compression and checksums"""
+
+    def __init__(
+        self,
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+        jobs: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        backup_dir: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        low_priority: Optional[bool] = None,
+    ):
+        """Initialize backup engine; unset options come from BACKUP_* settings
+
+        rate_limiter caps the dump bytes read per second (it can be shared by
+        several engines); low_priority runs dump tools under nice/ionice.
+        """
+        config = DatabaseConfig.get_backup_config()
+        self.codec = get_codec(
+            compression or config["compression"], config["level"] if level is None else level
+        )
+        self.jobs = max(1, jobs or config["jobs"] or os.cpu_count() or 1)
+        self.chunk_size = chunk_size or config["chunk_size"]
+        self.backup_dir = backup_dir or config["dir"]
+        self.redis_batch_size = config["redis_batch_size"]
+        self.rate_limiter = rate_limiter
+        if self.rate_limiter is None and config["io_limit_mb"] > 0:
+            self.rate_limiter = RateLimiter(config["io_limit_mb"] * 1024 * 1024)
+        self.low_priority = config["low_priority"] if low_priority is None else low_priority
+
+    def output_path(self, db_type: str, format: str = "plain", timestamp: Optional[str] = None) -> str:
+        """Default location for a new backup"""
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"{db_type}_backup_{timestamp}"
+        if format == "directory":
+            return os.path.join(self.backup_dir, db_type, f"{name}.dir")
+        suffix = ".redis" if db_type == "redis" else ".sql"
+        return os.path.join(self.backup_dir, db_type, f"{name}{suffix}{self.codec.extension}")
+
+    # ---- commands ----
+
+    @staticmethod
+    def _mysql_args(config: Dict) -> List[str]:
+        return [
+            f"--host={config['host']}",
+            f"--port={config['port']}",
+            f"--user={config['user']}",
+            f"--password={config.get('password', '')}",
+        ]
+
+    @staticmethod
+    def _postgresql_args(config: Dict) -> List[str]:
+        return [
+            f"--host={config['host']}",
+            f"--port={config['port']}",
+            f"--username={config['user']}",
+        ]
+
+    @staticmethod
+    def _postgresql_env(config: Dict) -> Dict:
+        env = os.environ.copy()
+        env["PGPASSWORD"] = config.get("password", "") or ""
+        return env
+
+    def _prefixed(self, cmd: List[str]) -> List[str]:
+        return priority_prefix() + cmd if self.low_priority else cmd
+
+    def _pg_compress_option(self) -> str:
+        """pg_dump --compress value for the codec (zstd needs pg_dump 16+)"""
+        if self.codec.name == "none":
+            return "0"
+        if self.codec.name == "zstd":
+            output = subprocess.run(["pg_dump", "--version"], stdout=subprocess.PIPE, text=True).stdout
+            match = re.search(r"(\d+)(?:\.\d+)?", output)
+            if match and int(match.group(1)) >= 16:
+                return f"zstd:{self.codec.level}"
+            logger.warning("⚠️  pg_dump < 16 has no zstd support, using gzip")
+        return str(min(max(self.codec.level, 1), 9))
+
+    # ---- streaming ----
+
+    def _compress_chunk(self, data: bytes) -> Tuple[bytes, str]:
+        compressed = self.codec.compress(data)
+        return compressed, hashlib.sha256(compressed).hexdigest()
+
+    def compress_blocks(self, blocks: Iterable[bytes], out: BinaryIO) -> Dict:
+        """Compress a stream of blocks into independent chunks; returns the manifest fields
+
+        Blocks of any size are regrouped into chunk_size chunks. At most
+        2 x jobs chunks are held in memory, so dumps of any size stream
+        through with bounded memory.
+        """
+        chunks = []
+        raw_hash = hashlib.sha256()
+        raw_bytes = offset = 0
+        pending = deque()
+        buffer = bytearray()
+
+        def write_oldest():
+            nonlocal offset
+            raw_length, future = pending.popleft()
+            data, digest = future.result()
+            out.write(data)
+            chunks.append({"offset": offset, "length": len(data), "raw_length": raw_length, "sha256": digest})
+            offset += len(data)
+
+        def submit(chunk: bytes):
+            nonlocal raw_bytes
+            if self.rate_limiter is not None:
+                # Slowing the reader back-pressures the dump tool and the database
+                self.rate_limiter.consume(len(chunk))
+            raw_hash.update(chunk)
+            raw_bytes += len(chunk)
+            pending.append((len(chunk), executor.submit(self._compress_chunk, chunk)))
+            if len(pending) >= self.jobs * 2:
+                write_oldest()
+
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="backup") as executor:
+            for block in blocks:
+                buffer += block
+                while len(buffer) >= self.chunk_size:
+                    submit(bytes(buffer[: self.chunk_size]))
+                    del buffer[: self.chunk_size]
+            if buffer:
+                submit(bytes(buffer))
+            while pending:
+                write_oldest()
+
+        return {
+            "chunks": chunks,
+            "raw_bytes": raw_bytes,
+            "compressed_bytes": offset,
+            "sha256": raw_hash.hexdigest(),
+        }
+
+    def iter_decompressed(self, backup_path: str, manifest: Optional[Dict] = None) -> Iterator[bytes]:
+        """Yield a plain backup's contents in order, decompressing chunks in parallel"""
+        if manifest is None:
+            yield from self._iter_unindexed(backup_path)
+            return
+
+        codec = Codec(manifest["compression"], manifest.get("level", 0))
+        raw_hash = hashlib.sha256()
+        pending = deque()
+        with open(backup_path, "rb") as f, ThreadPoolExecutor(
+            max_workers=self.jobs, thread_name_prefix="restore"
+        ) as executor:
+            for chunk in manifest["chunks"]:
+                f.seek(chunk["offset"])
+                pending.append(executor.submit(codec.decompress, f.read(chunk["length"])))
+                if len(pending) >= self.jobs * 2:
+                    block = pending.popleft().result()
+                    raw_hash.update(block)
+                    yield block
+            while pending:
+                block = pending.popleft().result()
+                raw_hash.update(block)
+                yield block
+
+        if raw_hash.hexdigest() != manifest["sha256"]:
+            raise RuntimeError(f"Checksum mismatch after decompressing {backup_path}")
+
+    def _iter_unindexed(self, backup_path: str) -> Iterator[bytes]:
+        """Stream a backup without a manifest (older .sql files, external dumps)"""
+        if backup_path.endswith(".zst"):
+            process = subprocess.Popen(["zstd", "-q", "-d", "-c", backup_path], stdout=subprocess.PIPE)
+            try:
+                while True:
+                    block = process.stdout.read(READ_SIZE)
+                    if not block:
+                        break
+                    yield block
+            finally:
+                process.stdout.close()
+                if process.wait():
+                    raise RuntimeError(f"zstd could not read {backup_path}")
+            return
+
+        opener = gzip.open if backup_path.endswith(".gz") else open
+        with opener(backup_path, "rb") as f:
+            while True:
+                block = f.read(READ_SIZE)
+                if not block:
+                    break
+                yield block
+
+    @staticmethod
+    def _stderr_tail(stderr: BinaryIO, limit: int = 2000) -> str:
+        stderr.seek(0)
+        return stderr.read().decode(errors="replace").strip()[-limit:]
+
+    def write_backup(
+        self, blocks: Iterable[bytes], output_path: str, stats: Optional[Dict] = None, **manifest_fields
+    ) -> Dict:
+        """Compress blocks into output_path and write its manifest
+
+        Writes to a .partial file that is renamed only once every block has
+        been written, so a failed backup never looks complete. stats holds
+        counters filled in while the blocks are produced; they are added to
+        the manifest. Raises on failure.
+        """
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        partial = output_path + ".partial"
+        start = time.time()
+        try:
+            with open(partial, "wb") as out:
+                fields = self.compress_blocks(blocks, out)
+            os.replace(partial, output_path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "format": "plain",
+            "file": os.path.basename(output_path),
+            "compression": self.codec.name,
+            "level": self.codec.level,
+            "chunk_size": self.chunk_size,
+            "created_at": datetime.now().isoformat(),
+            "elapsed": round(time.time() - start, 3),
+            **manifest_fields,
+            **(stats or {}),
+            **fields,
+        }
+        self._write_manifest(output_path, manifest)
+        return self.report(output_path, manifest)
+
+    def stream_backup(self, cmd: List[str], output_path: str, env: Optional[Dict] = None, **manifest_fields) -> Dict:
+        """Run a dump command and compress its output into output_path. Raises on failure"""
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(self._prefixed(cmd), stdout=subprocess.PIPE, stderr=stderr, env=env)
+
+            def blocks() -> Iterator[bytes]:
+                while True:
+                    block = process.stdout.read(self.chunk_size)
+                    if not block:
+                        break
+                    yield block
+                returncode = process.wait()
+                if returncode:
+                    raise RuntimeError(f"{cmd[0]} exited with {returncode}: {self._stderr_tail(stderr)}")
+
+            try:
+                return self.write_backup(blocks(), output_path, **manifest_fields)
+            finally:
+                process.stdout.close()
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+    def pipe_to_command(self, cmd: List[str], blocks: Iterable[bytes], env: Optional[Dict] = None) -> int:
+        """Write blocks to a command's stdin; returns bytes written. Raises on failure"""
+        written = 0
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr, env=env)
+            try:
+                for block in blocks:
+                    process.stdin.write(block)
+                    written += len(block)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass  # the command exited early; its status explains why
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+            returncode = process.wait()
+            if returncode:
+                raise RuntimeError(f"{cmd[0]} exited with {returncode}: {self._stderr_tail(stderr)}")
+        return written
+
+    def stream_restore(self, cmd: List[str], backup_path: str, env: Optional[Dict] = None, verify: bool = True) -> Dict:
+        """Feed a plain backup into a restore command's stdin. Raises on failure"""
+        manifest = self.verified_manifest(backup_path, verify)
+        start = time.time()
+        raw_bytes = self.pipe_to_command(cmd, self.iter_decompressed(backup_path, manifest), env)
+        elapsed = time.time() - start
+        return {
+            "path": backup_path,
+            "raw_bytes": raw_bytes,
+            "elapsed": round(elapsed, 3),
+            "mb_per_second": round(raw_bytes / 1024 / 1024 / elapsed, 1) if elapsed else 0.0,
+            "verified": verify and manifest is not None,
+        }
+
+    # ---- manifests ----
+
+    @staticmethod
+    def _write_manifest(backup_path: str, manifest: Dict) -> None:
+        path = manifest_path(backup_path)
+        with open(path + ".partial", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".partial", path)
+
+    @staticmethod
+    def report(backup_path: str, manifest: Dict) -> Dict:
+        """Size, compression ratio and throughput of a finished backup"""
+        raw_bytes = manifest.get("raw_bytes")
+        compressed_bytes = manifest["compressed_bytes"]
+        elapsed = manifest["elapsed"]
+        measured = raw_bytes if raw_bytes is not None else compressed_bytes
+        return {
+            "path": backup_path,
+            "manifest": manifest_path(backup_path),
+            "format": manifest["format"],
+            "compression": manifest["compression"],
+            "raw_bytes": raw_bytes,
+            "compressed_bytes": compressed_bytes,
+            "ratio": round(raw_bytes / compressed_bytes, 2) if raw_bytes and compressed_bytes else None,
+            "elapsed": elapsed,
+            "mb_per_second": round(measured / 1024 / 1024 / elapsed, 1) if elapsed else 0.0,
+            "chunks": len(manifest.get("chunks") or manifest.get("files") or []),
+            "keys": manifest.get("keys"),
+        }
+
+    def verified_manifest(self, backup_path: str, verify: bool = True) -> Optional[Dict]:
+        """Load a backup's manifest, raising if verification was requested and fails"""
+        manifest = load_manifest(backup_path)
+        if verify and manifest is not None:
+            check = self.verify(backup_path)
+            if not check["valid"]:
+                raise RuntimeError(f"Backup failed verification: {'; '.join(check['errors'][:3])}")
+        return manifest
+
+    def verify(self, backup_path: str) -> Dict:
+        """Check a backup against its manifest, hashing chunks/files in parallel"""
+        manifest = load_manifest(backup_path)
+        if manifest is None:
+            return {"valid": False, "errors": [f"No manifest for {backup_path}"], "checked": 0}
+
+        errors = []
+        if manifest["format"] == "directory":
+            items = [
+                (os.path.join(backup_path, item["path"]), 0, None, item["length"], item["sha256"], item["path"])
+                for item in manifest["files"]
+            ]
+        else:
+            size = os.path.getsize(backup_path) if os.path.exists(backup_path) else -1
+            if size != manifest["compressed_bytes"]:
+                errors.append(f"size is {size}, manifest says {manifest['compressed_bytes']}")
+            items = [
+                (backup_path, chunk["offset"], chunk["length"], chunk["length"], chunk["sha256"], f"chunk {i}")
+                for i, chunk in enumerate(manifest["chunks"])
+            ]
+
+        def check(item) -> Optional[str]:
+            path, offset, length, expected_length, expected, label = item
+            if not os.path.exists(path):
+                return f"{label}: missing"
+            if length is None and os.path.getsize(path) != expected_length:
+                return f"{label}: size changed"
+            if file_sha256(path, offset, length) != expected:
+                return f"{label}: checksum mismatch"
+            return None
+
+        if not errors:
+            with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="verify") as executor:
+                errors = [error for error in executor.map(check, items) if error]
+        return {"valid": not errors, "errors": errors, "checked": len(items)}
+
+    # ---- databases ----
+
+    def backup_mysql(self, config: Dict, output_path: Optional[str] = None) -> Dict:
+        """Stream a consistent mysqldump into a compressed backup"""
+        output_path = output_path or self.output_path("mysql")
+        try:
+            cmd = [
+                "mysqldump",
+                *self._mysql_args(config),
+                "--single-transaction",
+                "--quick",
+                "--routines",
+                "--triggers",
+                config["database"],
+            ]
+            result = self.stream_backup(cmd, output_path, database="mysql")
+            logger.info(f"✅ MySQL backup created: {output_path}")
+            return result
+        except Exception as e:
+            logger.error(f"❌ MySQL backup failed: {e}")
+            return {}
+
+    def backup_postgresql(self, config: Dict, output_path: Optional[str] = None, format: str = "plain") -> Dict:
+        """Back up PostgreSQL as a streamed plain dump or a parallel directory dump"""
+        output_path = output_path or self.output_path("postgresql", format)
+        try:
+            if format == "directory":
+                result = self._pg_dump_directory(config, output_path)
+            else:
+                cmd = ["pg_dump", *self._postgresql_args(config), config["database"]]
+                result = self.stream_backup(
+                    cmd, output_path, env=self._postgresql_env(config), database="postgresql"
+                )
+            logger.info(f"✅ PostgreSQL backup created: {output_path}")
+            return result
+        except Exception as e:
+            logger.error(f"❌ PostgreSQL backup failed: {e}")
+            return {}
+
+    def _pg_dump_directory(self, config: Dict, output_dir: str) -> Dict:
+        """pg_dump -Fd -j: one compressed file per table, dumped in parallel"""
+        if self.rate_limiter is not None:
+            raise ValueError(DIRECTORY_IO_LIMIT_ERROR)
+        os.makedirs(os.path.dirname(output_dir.rstrip("/")) or ".", exist_ok=True)
+        start = time.time()
+        cmd = [
+            "pg_dump",
+            *self._postgresql_args(config),
+            "--format=directory",
+            f"--jobs={self.jobs}",
+            f"--compress={self._pg_compress_option()}",
+            f"--file={output_dir}",
+            config["database"],
+        ]
+        result = subprocess.run(self._prefixed(cmd), env=self._postgresql_env(config), stderr=subprocess.PIPE)
+        if result.returncode:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise RuntimeError(f"pg_dump exited with {result.returncode}: {result.stderr.decode(errors='replace')}")
+
+        names = sorted(
+            os.path.relpath(os.path.join(root, name), output_dir)
+            for root, _, files in os.walk(output_dir)
+            for name in files
+        )
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="backup") as executor:
+            digests = list(executor.map(lambda name: file_sha256(os.path.join(output_dir, name)), names))
+        files = [
+            {"path": name, "length": os.path.getsize(os.path.join(output_dir, name)), "sha256": digest}
+            for name, digest in zip(names, digests)
+        ]
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "format": "directory",
+            "file": os.path.basename(output_dir.rstrip("/")),
+            "database": "postgresql",
+            "compression": self.codec.name,
+            "level": self.codec.level,
+            "jobs": self.jobs,
+            "created_at": datetime.now().isoformat(),
+            "elapsed": round(time.time() - start, 3),
+            "files": files,
+            "raw_bytes": None,  # pg_dump compresses per table; the raw size is unknown
+            "compressed_bytes": sum(item["length"] for item in files),
+        }
+        self._write_manifest(output_dir, manifest)
+        return self.report(output_dir, manifest)
+
+    def restore_mysql(self, config: Dict, backup_path: str, verify: bool = True) -> Dict:
+        """Verify and stream a backup into mysql"""
+        try:
+            cmd = ["mysql", *self._mysql_args(config), config["database"]]
+            result = self.stream_restore(cmd, backup_path, verify=verify)
+            logger.info(f"✅ Database restored from: {backup_path}")
+            return result
+        except Exception as e:
+            logger.error(f"❌ Restore failed: {e}")
+            return {}
+
+    def restore_postgresql(self, config: Dict, backup_path: str, verify: bool = True) -> Dict:
+        """Verify and restore a backup; directory backups restore in parallel"""
+        try:
+            env = self._postgresql_env(config)
+            if os.path.isdir(backup_path):
+                self.verified_manifest(backup_path, verify)
+                start = time.time()
+                cmd = [
+                    "pg_restore",
+                    *self._postgresql_args(config),
+                    f"--dbname={config['database']}",
+                    f"--jobs={self.jobs}",
+                    backup_path,
+                ]
+                subprocess.run(cmd, env=env, check=True)
+                result = {"path": backup_path, "elapsed": round(time.time() - start, 3), "verified": verify}
+            else:
+                cmd = [
+                    "psql",
+                    *self._postgresql_args(config),
+                    "--quiet",
+                    "--set=ON_ERROR_STOP=1",
+                    config["database"],
+                ]
+                result = self.stream_restore(cmd, backup_path, env=env, verify=verify)
+            logger.info(f"✅ Database restored from: {backup_path}")
+            return result
+        except Exception as e:
+            logger.error(f"❌ Restore failed: {e}")
+            return {}
+
+    # ---- redis ----
+
+    @staticmethod
+    def _redis_dump_batch(client, keys: List[bytes]) -> Tuple[bytes, int]:
+        """DUMP and PTTL a batch of keys in one round trip"""
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.dump(key)
+            pipe.pttl(key)
+        results = pipe.execute()
+
+        records = []
+        for key, payload, pttl in zip(keys, results[0::2], results[1::2]):
+            if payload is None or pttl == -2:
+                continue  # expired or deleted since SCAN returned it
+            if isinstance(key, str):
+                key = key.encode("utf-8", "surrogateescape")
+            records.append(pack_redis_record(key, max(pttl, 0), payload))
+        return b"".join(records), len(records)
+
+    def backup_redis(
+        self,
+        client,
+        output_path: Optional[str] = None,
+        match: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict:
+        """Stream every key (any type) into a compressed record backup
+
+        Walks the keyspace with SCAN, so the server is never blocked, and
+        fetches DUMP + PTTL for each batch in one pipelined round trip.
+        client must return bytes (decode_responses=False), as RedisManager
+        clients do.
+        """
+        output_path = output_path or self.output_path("redis")
+        batch_size = batch_size or self.redis_batch_size
+        stats = {"keys": 0}
+
+        def blocks() -> Iterator[bytes]:
+            yield REDIS_MAGIC
+            batch = []
+            for key in client.scan_iter(match=match, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    data, count = self._redis_dump_batch(client, batch)
+                    stats["keys"] += count
+                    yield data
+                    batch = []
+            if batch:
+                data, count = self._redis_dump_batch(client, batch)
+                stats["keys"] += count
+                yield data
+
+        try:
+            result = self.write_backup(blocks(), output_path, stats=stats, database="redis", format="redis")
+            logger.info(f"✅ Redis backup created: {output_path} ({stats['keys']} keys)")
+            return result
+        except Exception as e:
+            logger.error(f"❌ Redis backup failed: {e}")
+            return {}
+
+    def restore_redis(
+        self,
+        client,
+        backup_path: str,
+        batch_size: Optional[int] = None,
+        replace: bool = True,
+        verify: bool = True,
+    ) -> Dict:
+        """Restore a record backup with pipelined RESTORE in batches
+
+        Keys get the TTL they had left when the backup was taken. With
+        replace=False existing keys are kept and counted as failed. DUMP
+        payloads only restore on the same or a newer Redis version.
+        """
+        batch_size = batch_size or self.redis_batch_size
+        try:
+            manifest = self.verified_manifest(backup_path, verify)
+            if manifest is None or manifest.get("format") != "redis":
+                raise RuntimeError(f"{backup_path} is not a Redis record backup")
+
+            start = time.time()
+            restored = failed = 0
+            errors = []
+            pipe = client.pipeline(transaction=False)
+            queued = 0
+
+            def flush():
+                nonlocal restored, failed, queued
+                for result in pipe.execute(raise_on_error=False):
+                    if isinstance(result, Exception):
+                        failed += 1
+                        if len(errors) < 10:
+                            errors.append(str(result))
+                    else:
+                        restored += 1
+                queued = 0
+
+            for key, pttl, payload in iter_redis_records(self.iter_decompressed(backup_path, manifest)):
+                pipe.restore(key, pttl, payload, replace=replace)
+                queued += 1
+                if queued >= batch_size:
+                    flush()
+            if queued:
+                flush()
+
+            elapsed = time.time() - start
+            logger.info(f"✅ Redis restored from: {backup_path} ({restored} keys)")
+            return {
+                "path": backup_path,
+                "keys": restored,
+                "failed": failed,
+                "errors": errors,
+                "elapsed": round(elapsed, 3),
+                "keys_per_second": round(restored / elapsed) if elapsed else 0,
+                "verified": verify,
+            }
+        except Exception as e:
+            logger.error(f"❌ Redis restore failed: {e}")
+            return {}
+
+
+# ---- backup sets ----
+
+SET_DATABASES = ("mysql", "postgresql", "redis")
+# Microseconds keep sets started within the same second apart
+SET_ID_FORMAT = "%Y%m%d_%H%M%S_%f"
+LEGACY_SET_ID_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def parse_set_id(set_id: str) -> datetime:
+    """When a backup set was started, from its id"""
+    try:
+        return datetime.strptime(set_id, SET_ID_FORMAT)
+    except ValueError:
+        return datetime.strptime(set_id, LEGACY_SET_ID_FORMAT)
+
+
+def parse_backend_jobs(spec: str) -> Dict[str, int]:
+    """Parse "postgresql=4,mysql=2" into per-backend job counts"""
+    jobs = {}
+    for entry in (spec or "").split(","):
+        name, _, value = entry.partition("=")
+        if name.strip() and value.strip():
+            jobs[name.strip()] = int(value)
+    return jobs
+
+
+def remove_backup(path: str) -> None:
+    """Delete a backup file or directory and its manifest"""
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+    if os.path.exists(manifest_path(path)):
+        os.remove(manifest_path(path))
+
+
+class BackupSet:
+    """Backs up several databases concurrently and records them as one set
+
+    Each set gets backups/sets/backup_set_<id>.json listing every backup,
+    its checksummed manifest and when it was taken. All backups share one
+    I/O rate limit, and old sets are pruned by count and age.
+    """
+
+    def __init__(
+        self,
+        databases: Optional[List[str]] = None,
+        parallel: Optional[int] = None,
+        io_limit_mb: Optional[float] = None,
+        backend_jobs: Optional[Dict[str, int]] = None,
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+        backup_dir: Optional[str] = None,
+    ):
+        """Initialize a backup set; unset options come from BACKUP_* settings"""
+        config = DatabaseConfig.get_backup_config()
+        self.databases = list(databases or SET_DATABASES)
+        unknown = [name for name in self.databases if name not in SET_DATABASES]
+        if unknown:
+            raise ValueError(f"Unsupported databases: {', '.join(unknown)}")
+        self.parallel = max(1, parallel or config["parallel"])
+        self.backend_jobs = {**parse_backend_jobs(config["backend_jobs"]), **(backend_jobs or {})}
+        io_limit_mb = config["io_limit_mb"] if io_limit_mb is None else io_limit_mb
+        self.rate_limiter = RateLimiter(io_limit_mb * 1024 * 1024) if io_limit_mb > 0 else None
+        self.compression = compression
+        self.level = level
+        self.format = config["format"]
+        if self.format == "directory" and self.rate_limiter is not None and "postgresql" in self.databases:
+            raise ValueError(DIRECTORY_IO_LIMIT_ERROR)
+        self.backup_dir = backup_dir or config["dir"]
+        self.sets_dir = os.path.join(self.backup_dir, "sets")
+        self.retention_count = config["retention_count"]
+        self.retention_days = config["retention_days"]
+
+    def _backup_one(self, db_type: str, set_id: str) -> Dict:
+        """Back up one database with its own job limit and the shared rate limit"""
+        engine = BackupEngine(
+            compression=self.compression,
+            level=self.level,
+            jobs=self.backend_jobs.get(db_type),
+            backup_dir=self.backup_dir,
+            rate_limiter=self.rate_limiter,
+        )
+        format = self.format if db_type == "postgresql" else "plain"
+        path = engine.output_path(db_type, format, timestamp=set_id)
+        started_at = datetime.now().isoformat()
+        start = time.time()
+
+        if db_type == "mysql":
+            result = engine.backup_mysql(DatabaseConfig.get_mysql_config(), path)
+        elif db_type == "postgresql":
+            result = engine.backup_postgresql(DatabaseConfig.get_postgresql_config(), path, format)
+        else:
+            from db_manager import RedisManager
+
+            manager = RedisManager(DatabaseConfig.get_redis_config())
+            result = engine.backup_redis(manager.client, path) if manager.connect() else {}
+            manager.close()
+
+        return {
+            "database": db_type,
+            "status": "ok" if result else "failed",
+            "path": path,
+            "manifest": manifest_path(path) if result else None,
+            "jobs": engine.jobs,
+            # mysqldump --single-transaction and pg_dump read one snapshot taken
+            # at the start; Redis is scanned over the whole run
+            "consistency": "scan" if db_type == "redis" else "snapshot",
+            "started_at": started_at,
+            "finished_at": datetime.now().isoformat(),
+            "elapsed": round(time.time() - start, 3),
+            "raw_bytes": result.get("raw_bytes"),
+            "compressed_bytes": result.get("compressed_bytes"),
+            "ratio": result.get("ratio"),
+        }
+
+    def run(self, prune: bool = True) -> Dict:
+        """Back up all databases concurrently, write the set manifest and prune"""
+        set_id = datetime.now().strftime(SET_ID_FORMAT)
+        started_at = datetime.now().isoformat()
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="backup-set") as executor:
+            backups = list(executor.map(lambda db_type: self._backup_one(db_type, set_id), self.databases))
+        wall_time = time.time() - start
+        sum_of_backups = sum(backup["elapsed"] for backup in backups)
+
+        snapshots = [datetime.fromisoformat(b["started_at"]) for b in backups if b["status"] == "ok"]
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "id": set_id,
+            "status": "complete" if all(b["status"] == "ok" for b in backups) else "partial",
+            "started_at": started_at,
+            "finished_at": datetime.now().isoformat(),
+            # How far apart the databases' snapshots are
+            "snapshot_spread": round((max(snapshots) - min(snapshots)).total_seconds(), 3) if snapshots else None,
+            "parallel": self.parallel,
+            "io_limit_mb": self.rate_limiter.rate / 1024 / 1024 if self.rate_limiter else 0,
+            "wall_time": round(wall_time, 3),
+            "sum_of_backups": round(sum_of_backups, 3),
+            "speedup": round(sum_of_backups / wall_time, 2) if wall_time else None,
+            "backups": backups,
+        }
+        os.makedirs(self.sets_dir, exist_ok=True)
+        path = os.path.join(self.sets_dir, f"backup_set_{set_id}.json")
+        with open(path + ".partial", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".partial", path)
+
+        if manifest["status"] == "complete":
+            logger.info(f"✅ Backup set {set_id} complete in {manifest['wall_time']}s")
+        else:
+            logger.warning(f"⚠️  Backup set {set_id} is partial")
+        manifest["path"] = path
+        manifest["pruned"] = self.prune() if prune else []
+        return manifest
+
+    def list_sets(self) -> List[Dict]:
+        """Set manifests, oldest first"""
+        sets = []
+        if os.path.isdir(self.sets_dir):
+            for name in sorted(os.listdir(self.sets_dir)):
+                if name.startswith("backup_set_") and name.endswith(".json"):
+                    with open(os.path.join(self.sets_dir, name)) as f:
+                        sets.append(dict(json.load(f), path=os.path.join(self.sets_dir, name)))
+        return sets
+
+    def prune(self, keep: Optional[int] = None, max_age_days: Optional[float] = None) -> List[str]:
+        """Delete sets beyond the newest `keep` complete ones or older than max_age_days
+
+        The newest complete set is always kept, and partial sets newer than
+        it are kept too. Returns the ids of the deleted sets.
+        """
+        keep = self.retention_count if keep is None else keep
+        max_age_days = self.retention_days if max_age_days is None else max_age_days
+        sets = self.list_sets()
+        complete = [item for item in sets if item["status"] == "complete"]
+        if not complete:
+            return []
+
+        kept = {item["id"] for item in (complete[-keep:] if keep > 0 else complete)}
+        if max_age_days > 0:
+            cutoff = datetime.now() - timedelta(days=max_age_days)
+            kept = {set_id for set_id in kept if parse_set_id(set_id) >= cutoff}
+        kept.add(complete[-1]["id"])
+        newest_complete = complete[-1]["id"]
+
+        pruned = []
+        for item in sets:
+            if item["id"] in kept or item["id"] > newest_complete:
+                continue
+            for backup in item["backups"]:
+                remove_backup(backup["path"])
+            os.remove(item["path"])
+            pruned.append(item["id"])
+        if pruned:
+            logger.info(f"✅ Pruned {len(pruned)} backup sets")
+        return pruned
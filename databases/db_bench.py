@@ -0,0 +1,823 @@
+#!/usr/bin/env python3
+"""
+Database Benchmark Tool
+Micro-benchmarks for the database managers against local servers
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from db_config import DatabaseConfig
+from db_manager import MySQLManager, PostgreSQLManager, RedisManager, ElasticsearchManager
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def print_header(text: str) -> None:
+    """Print formatted header"""
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}\n")
+
+
+def report(label: str, ops: int, elapsed: float, extra: Optional[Dict] = None) -> float:
+    """Print a throughput line and return ops/second"""
+    rate = ops / elapsed if elapsed > 0 else 0.0
+    line = f"  {label:<28} {ops:>9} ops  {elapsed:8.3f}s  {rate:>12,.0f} ops/s"
+    if extra:
+        line += "  " + "  ".join(f"{k}={v}" for k, v in extra.items())
+    print(line)
+    return rate
+
+
+def get_sql_manager(database: str, **overrides):
+    """Create and connect a SQL manager with config overrides"""
+    if database == "mysql":
+        config = DatabaseConfig.get_mysql_config()
+        manager_cls = MySQLManager
+    else:
+        config = DatabaseConfig.get_postgresql_config()
+        manager_cls = PostgreSQLManager
+    config.update(overrides)
+    manager = manager_cls(config)
+    if not manager.connect():
+        print(f"❌ Could not connect to {database}")
+        sys.exit(1)
+    return manager
+
+
+# ========================================
+# Point lookups / prepared statements
+# ========================================
+
+POINT_LOOKUP_QUERIES = [
+    "SELECT id, email, payload FROM bench_point_lookup WHERE id = %s",
+    "SELECT id, payload FROM bench_point_lookup WHERE email = %s",
+    "SELECT COUNT(*) AS total FROM bench_point_lookup WHERE id BETWEEN %s AND %s",
+]
+
+
+def setup_point_lookup(database: str, rows: int) -> None:
+    """Create and fill the point lookup table"""
+    manager = get_sql_manager(database, prepared_cache_size=0)
+    manager.execute_update("DROP TABLE IF EXISTS bench_point_lookup")
+    manager.execute_update(
+        "CREATE TABLE bench_point_lookup ("
+        "id INTEGER PRIMARY KEY, email VARCHAR(255), payload TEXT)"
+    )
+    manager.execute_update("CREATE INDEX bench_point_lookup_email ON bench_point_lookup (email)")
+
+    chunk = 500
+    for start in range(0, rows, chunk):
+        ids = range(start, min(start + chunk, rows))
+        values = ", ".join(["(%s, %s, %s)"] * len(ids))
+        params = []
+        for i in ids:
+            params.extend([i, f"lead{i}@example.com", "x" * 64])
+        manager.execute_update(
+            f"INSERT INTO bench_point_lookup (id, email, payload) VALUES {values}",
+            tuple(params),
+        )
+    manager.close()
+
+
+def bench_point_lookup(args) -> None:
+    """Point lookups with and without the prepared statement cache"""
+    print_header(f"Point lookups on {args.database} ({args.queries} queries)")
+    setup_point_lookup(args.database, args.rows)
+
+    rng = random.Random(42)
+    workload = []
+    for _ in range(args.queries):
+        i = rng.randrange(args.rows)
+        shape = rng.randrange(len(POINT_LOOKUP_QUERIES))
+        if shape == 0:
+            workload.append((POINT_LOOKUP_QUERIES[0], (i,)))
+        elif shape == 1:
+            workload.append((POINT_LOOKUP_QUERIES[1], (f"lead{i}@example.com",)))
+        else:
+            workload.append((POINT_LOOKUP_QUERIES[2], (i, i + 10)))
+
+    rates = {}
+    for label, cache_size in (("unprepared", 0), ("prepared cache", args.cache_size)):
+        manager = get_sql_manager(args.database, prepared_cache_size=cache_size)
+        for query, params in workload[:100]:
+            manager.execute(query, params)
+
+        start = time.perf_counter()
+        for query, params in workload:
+            manager.execute(query, params)
+        elapsed = time.perf_counter() - start
+
+        stats = manager.get_statement_cache_stats()
+        extra = {"hit_rate": stats["hit_rate"]} if stats else None
+        rates[label] = report(label, len(workload), elapsed, extra)
+        manager.close()
+
+    if rates["unprepared"]:
+        print(f"\n  Speedup: {rates['prepared cache'] / rates['unprepared']:.2f}x")
+
+    manager = get_sql_manager(args.database, prepared_cache_size=0)
+    manager.execute_update("DROP TABLE IF EXISTS bench_point_lookup")
+    manager.close()
+
+
+# ========================================
+# Concurrent queries: threads vs asyncio
+# ========================================
+
+SLEEP_QUERIES = {
+    "mysql": "SELECT %s AS n, SLEEP(%s) AS slept",
+    "postgresql": "SELECT %s::int AS n, pg_sleep(%s) AS slept",
+}
+
+
+def run_threaded(args, query: str) -> float:
+    """Run the workload on a thread pool, one sync manager per thread"""
+    local = threading.local()
+    managers = []
+
+    def worker(i: int) -> None:
+        if not hasattr(local, "manager"):
+            local.manager = get_sql_manager(args.database, prepared_cache_size=0)
+            managers.append(local.manager)
+        local.manager.execute(query, (i, args.latency_ms / 1000.0))
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(worker, range(args.concurrency)))
+        start = time.perf_counter()
+        list(executor.map(worker, range(args.queries)))
+        elapsed = time.perf_counter() - start
+
+    for manager in managers:
+        manager.close()
+    return elapsed
+
+
+async def run_async(args, query: str) -> float:
+    """Run the workload on asyncio with one shared async pool"""
+    from db_async import AsyncMySQLManager, AsyncPostgreSQLManager
+
+    if args.database == "mysql":
+        config = DatabaseConfig.get_mysql_config()
+        manager = AsyncMySQLManager(config)
+    else:
+        config = DatabaseConfig.get_postgresql_config()
+        manager = AsyncPostgreSQLManager(config)
+    config["pool_size"] = args.concurrency
+    config["max_overflow"] = 0
+    if not await manager.connect():
+        print(f"❌ Could not connect to {args.database}")
+        sys.exit(1)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def worker(i: int) -> None:
+        async with semaphore:
+            await manager.execute(query, (i, args.latency_ms / 1000.0))
+
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.queries)))
+    elapsed = time.perf_counter() - start
+
+    await manager.close()
+    return elapsed
+
+
+def bench_concurrency(args) -> None:
+    """Concurrent query throughput: threaded sync managers vs async pool"""
+    print_header(
+        f"Concurrent queries on {args.database} "
+        f"({args.queries} queries, concurrency {args.concurrency}, "
+        f"{args.latency_ms}ms server latency)"
+    )
+    query = SLEEP_QUERIES[args.database]
+
+    threaded = report("threaded", args.queries, run_threaded(args, query))
+    asynced = report("asyncio", args.queries, asyncio.run(run_async(args, query)))
+    if threaded:
+        print(f"\n  Async vs threaded: {asynced / threaded:.2f}x")
+
+
+# ========================================
+# Redis bulk operations
+# ========================================
+
+
+def get_redis_manager(**overrides) -> RedisManager:
+    """Create and connect a Redis manager with config overrides"""
+    config = DatabaseConfig.get_redis_config()
+    config.update(overrides)
+    manager = RedisManager(config)
+    if not manager.connect():
+        print("❌ Could not connect to redis")
+        sys.exit(1)
+    return manager
+
+
+def bench_redis_bulk(args) -> None:
+    """Per-key SET/GET vs batched MSET/MGET and pipelined SETEX"""
+    print_header(f"Redis bulk operations ({args.keys} keys, batch size {args.batch_size})")
+    manager = get_redis_manager(batch_size=args.batch_size)
+
+    records = {
+        f"bench:lead:{i}": {"id": i, "email": f"lead{i}@example.com", "score": i % 100}
+        for i in range(args.keys)
+    }
+    keys = list(records)
+
+    def timed(label: str, func) -> float:
+        start = time.perf_counter()
+        func()
+        return report(label, len(keys), time.perf_counter() - start)
+
+    def single_set():
+        for key, value in records.items():
+            manager.set(key, value, ttl=args.ttl)
+
+    def single_get():
+        for key in keys:
+            manager.get(key)
+
+    single_set_rate = timed("set (per key)", single_set)
+    single_get_rate = timed("get (per key)", single_get)
+    timed("mset", lambda: manager.mset(records))
+    bulk_set_rate = timed("set_many_with_ttl", lambda: manager.set_many_with_ttl(records, args.ttl))
+    bulk_get_rate = timed("mget", lambda: manager.mget(keys))
+
+    if single_set_rate and single_get_rate:
+        print(f"\n  Write speedup: {bulk_set_rate / single_set_rate:.1f}x")
+        print(f"  Read speedup:  {bulk_get_rate / single_get_rate:.1f}x")
+
+    with manager.pipeline() as pipe:
+        for key in keys:
+            pipe.delete(key)
+    manager.close()
+
+
+# ========================================
+# Redis value codecs
+# ========================================
+
+
+def codec_payloads(size: int) -> Dict:
+    """Build benchmark payloads: lead records and a numeric array"""
+    import array
+
+    leads = [
+        {
+            "id": i,
+            "email": f"lead{i}@example.com",
+            "name": f"Lead {i}",
+            "status": "new" if i % 3 else "contacted",
+            "score": i % 100,
+            "tags": ["tilda", "landing"],
+        }
+        for i in range(size)
+    ]
+    try:
+        import numpy
+
+        numbers = numpy.arange(size * 100, dtype="float64")
+    except ImportError:
+        numbers = array.array("d", range(size * 100))
+    return {"leads": leads, "numeric": numbers}
+
+
+def bench_redis_codecs(args) -> None:
+    """Encode/decode time, size and Redis memory per codec"""
+    from db_codecs import CODECS, COMPRESSORS, ValueSerializer
+
+    print_header(f"Redis value codecs ({args.size} leads, {args.size * 100} floats)")
+    manager = get_redis_manager() if args.redis else None
+    payloads = codec_payloads(args.size)
+
+    def installed(classes: Dict) -> list:
+        names = []
+        for name, cls in classes.items():
+            try:
+                cls()
+                names.append(name)
+            except ImportError:
+                print(f"  (skipping {name}: not installed)")
+        return names
+
+    codecs = installed(CODECS)
+    compressions = ["none"] + installed(COMPRESSORS)
+
+    for payload_name, payload in payloads.items():
+        print(f"\n  {payload_name}:")
+        print(f"  {'codec':<16} {'encode µs':>10} {'decode µs':>10} {'bytes':>10} {'redis bytes':>12}")
+        for codec in codecs:
+            for compression in compressions:
+                serializer = ValueSerializer(
+                    default_codec=codec,
+                    compression=compression,
+                    compression_threshold=args.compression_threshold,
+                    allow_pickle=True,
+                )
+                value = payload
+                if codec != "pickle" and payload_name == "numeric":
+                    value = payload.tolist()
+
+                start = time.perf_counter()
+                for _ in range(args.iterations):
+                    encoded = serializer.dumps("bench:codec", value)
+                encode_us = (time.perf_counter() - start) / args.iterations * 1e6
+
+                start = time.perf_counter()
+                for _ in range(args.iterations):
+                    serializer.loads("bench:codec", encoded)
+                decode_us = (time.perf_counter() - start) / args.iterations * 1e6
+
+                memory = "-"
+                if manager:
+                    manager.client.set("bench:codec", encoded)
+                    memory = manager.client.memory_usage("bench:codec")
+
+                label = codec if compression == "none" else f"{codec}+{compression}"
+                print(
+                    f"  {label:<16} {encode_us:>10,.0f} {decode_us:>10,.0f} "
+                    f"{len(encoded):>10,} {memory:>12}"
+                )
+
+    if manager:
+        manager.delete("bench:codec")
+        manager.close()
+
+
+# ========================================
+# Redis backup and restore
+# ========================================
+
+
+def bench_redis_backup(args) -> None:
+    """KEYS + GET + JSON backup vs SCAN + pipelined DUMP record streams"""
+    import os
+    import json
+    import tempfile
+
+    from db_backup import BackupEngine
+
+    print_header(f"Redis backup/restore ({args.keys} keys in db {args.db}, batch size {args.batch_size})")
+    manager = get_redis_manager(db=args.db)
+    client = manager.client
+    if client.dbsize() and not args.force:
+        print(f"❌ Redis db {args.db} is not empty; it is flushed by this benchmark (use --force)")
+        sys.exit(1)
+
+    def populate() -> None:
+        client.flushdb()
+        pipe = client.pipeline(transaction=False)
+        for i in range(args.keys):
+            key = f"bench:backup:{i}"
+            kind = i % 5 if args.mixed else 0
+            if kind == 0:
+                pipe.set(key, f'{{"id": {i}, "email": "lead{i}@example.com", "score": {i % 100}}}')
+            elif kind == 1:
+                pipe.hset(key, mapping={"id": i, "email": f"lead{i}@example.com"})
+            elif kind == 2:
+                pipe.rpush(key, *range(5))
+            elif kind == 3:
+                pipe.sadd(key, "tilda", "landing", f"tag{i % 50}")
+            else:
+                pipe.zadd(key, {f"lead{i}": i % 100})
+            if i % 10 == 0:
+                pipe.pexpire(key, 3_600_000)
+            if i % 10_000 == 9_999:
+                pipe.execute()
+        pipe.execute()
+
+    def legacy_backup(path: str) -> None:
+        data = {}
+        for key in client.keys():
+            value = client.get(key)
+            data[key.decode("utf-8", "surrogateescape")] = value.decode("utf-8", "surrogateescape")
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def legacy_restore(path: str) -> None:
+        with open(path) as f:
+            data = json.load(f)
+        for key, value in data.items():
+            client.set(key.encode("utf-8", "surrogateescape"), value.encode("utf-8", "surrogateescape"))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        populate()
+        backup_rate = restore_rate = None
+        if not args.mixed:
+            path = os.path.join(workdir, "legacy.json")
+            start = time.perf_counter()
+            legacy_backup(path)
+            backup_rate = report(
+                "keys + get + json", args.keys, time.perf_counter() - start,
+                {"size": f"{os.path.getsize(path) / 1024 / 1024:.1f}MB"},
+            )
+            client.flushdb()
+            start = time.perf_counter()
+            legacy_restore(path)
+            restore_rate = report("set (per key)", args.keys, time.perf_counter() - start)
+        else:
+            print("  (legacy JSON backup skipped: it only handles string keys)")
+
+        populate()
+        for compression in args.compression.split(","):
+            engine = BackupEngine(compression=compression, jobs=args.jobs, backup_dir=workdir)
+            path = engine.output_path("redis")
+            start = time.perf_counter()
+            result = engine.backup_redis(client, path, batch_size=args.batch_size)
+            rate = report(
+                f"scan + dump ({engine.codec.name})", result["keys"], time.perf_counter() - start,
+                {"size": f"{result['compressed_bytes'] / 1024 / 1024:.1f}MB", "ratio": result["ratio"]},
+            )
+            if backup_rate:
+                print(f"    {rate / backup_rate:.1f}x legacy backup")
+
+            client.flushdb()
+            start = time.perf_counter()
+            restored = engine.restore_redis(client, path, batch_size=args.batch_size)
+            rate = report(
+                f"restore ({engine.codec.name})", restored["keys"], time.perf_counter() - start,
+                {"failed": restored["failed"]},
+            )
+            if restore_rate:
+                print(f"    {rate / restore_rate:.1f}x legacy restore")
+
+    client.flushdb()
+    manager.close()
+
+
+# ========================================
+# Elasticsearch bulk indexing
+# ========================================
+
+
+def bench_es_bulk(args) -> None:
+    """Per-document index calls vs the _bulk endpoint"""
+    print_header(f"Elasticsearch bulk indexing ({args.docs} docs, {args.concurrency} in flight)")
+    manager = ElasticsearchManager()
+    if not manager.connect():
+        print("❌ Could not connect to elasticsearch")
+        sys.exit(1)
+
+    index = "bench_bulk"
+
+    def documents(count: int):
+        for i in range(count):
+            yield {"id": i, "email": f"lead{i}@example.com", "score": i % 100, "notes": "x" * 200}
+
+    def reset_index() -> None:
+        manager.client.options(ignore_status=404).indices.delete(index=index)
+        manager.create_index(index)
+
+    single_docs = min(args.docs, args.single_docs)
+    reset_index()
+    start = time.perf_counter()
+    for document in documents(single_docs):
+        manager.index_document(index, str(document["id"]), document)
+    single_rate = report("index_document", single_docs, time.perf_counter() - start)
+
+    reset_index()
+    start = time.perf_counter()
+    summary = manager.bulk_index(
+        index,
+        documents(args.docs),
+        chunk_size=args.chunk_size,
+        max_in_flight=args.concurrency,
+        fast_load=args.fast_load,
+    )
+    bulk_rate = report(
+        "bulk_index",
+        summary["indexed"],
+        time.perf_counter() - start,
+        {"chunks": summary["chunks"], "retries": summary["retries"], "failed": summary["failed"]},
+    )
+
+    if single_rate:
+        print(f"\n  Speedup: {bulk_rate / single_rate:.1f}x")
+
+    manager.delete_index(index)
+    manager.close()
+
+
+# ========================================
+# Local search engine
+# ========================================
+
+SEARCH_WORDS = ["acme", "globex", "initech", "umbrella", "stark", "wayne", "tyrell", "cyberdyne"]
+
+
+def search_vocabulary(size: int = 5000) -> Tuple[List[str], List[float]]:
+    """Pseudo-words with Zipf weights, like natural-language term frequencies"""
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa"]
+    words = []
+    for i in range(size):
+        word, n = "", i + 1
+        while n:
+            n, digit = divmod(n, len(syllables))
+            word += syllables[digit]
+        words.append(word)
+    return words, [1.0 / rank for rank in range(1, size + 1)]
+
+
+def bench_local_search(args) -> None:
+    """Indexing throughput and query latency of the embedded search engine"""
+    from db_indexer import LEADS_MAPPING
+    from db_local_search import LocalSearchManager
+
+    print_header(f"Local search ({args.docs} docs, {args.queries} queries per type)")
+    manager = LocalSearchManager({"path": args.path})
+    if not manager.connect():
+        print("❌ Could not open local search database")
+        sys.exit(1)
+
+    vocabulary, weights = search_vocabulary()
+    index = "bench_leads"
+    if manager.index_exists(index):
+        manager.delete_index(index)
+    manager.create_index(index, LEADS_MAPPING)
+
+    def documents(start: int, count: int):
+        for i in range(start, start + count):
+            company = SEARCH_WORDS[i % len(SEARCH_WORDS)]
+            yield {
+                "id": i,
+                "name": f"Lead {i} {random.choice(SEARCH_WORDS)}",
+                "email": f"lead{i}@{company}.com",
+                "company": company.title(),
+                "status": ("new", "contacted", "won")[i % 3],
+                "score": i % 100,
+                "notes": " ".join(random.choices(vocabulary, weights, k=20)),
+            }
+
+    single_docs = min(args.docs, 2000)
+    start = time.perf_counter()
+    for document in documents(0, single_docs):
+        manager.index_document(index, str(document["id"]), document)
+    report("index_document", single_docs, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    summary = manager.bulk_index(index, documents(single_docs, args.docs - single_docs))
+    report("bulk_index", summary["indexed"], time.perf_counter() - start)
+
+    queries = {
+        "match": lambda: {"query": {"match": {"notes": random.choice(vocabulary)}}},
+        "match (2 terms, and)": lambda: {
+            "query": {
+                "match": {
+                    "notes": {"query": " ".join(random.choices(vocabulary, weights, k=2)), "operator": "and"}
+                }
+            }
+        },
+        "multi_match (boosted)": lambda: {
+            "query": {
+                "multi_match": {
+                    "query": random.choice(SEARCH_WORDS) + " " + random.choice(vocabulary),
+                    "fields": ["name^3", "company^2", "notes"],
+                }
+            }
+        },
+        "bool + filters": lambda: {
+            "query": {
+                "bool": {
+                    "must": {"match": {"company": random.choice(SEARCH_WORDS)}},
+                    "filter": [{"term": {"status": "won"}}, {"range": {"score": {"gte": 50}}}],
+                }
+            }
+        },
+        "term": lambda: {"query": {"term": {"status": "contacted"}}},
+    }
+    print()
+    for label, build in queries.items():
+        latencies = []
+        for _ in range(args.queries):
+            body = dict(build(), size=10)
+            query_start = time.perf_counter()
+            manager.search(index, body)
+            latencies.append((time.perf_counter() - query_start) * 1000)
+        latencies.sort()
+        report(
+            label,
+            len(latencies),
+            sum(latencies) / 1000,
+            {
+                "p50_ms": f"{latencies[len(latencies) // 2]:.2f}",
+                "p95_ms": f"{latencies[int(len(latencies) * 0.95)]:.2f}",
+            },
+        )
+
+    stats = manager.get_stats()
+    print(f"\n  Index size: {stats.get('size_bytes', 0) / 1024 / 1024:.1f} MB")
+    manager.delete_index(index)
+    manager.close()
+
+
+def bench_metrics_overhead(args) -> None:
+    """Cost of @timed per call, on a method that does no I/O"""
+    from db_metrics import timed, registry, sql_label, key_label
+
+    print_header(f"Metrics overhead ({args.calls} calls, best of {args.rounds})")
+    rows = [{"id": 1}]
+
+    class Manager:
+        def raw(self, query, params=None):
+            return rows
+
+        @timed("bench", "execute", label=sql_label)
+        def execute(self, query, params=None):
+            return rows
+
+        @timed("bench", "get", label=key_label, rows=None)
+        def get(self, key):
+            return rows
+
+    manager = Manager()
+    calls = {
+        "raw": lambda: manager.raw("SELECT * FROM leads WHERE id = %s", (1,)),
+        "timed sql": lambda: manager.execute("SELECT * FROM leads WHERE id = %s", (1,)),
+        "timed redis": lambda: manager.get("cache:leads:1"),
+    }
+    best = {}
+    for label, call in calls.items():
+        call()  # first call creates the thread table and series
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter_ns()
+            for _ in range(args.calls):
+                call()
+            timings.append(time.perf_counter_ns() - start)
+        best[label] = min(timings)
+        report(label, args.calls, best[label] / 1e9, {"ns_per_call": f"{best[label] / args.calls:.0f}"})
+
+    print()
+    for label in ("timed sql", "timed redis"):
+        overhead = (best[label] - best["raw"]) / args.calls
+        print(f"  {label} overhead: {overhead:.0f} ns/call")
+    registry.reset()
+
+
+def main() -> None:
+    """Main benchmark entry point"""
+    parser = argparse.ArgumentParser(
+        description="Database Benchmark Tool",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Prepared statement cache on a point-lookup workload
+  python db_bench.py point-lookup --database postgresql --queries 20000
+
+  # Async managers vs threads under concurrency
+  python db_bench.py concurrency --database postgresql --concurrency 64
+
+  # Redis pipelining against a local redis-server
+  python db_bench.py redis-bulk --keys 5000 --batch-size 500
+
+  # Value codecs (add --redis to measure MEMORY USAGE)
+  python db_bench.py redis-codecs --size 1000 --redis
+
+  # Redis backup/restore on 1M keys of every type (flushes db 15)
+  python db_bench.py redis-backup --keys 1000000 --mixed
+
+  # Elasticsearch _bulk vs per-document indexing
+  python db_bench.py es-bulk --docs 100000 --concurrency 4 --fast-load
+
+  # Embedded SQLite FTS5 search engine
+  python db_bench.py local-search --docs 100000 --queries 500
+
+  # Per-call cost of client-side latency metrics
+  python db_bench.py metrics-overhead --calls 1000000
+        """,
+    )
+
+    subparsers = parser.add_subparsers(dest="workload", help="Workloads")
+
+    # Point lookup workload
+    point_parser = subparsers.add_parser(
+        "point-lookup", help="Prepared statement cache on point lookups"
+    )
+    point_parser.add_argument(
+        "--database", choices=["mysql", "postgresql"], default="postgresql"
+    )
+    point_parser.add_argument("--rows", type=int, default=10000, help="Table size")
+    point_parser.add_argument("--queries", type=int, default=10000, help="Lookups to run")
+    point_parser.add_argument("--cache-size", type=int, default=100, help="Statement cache size")
+
+    # Concurrency workload
+    concurrency_parser = subparsers.add_parser(
+        "concurrency", help="Async managers vs threaded managers"
+    )
+    concurrency_parser.add_argument(
+        "--database", choices=["mysql", "postgresql"], default="postgresql"
+    )
+    concurrency_parser.add_argument("--queries", type=int, default=2000, help="Queries to run")
+    concurrency_parser.add_argument("--concurrency", type=int, default=32, help="In-flight queries")
+    concurrency_parser.add_argument(
+        "--latency-ms", type=float, default=5.0, help="Simulated server-side latency"
+    )
+
+    # Redis bulk workload
+    redis_bulk_parser = subparsers.add_parser(
+        "redis-bulk", help="Redis per-key vs batched operations"
+    )
+    redis_bulk_parser.add_argument("--keys", type=int, default=5000, help="Keys to write")
+    redis_bulk_parser.add_argument("--batch-size", type=int, default=500, help="Commands per round trip")
+    redis_bulk_parser.add_argument("--ttl", type=int, default=300, help="Key TTL in seconds")
+
+    # Redis codecs workload
+    codecs_parser = subparsers.add_parser(
+        "redis-codecs", help="Compare Redis value codecs and compression"
+    )
+    codecs_parser.add_argument("--size", type=int, default=1000, help="Lead records in payload")
+    codecs_parser.add_argument("--iterations", type=int, default=20, help="Encode/decode rounds")
+    codecs_parser.add_argument(
+        "--compression-threshold", type=int, default=1024, help="Compress payloads above bytes"
+    )
+    codecs_parser.add_argument(
+        "--redis", action="store_true", help="Measure MEMORY USAGE on local redis-server"
+    )
+
+    # Redis backup workload
+    redis_backup_parser = subparsers.add_parser(
+        "redis-backup", help="Redis JSON backup vs SCAN + DUMP record streams"
+    )
+    redis_backup_parser.add_argument("--keys", type=int, default=1000000, help="Keys to back up")
+    redis_backup_parser.add_argument("--db", type=int, default=15, help="Scratch Redis database (flushed)")
+    redis_backup_parser.add_argument("--batch-size", type=int, default=1000, help="Keys per pipeline")
+    redis_backup_parser.add_argument("--jobs", type=int, default=0, help="Compression threads")
+    redis_backup_parser.add_argument(
+        "--compression", default="zstd,gzip", help="Comma-separated codecs to compare"
+    )
+    redis_backup_parser.add_argument(
+        "--mixed", action="store_true", help="Hashes, lists, sets and sorted sets as well as strings"
+    )
+    redis_backup_parser.add_argument(
+        "--force", action="store_true", help="Run even if the scratch database is not empty"
+    )
+
+    # Elasticsearch bulk workload
+    es_bulk_parser = subparsers.add_parser(
+        "es-bulk", help="Elasticsearch per-document vs bulk indexing"
+    )
+    es_bulk_parser.add_argument("--docs", type=int, default=50000, help="Documents to bulk index")
+    es_bulk_parser.add_argument(
+        "--single-docs", type=int, default=2000, help="Documents to index one at a time"
+    )
+    es_bulk_parser.add_argument("--chunk-size", type=int, default=500, help="Documents per _bulk request")
+    es_bulk_parser.add_argument("--concurrency", type=int, default=4, help="Bulk requests in flight")
+    es_bulk_parser.add_argument(
+        "--fast-load", action="store_true", help="Disable refresh/replicas during the load"
+    )
+
+    # Local search workload
+    local_search_parser = subparsers.add_parser(
+        "local-search", help="Embedded search engine indexing and query latency"
+    )
+    local_search_parser.add_argument("--docs", type=int, default=50000, help="Documents to index")
+    local_search_parser.add_argument("--queries", type=int, default=200, help="Queries per type")
+    local_search_parser.add_argument(
+        "--path", default="bench_search.db", help="Search database file"
+    )
+
+    # Metrics overhead workload
+    metrics_parser = subparsers.add_parser(
+        "metrics-overhead", help="Per-call cost of @timed latency metrics"
+    )
+    metrics_parser.add_argument("--calls", type=int, default=200000, help="Calls per round")
+    metrics_parser.add_argument("--rounds", type=int, default=5, help="Rounds (best is reported)")
+
+    args = parser.parse_args()
+
+    if args.workload == "point-lookup":
+        bench_point_lookup(args)
+    elif args.workload == "concurrency":
+        bench_concurrency(args)
+    elif args.workload == "redis-bulk":
+        bench_redis_bulk(args)
+    elif args.workload == "redis-codecs":
+        bench_redis_codecs(args)
+    elif args.workload == "redis-backup":
+        bench_redis_backup(args)
+    elif args.workload == "es-bulk":
+        bench_es_bulk(args)
+    elif args.workload == "local-search":
+        bench_local_search(args)
+    elif args.workload == "metrics-overhead":
+        bench_metrics_overhead(args)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
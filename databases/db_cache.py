@@ -0,0 +1,452 @@
+# Database Cache Layer
+# Read-through / write-behind caching of primary database rows in Redis
+
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Iterable
+
+from db_config import DatabaseConfig
+from db_manager import MySQLManager
+from db_singleflight import SingleFlight, RedisLock
+
+
+logger = logging.getLogger(__name__)
+
+# Stored for rows that don't exist so repeated misses don't reach the database
+MISSING_ROW = {"_cache_missing": True}
+
+
+def parse_table_ttls(spec: str) -> Dict[str, int]:
+    """Parse 'table=seconds,...' into a TTL mapping"""
+    ttls = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            table, ttl = item.split("=", 1)
+            ttls[table.strip()] = int(ttl)
+    return ttls
+
+
+def normalize_row(row: Optional[Dict]) -> Optional[Dict]:
+    """Convert a row to its cached form (datetimes, decimals -> strings)"""
+    if row is None:
+        return None
+    return json.loads(json.dumps(row, default=str))
+
+
+def key_text(key: Any) -> str:
+    """Compare keys as text, the way cached rows render them (UUIDs, decimals, "5" vs 5)"""
+    return str(json.loads(json.dumps(key, default=str)))
+
+
+class CacheMetrics:
+    """Hit-rate and latency counters for a cached repository"""
+
+    def __init__(self):
+        """Initialize counters"""
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.db_loads = 0
+        self.coalesced = 0
+        self.lock_waits = 0
+        self.writes_queued = 0
+        self.writes_flushed = 0
+        self.flush_errors = 0
+        self.latency = {"hit": [0, 0.0, 0.0], "miss": [0, 0.0, 0.0]}
+
+    def record(self, outcome: str, seconds: float) -> None:
+        """Record a lookup latency for 'hit' or 'miss'"""
+        with self.lock:
+            bucket = self.latency[outcome]
+            bucket[0] += 1
+            bucket[1] += seconds
+            bucket[2] = max(bucket[2], seconds)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Increment a counter"""
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get_stats(self) -> Dict:
+        """Get metrics snapshot"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "negative_hits": self.negative_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "db_loads": self.db_loads,
+                "coalesced": self.coalesced,
+                "lock_waits": self.lock_waits,
+                "writes_queued": self.writes_queued,
+                "writes_flushed": self.writes_flushed,
+                "flush_errors": self.flush_errors,
+            }
+            for outcome, (count, total, peak) in self.latency.items():
+                stats[f"{outcome}_avg_ms"] = round(total / count * 1000, 3) if count else 0.0
+                stats[f"{outcome}_max_ms"] = round(peak * 1000, 3)
+            return stats
+
+
+class CachedRepository:
+    """Rows of one primary-database table cached in Redis
+
+    Reads go to Redis first and fall through to the database on a miss, with
+    concurrent misses for a key collapsed into one query (in-process
+    single-flight plus a Redis lock across processes). Writes are either
+    written through or, with write_behind, applied to the cache immediately
+    and flushed to the database in batches by a background thread.
+    """
+
+    def __init__(
+        self,
+        primary,
+        cache,
+        table: str,
+        key_column: str = "id",
+        ttl: Optional[int] = None,
+        config: Optional[Dict] = None,
+    ):
+        """Initialize repository over a SQL manager and a RedisManager"""
+        self.config = config or DatabaseConfig.get_cache_layer_config()
+        self.primary = primary
+        self.cache = cache
+        self.table = table
+        self.key_column = key_column
+        self.ttl = ttl or parse_table_ttls(self.config.get("table_ttls")).get(
+            table, self.config.get("default_ttl", 300)
+        )
+        self.prefix = f"{self.config.get('namespace', 'cache')}:{table}"
+        self.metrics = CacheMetrics()
+        self.flights = SingleFlight()
+        # Managers hold a single connection shared with every other user of
+        # the manager, so take the manager's own lock rather than a private one
+        self.db_lock = primary.lock
+        self.row_locks = RedisLock(cache.client, self.config.get("lock_timeout", 5))
+
+        self.write_behind = self.config.get("write_behind", False)
+        self.pending = {}
+        # Changes taken by a flush that hasn't committed yet
+        self.flushing = {}
+        self.pending_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.flusher = None
+        if self.write_behind:
+            self.flusher = threading.Thread(
+                target=self._flush_loop, name=f"cache-flush-{table}", daemon=True
+            )
+            self.flusher.start()
+
+    # ---- keys and tags ----
+
+    def cache_key(self, key: Any) -> str:
+        """Redis key for a row"""
+        return f"{self.prefix}:{key}"
+
+    def tag_key(self, tag: str) -> str:
+        """Redis set holding the row keys carrying a tag"""
+        return f"{self.prefix}:tag:{tag}"
+
+    def tag(self, key: Any, *tags: str) -> None:
+        """Attach invalidation tags to a cached row"""
+        pipe = self.cache.client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.sadd(self.tag_key(tag), self.cache_key(key))
+            pipe.expire(self.tag_key(tag), self.ttl * 2)
+        pipe.execute()
+
+    def invalidate(self, *keys: Any) -> None:
+        """Drop rows from the cache"""
+        if keys:
+            self.cache.client.delete(*(self.cache_key(k) for k in keys))
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Drop every row carrying a tag, returning how many were dropped"""
+        members = list(self.cache.client.smembers(self.tag_key(tag)))
+        if members:
+            self.cache.client.delete(*members)
+        self.cache.client.delete(self.tag_key(tag))
+        return len(members)
+
+    # ---- reads ----
+
+    def _select(self, keys: List[Any]) -> List[Dict]:
+        """Load rows from the primary database"""
+        placeholders = ", ".join(["%s"] * len(keys))
+        with self.db_lock:
+            rows = self.primary.execute(
+                f"SELECT * FROM {self.table} WHERE {self.key_column} IN ({placeholders})",
+                tuple(keys),
+            )
+        self.metrics.incr("db_loads")
+        return [normalize_row(row) for row in rows]
+
+    def _store(self, rows: Dict[Any, Optional[Dict]]) -> None:
+        """Write loaded rows (or missing markers) to the cache"""
+        try:
+            with self.cache.pipeline() as pipe:
+                for key, row in rows.items():
+                    if row is None:
+                        pipe.set(self.cache_key(key), MISSING_ROW, self.config.get("negative_ttl", 30))
+                    else:
+                        pipe.set(self.cache_key(key), row, self.ttl)
+        except Exception as e:
+            logger.error(f"❌ Cache store failed for {self.table}: {e}")
+
+    def _load(self, key: Any) -> Optional[Dict]:
+        """Load one row, guarded by a cross-process Redis lock"""
+        cache_key = self.cache_key(key)
+        lock_key = f"{cache_key}:lock"
+        try:
+            token = self.row_locks.acquire(lock_key)
+            acquired = token is not None
+        except Exception as e:
+            # Redis unavailable: serve from the database without the lock
+            logger.error(f"❌ Cache lock failed for {self.table}: {e}")
+            acquired, token = True, None
+
+        if not acquired:
+            # Another process is loading this row: wait for it to fill the cache
+            self.metrics.incr("lock_waits")
+            deadline = time.monotonic() + self.row_locks.timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.02)
+                value = self.cache.get(cache_key)
+                if value is not None:
+                    return None if value == MISSING_ROW else value
+            token = None
+
+        try:
+            rows = self._select([key])
+            row = self._with_pending(key, rows[0] if rows else None)
+            self._store({key: row})
+            return row
+        finally:
+            if token:
+                try:
+                    self.row_locks.release(lock_key, token)
+                except Exception as e:
+                    logger.error(f"❌ Cache unlock failed for {self.table}: {e}")
+
+    def _with_pending(self, key: Any, row: Optional[Dict]) -> Optional[Dict]:
+        """Apply write-behind changes not yet in the database to a loaded row"""
+        if not self.write_behind or row is None:
+            return row
+        with self.pending_lock:
+            changes = {**self.flushing.get(key, {}), **self.pending.get(key, {})}
+        return {**row, **normalize_row(changes)} if changes else row
+
+    def get(self, key: Any) -> Optional[Dict]:
+        """Get a row by key, loading it on a cache miss"""
+        start = time.perf_counter()
+        value = self.cache.get(self.cache_key(key))
+        if value is not None:
+            self.metrics.incr("hits")
+            if value == MISSING_ROW:
+                self.metrics.incr("negative_hits")
+                value = None
+            self.metrics.record("hit", time.perf_counter() - start)
+            return value
+
+        self.metrics.incr("misses")
+        try:
+            row, shared = self.flights.do(self.cache_key(key), lambda: self._load(key))
+            if shared:
+                self.metrics.incr("coalesced")
+            return row
+        except Exception as e:
+            logger.error(f"❌ Cache load failed for {self.table}:{key}: {e}")
+            return None
+        finally:
+            self.metrics.record("miss", time.perf_counter() - start)
+
+    def get_many(self, keys: Iterable[Any]) -> Dict[Any, Dict]:
+        """Get many rows, loading all misses in one query"""
+        start = time.perf_counter()
+        keys = list(keys)
+        values = self.cache.mget([self.cache_key(k) for k in keys])
+
+        found, missing = {}, []
+        for key, value in zip(keys, values):
+            if value is None:
+                missing.append(key)
+            elif value != MISSING_ROW:
+                found[key] = value
+        self.metrics.incr("hits", len(keys) - len(missing))
+        self.metrics.incr("misses", len(missing))
+
+        if missing:
+            try:
+                loaded = {key_text(row[self.key_column]): row for row in self._select(missing)}
+                rows = {key: self._with_pending(key, loaded.get(key_text(key))) for key in missing}
+                self._store(rows)
+                for key, row in rows.items():
+                    if row is not None:
+                        found[key] = row
+            except Exception as e:
+                logger.error(f"❌ Cache bulk load failed for {self.table}: {e}")
+
+        self.metrics.record("miss" if missing else "hit", time.perf_counter() - start)
+        return found
+
+    # ---- writes ----
+
+    def save(self, row: Dict) -> bool:
+        """Insert or replace a row (write-through) and refresh the cache"""
+        key = row[self.key_column]
+        columns = list(row)
+        placeholders = ", ".join(["%s"] * len(columns))
+        updates = [c for c in columns if c != self.key_column]
+        if isinstance(self.primary, MySQLManager):
+            conflict = "ON DUPLICATE KEY UPDATE " + ", ".join(
+                f"{c} = VALUES({c})" for c in updates
+            )
+        else:
+            conflict = f"ON CONFLICT ({self.key_column}) DO UPDATE SET " + ", ".join(
+                f"{c} = EXCLUDED.{c}" for c in updates
+            )
+        query = (
+            f"INSERT INTO {self.table} ({', '.join(columns)}) "
+            f"VALUES ({placeholders}) {conflict}"
+        )
+        with self.db_lock:
+            saved = self.primary.execute_update(query, tuple(row.values())) > 0
+        if saved:
+            self._store({key: normalize_row(row)})
+        else:
+            self.invalidate(key)
+        return saved
+
+    def update(self, key: Any, changes: Dict) -> bool:
+        """Update columns of a row, written behind when enabled"""
+        if not self.write_behind:
+            assignments = ", ".join(f"{c} = %s" for c in changes)
+            with self.db_lock:
+                updated = self.primary.execute_update(
+                    f"UPDATE {self.table} SET {assignments} WHERE {self.key_column} = %s",
+                    tuple(changes.values()) + (key,),
+                )
+            self.invalidate(key)
+            return updated > 0
+
+        cached = self.cache.get(self.cache_key(key))
+        if cached is not None and cached != MISSING_ROW:
+            cached.update(normalize_row(changes))
+            self.cache.set(self.cache_key(key), cached, self.ttl)
+        else:
+            self.invalidate(key)
+
+        with self.pending_lock:
+            self.pending.setdefault(key, {}).update(changes)
+            queued = len(self.pending)
+        self.metrics.incr("writes_queued")
+        if queued >= self.config.get("write_behind_batch", 500):
+            self.flush()
+        return True
+
+    def delete(self, key: Any) -> bool:
+        """Delete a row from the database and the cache"""
+        with self.pending_lock:
+            self.pending.pop(key, None)
+        with self.db_lock:
+            deleted = self.primary.execute_update(
+                f"DELETE FROM {self.table} WHERE {self.key_column} = %s", (key,)
+            )
+        self.invalidate(key)
+        return deleted > 0
+
+    def flush(self) -> int:
+        """Write queued updates to the database, one transaction per batch"""
+        with self.pending_lock:
+            pending, self.pending = self.pending, {}
+            self.flushing = pending
+        if not pending:
+            return 0
+
+        # Group by column set so each group is one executemany
+        groups = {}
+        for key, changes in pending.items():
+            groups.setdefault(tuple(changes), []).append(tuple(changes.values()) + (key,))
+
+        try:
+            with self.db_lock:
+                cursor = self.primary.connection.cursor()
+                try:
+                    for columns, params in groups.items():
+                        assignments = ", ".join(f"{c} = %s" for c in columns)
+                        cursor.executemany(
+                            f"UPDATE {self.table} SET {assignments} "
+                            f"WHERE {self.key_column} = %s",
+                            params,
+                        )
+                    self.primary.connection.commit()
+                except Exception:
+                    self.primary.connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            with self.pending_lock:
+                self.flushing = {}
+            # Rows loaded before the commit may have been cached without the
+            # change; drop them so the next read sees the database
+            try:
+                self.invalidate(*pending)
+            except Exception as e:
+                logger.error(f"❌ Cache invalidation after flush failed for {self.table}: {e}")
+            self.metrics.incr("writes_flushed", len(pending))
+            return len(pending)
+        except Exception as e:
+            self.metrics.incr("flush_errors")
+            logger.error(f"❌ Write-behind flush failed for {self.table}: {e}")
+            # Requeue without overwriting newer changes
+            with self.pending_lock:
+                for key, changes in pending.items():
+                    merged = dict(changes)
+                    merged.update(self.pending.get(key, {}))
+                    self.pending[key] = merged
+                self.flushing = {}
+            return 0
+
+    def _flush_loop(self) -> None:
+        """Background write-behind loop"""
+        interval = self.config.get("write_behind_interval", 1.0)
+        while not self.stop_event.wait(interval):
+            self.flush()
+
+    def get_stats(self) -> Dict:
+        """Get hit-rate, latency and write-behind metrics"""
+        stats = self.metrics.get_stats()
+        stats["table"] = self.table
+        stats["ttl"] = self.ttl
+        with self.pending_lock:
+            stats["writes_pending"] = len(self.pending)
+        return stats
+
+    def close(self) -> None:
+        """Stop the write-behind thread and flush remaining writes"""
+        self.stop_event.set()
+        if self.flusher:
+            self.flusher.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def create_repository(manager, table: str, **kwargs) -> CachedRepository:
+    """Build a repository over the configured primary and cache databases"""
+    if DatabaseConfig.DATABASE_SELECTION.get("primary", "postgresql").lower() == "mysql":
+        primary = manager.mysql
+    else:
+        primary = manager.postgresql
+    cache = manager.redis
+    if primary is None or cache is None:
+        raise RuntimeError("Primary or cache database unavailable")
+    return CachedRepository(primary, cache, table, **kwargs)
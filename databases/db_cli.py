@@ -4,15 +4,22 @@ Database Management CLI Tool
 Command-line interface for managing all databases
 """
 
+import os
 import sys
+import time
 import argparse
 import json
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import logging
 
 from db_config import DatabaseConfig, DatabaseURLBuilder
 from db_manager import DatabaseManager
+from db_metrics import fetch_snapshot
+from db_dashboard import Dashboard, Recorder, play
+from db_backup import DIRECTORY_IO_LIMIT_ERROR, BackupEngine, BackupSet, RateLimiter
+from db_incremental import BackupCatalog, PostgreSQLIncrementalBackup
+from db_backfill import Backfill, checkpoint_path, format_duration, list_checkpoints, replica_config
 from db_utils import (
     DatabaseUtils,
     DatabaseBackup,
@@ -41,11 +48,15 @@ def cmd_status(args) -> None:
     print_header("Database Status Check")
 
     manager = DatabaseManager()
-    status = manager.health_check()
+    details = manager.health_details()
+    status = {db: result["healthy"] for db, result in details.items()}
 
-    for db, is_connected in status.items():
-        symbol = "✅" if is_connected else "❌"
-        print(f"{symbol} {db.upper()}: {'Connected' if is_connected else 'Failed'}")
+    for db, result in details.items():
+        symbol = "✅" if result["healthy"] else "❌"
+        line = f"{symbol} {db.upper()}: {'Connected' if result['healthy'] else 'Failed'} ({result['latency_ms']}ms)"
+        if result["error"]:
+            line += f" - {result['error']}"
+        print(line)
 
     # Print detailed info
     if any(status.values()):
@@ -68,29 +79,110 @@ def cmd_config(args) -> None:
     DatabaseConfig.print_config(show_passwords=show_passwords)
 
 
+def print_backup_report(result: Dict) -> None:
+    """Print size, compression ratio and throughput of a backup"""
+    size = DatabaseUtils.format_db_size(result["compressed_bytes"])
+    print(f"✅ Backup created: {result['path']}")
+    if result.get("raw_bytes") is not None:
+        print(
+            f"  Size: {DatabaseUtils.format_db_size(result['raw_bytes'])} -> {size} "
+            f"({result['compression']}, ratio {result['ratio']}x)"
+        )
+    else:
+        print(f"  Size: {size} ({result['compression']})")
+    print(f"  Time: {result['elapsed']}s ({result['mb_per_second']} MB/s, {result['chunks']} chunks)")
+    if result.get("keys") is not None:
+        print(f"  Keys: {result['keys']}")
+    print(f"  Manifest: {result['manifest']}")
+
+
+def cmd_backup_all(args) -> None:
+    """Back up every database concurrently as one set"""
+    print_header("Backing up all databases")
+
+    try:
+        backup_set = BackupSet(
+            databases=parse_databases(args.databases),
+            parallel=args.parallel,
+            io_limit_mb=args.io_limit,
+            compression=args.compression,
+            level=args.level,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if args.keep is not None:
+        backup_set.retention_count = args.keep
+    result = backup_set.run(prune=not args.no_prune)
+
+    for backup in result["backups"]:
+        if backup["status"] == "ok":
+            size = DatabaseUtils.format_db_size(backup["compressed_bytes"])
+            print(f"  ✅ {backup['database']:<11} {backup['elapsed']:>8.1f}s  {size:>10}  {backup['path']}")
+        else:
+            print(f"  ❌ {backup['database']:<11} {backup['elapsed']:>8.1f}s  failed")
+    print(f"\n  Wall time:       {result['wall_time']:.1f}s")
+    print(f"  Sum of backups:  {result['sum_of_backups']:.1f}s ({result['speedup']}x from running concurrently)")
+    if result["snapshot_spread"] is not None:
+        print(f"  Snapshot spread: {result['snapshot_spread']}s")
+    print(f"  Set manifest:    {result['path']}")
+    if result["pruned"]:
+        print(f"  Pruned sets:     {', '.join(result['pruned'])}")
+    print(f"\n{'✅ Backup set complete' if result['status'] == 'complete' else '❌ Backup set is partial'}")
+
+
 def cmd_backup(args) -> None:
     """Create database backup"""
+    if args.all:
+        cmd_backup_all(args)
+        return
+
     print_header(f"Backing up {args.database}")
 
     db_type = args.database
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"backups/{db_type}/{db_type}_backup_{timestamp}.sql"
+    if args.incremental is not None:
+        if db_type != "postgresql":
+            print("❌ Incremental backups are only supported for PostgreSQL")
+            return
+        engine = BackupEngine(compression=args.compression, level=args.level, jobs=args.jobs)
+        result = PostgreSQLIncrementalBackup(engine=engine).backup(args.incremental or None, args.new_chain)
+        if result:
+            print(f"✅ {result['mode']} {result['kind']} backup in chain {result['chain']}: {result['path']}")
+            print(f"  Size: {DatabaseUtils.format_db_size(result['bytes'])}")
+            print(f"  Time: {result['elapsed']}s")
+            print(f"  Consistent up to: {result['until']}")
+        else:
+            print(f"❌ Backup failed")
+        return
 
+    if args.format == "directory" and db_type != "postgresql":
+        print("❌ Directory format is only supported for PostgreSQL")
+        return
+
+    engine = BackupEngine(
+        compression=args.compression,
+        level=args.level,
+        jobs=args.jobs,
+        rate_limiter=RateLimiter(args.io_limit * 1024 * 1024) if args.io_limit else None,
+    )
+    if args.format == "directory" and engine.rate_limiter is not None:
+        print(f"❌ {DIRECTORY_IO_LIMIT_ERROR} (or unset --io-limit / BACKUP_IO_LIMIT_MB)")
+        return
+    output_file = args.output or engine.output_path(db_type, args.format)
     if db_type == "mysql":
-        config = DatabaseConfig.get_mysql_config()
-        success = DatabaseBackup.backup_mysql(config, output_file)
+        result = engine.backup_mysql(DatabaseConfig.get_mysql_config(), output_file)
     elif db_type == "postgresql":
-        config = DatabaseConfig.get_postgresql_config()
-        success = DatabaseBackup.backup_postgresql(config, output_file)
+        result = engine.backup_postgresql(DatabaseConfig.get_postgresql_config(), output_file, args.format)
     elif db_type == "redis":
         redis_mgr = DatabaseManager().init_redis()
-        success = DatabaseBackup.backup_redis(redis_mgr.client, output_file)
+        result = engine.backup_redis(redis_mgr.client, output_file)
+        redis_mgr.close()
     else:
         print(f"❌ Unsupported database: {db_type}")
         return
 
-    if success:
-        print(f"✅ Backup created: {output_file}")
+    if result:
+        print_backup_report(result)
     else:
         print(f"❌ Backup failed")
 
@@ -102,34 +194,86 @@ def cmd_restore(args) -> None:
     db_type = args.database
     backup_file = args.file
 
+    if args.point_in_time or not backup_file:
+        if db_type != "postgresql":
+            print("❌ --file is required (point-in-time restores are PostgreSQL only)")
+            return
+        engine = BackupEngine(jobs=args.jobs)
+        result = PostgreSQLIncrementalBackup(engine=engine).restore(
+            args.point_in_time, target_db=args.target_db, data_dir=args.data_dir
+        )
+        if result:
+            print(f"✅ Restored {result['mode']} chain {result['chain']} to {result['restored_to']}")
+            print(f"  Increments applied: {result['increments']}")
+            print(f"  Time: {result['elapsed']}s")
+            if result.get("next_step"):
+                print(f"  Start the restored cluster with: {result['next_step']}")
+        else:
+            print(f"❌ Restore failed")
+        return
+
     if db_type == "mysql":
         config = DatabaseConfig.get_mysql_config()
-        success = DatabaseBackup.restore_from_backup(db_type, config, backup_file)
     elif db_type == "postgresql":
         config = DatabaseConfig.get_postgresql_config()
-        success = DatabaseBackup.restore_from_backup(db_type, config, backup_file)
     elif db_type == "redis":
         config = DatabaseConfig.get_redis_config()
-        success = DatabaseBackup.restore_from_backup(db_type, config, backup_file)
     else:
         print(f"❌ Unsupported database: {db_type}")
         return
 
+    success = DatabaseBackup.restore_from_backup(
+        db_type, config, backup_file, jobs=args.jobs, verify=not args.no_verify
+    )
     if success:
         print(f"✅ Database restored from: {backup_file}")
     else:
         print(f"❌ Restore failed")
 
 
+def cmd_catalog(args) -> None:
+    """List PostgreSQL base backups and their increments"""
+    print_header("Backup Catalog")
+
+    catalog = BackupCatalog()
+    if not catalog.chains:
+        print("  No incremental backups yet")
+        return
+    for chain in catalog.chains:
+        base = chain["base"]
+        print(f"  {chain['mode']} chain {chain['id']}")
+        print(f"    base        {base['until']}  {DatabaseUtils.format_db_size(base['bytes'])}")
+        for increment in chain["increments"]:
+            print(f"    increment   {increment['until']}  {DatabaseUtils.format_db_size(increment['bytes'])}")
+
+
+def cmd_verify(args) -> None:
+    """Verify a backup against its manifest"""
+    print_header("Verifying backup")
+
+    result = BackupEngine(jobs=args.jobs).verify(args.file)
+    if result["valid"]:
+        print(f"✅ {args.file}: {result['checked']} chunks/files OK")
+    else:
+        print(f"❌ {args.file} failed verification:")
+        for error in result["errors"][:20]:
+            print(f"  - {error}")
+
+
+def parse_databases(value: Optional[str]) -> Optional[List[str]]:
+    """Split a --databases list; None means the DB_WARMUP default"""
+    if not value:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
 def cmd_info(args) -> None:
     """Display database information"""
     print_header("Database Information")
 
-    manager = DatabaseManager()
-    manager.init_mysql()
-    manager.init_postgresql()
-    manager.init_redis()
-    manager.init_elasticsearch()
+    manager = DatabaseManager(warm_up=False)
+    live = manager.warm_up(parse_databases(args.databases), block=True, timeout=args.timeout)
+    print(f"🔌 Connected: {', '.join(live) or 'none'}")
 
     info = DatabaseMonitoring.get_database_info(manager)
     print(json.dumps(info, indent=2))
@@ -137,66 +281,646 @@ def cmd_info(args) -> None:
 
 def cmd_monitor(args) -> None:
     """Monitor database performance"""
+    if args.replay:
+        try:
+            play(args.replay, speed=args.speed)
+        except (OSError, ValueError) as e:
+            print(f"❌ Replay failed: {e}")
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.live or args.record:
+        run_dashboard(args)
+        return
+
     print_header("Database Monitoring")
 
-    manager = DatabaseManager()
-    manager.init_mysql()
-    manager.init_postgresql()
-    manager.init_redis()
-    manager.init_elasticsearch()
-
-    # Show slow queries
-    print("\n⏱️  Slow Queries (threshold: 1000ms):")
-    slow_queries = DatabaseMonitoring.monitor_slow_queries(manager)
-    if slow_queries:
-        for query in slow_queries[:5]:
-            print(f"  - {query['db']}: {query}")
+    manager = DatabaseManager(warm_up=False)
+    live = manager.warm_up(parse_databases(args.databases), block=True, timeout=args.timeout)
+    print(f"🔌 Connected: {', '.join(live) or 'none'}")
+
+    # Show the queries that consumed the most time (needs query-stats collect)
+    top_queries = DatabaseMonitoring.top_queries(hours=1, limit=5)
+    if top_queries:
+        print("\n📈 Top Queries by Total Time (last hour):")
+        print_top_queries(top_queries)
     else:
-        print("  ✅ No slow queries found")
-
-    # Show locks
-    print("\n🔒 Database Locks:")
-    locks = DatabaseMonitoring.check_database_locks(manager)
-    if locks:
-        for lock in locks[:5]:
-            print(f"  - {lock['db']}: {lock}")
+        print("\n⏱️  Slow Queries (threshold: 1000ms):")
+        slow_queries = DatabaseMonitoring.monitor_slow_queries(manager)
+        if slow_queries:
+            for query in slow_queries[:5]:
+                print(f"  - {query['db']}: {query}")
+        else:
+            print("  ✅ No slow queries found")
+        print("  💡 Run 'db_cli.py query-stats collect' for per-query time, calls and trends")
+
+    # Show latency as the application sees it (pool waits, network, driver)
+    source, series = fetch_snapshot(args.metrics_url)
+    print(f"\n📏 Client Latency ({source}):")
+    if series:
+        print_client_metrics(series[:8])
     else:
-        print("  ✅ No locks found")
+        print("  No calls recorded yet (DB_METRICS enables @timed on manager methods)")
+
+    # Show slow-query plans that look wrong (needs DB_EXPLAIN)
+    print("\n🧭 Plan Regressions (last 24h):")
+    regressions = DatabaseMonitoring.plan_regressions(hours=24, limit=5)
+    if regressions:
+        print_plans(regressions)
+        print("  💡 Run 'db_cli.py advise' for index proposals costed against the workload")
+    elif DatabaseConfig.get_explain_config()["enabled"]:
+        print("  ✅ No flagged plans")
+    else:
+        print("  💡 Set DB_EXPLAIN=true to capture EXPLAIN plans of slow queries")
+
+    # Show who blocks whom
+    print("\n🔒 Lock Waits:")
+    graphs = [graph for graph in DatabaseMonitoring.lock_graphs(manager) if graph["waits"]]
+    if graphs:
+        print_lock_graphs(graphs)
+        print("  💡 Run 'db_cli.py locks --dry-run' to see what the cancel policy would do")
+    else:
+        print("  ✅ No lock waits")
 
     # Show stats
     print("\n📊 Statistics:")
-    if manager.redis:
+    if manager.is_live("redis"):
         stats = manager.redis.get_stats()
         print(f"  Redis Memory: {stats.get('memory_used')}")
         print(f"  Redis Clients: {stats.get('connected_clients')}")
-
-    if manager.elasticsearch:
+        pool = stats.get("pool") or {}
+        if pool:
+            print(
+                f"  Redis Pool: {pool['in_use']}/{pool['max_connections']} in use "
+                f"(peak {pool['peak_in_use']}, timeouts {pool['timeouts']}, "
+                f"avg wait {pool['avg_wait_ms']}ms)"
+            )
+
+    if manager.is_live("elasticsearch"):
         stats = manager.elasticsearch.get_stats()
         print(f"  ES Status: {stats.get('status')}")
         print(f"  ES Nodes: {stats.get('nodes')}")
 
 
+def run_dashboard(args) -> None:
+    """Refresh a live dashboard of every connected backend until Ctrl+C"""
+    manager = DatabaseManager(warm_up=False)
+    live = manager.warm_up(parse_databases(args.databases), block=True, timeout=args.timeout)
+    dashboard = Dashboard(manager, live, interval=args.interval, metrics_url=args.metrics_url)
+    recorder = Recorder(args.record, dashboard.interval) if args.record else None
+    try:
+        dashboard.run(duration=args.duration, recorder=recorder)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dashboard.close()
+        if recorder:
+            recorder.close()
+        manager.close_all()
+    if recorder:
+        print(f"\n💾 Recorded {recorder.samples} samples to {args.record}")
+        print(f"  💡 Replay with 'db_cli.py monitor --replay {args.record}'")
+
+
 def cmd_migrate(args) -> None:
-    """Create or run migrations"""
+    """Create, inspect or run migrations"""
     print_header("Database Migrations")
 
-    migration = DatabaseMigration()
+    if args.action in ("create", "list"):
+        migration = DatabaseMigration(args.dir)
+        if args.action == "create":
+            if not args.name:
+                print("❌ --name is required for create")
+            elif migration.create_migration(args.name, args.database_type):
+                print(f"✅ Migration created: {args.name}")
+            else:
+                print(f"❌ Failed to create migration")
+        else:
+            migrations = migration.get_migrations()
+            print(f"Found {len(migrations)} migrations:")
+            for m in migrations:
+                print(f"  - {m}")
+        return
+
+    if args.database_type not in ("mysql", "postgresql"):
+        print(f"❌ Migrations run on mysql or postgresql, not {args.database_type}")
+        return
+
+    manager = DatabaseManager(warm_up=False)
+    db = manager.mysql if args.database_type == "mysql" else manager.postgresql
+    if db is None:
+        print(f"❌ {args.database_type} is not available")
+        return
+
+    migration = DatabaseMigration(args.dir, manager=db, db_type=args.database_type)
+    try:
+        if args.action == "status":
+            icons = {"applied": "✅", "pending": "⏳", "changed": "⚠️ ", "missing": "❓"}
+            for m in migration.status():
+                mode = "" if m["transactional"] in (None, True) else " [no-transaction]"
+                applied_at = f" ({m['applied_at']})" if m["applied_at"] else ""
+                print(f"  {icons[m['state']]} {m['version']}: {m['state']}{mode}{applied_at}")
+
+        elif args.action == "run":
+            result = migration.run(target=args.target, dry_run=args.dry_run)
+            if args.dry_run:
+                print(f"{len(result['pending'])} pending migrations:")
+                for version in result["pending"]:
+                    print(f"  - {version}")
+            else:
+                for version in result["applied"]:
+                    print(f"✅ Applied {version}")
+                if not result["applied"] and not result["error"]:
+                    print("✅ Schema is up to date")
+            if result["error"]:
+                failed = f" ({result['failed']})" if result["failed"] else ""
+                print(f"❌ {result['error']}{failed}")
+    except Exception as e:
+        print(f"❌ {e}")
+    finally:
+        manager.close_all()
+
+
+def cmd_backfill(args) -> None:
+    """Run, inspect or reset batched backfills"""
+    print_header("Backfill")
+
+    if args.action == "status":
+        checkpoints = list_checkpoints(args.dir)
+        if not checkpoints:
+            print("No backfills")
+        for state in checkpoints:
+            progress = Backfill.progress(state)
+            done = "done" if state.get("done") else f"{progress:.1%}" if progress is not None else "running"
+            print(
+                f"  {state['name']}: {state['table']} SET {state['set']} — {done}, "
+                f"{state['rows']} rows in {state['batches']} batches "
+                f"(last {state['key']}={state['last_key']} of {state['max_key']}, updated {state['updated_at']})"
+            )
+        return
+
+    if not args.name:
+        print("❌ --name is required")
+        return
+
+    if args.action == "reset":
+        path = checkpoint_path(args.name, args.dir)
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"✅ Checkpoint removed: {path}")
+        else:
+            print(f"No checkpoint for {args.name}")
+        return
+
+    if not args.table or not args.set:
+        print("❌ --table and --set are required for run")
+        return
+
+    manager = DatabaseManager(warm_up=False)
+    db = manager.mysql if args.database_type == "mysql" else manager.postgresql
+    if db is None:
+        print(f"❌ {args.database_type} is not available")
+        return
+
+    # MySQL lag is read on a replica; without one the run cannot throttle on it
+    replica = None
+    replica_spec = args.replica or DatabaseConfig.get_backfill_config()["replica"]
+    if args.database_type == "mysql" and replica_spec:
+        from db_manager import MySQLManager
+
+        try:
+            replica = MySQLManager(replica_config(replica_spec))
+        except ValueError as e:
+            print(f"❌ {e}")
+            manager.close_all()
+            return
+        if not replica.connect():
+            print(f"❌ Could not connect to replica {replica_spec}")
+            manager.close_all()
+            return
+    elif args.database_type == "mysql":
+        print("⚠️  No --replica given: MySQL replication lag will not be checked")
+
+    backfill = Backfill(
+        args.name,
+        db,
+        args.table,
+        args.set,
+        where=args.where,
+        key=args.key,
+        db_type=args.database_type,
+        replica=replica,
+        batch_size=args.batch_size,
+        target_ms=args.target_ms,
+        max_lag=args.max_lag,
+        checkpoint_dir=args.dir,
+    )
+    last_print = [0.0]
+
+    def on_progress(state: Dict) -> None:
+        now = time.time()
+        if now - last_print[0] < args.interval and not state["done"]:
+            return
+        last_print[0] = now
+        progress = f"{state['progress']:6.1%}" if state["progress"] is not None else "     ?"
+        print(
+            f"  {progress} | {state['rows']:,} rows | {state['rows_per_second']:,.0f} rows/s | "
+            f"batch {state['batch_size']} ({state['last_batch_ms']}ms) | "
+            f"lag {state['replication_lag']}s | ETA {format_duration(state['eta_seconds'])}"
+        )
+
+    try:
+        result = backfill.run(max_seconds=args.max_time, on_progress=on_progress)
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted; run again with --name {args.name} to resume")
+        return
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        return
+    finally:
+        if replica is not None:
+            replica.close()
+        manager.close_all()
+
+    if result["done"]:
+        print(
+            f"✅ {result['rows']:,} rows in {result['batches']} batches "
+            f"({format_duration(result['elapsed_seconds'])} this run)"
+        )
+    else:
+        print(f"⏸️  Paused at {result['key']}={result['last_key']}; run again to resume")
+
+
+def print_client_metrics(series: List[Dict], width: int = 60) -> None:
+    """Print latency percentiles per backend, operation and label"""
+    for s in series:
+        name = f"{s['backend']}.{s['operation']}"
+        if s["label"]:
+            name += f" [{s['label']}]"
+        print(
+            f"  - {name}: {s['count']:,} calls, p50 {s['p50_ms']}ms, p95 {s['p95_ms']}ms, "
+            f"p99 {s['p99_ms']}ms, max {s['max_ms']}ms, {s['errors']} errors, {s['rows']:,} rows"
+        )
+        if s.get("query"):
+            text = s["query"] if len(s["query"]) <= width else s["query"][: width - 1] + "…"
+            print(f"      {text}")
+
+
+def print_top_queries(queries: List[Dict], width: int = 90) -> None:
+    """Print ranked query shapes"""
+    for rank, q in enumerate(queries, 1):
+        text = " ".join((q["query"] or "").split())
+        if len(text) > width:
+            text = text[: width - 1] + "…"
+        hit = f", hit {q['hit_ratio']:.1%}" if q.get("hit_ratio") is not None else ""
+        share = f" ({q['percent_time']}%)" if "percent_time" in q else ""
+        print(
+            f"  {rank:>2}. [{q['db']} {q['fingerprint']}] {q['total_ms']:,.0f}ms{share}, "
+            f"{q['calls']:,} calls, {q['mean_ms']}ms avg, {q['rows']:,} rows{hit}"
+        )
+        print(f"      {text}")
+
+
+def cmd_query_stats(args) -> None:
+    """Snapshot and rank per-query statistics"""
+    from db_query_stats import QueryStats
+
+    print_header("Query Analytics")
+
+    stats = QueryStats(args.db_file)
+    try:
+        if args.action in ("snapshot", "collect"):
+            manager = DatabaseManager(warm_up=False)
+            databases = parse_databases(args.databases) or ("postgresql", "mysql")
+            databases = tuple(d for d in databases if d in ("postgresql", "mysql"))
+            live = manager.warm_up(databases, block=True, timeout=args.timeout)
+            print(f"🔌 Connected: {', '.join(live) or 'none'}")
+            try:
+                if args.action == "snapshot":
+                    for result in stats.snapshot(manager, databases):
+                        if "error" in result:
+                            print(f"❌ {result['db']}: {result['error']}")
+                        elif result["baseline"]:
+                            print(f"✅ {result['db']}: baseline of {result['entries']} entries recorded")
+                        else:
+                            print(
+                                f"✅ {result['db']}: {result['fingerprints']} active query shapes "
+                                f"over {result['interval_s']:.0f}s"
+                            )
+                else:
+                    print(f"📸 Snapshot every {args.interval or stats.config['interval']:.0f}s (Ctrl+C to stop)")
+                    stats.collect(manager, interval=args.interval, count=args.count, databases=databases)
+            except KeyboardInterrupt:
+                print("\n⏹️  Stopped")
+            finally:
+                manager.close_all()
+
+        elif args.action == "top":
+            since = time.time() - args.hours * 3600
+            queries = stats.top(db=args.database, since=since, limit=args.limit, order=args.order)
+            print(f"Top {len(queries)} query shapes by {args.order} (last {args.hours:g}h):")
+            print_top_queries(queries)
+
+        elif args.action == "trend":
+            if not args.fingerprint:
+                print("❌ --fingerprint is required for trend")
+                return
+            matches = stats.find(args.fingerprint)
+            if len(matches) != 1:
+                print(f"❌ {len(matches)} query shapes match {args.fingerprint}")
+                for match in matches[:10]:
+                    print(f"  {match['fingerprint']}: {match['query'][:80]}")
+                return
+            query = matches[0]
+            print(f"{query['db']} {query['fingerprint']}: {' '.join(query['query'].split())[:200]}\n")
+            bucket = "hour" if args.days <= 2 else "day"
+            fmt = "%Y-%m-%d %H:00" if bucket == "hour" else "%Y-%m-%d"
+            for point in stats.trend(query["fingerprint"], db=query["db"], days=args.days, bucket=bucket):
+                print(
+                    f"  {datetime.fromtimestamp(point['bucket_start']).strftime(fmt)}  "
+                    f"{point['calls']:>10,} calls  {point['total_ms']:>12,.0f}ms  {point['mean_ms']:>9}ms avg"
+                )
+
+        elif args.action == "prune":
+            print(f"✅ Removed {stats.prune(args.retention_days)} old deltas")
+    finally:
+        stats.close()
+
+
+def print_plans(plans: List[Dict], width: int = 90) -> None:
+    """Print captured plans with their regression flags"""
+    from db_explain import describe_flag
+
+    for plan in plans:
+        text = " ".join(plan["query"].split())
+        if len(text) > width:
+            text = text[: width - 1] + "…"
+        captured = datetime.fromtimestamp(plan["captured_at"]).strftime("%Y-%m-%d %H:%M")
+        print(f"  - [{plan['db']} {plan['fingerprint']}] {plan['duration_ms']:,.0f}ms at {captured}")
+        print(f"      {text}")
+        for flag in plan["flags"]:
+            print(f"      ⚠️  {describe_flag(flag)}")
+
+
+def cmd_explain(args) -> None:
+    """Inspect plans captured for slow queries, or explain one now"""
+    from db_explain import ExplainCapture, ExplainStore, describe_flag, format_plan, statement_kind
+
+    print_header("Query Plans")
+
+    store = ExplainStore(args.db_file)
+    try:
+        if args.action == "list":
+            since = time.time() - args.hours * 3600
+            plans = store.latest(db=args.database, since=since, limit=args.limit, flagged=args.flagged)
+            kind = "flagged plans" if args.flagged else "captured plans"
+            print(f"{len(plans)} {kind} (last {args.hours:g}h):")
+            print_plans(plans)
+
+        elif args.action == "show":
+            if not args.fingerprint:
+                print("❌ --fingerprint is required for show")
+                return
+            plans = store.history(args.fingerprint, db=args.database)
+            if len({(p["db"], p["fingerprint"]) for p in plans}) != 1:
+                print(f"❌ {len({(p['db'], p['fingerprint']) for p in plans})} query shapes match {args.fingerprint}")
+                return
+            latest = plans[0]
+            print(f"{latest['db']} {latest['fingerprint']}: {' '.join(latest['query'].split())[:200]}\n")
+            print(latest["plan"] if args.raw else format_plan(latest["nodes"]))
+            for flag in latest["flags"]:
+                print(f"⚠️  {describe_flag(flag)}")
+            print(f"\nCaptures ({len(plans)}):")
+            for plan in plans:
+                captured = datetime.fromtimestamp(plan["captured_at"]).strftime("%Y-%m-%d %H:%M:%S")
+                mode = "analyze" if plan["analyzed"] else "estimate"
+                print(
+                    f"  {captured}  {plan['duration_ms']:>9,.0f}ms  {mode:<8}  shape {plan['shape']}  "
+                    f"{len(plan['flags'])} flags"
+                )
+
+        elif args.action == "run":
+            if not args.query:
+                print("❌ --query is required for run")
+                return
+            kind = statement_kind(args.query)
+            if kind is None:
+                print("❌ Only SELECT/INSERT/UPDATE/DELETE statements can be explained")
+                return
+            manager = DatabaseManager(warm_up=False)
+            db = manager.mysql if args.database_type == "mysql" else manager.postgresql
+            if db is None:
+                print(f"❌ {args.database_type} is not available")
+                return
+            capture = ExplainCapture(db, args.database_type)
+            try:
+                started = time.perf_counter()
+                nodes, plan = capture.explain(args.query, analyze=kind == "read")
+                entry = store.record(
+                    args.database_type,
+                    DatabaseUtils.fingerprint_query(args.query),
+                    args.query,
+                    (time.perf_counter() - started) * 1000,
+                    nodes,
+                    plan,
+                    analyzed=kind == "read",
+                )
+            finally:
+                capture.close()
+                manager.close_all()
+            print(plan if args.raw else format_plan(nodes))
+            for flag in entry["flags"]:
+                print(f"⚠️  {describe_flag(flag)}")
+            if not entry["flags"]:
+                print("✅ No seq scans of large tables or row-estimate misses")
+            print(f"\nStored as {args.database_type} {entry['fingerprint']}")
+    finally:
+        store.close()
+
+
+def cmd_locks(args) -> None:
+    """Show blocking chains and apply the cancel policy to root blockers"""
+    from db_locks import cancel_blockers
+
+    if not args.json:
+        print_header("Lock Waits")
+
+    policy = DatabaseConfig.get_locks_config()
+    if args.after is not None:
+        policy["cancel_after"] = args.after
+    if args.action:
+        policy["action"] = args.action
+    apply_policy = args.cancel or args.dry_run or policy["cancel"]
+
+    manager = DatabaseManager(warm_up=False)
+    databases = parse_databases(args.databases) or ["postgresql", "mysql"]
+    manager.warm_up(databases, block=True, timeout=args.timeout)
+    try:
+        while True:
+            graphs = DatabaseMonitoring.lock_graphs(manager, databases)
+            actions = cancel_blockers(manager, graphs, policy, dry_run=args.dry_run) if apply_policy else []
+            if args.json:
+                print(json.dumps({"graphs": graphs, "actions": actions}, indent=2, default=str))
+            else:
+                if args.watch:
+                    print(f"\n⏱️  {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                waiting = [graph for graph in graphs if graph["waits"]]
+                if waiting:
+                    print_lock_graphs(waiting)
+                else:
+                    checked = ", ".join(graph["db"] for graph in graphs) or "no SQL backend connected"
+                    print(f"✅ No lock waits ({checked})")
+                if actions:
+                    print_lock_actions(actions, args.dry_run)
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.close_all()
+
+
+def print_lock_graphs(graphs: List[Dict]) -> None:
+    """Print root blockers with the sessions waiting behind them"""
+    from db_locks import format_lock_tree
+
+    for graph in graphs:
+        print(f"  {graph['db']}: {len(graph['waits'])} waiting, {len(graph['roots'])} root blockers")
+        for line in format_lock_tree(graph):
+            print(f"    {line}")
+
+
+def print_lock_actions(actions: List[Dict], dry_run: bool = False) -> None:
+    """Print what the cancel policy did (or would do) to each root blocker"""
+    print(f"\n🛑 Cancel policy{' (dry run)' if dry_run else ''}:")
+    for action in actions:
+        target = f"{action['db']} {action['id']}"
+        if action["skipped"]:
+            print(f"  - {target}: left alone, {action['skipped']}")
+            continue
+        verb = f"✅ {action['action']}" if action["done"] else f"would {action['action']}"
+        print(f"  - {target}: {verb} (blocking {action['blocked_count']} for {action['blocking_s']}s)")
+
+
+def print_advice(report: Dict, width: int = 90) -> None:
+    """Print an index advisor report"""
+    workload = report["workload"]
+    print(f"🔍 Missing Indexes ({workload['queries']} query shapes from {workload['source']}):")
+    if not report["missing"]:
+        print("  ✅ No missing indexes found")
+    for rank, proposal in enumerate(report["missing"], 1):
+        print(f"  {rank:>2}. {proposal['definition']}")
+        seq = f", {proposal['seq_scan_share']:.0%} of scans sequential" if proposal["seq_scan_share"] is not None else ""
+        print(
+            f"      serves {len(proposal['queries'])} query shapes, {proposal['calls']:,} calls, "
+            f"{proposal['total_ms']:,.0f}ms ({proposal['percent_time']}% of workload); "
+            f"{proposal['table']}: {proposal['table_rows']:,} rows{seq}"
+        )
+        estimate = proposal["estimate"]
+        if estimate:
+            print(
+                f"      hypothetical cost {estimate['cost_before']:,.0f} → {estimate['cost_after']:,.0f} "
+                f"({estimate['improvement']:.0%} lower), ~{estimate['saving_ms']:,.0f}ms saved, "
+                f"used by {estimate['queries_using']} queries"
+            )
+        if proposal["extends"]:
+            print(f"      makes {proposal['extends']} redundant (leading prefix)")
+        for line in proposal["evidence"]:
+            print(f"      {line}")
+        text = " ".join((proposal["queries"][0]["query"] or "").split())
+        print(f"      e.g. {text[: width - 1] + '…' if len(text) > width else text}")
+    if report["rejected"]:
+        print(f"  ({report['rejected']} more proposals dropped: the planner would not use them)")
+    if report["missing"] and not report["hypothetical"]:
+        print("  💡 Install hypopg (PostgreSQL) to cost proposals with hypothetical indexes")
+
+    since = report["stats_since"]
+    window = f"since {datetime.fromtimestamp(since).strftime('%Y-%m-%d')}" if since else "since stats reset"
+    print(f"\n🗑️  Unused Indexes (no scans {window}; check replicas before dropping):")
+    if not report["unused"]:
+        print("  ✅ No unused indexes")
+    for index in report["unused"]:
+        size = DatabaseUtils.format_db_size(index["size_bytes"]) if index["size_bytes"] is not None else "size n/a"
+        writes = f", table took {index['table_writes']:,} writes" if index["table_writes"] else ""
+        print(f"  - {index['name']} on {index['table']} ({', '.join(index['columns'])}): {size}{writes}")
+        print(f"      {index['drop']}")
+
+    print("\n♊ Duplicate Indexes:")
+    if not report["duplicates"]:
+        print("  ✅ No duplicate indexes")
+    for index in report["duplicates"]:
+        print(f"  - {index['name']} ({', '.join(index['columns'])}) is {index['reason']} {index['covered_by']}")
+        print(f"      {index['drop']}")
+
+
+def cmd_advise(args) -> None:
+    """Propose missing indexes and flag unused or duplicate ones"""
+    from db_advisor import IndexAdvisor
+
+    if not args.json:
+        print_header("Index Advisor")
+
+    manager = DatabaseManager(warm_up=False)
+    db = manager.mysql if args.database_type == "mysql" else manager.postgresql
+    if db is None:
+        print(f"❌ {args.database_type} is not available")
+        return
+    try:
+        advisor = IndexAdvisor(db, args.database_type)
+        report = advisor.advise(hours=args.hours, limit=args.limit, estimate=not args.no_estimate)
+    except Exception as e:
+        print(f"❌ Advisor failed: {e}")
+        return
+    finally:
+        manager.close_all()
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_advice(report)
+
 
-    if args.action == "create":
-        if migration.create_migration(args.name, args.database_type):
-            print(f"✅ Migration created: {args.name}")
+def cmd_index(args) -> None:
+    """Sync or query the leads/Tilda search index"""
+    from db_indexer import create_indexer
+
+    print_header("Search Index")
+
+    manager = DatabaseManager()
+    try:
+        indexer = create_indexer(manager)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+
+    if args.action == "sync":
+        sources = ("leads", "tilda") if args.source == "all" else (args.source,)
+        results = indexer.sync(sources=sources, full=args.full)
+        if "error" in results:
+            print(f"❌ {results['error']}")
+        for source, summary in results.items():
+            if not isinstance(summary, dict):
+                continue
+            if "error" in summary:
+                print(f"❌ {source}: {summary['error']}")
+            else:
+                print(f"✅ {source}: {summary}")
+
+    elif args.action == "search":
+        if not args.query:
+            print("❌ --query is required for search")
         else:
-            print(f"❌ Failed to create migration")
+            response = indexer.search_text(args.query, size=args.size)
+            print(f"{response['total']} results in {response['took_ms']}ms")
+            for result in response["results"]:
+                label = result.get("name") or result.get("title") or result.get("email")
+                print(f"  [{result['_type']}] {label} (score {result['_score']})")
 
-    elif args.action == "list":
-        migrations = migration.get_migrations()
-        print(f"Found {len(migrations)} migrations:")
-        for m in migrations:
-            print(f"  - {m}")
+    elif args.action == "status":
+        print(json.dumps(indexer.get_status(), indent=2, default=str))
 
-    elif args.action == "run":
-        print("⚠️  Migration execution not yet implemented")
-        print("Use migration files with database CLI tools")
+    manager.close_all()
 
 
 def cmd_init(args) -> None:
@@ -208,8 +932,6 @@ def cmd_init(args) -> None:
     print("✅ Created .env file")
 
     # Create directories
-    import os
-
     dirs = ["backups/mysql", "backups/postgresql", "backups/redis", "logs", "migrations"]
     for dir_path in dirs:
         os.makedirs(dir_path, exist_ok=True)
@@ -292,15 +1014,60 @@ Examples:
   
   # Create backup
   python db_cli.py backup --database mysql
+
+  # Parallel PostgreSQL backup (pg_dump -Fd -j 8, zstd)
+  python db_cli.py backup --database postgresql --format directory --jobs 8
+
+  # Back up every database at once, throttled to 50 MB/s, keeping 7 sets
+  python db_cli.py backup --all --io-limit 50 --keep 7
+
+  # Nightly increment, then restore a point in time into a new database
+  python db_cli.py backup --database postgresql --incremental logical
+  python db_cli.py restore --database postgresql --point-in-time "2024-05-01 12:00" --target-db moai_restore
   
   # Display configuration
   python db_cli.py config
   
   # Monitor databases
   python db_cli.py monitor
+
+  # Monitor only the backends you use (others are never connected)
+  python db_cli.py monitor --databases postgresql,redis
+
+  # Client-side latency (p50/p95/p99) from another app instance
+  python db_cli.py monitor --metrics-url http://app-1:8888/metrics
+
+  # Live dashboard every 2s, recording an hour of samples for later replay
+  python db_cli.py monitor --live --interval 2 --record monitor.jsonl.gz --duration 3600
+  python db_cli.py monitor --replay monitor.jsonl.gz --speed 10
   
   # Test connection
   python db_cli.py test --database postgresql
+
+  # Apply pending migrations (one transaction each, checksums recorded)
+  python db_cli.py migrate run --database-type postgresql
+
+  # Backfill a new column in throttled batches (Ctrl+C and re-run to resume)
+  python db_cli.py backfill run --name status_norm --table leads --set "status_norm = lower(status)"
+
+  # Snapshot query statistics every 5 minutes, then rank by time consumed
+  python db_cli.py query-stats collect
+  python db_cli.py query-stats top --hours 24
+
+  # Plans captured for slow queries (DB_EXPLAIN=true), and one in detail
+  python db_cli.py explain list --flagged
+  python db_cli.py explain show --fingerprint 88505f54
+
+  # Index advice from the observed workload (hypopg costs proposals)
+  python db_cli.py advise --database-type postgresql --hours 168
+
+  # Who blocks whom; what the cancel policy would do; enforce it every 30s
+  python db_cli.py locks
+  python db_cli.py locks --dry-run --after 120
+  python db_cli.py locks --cancel --action terminate --watch 30
+
+  # Sync leads and Tilda content into the search index
+  python db_cli.py index sync
         """,
     )
 
@@ -317,12 +1084,50 @@ Examples:
 
     # Backup command
     backup_parser = subparsers.add_parser("backup", help="Create backup")
-    backup_parser.add_argument(
+    backup_target = backup_parser.add_mutually_exclusive_group(required=True)
+    backup_target.add_argument(
         "--database",
         choices=["mysql", "postgresql", "redis"],
-        required=True,
         help="Database to backup",
     )
+    backup_target.add_argument(
+        "--all", action="store_true", help="Back up MySQL, PostgreSQL and Redis concurrently as one set"
+    )
+    backup_parser.add_argument("--databases", help="With --all: comma-separated subset")
+    backup_parser.add_argument(
+        "--parallel", type=int, help="With --all: databases backed up at once (default: BACKUP_PARALLEL)"
+    )
+    backup_parser.add_argument(
+        "--io-limit", type=float, help="Cap on dump read rate in MB/s across all backups (default: BACKUP_IO_LIMIT_MB)"
+    )
+    backup_parser.add_argument("--keep", type=int, help="With --all: complete sets to keep (default: BACKUP_RETENTION_COUNT)")
+    backup_parser.add_argument("--no-prune", action="store_true", help="With --all: skip retention pruning")
+    backup_parser.add_argument(
+        "--compression",
+        choices=["zstd", "gzip", "none"],
+        help="Compression codec (default: BACKUP_COMPRESSION)",
+    )
+    backup_parser.add_argument("--level", type=int, help="Compression level (default: codec default)")
+    backup_parser.add_argument(
+        "--jobs", type=int, help="Compression threads / pg_dump jobs (default: BACKUP_JOBS or CPU count)"
+    )
+    backup_parser.add_argument(
+        "--format",
+        choices=["plain", "directory"],
+        default=DatabaseConfig.get_backup_config()["format"],
+        help="plain: streamed SQL dump; directory: parallel pg_dump -Fd (PostgreSQL)",
+    )
+    backup_parser.add_argument("--output", help="Backup path (default: BACKUP_DIR/<database>/...)")
+    backup_parser.add_argument(
+        "--incremental",
+        nargs="?",
+        const="",
+        choices=["", "wal", "logical"],
+        help="PostgreSQL increment on the latest chain (default mode: BACKUP_INCREMENTAL_MODE)",
+    )
+    backup_parser.add_argument(
+        "--new-chain", action="store_true", help="Start a new chain with a base backup"
+    )
 
     # Restore command
     restore_parser = subparsers.add_parser("restore", help="Restore from backup")
@@ -332,23 +1137,188 @@ Examples:
         required=True,
         help="Database to restore",
     )
-    restore_parser.add_argument("--file", required=True, help="Backup file path")
+    restore_parser.add_argument("--file", help="Backup file path (omit for a point-in-time restore)")
+    restore_parser.add_argument(
+        "--point-in-time", help="PostgreSQL: restore the catalog to this time (ISO 8601, default latest)"
+    )
+    restore_parser.add_argument("--target-db", help="Logical restores: database to restore into")
+    restore_parser.add_argument("--data-dir", help="WAL restores: empty directory for the restored cluster")
+    restore_parser.add_argument(
+        "--jobs", type=int, help="Decompression threads / pg_restore jobs (default: BACKUP_JOBS or CPU count)"
+    )
+    restore_parser.add_argument(
+        "--no-verify", action="store_true", help="Skip checking the backup against its manifest"
+    )
+
+    # Catalog command
+    subparsers.add_parser("catalog", help="List incremental PostgreSQL backups")
+
+    # Verify command
+    verify_parser = subparsers.add_parser("verify", help="Verify a backup against its manifest")
+    verify_parser.add_argument("--file", required=True, help="Backup file or directory")
+    verify_parser.add_argument("--jobs", type=int, help="Hashing threads")
 
     # Info command
-    subparsers.add_parser("info", help="Display database information")
+    info_parser = subparsers.add_parser("info", help="Display database information")
 
     # Monitor command
-    subparsers.add_parser("monitor", help="Monitor database performance")
+    monitor_parser = subparsers.add_parser("monitor", help="Monitor database performance")
+    for connect_parser in (info_parser, monitor_parser):
+        connect_parser.add_argument(
+            "--databases", help="Comma-separated backends to connect (default: DB_WARMUP or all)"
+        )
+        connect_parser.add_argument(
+            "--timeout", type=float, help="Seconds to wait for connections (default: DB_WARMUP_TIMEOUT)"
+        )
+    monitor_parser.add_argument(
+        "--metrics-url", help="Client latency endpoint of the running app (default: DB_METRICS_URL)"
+    )
+    monitor_parser.add_argument(
+        "--live", action="store_true", help="Refresh a dashboard every interval until Ctrl+C"
+    )
+    monitor_parser.add_argument(
+        "--interval", type=float, help="Seconds between live samples (default: DB_DASHBOARD_INTERVAL)"
+    )
+    monitor_parser.add_argument(
+        "--duration", type=float, help="Stop the live dashboard after this many seconds"
+    )
+    monitor_parser.add_argument(
+        "--record", metavar="FILE", help="Also write live samples to FILE (.gz compresses; implies --live)"
+    )
+    monitor_parser.add_argument("--replay", metavar="FILE", help="Play back a --record file")
+    monitor_parser.add_argument(
+        "--speed", type=float, default=1.0, help="Replay speed multiplier (0 = no delay)"
+    )
 
     # Migrate command
     migrate_parser = subparsers.add_parser("migrate", help="Manage migrations")
     migrate_parser.add_argument(
         "action",
-        choices=["create", "list", "run"],
+        choices=["create", "list", "status", "run"],
         help="Migration action",
     )
     migrate_parser.add_argument("--name", help="Migration name")
     migrate_parser.add_argument("--database-type", default="postgresql", help="Database type")
+    migrate_parser.add_argument("--dir", help="Migrations directory (default: MIGRATIONS_DIR)")
+    migrate_parser.add_argument("--target", help="run: stop after this version")
+    migrate_parser.add_argument(
+        "--dry-run", action="store_true", help="run: list pending migrations without applying them"
+    )
+
+    # Backfill command
+    backfill_parser = subparsers.add_parser("backfill", help="Batched, resumable UPDATE of a large table")
+    backfill_parser.add_argument("action", choices=["run", "status", "reset"], help="Backfill action")
+    backfill_parser.add_argument("--name", help="Backfill name (checkpoint file)")
+    backfill_parser.add_argument("--table", help="Table to update")
+    backfill_parser.add_argument("--set", help='SET clause, e.g. "status_norm = lower(status)"')
+    backfill_parser.add_argument("--where", help='Extra filter, e.g. "status_norm IS NULL"')
+    backfill_parser.add_argument("--key", default="id", help="Primary key column (default: id)")
+    backfill_parser.add_argument(
+        "--database-type",
+        choices=["mysql", "postgresql"],
+        default=DatabaseConfig.DATABASE_SELECTION["primary"],
+        help="Database (default: PRIMARY_DB)",
+    )
+    backfill_parser.add_argument("--batch-size", type=int, help="Initial rows per batch")
+    backfill_parser.add_argument("--target-ms", type=float, help="Batch latency to stay under")
+    backfill_parser.add_argument("--max-lag", type=float, help="Replica lag (s) that halves batches and pauses")
+    backfill_parser.add_argument(
+        "--replica", help="MySQL replica to read lag from: host[:port] or mysql:// DSN (default: BACKFILL_REPLICA)"
+    )
+    backfill_parser.add_argument("--max-time", type=float, help="Stop after this many seconds (resumable)")
+    backfill_parser.add_argument("--interval", type=float, default=2.0, help="Seconds between progress lines")
+    backfill_parser.add_argument("--dir", help="Checkpoint directory (default: BACKFILL_DIR)")
+
+    # Query stats command
+    query_stats_parser = subparsers.add_parser(
+        "query-stats", help="Snapshot and rank pg_stat_statements / MySQL digest statistics"
+    )
+    query_stats_parser.add_argument(
+        "action", choices=["snapshot", "collect", "top", "trend", "prune"], help="Query stats action"
+    )
+    query_stats_parser.add_argument("--databases", help="snapshot/collect: postgresql,mysql (default: both)")
+    query_stats_parser.add_argument("--timeout", type=float, help="Seconds to wait for connections")
+    query_stats_parser.add_argument("--interval", type=float, help="collect: seconds between snapshots")
+    query_stats_parser.add_argument("--count", type=int, help="collect: stop after this many snapshots")
+    query_stats_parser.add_argument("--database", choices=["postgresql", "mysql"], help="top: one database")
+    query_stats_parser.add_argument("--hours", type=float, default=24, help="top: window (default: 24)")
+    query_stats_parser.add_argument("--limit", type=int, default=10, help="top: number of queries")
+    query_stats_parser.add_argument(
+        "--order",
+        choices=["total_ms", "calls", "mean_ms", "rows", "rows_examined", "blks_read"],
+        default="total_ms",
+        help="top: ranking (default: total_ms)",
+    )
+    query_stats_parser.add_argument("--fingerprint", help="trend: fingerprint (or prefix) from top")
+    query_stats_parser.add_argument("--days", type=float, default=7, help="trend: days back (default: 7)")
+    query_stats_parser.add_argument("--retention-days", type=float, help="prune: keep this many days")
+    query_stats_parser.add_argument("--db-file", help="Analytics database (default: QUERY_STATS_DB)")
+
+    # Explain command
+    explain_parser = subparsers.add_parser("explain", help="Inspect EXPLAIN plans of slow queries")
+    explain_parser.add_argument("action", choices=["list", "show", "run"], help="Explain action")
+    explain_parser.add_argument("--database", choices=["postgresql", "mysql"], help="list/show: one database")
+    explain_parser.add_argument("--hours", type=float, default=24, help="list: window (default: 24)")
+    explain_parser.add_argument("--limit", type=int, default=20, help="list: number of plans")
+    explain_parser.add_argument("--flagged", action="store_true", help="list: only plans with regressions")
+    explain_parser.add_argument("--fingerprint", help="show: fingerprint (or prefix) from list")
+    explain_parser.add_argument("--raw", action="store_true", help="show/run: print the database's own output")
+    explain_parser.add_argument("--query", help="run: statement to explain (reads run with ANALYZE)")
+    explain_parser.add_argument(
+        "--database-type", choices=["postgresql", "mysql"], default="postgresql", help="run: database"
+    )
+    explain_parser.add_argument("--db-file", help="Plan database (default: DB_EXPLAIN_DB)")
+
+    # Advise command
+    advise_parser = subparsers.add_parser("advise", help="Propose missing indexes, flag unused/duplicate ones")
+    advise_parser.add_argument(
+        "--database-type", choices=["postgresql", "mysql"], default="postgresql", help="Database to analyse"
+    )
+    advise_parser.add_argument("--hours", type=float, help="Workload window (default: DB_ADVISOR_HOURS)")
+    advise_parser.add_argument("--limit", type=int, help="Query shapes analysed (default: DB_ADVISOR_MAX_QUERIES)")
+    advise_parser.add_argument("--no-estimate", action="store_true", help="Skip hypothetical-index costing")
+    advise_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    # Locks command
+    locks_parser = subparsers.add_parser("locks", help="Show who blocks whom, cancel long root blockers")
+    locks_parser.add_argument(
+        "--databases", help="Comma-separated SQL backends to analyse (default: postgresql,mysql)"
+    )
+    locks_parser.add_argument(
+        "--timeout", type=float, help="Seconds to wait for connections (default: DB_WARMUP_TIMEOUT)"
+    )
+    locks_parser.add_argument(
+        "--cancel", action="store_true", help="Apply the cancel policy now (default: DB_LOCK_CANCEL)"
+    )
+    locks_parser.add_argument(
+        "--dry-run", action="store_true", help="Show what the cancel policy would do without doing it"
+    )
+    locks_parser.add_argument(
+        "--action",
+        choices=["cancel", "terminate"],
+        help="Cancel the statement or end the session (default: DB_LOCK_CANCEL_ACTION)",
+    )
+    locks_parser.add_argument(
+        "--after",
+        type=float,
+        help="Act once the oldest wait behind a blocker reaches this many seconds (default: DB_LOCK_CANCEL_AFTER)",
+    )
+    locks_parser.add_argument("--watch", type=float, metavar="SECONDS", help="Repeat every SECONDS until Ctrl+C")
+    locks_parser.add_argument("--json", action="store_true", help="Print graphs and actions as JSON")
+
+    # Index command
+    index_parser = subparsers.add_parser("index", help="Manage the search index")
+    index_parser.add_argument(
+        "action",
+        choices=["sync", "search", "status"],
+        help="Index action",
+    )
+    index_parser.add_argument(
+        "--source", choices=["all", "leads", "tilda"], default="all", help="Source to sync"
+    )
+    index_parser.add_argument("--full", action="store_true", help="Ignore watermarks and reindex")
+    index_parser.add_argument("--query", help="Search text")
+    index_parser.add_argument("--size", type=int, default=10, help="Results to show")
 
     # Init command
     subparsers.add_parser("init", help="Initialize database environment")
@@ -373,12 +1343,28 @@ Examples:
         cmd_backup(args)
     elif args.command == "restore":
         cmd_restore(args)
+    elif args.command == "catalog":
+        cmd_catalog(args)
+    elif args.command == "verify":
+        cmd_verify(args)
     elif args.command == "info":
         cmd_info(args)
     elif args.command == "monitor":
         cmd_monitor(args)
     elif args.command == "migrate":
         cmd_migrate(args)
+    elif args.command == "backfill":
+        cmd_backfill(args)
+    elif args.command == "query-stats":
+        cmd_query_stats(args)
+    elif args.command == "explain":
+        cmd_explain(args)
+    elif args.command == "advise":
+        cmd_advise(args)
+    elif args.command == "locks":
+        cmd_locks(args)
+    elif args.command == "index":
+        cmd_index(args)
     elif args.command == "init":
         cmd_init(args)
     elif args.command == "test":
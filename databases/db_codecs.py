@@ -0,0 +1,342 @@
+# Redis Value Codecs
+# Pluggable serialization and compression for RedisManager values
+#
+# Stored format:
+#   v0  plain JSON text (no header) - written by older releases and by the
+#       default json codec when the value is not compressed
+#   v1  MAGIC | version | codec id | compression id | payload
+#
+# The codec id in a value's header is not trusted on its own: codecs that
+# run code while decoding (pickle) are used only when enabled explicitly
+# (allow_pickle / REDIS_ALLOW_PICKLE) and only for values under a key whose
+# namespace is configured for that codec.
+
+import json
+import pickle
+import struct
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# 0xFF never appears in UTF-8, so JSON text can't start with the magic
+MAGIC = b"\xffMO"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<3sBBB")
+
+
+class JSONCodec:
+    """JSON serialization (compatible with values written before codecs)"""
+
+    name = "json"
+    codec_id = 1
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a value"""
+        return json.dumps(value).encode("utf-8")
+
+    def decode(self, payload: bytes) -> Any:
+        """Decode a payload"""
+        return json.loads(bytes(payload))
+
+
+class MsgpackCodec:
+    """MessagePack serialization (compact, fast for dicts and numbers)"""
+
+    name = "msgpack"
+    codec_id = 2
+
+    def __init__(self):
+        import msgpack
+
+        self.msgpack = msgpack
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a value"""
+        return self.msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Any:
+        """Decode a payload"""
+        return self.msgpack.unpackb(payload, raw=False)
+
+
+class PickleCodec:
+    """Pickle protocol 5 with out-of-band buffers (numpy arrays, bytes-like)
+
+    Unpickling runs code, so the codec is off unless allow_pickle is set.
+    """
+
+    name = "pickle"
+    codec_id = 3
+    runs_code = True
+    COUNT = struct.Struct("<I")
+    LENGTH = struct.Struct("<Q")
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a value, appending out-of-band buffers after the pickle"""
+        buffers = []
+        data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        raws = [buffer.raw() for buffer in buffers]
+        parts = [self.COUNT.pack(len(raws) + 1), self.LENGTH.pack(len(data))]
+        parts.extend(self.LENGTH.pack(raw.nbytes) for raw in raws)
+        parts.append(data)
+        parts.extend(raws)
+        return b"".join(parts)
+
+    def decode(self, payload: bytes) -> Any:
+        """Decode a payload, passing buffers as zero-copy views"""
+        view = memoryview(payload)
+        (count,) = self.COUNT.unpack_from(view, 0)
+        offset = self.COUNT.size
+        lengths = []
+        for _ in range(count):
+            lengths.append(self.LENGTH.unpack_from(view, offset)[0])
+            offset += self.LENGTH.size
+        frames = []
+        for length in lengths:
+            frames.append(view[offset : offset + length])
+            offset += length
+        return pickle.loads(frames[0], buffers=frames[1:])
+
+
+class ZlibCompressor:
+    """zlib compression (standard library)"""
+
+    name = "zlib"
+    compression_id = 1
+
+    def __init__(self, level: Optional[int] = None):
+        import zlib
+
+        self.zlib = zlib
+        self.level = 6 if level is None else level
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress data"""
+        return self.zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress data"""
+        return self.zlib.decompress(data)
+
+
+class ZstdCompressor:
+    """Zstandard compression (requires zstandard)"""
+
+    name = "zstd"
+    compression_id = 2
+
+    def __init__(self, level: Optional[int] = None):
+        import zstandard
+
+        self.compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        self.decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress data"""
+        return self.compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress data"""
+        return self.decompressor.decompress(data)
+
+
+class LZ4Compressor:
+    """LZ4 frame compression (requires lz4)"""
+
+    name = "lz4"
+    compression_id = 3
+
+    def __init__(self, level: Optional[int] = None):
+        import lz4.frame
+
+        self.lz4 = lz4.frame
+        self.level = 0 if level is None else level
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress data"""
+        return self.lz4.compress(data, compression_level=self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress data"""
+        return self.lz4.decompress(data)
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec, MsgpackCodec, PickleCodec)}
+COMPRESSORS = {c.name: c for c in (ZlibCompressor, ZstdCompressor, LZ4Compressor)}
+
+
+def register_codec(codec_class) -> None:
+    """Register a custom codec class (needs name, codec_id, encode, decode)"""
+    CODECS[codec_class.name] = codec_class
+
+
+def parse_namespaces(spec: str) -> Dict[str, str]:
+    """Parse 'prefix=codec[+compression],...' into a prefix mapping"""
+    namespaces = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            prefix, codec = item.rsplit("=", 1)
+            namespaces[prefix.strip()] = codec.strip()
+    return namespaces
+
+
+class ValueSerializer:
+    """Encode/decode Redis values with a codec selected by key namespace"""
+
+    def __init__(
+        self,
+        default_codec: str = "json",
+        namespaces: Optional[Dict[str, str]] = None,
+        compression: Optional[str] = None,
+        compression_threshold: int = 1024,
+        compression_level: Optional[int] = None,
+        allow_pickle: bool = False,
+    ):
+        """Initialize serializer
+
+        allow_pickle enables codecs that run code when decoding; without it
+        namespaces configured for pickle fall back to json.
+        """
+        self.allow_pickle = allow_pickle
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self._codecs = {}
+        self._compressors = {}
+        self.default = self._resolve(default_codec, compression)
+        # Longest prefix wins
+        self.rules = sorted(
+            ((prefix, self._resolve(*self._split(spec, compression)))
+             for prefix, spec in (namespaces or {}).items()),
+            key=lambda rule: len(rule[0]),
+            reverse=True,
+        )
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "ValueSerializer":
+        """Build a serializer from a Redis config dict"""
+        namespaces = config.get("codec_namespaces") or {}
+        if isinstance(namespaces, str):
+            namespaces = parse_namespaces(namespaces)
+        return cls(
+            default_codec=config.get("codec", "json"),
+            namespaces=namespaces,
+            compression=config.get("compression"),
+            compression_threshold=config.get("compression_threshold", 1024),
+            compression_level=config.get("compression_level"),
+            allow_pickle=config.get("allow_pickle", False),
+        )
+
+    @staticmethod
+    def _split(spec: str, compression: Optional[str]) -> Tuple[str, Optional[str]]:
+        """Split 'codec+compression' into its parts"""
+        if "+" in spec:
+            codec, compression = spec.split("+", 1)
+            return codec, compression
+        return spec, compression
+
+    def _get_codec(self, name: str):
+        """Instantiate a codec once, falling back to JSON if unavailable"""
+        if name not in self._codecs:
+            try:
+                codec_class = CODECS[name]
+                if getattr(codec_class, "runs_code", False) and not self.allow_pickle:
+                    raise ImportError("decoding runs code; set REDIS_ALLOW_PICKLE=true to enable")
+                self._codecs[name] = codec_class()
+            except (KeyError, ImportError) as e:
+                logger.warning(f"⚠️  Codec '{name}' unavailable ({e}), using json")
+                self._codecs[name] = self._get_codec("json") if name != "json" else JSONCodec()
+        return self._codecs[name]
+
+    def _get_compressor(self, name: Optional[str]):
+        """Instantiate a compressor once; None disables compression"""
+        if not name or name == "none":
+            return None
+        if name not in self._compressors:
+            try:
+                self._compressors[name] = COMPRESSORS[name](self.compression_level)
+            except (KeyError, ImportError) as e:
+                logger.warning(f"⚠️  Compression '{name}' unavailable ({e}), disabled")
+                self._compressors[name] = None
+        return self._compressors[name]
+
+    def _resolve(self, codec: str, compression: Optional[str]) -> Tuple:
+        """Resolve names to (codec, compressor) instances"""
+        return self._get_codec(codec), self._get_compressor(compression)
+
+    def select(self, key: str) -> Tuple:
+        """Get the (codec, compressor) pair for a key"""
+        for prefix, pair in self.rules:
+            if key.startswith(prefix):
+                return pair
+        return self.default
+
+    def dumps(self, key: str, value: Any) -> bytes:
+        """Serialize a value for a key"""
+        codec, compressor = self.select(key)
+        payload = codec.encode(value)
+        compression_id = 0
+        if compressor is not None and len(payload) >= self.compression_threshold:
+            payload = compressor.compress(payload)
+            compression_id = compressor.compression_id
+        if codec.codec_id == JSONCodec.codec_id and not compression_id:
+            # Plain JSON stays readable by releases without codec support
+            return payload
+        return HEADER.pack(MAGIC, FORMAT_VERSION, codec.codec_id, compression_id) + payload
+
+    def loads(self, key: str, raw: Optional[bytes]) -> Optional[Any]:
+        """Deserialize a value stored under key (v0 JSON or v1 framed)
+
+        Data-only codecs decode whatever the header names; a codec that
+        runs code is refused unless it is the one configured for key.
+        """
+        if not raw:
+            return None
+        if isinstance(raw, str):
+            return json.loads(raw)
+        if not raw.startswith(MAGIC):
+            return json.loads(raw)
+
+        _, version, codec_id, compression_id = HEADER.unpack_from(raw)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported value format version {version}")
+        codec = self._codec_by_id(codec_id)
+        if getattr(codec, "runs_code", False) and self.select(key)[0] is not codec:
+            raise ValueError(f"Refusing {codec.name} value for key {key!r}: not a {codec.name} namespace")
+        payload = memoryview(raw)[HEADER.size :]
+        if compression_id:
+            payload = self._compressor_by_id(compression_id).decompress(payload)
+        return codec.decode(payload)
+
+    def _codec_by_id(self, codec_id: int):
+        """Find a codec instance by wire id"""
+        for name, codec_class in CODECS.items():
+            if codec_class.codec_id == codec_id:
+                codec = self._get_codec(name)
+                if codec.codec_id != codec_id:
+                    raise ValueError(f"Codec '{name}' is not installed")
+                return codec
+        raise ValueError(f"Unknown codec id {codec_id}")
+
+    def _compressor_by_id(self, compression_id: int):
+        """Find a compressor instance by wire id"""
+        for name, compressor_class in COMPRESSORS.items():
+            if compressor_class.compression_id == compression_id:
+                compressor = self._get_compressor(name)
+                if compressor is None:
+                    raise ValueError(f"Compression '{name}' is not installed")
+                return compressor
+        raise ValueError(f"Unknown compression id {compression_id}")
+
+    def describe(self) -> List[Dict]:
+        """Describe namespace rules for debugging"""
+        rules = [("*", self.default)] + self.rules
+        return [
+            {
+                "prefix": prefix,
+                "codec": codec.name,
+                "compression": compressor.name if compressor else None,
+            }
+            for prefix, (codec, compressor) in rules
+        ]
@@ -25,6 +25,7 @@ class DatabaseConfig:
         "pool_size": int(os.getenv("MYSQL_POOL_SIZE", 5)),
         "max_overflow": int(os.getenv("MYSQL_MAX_OVERFLOW", 10)),
         "pool_recycle": int(os.getenv("MYSQL_POOL_RECYCLE", 3600)),
+        "prepared_cache_size": int(os.getenv("MYSQL_PREPARED_CACHE_SIZE", 100)),
     }
 
     # PostgreSQL Configuration
@@ -38,6 +39,7 @@ class DatabaseConfig:
         "pool_size": int(os.getenv("POSTGRES_POOL_SIZE", 5)),
         "max_overflow": int(os.getenv("POSTGRES_MAX_OVERFLOW", 10)),
         "pool_recycle": int(os.getenv("POSTGRES_POOL_RECYCLE", 3600)),
+        "prepared_cache_size": int(os.getenv("POSTGRES_PREPARED_CACHE_SIZE", 100)),
         "connect_timeout": int(os.getenv("POSTGRES_TIMEOUT", 10)),
     }
 
@@ -52,10 +54,17 @@ class DatabaseConfig:
         "ssl_keyfile": os.getenv("REDIS_SSL_KEYFILE", None),
         "ssl_ca_certs": os.getenv("REDIS_SSL_CA_CERTS", None),
         "max_connections": int(os.getenv("REDIS_MAX_CONNECTIONS", 50)),
+        "pool_timeout": int(os.getenv("REDIS_POOL_TIMEOUT", 5)),
         "socket_keepalive": os.getenv("REDIS_KEEPALIVE", "true").lower() == "true",
         "socket_connect_timeout": int(os.getenv("REDIS_CONNECT_TIMEOUT", 5)),
         "socket_timeout": int(os.getenv("REDIS_SOCKET_TIMEOUT", 5)),
         "retry_on_timeout": os.getenv("REDIS_RETRY_ON_TIMEOUT", "true").lower() == "true",
+        "batch_size": int(os.getenv("REDIS_BATCH_SIZE", 500)),
+        "codec": os.getenv("REDIS_CODEC", "json"),
+        "codec_namespaces": os.getenv("REDIS_CODEC_NAMESPACES", ""),
+        "allow_pickle": os.getenv("REDIS_ALLOW_PICKLE", "false").lower() == "true",  # pickle runs code
+        "compression": os.getenv("REDIS_COMPRESSION", "none"),
+        "compression_threshold": int(os.getenv("REDIS_COMPRESSION_THRESHOLD", 1024)),
     }
 
     # ElasticSearch Configuration
@@ -76,13 +85,159 @@ class DatabaseConfig:
         "retry_on_timeout": os.getenv("ELASTICSEARCH_RETRY_ON_TIMEOUT", "true").lower() == "true",
         "min_delay_between_retrying": float(os.getenv("ELASTICSEARCH_MIN_DELAY", 0.1)),
         "max_delay_between_retrying": float(os.getenv("ELASTICSEARCH_MAX_DELAY", 10.0)),
+        "bulk_chunk_size": int(os.getenv("ELASTICSEARCH_BULK_CHUNK_SIZE", 500)),
+        "bulk_max_bytes": int(os.getenv("ELASTICSEARCH_BULK_MAX_BYTES", 10 * 1024 * 1024)),
+        "bulk_concurrency": int(os.getenv("ELASTICSEARCH_BULK_CONCURRENCY", 4)),
+        "bulk_max_retries": int(os.getenv("ELASTICSEARCH_BULK_MAX_RETRIES", 5)),
+    }
+
+    # Local Search Configuration (embedded SQLite FTS5 engine)
+    LOCAL_SEARCH_CONFIG = {
+        "path": os.getenv("LOCAL_SEARCH_PATH", "search.db"),
+        "tokenizer": os.getenv("LOCAL_SEARCH_TOKENIZER", "unicode61 remove_diacritics 2"),
+        "fallback": os.getenv("LOCAL_SEARCH_FALLBACK", "true").lower() == "true",
+    }
+
+    # Cache Layer Configuration (primary DB cached in Redis)
+    CACHE_LAYER_CONFIG = {
+        "namespace": os.getenv("CACHE_NAMESPACE", "cache"),
+        "default_ttl": int(os.getenv("CACHE_DEFAULT_TTL", 300)),
+        "table_ttls": os.getenv("CACHE_TABLE_TTLS", ""),
+        "negative_ttl": int(os.getenv("CACHE_NEGATIVE_TTL", 30)),
+        "lock_timeout": float(os.getenv("CACHE_LOCK_TIMEOUT", 5)),
+        "write_behind": os.getenv("CACHE_WRITE_BEHIND", "false").lower() == "true",
+        "write_behind_interval": float(os.getenv("CACHE_WRITE_BEHIND_INTERVAL", 1.0)),
+        "write_behind_batch": int(os.getenv("CACHE_WRITE_BEHIND_BATCH", 500)),
+    }
+
+    # Search Index Configuration (leads and Tilda content in the search database)
+    SEARCH_INDEX_CONFIG = {
+        "index_prefix": os.getenv("SEARCH_INDEX_PREFIX", "moai_"),
+        "state_file": os.getenv("SEARCH_INDEX_STATE", "search_index_state.json"),
+        "leads_table": os.getenv("SEARCH_LEADS_TABLE", "leads"),
+        "leads_key": os.getenv("SEARCH_LEADS_KEY", "id"),
+        "updated_column": os.getenv("SEARCH_UPDATED_COLUMN", "updated_at"),
+        "batch_size": int(os.getenv("SEARCH_SYNC_BATCH", 1000)),
+        "watermark_overlap": float(os.getenv("SEARCH_WATERMARK_OVERLAP", 60.0)),  # seconds re-read per sync
+        "tilda_public_key": os.getenv("TILDA_PUBLIC_KEY", None),
+        "tilda_secret_key": os.getenv("TILDA_SECRET_KEY", None),
+    }
+
+    # Backup Configuration
+    BACKUP_CONFIG = {
+        "dir": os.getenv("BACKUP_DIR", "backups"),
+        "compression": os.getenv("BACKUP_COMPRESSION", "zstd"),  # zstd, gzip or none
+        "level": int(os.getenv("BACKUP_COMPRESSION_LEVEL", 0)),  # 0 = codec default
+        "jobs": int(os.getenv("BACKUP_JOBS", 0)),  # 0 = CPU count
+        "chunk_size": int(os.getenv("BACKUP_CHUNK_SIZE", 16 * 1024 * 1024)),
+        "format": os.getenv("BACKUP_FORMAT", "plain"),  # plain or directory (PostgreSQL)
+        "redis_batch_size": int(os.getenv("BACKUP_REDIS_BATCH", 1000)),  # keys per DUMP/RESTORE pipeline
+        "incremental_mode": os.getenv("BACKUP_INCREMENTAL_MODE", "logical"),  # logical or wal
+        "incremental_tables": os.getenv("BACKUP_INCREMENTAL_TABLES", "leads"),  # table[:key[:updated_column]]
+        "key_column": os.getenv("BACKUP_KEY_COLUMN", "id"),
+        "updated_column": os.getenv("BACKUP_UPDATED_COLUMN", "updated_at"),
+        "watermark_overlap": float(os.getenv("BACKUP_WATERMARK_OVERLAP", 60.0)),  # seconds re-read per increment
+        "track_deletes": os.getenv("BACKUP_TRACK_DELETES", "true").lower() == "true",
+        "wal_slot": os.getenv("BACKUP_WAL_SLOT", "moai_backup"),
+        "parallel": int(os.getenv("BACKUP_PARALLEL", 3)),  # databases backed up at once by backup --all
+        "backend_jobs": os.getenv("BACKUP_BACKEND_JOBS", "postgresql=4,mysql=2,redis=2"),
+        "io_limit_mb": float(os.getenv("BACKUP_IO_LIMIT_MB", 0)),  # MB/s across all backups, 0 = unlimited
+        "low_priority": os.getenv("BACKUP_LOW_PRIORITY", "true").lower() == "true",  # nice / ionice
+        "retention_count": int(os.getenv("BACKUP_RETENTION_COUNT", 7)),  # complete sets to keep
+        "retention_days": float(os.getenv("BACKUP_RETENTION_DAYS", 0)),  # 0 = no age limit
+    }
+
+    # Migration Configuration
+    MIGRATION_CONFIG = {
+        "dir": os.getenv("MIGRATIONS_DIR", "./migrations"),
+        "table": os.getenv("MIGRATIONS_TABLE", "schema_migrations"),
+        "lock_timeout": float(os.getenv("MIGRATION_LOCK_TIMEOUT", 5.0)),  # seconds DDL waits for locks, 0 = server default
+        "batch_size": int(os.getenv("MIGRATION_BATCH_SIZE", 1000)),  # rows per {batch_size} backfill batch
+        "batch_sleep": float(os.getenv("MIGRATION_BATCH_SLEEP", 0.1)),  # seconds between batches
+    }
+
+    # Backfill Configuration (batched UPDATEs by primary-key range)
+    BACKFILL_CONFIG = {
+        "dir": os.getenv("BACKFILL_DIR", "backfills"),  # checkpoint files
+        "batch_size": int(os.getenv("BACKFILL_BATCH_SIZE", 1000)),  # initial rows per batch
+        "min_batch": int(os.getenv("BACKFILL_MIN_BATCH", 100)),
+        "max_batch": int(os.getenv("BACKFILL_MAX_BATCH", 50000)),
+        "batch_step": int(os.getenv("BACKFILL_BATCH_STEP", 500)),  # growth per fast batch
+        "target_ms": float(os.getenv("BACKFILL_TARGET_MS", 250)),  # slower batches halve the size
+        "max_lag": float(os.getenv("BACKFILL_MAX_LAG", 5.0)),  # replica seconds behind, 0 = ignore
+        "replica": os.getenv("BACKFILL_REPLICA", None),  # MySQL replica host[:port] or DSN for lag
+        "sleep": float(os.getenv("BACKFILL_SLEEP", 0.05)),  # pause between batches
+    }
+
+    # Query Analytics Configuration (pg_stat_statements / MySQL digest snapshots)
+    QUERY_STATS_CONFIG = {
+        "path": os.getenv("QUERY_STATS_DB", "query_stats.db"),  # SQLite file
+        "interval": float(os.getenv("QUERY_STATS_INTERVAL", 300)),  # seconds between snapshots
+        "retention_days": float(os.getenv("QUERY_STATS_RETENTION_DAYS", 30)),  # 0 = keep forever
+    }
+
+    # Client Metrics Configuration (latency histograms of manager calls)
+    METRICS_CONFIG = {
+        "enabled": os.getenv("DB_METRICS", "true").lower() == "true",
+        "max_series": int(os.getenv("DB_METRICS_MAX_SERIES", 500)),  # labels per operation, then "other"
+        "url": os.getenv("DB_METRICS_URL", "http://localhost:8888/metrics"),  # read by db_cli monitor
+    }
+
+    # Slow Query Plan Capture Configuration (sampled EXPLAIN ANALYZE)
+    EXPLAIN_CONFIG = {
+        "enabled": os.getenv("DB_EXPLAIN", "false").lower() == "true",
+        "path": os.getenv("DB_EXPLAIN_DB", "explain_plans.db"),  # SQLite file
+        "threshold_ms": float(os.getenv("DB_EXPLAIN_THRESHOLD_MS", 500)),
+        "sample_rate": float(os.getenv("DB_EXPLAIN_SAMPLE_RATE", 0.1)),  # of slow calls
+        "min_interval": float(os.getenv("DB_EXPLAIN_MIN_INTERVAL", 600)),  # seconds per fingerprint
+        "timeout_ms": int(os.getenv("DB_EXPLAIN_TIMEOUT_MS", 30000)),  # statement timeout for ANALYZE
+        "large_table_rows": int(os.getenv("DB_EXPLAIN_LARGE_TABLE_ROWS", 10000)),  # seq scan flag
+        "estimate_factor": float(os.getenv("DB_EXPLAIN_ESTIMATE_FACTOR", 10)),  # row-estimate miss flag
+    }
+
+    # Index Advisor Configuration (db_cli advise)
+    ADVISOR_CONFIG = {
+        "hours": float(os.getenv("DB_ADVISOR_HOURS", 168)),  # workload window from query analytics
+        "max_queries": int(os.getenv("DB_ADVISOR_MAX_QUERIES", 50)),  # top query shapes analysed
+        "min_table_rows": int(os.getenv("DB_ADVISOR_MIN_TABLE_ROWS", 10000)),  # smaller tables scan fine
+        "max_columns": int(os.getenv("DB_ADVISOR_MAX_COLUMNS", 3)),  # per proposed index
+    }
+
+    # Live Dashboard Configuration (db_cli monitor --live)
+    DASHBOARD_CONFIG = {
+        "interval": float(os.getenv("DB_DASHBOARD_INTERVAL", 2.0)),  # seconds between samples
+        "sample_timeout": float(os.getenv("DB_DASHBOARD_SAMPLE_TIMEOUT", 1.5)),  # per backend
+    }
+
+    # Lock-Wait Configuration (check_database_locks / db_cli locks)
+    LOCKS_CONFIG = {
+        "cancel": os.getenv("DB_LOCK_CANCEL", "false").lower() == "true",  # apply policy when checking
+        "action": os.getenv("DB_LOCK_CANCEL_ACTION", "cancel"),  # cancel (statement) or terminate (session)
+        "cancel_after": float(os.getenv("DB_LOCK_CANCEL_AFTER", 300)),  # seconds of the oldest wait behind it
+        "min_blocked": int(os.getenv("DB_LOCK_CANCEL_MIN_BLOCKED", 1)),  # sessions waiting behind it
+        "exclude_users": [
+            user.strip() for user in os.getenv("DB_LOCK_CANCEL_EXCLUDE_USERS", "").split(",") if user.strip()
+        ],
+    }
+
+    # Connection Configuration (lazy DatabaseManager backends)
+    CONNECTION_CONFIG = {
+        "warmup": os.getenv("DB_WARMUP", ""),  # e.g. "postgresql,redis" or "all"
+        "warmup_timeout": float(os.getenv("DB_WARMUP_TIMEOUT", 10.0)),
+        "retry_backoff": float(os.getenv("DB_RETRY_BACKOFF", 30.0)),  # after a failed connect
+    }
+
+    # Health Check Configuration
+    HEALTH_CHECK_CONFIG = {
+        "timeout": float(os.getenv("HEALTH_CHECK_TIMEOUT", 3.0)),  # deadline for all probes
+        "ttl": float(os.getenv("HEALTH_CHECK_TTL", 5.0)),  # seconds results are reused
     }
 
     # Database Selection
     DATABASE_SELECTION = {
         "primary": os.getenv("PRIMARY_DB", "postgresql"),  # postgresql or mysql
         "cache": os.getenv("CACHE_DB", "redis"),  # redis
-        "search": os.getenv("SEARCH_DB", "elasticsearch"),  # elasticsearch
+        "search": os.getenv("SEARCH_DB", "elasticsearch"),  # elasticsearch or local
     }
 
     @classmethod
@@ -105,6 +260,76 @@ class DatabaseConfig:
         """Get ElasticSearch configuration"""
         return cls.ELASTICSEARCH_CONFIG.copy()
 
+    @classmethod
+    def get_local_search_config(cls) -> Dict:
+        """Get local search configuration"""
+        return cls.LOCAL_SEARCH_CONFIG.copy()
+
+    @classmethod
+    def get_cache_layer_config(cls) -> Dict:
+        """Get cache layer configuration"""
+        return cls.CACHE_LAYER_CONFIG.copy()
+
+    @classmethod
+    def get_search_index_config(cls) -> Dict:
+        """Get search index configuration"""
+        return cls.SEARCH_INDEX_CONFIG.copy()
+
+    @classmethod
+    def get_backup_config(cls) -> Dict:
+        """Get backup configuration"""
+        return cls.BACKUP_CONFIG.copy()
+
+    @classmethod
+    def get_migration_config(cls) -> Dict:
+        """Get migration configuration"""
+        return cls.MIGRATION_CONFIG.copy()
+
+    @classmethod
+    def get_backfill_config(cls) -> Dict:
+        """Get backfill configuration"""
+        return cls.BACKFILL_CONFIG.copy()
+
+    @classmethod
+    def get_query_stats_config(cls) -> Dict:
+        """Get query analytics configuration"""
+        return cls.QUERY_STATS_CONFIG.copy()
+
+    @classmethod
+    def get_metrics_config(cls) -> Dict:
+        """Get client metrics configuration"""
+        return cls.METRICS_CONFIG.copy()
+
+    @classmethod
+    def get_explain_config(cls) -> Dict:
+        """Get slow query plan capture configuration"""
+        return cls.EXPLAIN_CONFIG.copy()
+
+    @classmethod
+    def get_advisor_config(cls) -> Dict:
+        """Get index advisor configuration"""
+        return cls.ADVISOR_CONFIG.copy()
+
+    @classmethod
+    def get_dashboard_config(cls) -> Dict:
+        """Get live dashboard configuration"""
+        return cls.DASHBOARD_CONFIG.copy()
+
+    @classmethod
+    def get_locks_config(cls) -> Dict:
+        """Get lock-wait analysis and cancel policy configuration"""
+        return cls.LOCKS_CONFIG.copy()
+
+    @classmethod
+    def get_connection_config(cls) -> Dict:
+        """Get connection configuration"""
+        return cls.CONNECTION_CONFIG.copy()
+
+    @classmethod
+    def get_health_check_config(cls) -> Dict:
+        """Get health check configuration"""
+        return cls.HEALTH_CHECK_CONFIG.copy()
+
     @classmethod
     def get_primary_db_config(cls) -> Dict:
         """Get primary database configuration"""
@@ -132,6 +357,20 @@ class DatabaseConfig:
             "postgresql": cls.get_postgresql_config(),
             "redis": cls.get_redis_config(),
             "elasticsearch": cls.get_elasticsearch_config(),
+            "local_search": cls.get_local_search_config(),
+            "cache_layer": cls.get_cache_layer_config(),
+            "search_index": cls.get_search_index_config(),
+            "backup": cls.get_backup_config(),
+            "migration": cls.get_migration_config(),
+            "backfill": cls.get_backfill_config(),
+            "query_stats": cls.get_query_stats_config(),
+            "metrics": cls.get_metrics_config(),
+            "explain": cls.get_explain_config(),
+            "advisor": cls.get_advisor_config(),
+            "dashboard": cls.get_dashboard_config(),
+            "locks": cls.get_locks_config(),
+            "connection": cls.get_connection_config(),
+            "health_check": cls.get_health_check_config(),
             "selection": cls.DATABASE_SELECTION,
         }
 
@@ -149,6 +388,8 @@ class DatabaseConfig:
                 config["redis"]["password"] = "***"
             if config["elasticsearch"]["password"]:
                 config["elasticsearch"]["password"] = "***"
+            if config["search_index"]["tilda_secret_key"]:
+                config["search_index"]["tilda_secret_key"] = "***"
 
         print(json.dumps(config, indent=2))
 
@@ -0,0 +1,642 @@
+# Live Database Dashboard
+# Refreshing terminal view of every connected backend (db_cli monitor --live)
+#
+# Each interval one sampler per backend runs on a thread pool, so a slow
+# backend only delays its own row. A sample that misses
+# DB_DASHBOARD_SAMPLE_TIMEOUT is shown as stale, and that sampler is
+# skipped until it returns instead of piling up threads. A sampler makes
+# one round trip against server counters (pg_stat_database and
+# pg_stat_activity, performance_schema.global_status, INFO, cluster health
+# plus filtered index stats) and turns cumulative counters into per-second
+# rates and hit ratios over the last interval. It reads the manager's
+# cursor or client directly, so sampling neither passes through @timed
+# nor logs an error line under the dashboard on every failed refresh.
+#
+# Client latency percentiles are windowed the same way: db_metrics
+# histogram buckets (from the app's /metrics endpoint, or this process)
+# are diffed against the previous sample before taking p50/p95/p99.
+#
+# --record writes samples as JSON lines (gzip when the name ends in .gz):
+# a header naming each backend's fields, then one line per sample with
+# the values in that order and "t" in seconds since the start. --replay
+# renders a recording through the same view.
+
+import sys
+import gzip
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from db_config import DatabaseConfig
+from db_metrics import Series, bucket_bounds, fetch_snapshot
+from db_utils import DatabaseUtils
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "moai-dashboard"
+VERSION = 1
+CLEAR = "\033[H\033[2J"
+CLIENT_FIELDS = ("calls_per_s", "p50_ms", "p95_ms", "p99_ms", "errors", "sample_ms")
+STATUS_ICONS = {"green": "🟢", "yellow": "🟡", "red": "🔴"}
+
+POSTGRESQL_SAMPLE = """
+SELECT
+    (SELECT sum(xact_commit + xact_rollback) FROM pg_stat_database) AS xacts,
+    (SELECT sum(blks_hit) FROM pg_stat_database) AS blks_hit,
+    (SELECT sum(blks_read) FROM pg_stat_database) AS blks_read,
+    {statements} AS statements,
+    count(*) AS connections,
+    count(*) FILTER (WHERE state = 'active' AND pid <> pg_backend_pid()) AS active,
+    count(*) FILTER (WHERE wait_event_type = 'Lock') AS lock_waits,
+    COALESCE(max(EXTRACT(EPOCH FROM clock_timestamp() - query_start))
+        FILTER (WHERE state = 'active' AND pid <> pg_backend_pid()), 0) AS longest_s,
+    current_setting('max_connections')::int AS max_connections
+FROM pg_stat_activity
+WHERE backend_type = 'client backend'
+"""
+
+MYSQL_SAMPLE = """
+SELECT VARIABLE_NAME AS name, VARIABLE_VALUE AS value
+FROM performance_schema.global_status
+WHERE VARIABLE_NAME IN (
+    'Questions', 'Threads_connected', 'Threads_running', 'Innodb_row_lock_current_waits',
+    'Slow_queries', 'Innodb_buffer_pool_read_requests', 'Innodb_buffer_pool_reads'
+)
+UNION ALL SELECT 'max_connections', @@max_connections
+"""
+
+
+class Sampler:
+    """Server counters of one backend, as rates over the last interval"""
+
+    name = ""
+    fields: Tuple[str, ...] = ()
+
+    def __init__(self, manager):
+        """Initialize sampler for a connected backend manager"""
+        self.manager = manager
+        self._previous: Optional[Tuple[float, Dict[str, float]]] = None
+
+    def deltas(self, counters: Dict[str, Optional[float]], now: float) -> Tuple[Dict[str, float], float]:
+        """Counter increases since the previous sample, and the seconds between
+
+        Counters that went backwards (a server restart or stats reset)
+        are left out, so their rates show as unknown for one interval.
+        """
+        previous, self._previous = self._previous, (now, counters)
+        if previous is None:
+            return {}, 0.0
+        then, old = previous
+        changed = {}
+        for key, value in counters.items():
+            if value is not None and old.get(key) is not None and value >= old[key]:
+                changed[key] = value - old[key]
+        return changed, now - then
+
+    def sample(self) -> Dict:
+        """Read the backend's counters"""
+        raise NotImplementedError
+
+
+def per_second(changed: Dict[str, float], elapsed: float, key: str) -> Optional[float]:
+    """Rate of one counter, None until there are two samples"""
+    if key not in changed or elapsed <= 0:
+        return None
+    return round(changed[key] / elapsed, 1)
+
+
+def hit_ratio(changed: Dict[str, float], hits: str, misses: str) -> Optional[float]:
+    """Hit percentage over the interval, None when nothing was looked up"""
+    if hits not in changed or misses not in changed:
+        return None
+    lookups = changed[hits] + changed[misses]
+    return round(changed[hits] / lookups * 100, 2) if lookups else None
+
+
+def as_number(value) -> Optional[float]:
+    """Float of a driver value (Decimal, str, None)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PostgreSQLSampler(Sampler):
+    """pg_stat_database counters and pg_stat_activity in one query"""
+
+    name = "postgresql"
+    fields = (
+        "ops_per_s", "tps", "connections", "max_connections", "active", "lock_waits", "cache_hit", "longest_s",
+    )
+
+    def __init__(self, manager):
+        super().__init__(manager)
+        self.query = None
+
+    def prepare(self, cursor) -> str:
+        """Sample query, counting statements when pg_stat_statements is installed"""
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+        statements = "(SELECT sum(calls) FROM pg_stat_statements)" if cursor.fetchone() else "NULL"
+        return POSTGRESQL_SAMPLE.format(statements=statements)
+
+    def sample(self) -> Dict:
+        connection = self.manager.connection
+        cursor = connection.cursor()
+        try:
+            if self.query is None:
+                self.query = self.prepare(cursor)
+            cursor.execute(self.query)
+            row = dict(zip([desc[0] for desc in cursor.description], cursor.fetchone()))
+        finally:
+            cursor.close()
+            # Statistics views are snapshotted per transaction; end it so
+            # the next sample sees fresh counters
+            connection.rollback()
+        now = time.monotonic()
+        changed, elapsed = self.deltas(
+            {key: as_number(row[key]) for key in ("xacts", "blks_hit", "blks_read", "statements")}, now
+        )
+        return {
+            "ops_per_s": per_second(changed, elapsed, "statements"),
+            "tps": per_second(changed, elapsed, "xacts"),
+            "connections": row["connections"],
+            "max_connections": row["max_connections"],
+            "active": row["active"],
+            "lock_waits": row["lock_waits"],
+            "cache_hit": hit_ratio(changed, "blks_hit", "blks_read"),
+            "longest_s": round(as_number(row["longest_s"]) or 0.0, 1),
+        }
+
+
+class MySQLSampler(Sampler):
+    """performance_schema.global_status counters in one query"""
+
+    name = "mysql"
+    fields = (
+        "ops_per_s", "connections", "max_connections", "active", "lock_waits", "cache_hit", "slow_per_s",
+    )
+
+    def sample(self) -> Dict:
+        cursor = self.manager.connection.cursor()
+        try:
+            cursor.execute(MYSQL_SAMPLE)
+            status = {str(name).lower(): as_number(value) for name, value in cursor.fetchall()}
+        finally:
+            cursor.close()
+        now = time.monotonic()
+        changed, elapsed = self.deltas(
+            {
+                "questions": status.get("questions"),
+                "slow_queries": status.get("slow_queries"),
+                "requests": status.get("innodb_buffer_pool_read_requests"),
+                "reads": status.get("innodb_buffer_pool_reads"),
+            },
+            now,
+        )
+        # Every read request not served from disk was a buffer pool hit
+        cache_hit = None
+        if changed.get("requests"):
+            cache_hit = round(max(changed["requests"] - changed.get("reads", 0), 0) / changed["requests"] * 100, 2)
+        return {
+            "ops_per_s": per_second(changed, elapsed, "questions"),
+            "connections": status.get("threads_connected"),
+            "max_connections": status.get("max_connections"),
+            "active": status.get("threads_running"),
+            "lock_waits": status.get("innodb_row_lock_current_waits"),
+            "cache_hit": cache_hit,
+            "slow_per_s": per_second(changed, elapsed, "slow_queries"),
+        }
+
+
+class RedisSampler(Sampler):
+    """INFO counters in one command"""
+
+    name = "redis"
+    fields = (
+        "ops_per_s", "connections", "max_connections", "blocked", "used_memory", "max_memory", "cache_hit",
+        "evicted_per_s",
+    )
+
+    def sample(self) -> Dict:
+        info = self.manager.client.info()
+        now = time.monotonic()
+        changed, elapsed = self.deltas(
+            {
+                "commands": as_number(info.get("total_commands_processed")),
+                "hits": as_number(info.get("keyspace_hits")),
+                "misses": as_number(info.get("keyspace_misses")),
+                "evicted": as_number(info.get("evicted_keys")),
+            },
+            now,
+        )
+        return {
+            "ops_per_s": per_second(changed, elapsed, "commands"),
+            "connections": info.get("connected_clients"),
+            "max_connections": info.get("maxclients"),  # INFO clients, Redis 7+
+            "blocked": info.get("blocked_clients"),
+            "used_memory": info.get("used_memory"),
+            "max_memory": info.get("maxmemory") or None,
+            "cache_hit": hit_ratio(changed, "hits", "misses"),
+            "evicted_per_s": per_second(changed, elapsed, "evicted"),
+        }
+
+
+class ElasticsearchSampler(Sampler):
+    """Cluster health plus search and indexing totals"""
+
+    name = "elasticsearch"
+    fields = (
+        "ops_per_s", "status", "active_shards", "relocating_shards", "initializing_shards",
+        "unassigned_shards", "search_per_s", "index_per_s",
+    )
+
+    def sample(self) -> Dict:
+        client = self.manager.client
+        health = client.cluster.health()
+        stats = client.indices.stats(
+            metric="search,indexing",
+            filter_path="_all.total.search.query_total,_all.total.indexing.index_total",
+        )
+        totals = stats.get("_all", {}).get("total", {})
+        now = time.monotonic()
+        changed, elapsed = self.deltas(
+            {
+                "searches": as_number(totals.get("search", {}).get("query_total")),
+                "indexed": as_number(totals.get("indexing", {}).get("index_total")),
+            },
+            now,
+        )
+        search_per_s = per_second(changed, elapsed, "searches")
+        index_per_s = per_second(changed, elapsed, "indexed")
+        return {
+            "ops_per_s": round(search_per_s + index_per_s, 1)
+            if search_per_s is not None and index_per_s is not None
+            else None,
+            "status": health.get("status"),
+            "active_shards": health.get("active_shards"),
+            "relocating_shards": health.get("relocating_shards"),
+            "initializing_shards": health.get("initializing_shards"),
+            "unassigned_shards": health.get("unassigned_shards"),
+            "search_per_s": search_per_s,
+            "index_per_s": index_per_s,
+        }
+
+
+SAMPLERS = {
+    sampler.name: sampler for sampler in (PostgreSQLSampler, MySQLSampler, RedisSampler, ElasticsearchSampler)
+}
+
+
+def fields(backend: str) -> Tuple[str, ...]:
+    """Recorded fields of a backend, in file order"""
+    return SAMPLERS[backend].fields + CLIENT_FIELDS
+
+
+class ClientLatency:
+    """Client-side calls and percentiles per backend over the last interval"""
+
+    def __init__(self, url: Optional[str] = None):
+        """Initialize from a /metrics URL (default: DB_METRICS_URL, else this process)"""
+        self.url = url
+        self.source = None
+        self._previous: Dict[str, Tuple[float, int, int, Dict[int, int]]] = {}
+
+    def sample(self) -> Dict[str, Dict]:
+        """Windowed calls/s, errors and p50/p95/p99 for each backend"""
+        self.source, series = fetch_snapshot(self.url, buckets=True)
+        now = time.monotonic()
+        totals: Dict[str, List] = {}
+        for s in series:
+            total = totals.setdefault(s["backend"], [0, 0, {}])
+            total[0] += s["count"]
+            total[1] += s["errors"]
+            for index, n in s.get("buckets", {}).items():
+                # JSON object keys arrive as strings
+                total[2][int(index)] = total[2].get(int(index), 0) + n
+
+        result = {}
+        for backend, (count, errors, buckets) in totals.items():
+            previous = self._previous.get(backend)
+            self._previous[backend] = (now, count, errors, buckets)
+            if previous is None or count < previous[1]:
+                continue
+            then, old_count, old_errors, old_buckets = previous
+            window = Series(backend)
+            window.count = count - old_count
+            for index, n in buckets.items():
+                if n > old_buckets.get(index, 0):
+                    window.buckets[index] = n - old_buckets.get(index, 0)
+            if window.buckets:
+                low, width = bucket_bounds(max(window.buckets))
+                window.max_ns = low + width
+            p50, p95, p99 = (window.quantile(q) / 1e6 for q in (0.5, 0.95, 0.99))
+            result[backend] = {
+                "calls_per_s": round(window.count / (now - then), 1) if now > then else None,
+                "p50_ms": round(p50, 3) if window.count else None,
+                "p95_ms": round(p95, 3) if window.count else None,
+                "p99_ms": round(p99, 3) if window.count else None,
+                "errors": errors - old_errors,
+            }
+        return result
+
+
+class Dashboard:
+    """Concurrent sampling loop behind db_cli monitor --live"""
+
+    def __init__(
+        self,
+        manager,
+        backends: List[str],
+        interval: Optional[float] = None,
+        sample_timeout: Optional[float] = None,
+        metrics_url: Optional[str] = None,
+    ):
+        """Initialize dashboard over the live backends of a DatabaseManager"""
+        config = DatabaseConfig.get_dashboard_config()
+        self.interval = interval or config["interval"]
+        self.sample_timeout = min(sample_timeout or config["sample_timeout"], self.interval)
+        self.samplers = {
+            name: SAMPLERS[name](getattr(manager, name)) for name in backends if name in SAMPLERS
+        }
+        self.client = ClientLatency(metrics_url)
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(self.samplers) + 1, thread_name_prefix="dashboard"
+        )
+        self._pending: Dict[str, object] = {}
+
+    def _timed(self, task) -> Tuple[Dict, float]:
+        """Run one sampler, returning its fields and round trip in ms"""
+        started = time.perf_counter()
+        values = task.sample()
+        return values, round((time.perf_counter() - started) * 1000, 2)
+
+    def sample(self) -> Dict:
+        """Sample every backend (and client latency) concurrently
+
+        Returns {"time": epoch, "source": client metrics source,
+        "backends": {name: fields}}; a backend that failed has only
+        "error", one still running from an earlier interval only "stale".
+        """
+        tasks = dict(self.samplers, client=self.client)
+        futures = {}
+        for name, task in tasks.items():
+            if name not in self._pending:
+                futures[name] = self._pending[name] = self.executor.submit(self._timed, task)
+        wait(futures.values(), timeout=self.sample_timeout)
+
+        results: Dict[str, Dict] = {}
+        for name in tasks:
+            future = futures.get(name)
+            if future is None or not future.done():
+                results[name] = {"stale": True}
+                if future is not None:
+                    future.add_done_callback(lambda _, name=name: self._pending.pop(name, None))
+                continue
+            del self._pending[name]
+            try:
+                values, sample_ms = future.result()
+            except Exception as e:
+                logger.debug(f"{name} sample failed: {e}")
+                message = str(e).strip()
+                results[name] = {"error": message.splitlines()[0] if message else type(e).__name__}
+                continue
+            values["sample_ms"] = sample_ms
+            results[name] = values
+
+        latency = results.pop("client")
+        for name, values in results.items():
+            if "stale" not in values and "error" not in values:
+                values.update(latency.get(name) or dict.fromkeys(CLIENT_FIELDS[:-1]))
+        return {"time": time.time(), "source": self.client.source, "backends": results}
+
+    def run(
+        self,
+        duration: Optional[float] = None,
+        recorder: Optional["Recorder"] = None,
+        out: TextIO = sys.stdout,
+    ) -> int:
+        """Sample and render every interval until duration (or Ctrl+C)
+
+        Samples are taken on a fixed cadence; a round that overruns the
+        interval skips the missed ticks rather than bunching up. Returns
+        the number of samples taken.
+        """
+        started = time.monotonic()
+        taken = 0
+        while True:
+            sample = self.sample()
+            taken += 1
+            if recorder:
+                recorder.write(sample)
+            note = f"recording → {recorder.path}" if recorder else ""
+            show(out, render(sample, self.interval, note))
+            elapsed = time.monotonic() - started
+            if duration is not None and elapsed + self.interval > duration:
+                return taken
+            time.sleep(self.interval - elapsed % self.interval)
+
+    def close(self) -> None:
+        """Stop the sampling threads (a stuck sample is abandoned)"""
+        self.executor.shutdown(wait=False)
+
+
+class Recorder:
+    """Compact time-series file of dashboard samples"""
+
+    def __init__(self, path: str, interval: float):
+        """Initialize recorder (gzip-compressed when path ends in .gz)"""
+        self.path = path
+        self.interval = interval
+        opener = gzip.open if path.endswith(".gz") else open
+        self.file = opener(path, "wt", encoding="utf-8")
+        self.started_at: Optional[float] = None
+        self.samples = 0
+
+    def write(self, sample: Dict) -> None:
+        """Append one sample (the first also writes the header)"""
+        if self.started_at is None:
+            self.started_at = sample["time"]
+            header = {
+                "format": FORMAT,
+                "version": VERSION,
+                "started_at": self.started_at,
+                "interval": self.interval,
+                "source": sample["source"],
+                "fields": {name: list(fields(name)) for name in sample["backends"]},
+            }
+            self.file.write(json.dumps(header, separators=(",", ":")) + "\n")
+        line = {"t": round(sample["time"] - self.started_at, 3)}
+        for name, values in sample["backends"].items():
+            if "error" in values:
+                line[name] = values["error"]
+            elif values.get("stale"):
+                line[name] = None
+            else:
+                line[name] = [values.get(field) for field in fields(name)]
+        self.file.write(json.dumps(line, separators=(",", ":")) + "\n")
+        self.samples += 1
+        if not self.path.endswith(".gz"):
+            # Whole lines on disk if the monitor is killed
+            self.file.flush()
+
+    def close(self) -> None:
+        """Flush and close the file"""
+        self.file.close()
+
+
+def replay(path: str) -> Tuple[Dict, Iterator[Dict]]:
+    """Header and samples of a recording, in the shape Dashboard.sample returns"""
+    opener = gzip.open if path.endswith(".gz") else open
+    file = opener(path, "rt", encoding="utf-8")
+    header = json.loads(file.readline() or "{}")
+    if header.get("format") != FORMAT:
+        file.close()
+        raise ValueError(f"{path} is not a dashboard recording")
+
+    def samples() -> Iterator[Dict]:
+        with file:
+            for line in file:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                backends = {}
+                for name, names in header["fields"].items():
+                    values = row.get(name)
+                    if isinstance(values, list):
+                        backends[name] = dict(zip(names, values))
+                    elif isinstance(values, str):
+                        backends[name] = {"error": values}
+                    else:
+                        backends[name] = {"stale": True}
+                yield {
+                    "time": header["started_at"] + row["t"],
+                    "source": header.get("source"),
+                    "backends": backends,
+                }
+
+    return header, samples()
+
+
+def play(path: str, speed: float = 1.0, out: TextIO = sys.stdout) -> int:
+    """Render a recording at its recorded pace divided by speed"""
+    header, samples = replay(path)
+    shown = 0
+    previous = None
+    for sample in samples:
+        if previous is not None and speed > 0:
+            time.sleep(max(sample["time"] - previous, 0) / speed)
+        previous = sample["time"]
+        note = f"replay of {path} ({speed:g}x)"
+        show(out, render(sample, header["interval"], note))
+        shown += 1
+    return shown
+
+
+def show(out: TextIO, frame: str) -> None:
+    """Redraw a terminal in place; append frames when output is piped"""
+    if out.isatty():
+        out.write(CLEAR + frame)
+    else:
+        out.write(frame + "\n")
+    out.flush()
+
+
+def number(value, digits: int = 0, suffix: str = "") -> str:
+    """Compact number, "–" when unknown"""
+    if value is None:
+        return "–"
+    return f"{value:,.{digits}f}{suffix}"
+
+
+def size(value) -> str:
+    """Bytes in a readable unit, "–" when unknown"""
+    return "–" if value is None else DatabaseUtils.format_db_size(value)
+
+
+def utilization(used, limit) -> str:
+    """used/limit (percent)"""
+    if used is None:
+        return "–"
+    if not limit:
+        return f"{used:,.0f}"
+    return f"{used:,.0f}/{limit:,.0f} ({used / limit * 100:.0f}%)"
+
+
+def detail(name: str, values: Dict) -> str:
+    """Backend-specific second line of a row"""
+    if name == "postgresql":
+        parts = [f"cache hit {number(values.get('cache_hit'), 2, '%')}", f"active {number(values.get('active'))}"]
+        parts.append(f"longest query {number(values.get('longest_s'), 1, 's')}")
+        parts.append(f"{number(values.get('tps'), 1)} tx/s")
+        if values.get("ops_per_s") is None and values.get("tps") is not None:
+            parts.append("ops/s needs pg_stat_statements")
+    elif name == "mysql":
+        parts = [
+            f"buffer pool hit {number(values.get('cache_hit'), 2, '%')}",
+            f"running {number(values.get('active'))}",
+            f"slow {number(values.get('slow_per_s'), 1)}/s",
+        ]
+    elif name == "redis":
+        memory = size(values.get("used_memory"))
+        if values.get("max_memory") and values.get("used_memory") is not None:
+            memory += f" / {size(values['max_memory'])} ({values['used_memory'] / values['max_memory'] * 100:.0f}%)"
+        parts = [
+            f"memory {memory}",
+            f"hit {number(values.get('cache_hit'), 2, '%')}",
+            f"evicted {number(values.get('evicted_per_s'), 1)}/s",
+        ]
+    else:
+        status = values.get("status") or "unknown"
+        parts = [
+            f"{STATUS_ICONS.get(status, '⚪')} {status}",
+            f"shards {number(values.get('active_shards'))} active, "
+            f"{number(values.get('relocating_shards'))} relocating, "
+            f"{number(values.get('initializing_shards'))} initializing, "
+            f"{number(values.get('unassigned_shards'))} unassigned",
+            f"search {number(values.get('search_per_s'), 1)}/s",
+            f"index {number(values.get('index_per_s'), 1)}/s",
+        ]
+    return " · ".join(parts)
+
+
+def render(sample: Dict, interval: float, note: str = "") -> str:
+    """Dashboard frame of one sample"""
+    stamp = datetime.fromtimestamp(sample["time"]).strftime("%Y-%m-%d %H:%M:%S")
+    lines = [f"🗄️  Database Monitor — {stamp} (every {interval:g}s){'  ' + note if note else ''}"]
+    lines.append(f"   Client latency: {sample.get('source') or 'unavailable'}")
+    lines.append("")
+    lines.append(
+        f"{'BACKEND':<14}{'OPS/S':>11}{'CALLS/S':>10}{'P50ms':>9}{'P95ms':>9}{'P99ms':>9}"
+        f"{'ERR':>6}{'RTTms':>8}  {'CONNECTIONS':<18}{'LOCKS':>6}"
+    )
+    if not sample["backends"]:
+        lines.append("  No backends connected")
+    for name, values in sample["backends"].items():
+        if "error" in values:
+            lines.append(f"{name:<14}❌ {values['error']}")
+            continue
+        if values.get("stale"):
+            lines.append(f"{name:<14}⏳ sample still running")
+            continue
+        ops = values.get("ops_per_s")
+        if ops is None and values.get("tps") is not None:
+            ops_text = number(values["tps"], 1) + "tx"
+        else:
+            ops_text = number(ops, 1)
+        locks = values.get("lock_waits", values.get("blocked"))
+        lines.append(
+            f"{name:<14}{ops_text:>11}{number(values.get('calls_per_s'), 1):>10}"
+            f"{number(values.get('p50_ms'), 2):>9}{number(values.get('p95_ms'), 2):>9}"
+            f"{number(values.get('p99_ms'), 2):>9}{number(values.get('errors')):>6}"
+            f"{number(values.get('sample_ms'), 1):>8}  "
+            f"{utilization(values.get('connections'), values.get('max_connections')):<18}"
+            f"{number(locks):>6}"
+        )
+        lines.append(f"  {detail(name, values)}")
+    lines.append("")
+    lines.append("Ctrl+C to stop")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,449 @@
+# Slow Query Plan Capture
+# Sampled EXPLAIN ANALYZE of slow queries, stored in SQLite by fingerprint
+#
+# PostgreSQLManager and MySQLManager hand every statement that took longer
+# than DB_EXPLAIN_THRESHOLD_MS to ExplainCapture.observe(). A sampled few
+# (DB_EXPLAIN_SAMPLE_RATE, at most one per fingerprint per
+# DB_EXPLAIN_MIN_INTERVAL, one capture in flight) are explained again on a
+# background thread with its own connection, so the calling query never
+# waits. Reads get EXPLAIN (ANALYZE, BUFFERS) / EXPLAIN ANALYZE under a
+# statement timeout (in a READ ONLY transaction on PostgreSQL) and are
+# rolled back; writes, SELECT ... FOR UPDATE and reads calling functions
+# whose effects a rollback can't undo (sequences, advisory locks, backend
+# signals, sleeps) only get a plain EXPLAIN, since ANALYZE would run them
+# again.
+#
+# Both plan formats are reduced to the same node list (type, relation,
+# estimated and actual rows, rows scanned). A capture is flagged when it
+# seq-scans a large table, when a node's row estimate is off by more than
+# DB_EXPLAIN_ESTIMATE_FACTOR, or when the plan's shape differs from the
+# previous capture of the same fingerprint.
+
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from db_config import DatabaseConfig
+from db_metrics import sql_label
+
+
+logger = logging.getLogger(__name__)
+
+PLANS_PER_FINGERPRINT = 20
+# Row-estimate misses below this many rows (either side) are noise
+ESTIMATE_MIN_ROWS = 100
+SEQ_SCAN_NODES = ("Seq Scan", "Table scan")
+
+LEADING_COMMENTS_RE = re.compile(r"^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*", re.DOTALL)
+KEYWORD_RE = re.compile(r"[A-Za-z]+")
+WRITE_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+LOCKING_READ_RE = re.compile(
+    r"\bFOR\s+(UPDATE|SHARE|NO\s+KEY\s+UPDATE|KEY\s+SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b", re.IGNORECASE
+)
+# Functions with effects outside the transaction: running them again under
+# ANALYZE would consume sequence values, take session locks or signal backends
+SIDE_EFFECT_FUNCTION_RE = re.compile(
+    r"\b(nextval|setval|lastval|pg_(try_)?advisory_\w*|pg_cancel_backend|pg_terminate_backend"
+    r"|pg_reload_conf|pg_rotate_logfile|pg_switch_wal|pg_promote|pg_notify|pg_sleep\w*"
+    r"|pg_create_\w+|pg_drop_\w+|pg_replication_origin_\w+|pg_logical_emit_message|pg_stat_reset\w*"
+    r"|set_config|dblink\w*|lo_\w+|get_lock|release_lock|release_all_locks|is_used_lock|sleep|benchmark)\s*\(",
+    re.IGNORECASE,
+)
+# "-> Table scan on leads  (cost=1020 rows=10000) (actual time=0.04..4.2 rows=10000 loops=1)"
+MYSQL_NODE_RE = re.compile(
+    r"^(?P<indent>\s*)-> (?P<desc>.*?)"
+    r"(?:\s+\((?:cost=\S+ )?rows=(?P<rows>[\d.e+]+)\))?"
+    r"(?:\s+\(actual time=\S+ rows=(?P<actual>[\d.e+]+) loops=(?P<loops>\d+)\))?\s*$"
+)
+MYSQL_RELATION_RE = re.compile(r"^(?P<node>.+?) on (?P<relation>[\w$]+)(?: using (?P<index>[\w$]+))?")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id INTEGER PRIMARY KEY, db TEXT, fingerprint TEXT, query TEXT, captured_at REAL,
+    duration_ms REAL, analyzed INTEGER, shape TEXT, nodes TEXT, plan TEXT, flags TEXT
+);
+CREATE INDEX IF NOT EXISTS plans_fingerprint ON plans (db, fingerprint, captured_at);
+CREATE INDEX IF NOT EXISTS plans_time ON plans (captured_at);
+"""
+
+
+def statement_kind(query: str) -> Optional[str]:
+    """"read", "write" or None (not explainable) for a SQL statement"""
+    body = LEADING_COMMENTS_RE.sub("", query, count=1)
+    match = KEYWORD_RE.match(body)
+    keyword = match.group(0).upper() if match else ""
+    if keyword in ("INSERT", "UPDATE", "DELETE", "REPLACE", "MERGE"):
+        return "write"
+    if keyword == "WITH" and WRITE_RE.search(body):
+        return "write"
+    if keyword in ("SELECT", "WITH", "TABLE", "VALUES"):
+        if LOCKING_READ_RE.search(body) or SIDE_EFFECT_FUNCTION_RE.search(body):
+            return "write"
+        return "read"
+    return None
+
+
+def _number(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def postgresql_nodes(plan, depth: int = 0) -> List[Dict]:
+    """Flatten EXPLAIN (FORMAT JSON) output into plan nodes"""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    if isinstance(plan, list):
+        plan = plan[0]
+    if "Plan" in plan:
+        plan = plan["Plan"]
+    loops = plan.get("Actual Loops")
+    actual = plan.get("Actual Rows")
+    node = {
+        "depth": depth,
+        "node": plan["Node Type"],
+        "relation": plan.get("Relation Name"),
+        "index": plan.get("Index Name"),
+        "plan_rows": _number(plan.get("Plan Rows")),
+        "actual_rows": _number(actual),
+        "loops": loops,
+        "rows_scanned": None,
+    }
+    if actual is not None:
+        removed = plan.get("Rows Removed by Filter", 0)
+        node["rows_scanned"] = (actual + removed) * (loops or 1)
+    nodes = [node]
+    for child in plan.get("Plans", []):
+        nodes.extend(postgresql_nodes(child, depth + 1))
+    return nodes
+
+
+def mysql_nodes(tree: str) -> List[Dict]:
+    """Parse EXPLAIN ANALYZE / EXPLAIN FORMAT=TREE output into plan nodes"""
+    nodes = []
+    for line in tree.splitlines():
+        match = MYSQL_NODE_RE.match(line)
+        if not match:
+            continue
+        desc = match.group("desc")
+        # "Filter: (a.x = b.y) ..." has no relation even if " on " appears later
+        relation = None if ":" in desc.split(" on ", 1)[0] else MYSQL_RELATION_RE.match(desc)
+        actual = _number(match.group("actual"))
+        loops = int(match.group("loops")) if match.group("loops") else None
+        node = relation.group("node") if relation else re.sub(r"\s*\(.*$", "", desc.split(":", 1)[0])
+        nodes.append(
+            {
+                "depth": len(match.group("indent")) // 4,
+                "node": node,
+                "relation": relation.group("relation") if relation else None,
+                "index": relation.group("index") if relation else None,
+                "plan_rows": _number(match.group("rows")),
+                "actual_rows": actual,
+                "loops": loops,
+                # A table scan reads every row; actual rows are those it returned
+                "rows_scanned": actual * (loops or 1) if actual is not None else None,
+            }
+        )
+    return nodes
+
+
+def plan_shape(nodes: List[Dict]) -> str:
+    """Id of a plan's structure (node types, relations, indexes)"""
+    shape = "|".join(f"{n['depth']}:{n['node']}:{n['relation'] or ''}:{n['index'] or ''}" for n in nodes)
+    return hashlib.sha1(shape.encode()).hexdigest()[:16]
+
+
+def analyze_plan(nodes: List[Dict], large_table_rows: int, estimate_factor: float) -> List[Dict]:
+    """Seq scans of large tables and row-estimate misses in a plan"""
+    flags = []
+    for node in nodes:
+        scanned = node["rows_scanned"] if node["rows_scanned"] is not None else node["plan_rows"]
+        if node["node"] in SEQ_SCAN_NODES and scanned is not None and scanned >= large_table_rows:
+            flags.append({"type": "seq_scan", "relation": node["relation"], "rows": int(scanned)})
+        estimated, actual = node["plan_rows"], node["actual_rows"]
+        if estimated is None or actual is None or max(estimated, actual) < ESTIMATE_MIN_ROWS:
+            continue
+        factor = max(estimated, 1) / max(actual, 1)
+        factor = max(factor, 1 / factor)
+        if factor >= estimate_factor:
+            flags.append(
+                {
+                    "type": "estimate",
+                    "node": node["node"],
+                    "relation": node["relation"],
+                    "estimated": int(estimated),
+                    "actual": int(actual),
+                    "factor": round(factor, 1),
+                }
+            )
+    return flags
+
+
+def describe_flag(flag: Dict) -> str:
+    """One-line description of a plan flag"""
+    if flag["type"] == "seq_scan":
+        return f"seq scan on {flag['relation']} ({flag['rows']:,} rows)"
+    if flag["type"] == "estimate":
+        on = f" on {flag['relation']}" if flag["relation"] else ""
+        return (
+            f"{flag['node']}{on}: estimated {flag['estimated']:,} rows, "
+            f"actual {flag['actual']:,} ({flag['factor']:g}x off)"
+        )
+    if flag["type"] == "plan_changed":
+        return f"plan changed (was {flag['previous_shape']})"
+    return flag["type"]
+
+
+def format_plan(nodes: List[Dict]) -> str:
+    """Indented plan tree with estimated and actual rows"""
+    lines = []
+    for node in nodes:
+        name = node["node"]
+        if node["relation"]:
+            name += f" on {node['relation']}"
+        if node["index"]:
+            name += f" using {node['index']}"
+        rows = []
+        if node["plan_rows"] is not None:
+            rows.append(f"est {node['plan_rows']:,.0f}")
+        if node["actual_rows"] is not None:
+            rows.append(f"actual {node['actual_rows']:,.0f} x{node['loops'] or 1}")
+        detail = f"  ({', '.join(rows)})" if rows else ""
+        lines.append(f"{'   ' * node['depth']}-> {name}{detail}")
+    return "\n".join(lines)
+
+
+class ExplainStore:
+    """Captured plans by query fingerprint, with regression flags"""
+
+    def __init__(self, path: Optional[str] = None):
+        """Open (or create) the plan database (default: DB_EXPLAIN_DB)"""
+        self.config = DatabaseConfig.get_explain_config()
+        self.path = path or self.config["path"]
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.client = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.client.row_factory = sqlite3.Row
+        self.client.execute("PRAGMA journal_mode=WAL")
+        self.client.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the plan database"""
+        self.client.close()
+
+    def record(
+        self,
+        db_name: str,
+        fingerprint: str,
+        query: str,
+        duration_ms: float,
+        nodes: List[Dict],
+        plan: str,
+        analyzed: bool,
+        captured_at: Optional[float] = None,
+    ) -> Dict:
+        """Store a plan, flagging it against the thresholds and the previous capture"""
+        captured_at = captured_at or time.time()
+        shape = plan_shape(nodes)
+        flags = analyze_plan(nodes, self.config["large_table_rows"], self.config["estimate_factor"])
+        with self.lock:
+            previous = self.client.execute(
+                "SELECT shape FROM plans WHERE db = ? AND fingerprint = ? ORDER BY captured_at DESC LIMIT 1",
+                (db_name, fingerprint),
+            ).fetchone()
+            if previous and previous["shape"] != shape:
+                flags.append({"type": "plan_changed", "previous_shape": previous["shape"]})
+            self.client.execute("BEGIN")
+            try:
+                self.client.execute(
+                    "INSERT INTO plans (db, fingerprint, query, captured_at, duration_ms, analyzed, "
+                    "shape, nodes, plan, flags) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        db_name,
+                        fingerprint,
+                        query,
+                        captured_at,
+                        duration_ms,
+                        int(analyzed),
+                        shape,
+                        json.dumps(nodes),
+                        plan,
+                        json.dumps(flags),
+                    ),
+                )
+                self.client.execute(
+                    "DELETE FROM plans WHERE db = ? AND fingerprint = ? AND id NOT IN "
+                    "(SELECT id FROM plans WHERE db = ? AND fingerprint = ? ORDER BY captured_at DESC LIMIT ?)",
+                    (db_name, fingerprint, db_name, fingerprint, PLANS_PER_FINGERPRINT),
+                )
+                self.client.execute("COMMIT")
+            except Exception:
+                self.client.execute("ROLLBACK")
+                raise
+        return {"db": db_name, "fingerprint": fingerprint, "shape": shape, "flags": flags}
+
+    @staticmethod
+    def _entry(row) -> Dict:
+        entry = dict(row)
+        entry["analyzed"] = bool(entry["analyzed"])
+        entry["nodes"] = json.loads(entry["nodes"])
+        entry["flags"] = json.loads(entry["flags"])
+        return entry
+
+    def latest(
+        self,
+        db: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: int = 20,
+        flagged: bool = False,
+    ) -> List[Dict]:
+        """Most recent capture of each fingerprint, newest first"""
+        sql = (
+            "SELECT * FROM plans p WHERE captured_at = (SELECT MAX(captured_at) FROM plans "
+            "WHERE db = p.db AND fingerprint = p.fingerprint)"
+        )
+        params: List = []
+        if db:
+            sql += " AND db = ?"
+            params.append(db)
+        if since:
+            sql += " AND captured_at >= ?"
+            params.append(since)
+        if flagged:
+            sql += " AND flags != '[]'"
+        sql += " ORDER BY captured_at DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.client.execute(sql, params).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def history(self, prefix: str, db: Optional[str] = None, limit: int = PLANS_PER_FINGERPRINT) -> List[Dict]:
+        """Captures of the fingerprints starting with prefix, newest first"""
+        sql = "SELECT * FROM plans WHERE fingerprint LIKE ?"
+        params: List = [prefix.replace("%", "").replace("_", "") + "%"]
+        if db:
+            sql += " AND db = ?"
+            params.append(db)
+        sql += " ORDER BY captured_at DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.client.execute(sql, params).fetchall()
+        return [self._entry(row) for row in rows]
+
+
+class ExplainCapture:
+    """Background, sampled EXPLAIN of a manager's slow queries"""
+
+    def __init__(self, manager, db_type: str, config: Optional[Dict] = None):
+        """Initialize capture for a PostgreSQLManager or MySQLManager"""
+        self.config = config or DatabaseConfig.get_explain_config()
+        self.manager = manager
+        self.db_type = db_type
+        self.threshold_s = self.config["threshold_ms"] / 1000
+        self.sample_rate = self.config["sample_rate"]
+        self.min_interval = self.config["min_interval"]
+        self._lock = threading.Lock()
+        self._busy = False
+        self._last: Dict[str, float] = {}
+        self._worker = None
+        self._store = None
+
+    @classmethod
+    def for_manager(cls, manager, db_type: str) -> Optional["ExplainCapture"]:
+        """Capture for a manager, or None when DB_EXPLAIN is off"""
+        config = DatabaseConfig.get_explain_config()
+        return cls(manager, db_type, config) if config["enabled"] else None
+
+    def observe(self, query: str, params, elapsed: float) -> None:
+        """Maybe capture the plan of a statement that took elapsed seconds"""
+        if elapsed < self.threshold_s or random.random() >= self.sample_rate:
+            return
+        kind = statement_kind(query)
+        if kind is None:
+            return
+        fingerprint = sql_label(query)
+        now = time.time()
+        with self._lock:
+            if self._busy or now - self._last.get(fingerprint, 0) < self.min_interval:
+                return
+            if len(self._last) >= 10000:
+                self._last.clear()
+            self._last[fingerprint] = now
+            self._busy = True
+        if isinstance(params, list):
+            params = tuple(params)
+        threading.Thread(
+            target=self._capture,
+            args=(query, params, elapsed * 1000, fingerprint, kind == "read"),
+            name="explain-capture",
+            daemon=True,
+        ).start()
+
+    def _connection(self):
+        """The capture thread's own connection (a one-connection manager)"""
+        if self._worker is None:
+            worker = type(self.manager)(dict(self.manager.config, pool_size=1))
+            worker.explain = None
+            if not worker.connect():
+                return None
+            self._worker = worker
+        return self._worker.connection
+
+    def explain(self, query: str, params=None, analyze: bool = True) -> Tuple[List[Dict], str]:
+        """Plan nodes and raw plan of a statement, on the capture connection"""
+        connection = self._connection()
+        if connection is None:
+            raise ConnectionError(f"{self.db_type} unavailable for EXPLAIN")
+        cursor = connection.cursor()
+        try:
+            if self.db_type == "postgresql":
+                options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+                if analyze:
+                    # Must come first in the transaction; writes the read missed fail
+                    cursor.execute("SET TRANSACTION READ ONLY")
+                cursor.execute("SET LOCAL statement_timeout = %s", (self.config["timeout_ms"],))
+                cursor.execute(f"EXPLAIN ({options}) {query}", params)
+                plan = cursor.fetchone()[0]
+                return postgresql_nodes(plan), plan if isinstance(plan, str) else json.dumps(plan, indent=2)
+            if analyze:
+                cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (self.config["timeout_ms"],))
+            cursor.execute(f"{'EXPLAIN ANALYZE' if analyze else 'EXPLAIN FORMAT=TREE'} {query}", params)
+            plan = cursor.fetchone()[0]
+            cursor.fetchall()
+            return mysql_nodes(plan), plan
+        finally:
+            # ANALYZE ran the statement; never keep anything it did
+            connection.rollback()
+            cursor.close()
+
+    def _capture(self, query: str, params, duration_ms: float, fingerprint: str, analyze: bool) -> None:
+        """Explain and store one slow statement (capture thread)"""
+        try:
+            nodes, plan = self.explain(query, params, analyze)
+            if self._store is None:
+                self._store = ExplainStore(self.config["path"])
+            entry = self._store.record(self.db_type, fingerprint, query, duration_ms, nodes, plan, analyze)
+            if entry["flags"]:
+                flags = "; ".join(describe_flag(flag) for flag in entry["flags"])
+                logger.warning(f"⚠️  Plan regression in {self.db_type} query {fingerprint} ({duration_ms:.0f}ms): {flags}")
+        except Exception as e:
+            logger.warning(f"⚠️  EXPLAIN capture of {fingerprint} failed: {e}")
+        finally:
+            self._busy = False
+
+    def close(self) -> None:
+        """Close the capture connection and plan database"""
+        if self._worker is not None:
+            self._worker.close()
+            if hasattr(self._worker.pool, "closeall"):
+                self._worker.pool.closeall()
+            self._worker = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
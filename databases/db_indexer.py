@@ -0,0 +1,447 @@
+# Search Indexer
+# Syncs leads from the primary database and Tilda project/page metadata
+# into the search database
+
+import os
+import json
+import time
+import hashlib
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Any, Optional, Callable, Iterable
+
+from db_config import DatabaseConfig
+
+
+logger = logging.getLogger(__name__)
+
+TILDA_API_URL = "https://api.tildacdn.info/v1"
+
+# Lowercased, accent-folded text so "José" matches "jose"
+TEXT_ANALYSIS = {
+    "analysis": {
+        "analyzer": {
+            "folded": {
+                "type": "custom",
+                "tokenizer": "standard",
+                "filter": ["lowercase", "asciifolding"],
+            }
+        }
+    }
+}
+
+FOLDED_TEXT = {"type": "text", "analyzer": "folded"}
+FOLDED_TEXT_WITH_RAW = {"type": "text", "analyzer": "folded", "fields": {"raw": {"type": "keyword"}}}
+
+# Unlisted columns stay in _source but aren't indexed
+LEADS_MAPPING = {
+    "settings": TEXT_ANALYSIS,
+    "mappings": {
+        "dynamic": False,
+        "properties": {
+            "id": {"type": "keyword"},
+            "name": FOLDED_TEXT_WITH_RAW,
+            "first_name": FOLDED_TEXT,
+            "last_name": FOLDED_TEXT,
+            "email": FOLDED_TEXT_WITH_RAW,
+            "phone": {"type": "keyword"},
+            "company": FOLDED_TEXT_WITH_RAW,
+            "status": {"type": "keyword"},
+            "source": {"type": "keyword"},
+            "score": {"type": "float"},
+            "notes": FOLDED_TEXT,
+            "created_at": {"type": "date"},
+            "updated_at": {"type": "date"},
+        },
+    },
+}
+
+TILDA_MAPPING = {
+    "settings": TEXT_ANALYSIS,
+    "mappings": {
+        "dynamic": False,
+        "properties": {
+            "id": {"type": "keyword"},
+            "type": {"type": "keyword"},
+            "project_id": {"type": "keyword"},
+            "project_title": FOLDED_TEXT_WITH_RAW,
+            "title": FOLDED_TEXT_WITH_RAW,
+            "descr": FOLDED_TEXT,
+            "url": {"type": "keyword"},
+            "alias": {"type": "keyword"},
+            "published": {"type": "keyword"},
+        },
+    },
+}
+
+SEARCH_FIELDS = [
+    "name^3",
+    "title^3",
+    "first_name^2",
+    "last_name^2",
+    "company^2",
+    "email^2",
+    "project_title",
+    "descr",
+    "notes",
+    "phone",
+]
+
+
+def to_document(row: Dict) -> Dict:
+    """Convert a database row to a JSON document (ISO dates, floats)"""
+    document = {}
+    for column, value in row.items():
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            value = bytes(value).decode("utf-8", errors="replace")
+        document[column] = value
+    return document
+
+
+def overlap_start(watermark: Any, overlap: float) -> Any:
+    """Move a watermark back by overlap seconds (non-timestamps are kept)"""
+    try:
+        return (datetime.fromisoformat(str(watermark)) - timedelta(seconds=overlap)).isoformat()
+    except ValueError:
+        return watermark
+
+
+def document_hash(document: Dict) -> str:
+    """Fingerprint a document to detect changes"""
+    return hashlib.sha1(json.dumps(document, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class TildaFetcher:
+    """Fetch Tilda projects and pages as search documents
+
+    Raises on API errors so a failed fetch never looks like deleted content.
+    """
+
+    def __init__(self, public_key: str, secret_key: str, timeout: int = 10):
+        """Initialize fetcher"""
+        self.public_key = public_key
+        self.secret_key = secret_key
+        self.timeout = timeout
+
+    def _get(self, method: str, **params) -> Any:
+        """Call a Tilda API method and return its result"""
+        import requests
+
+        params.update(publickey=self.public_key, secretkey=self.secret_key)
+        response = requests.get(f"{TILDA_API_URL}/{method}/", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") != "FOUND":
+            raise RuntimeError(f"Tilda API error: {data.get('message', 'Unknown error')}")
+        return data.get("result", [])
+
+    def __call__(self) -> List[Dict]:
+        """Fetch all projects and their pages"""
+        documents = []
+        for project in self._get("getprojectslist"):
+            project_id = str(project.get("id"))
+            documents.append({
+                "id": f"project-{project_id}",
+                "type": "project",
+                "project_id": project_id,
+                "project_title": project.get("title"),
+                "title": project.get("title"),
+                "descr": project.get("descr", ""),
+                "url": project.get("customdomain") or project.get("tildauid", ""),
+            })
+            for page in self._get("getpageslist", projectid=project_id):
+                documents.append({
+                    "id": f"page-{page.get('id')}",
+                    "type": "page",
+                    "project_id": project_id,
+                    "project_title": project.get("title"),
+                    "title": page.get("title"),
+                    "descr": page.get("descr", ""),
+                    "alias": page.get("alias", ""),
+                    "url": page.get("filename", ""),
+                    "published": str(page.get("published", "")),
+                })
+        return documents
+
+
+class SearchIndexer:
+    """Keeps the leads and Tilda search indexes in sync
+
+    Leads are synced incrementally by an (updated_at, id) watermark; Tilda
+    content has no modification time, so changed documents are found by
+    content hash and removed ones are deleted. Progress is kept in a JSON
+    state file so each run only sends what changed.
+    """
+
+    def __init__(
+        self,
+        search,
+        primary=None,
+        config: Optional[Dict] = None,
+        tilda_fetcher: Optional[Callable[[], Iterable[Dict]]] = None,
+    ):
+        """Initialize indexer"""
+        self.search = search
+        self.primary = primary
+        self.config = config or DatabaseConfig.get_search_index_config()
+        self.leads_index = f"{self.config['index_prefix']}leads"
+        self.tilda_index = f"{self.config['index_prefix']}tilda"
+        self.tilda_fetcher = tilda_fetcher
+        if self.tilda_fetcher is None and self.config.get("tilda_public_key"):
+            self.tilda_fetcher = TildaFetcher(
+                self.config["tilda_public_key"], self.config.get("tilda_secret_key") or ""
+            )
+        self.state = self._load_state()
+
+    # ---- state ----
+
+    def _load_state(self) -> Dict:
+        """Load sync state"""
+        try:
+            with open(self.config["state_file"]) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️  Ignoring unreadable search index state: {e}")
+            return {}
+
+    def _save_state(self) -> None:
+        """Write sync state atomically"""
+        path = self.config["state_file"]
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.state, f, indent=2, default=str)
+        os.replace(temp_path, path)
+
+    # ---- indexes ----
+
+    def ensure_indices(self) -> bool:
+        """Create the indexes with explicit mappings if missing"""
+        ok = True
+        for index_name, mapping in ((self.leads_index, LEADS_MAPPING), (self.tilda_index, TILDA_MAPPING)):
+            if not self.search.index_exists(index_name):
+                ok = self.search.create_index(index_name, mapping) and ok
+        return ok
+
+    # ---- sync ----
+
+    def sync_leads(self, full: bool = False) -> Dict:
+        """Index leads changed since the last watermark"""
+        if self.primary is None:
+            return {"error": "No primary database configured"}
+
+        table = self.config["leads_table"]
+        key = self.config["leads_key"]
+        column = self.config["updated_column"]
+        batch_size = self.config["batch_size"]
+        state = {} if full else self.state.get("leads", {})
+        watermark = state.get("updated_at")
+        # Re-read an overlap window: rows committed late with an older
+        # updated_at would otherwise fall behind the watermark
+        since = None if watermark is None else overlap_start(watermark, self.config["watermark_overlap"])
+        position = None
+        summary = {"indexed": 0, "failed": 0, "batches": 0}
+
+        start = time.time()
+        while True:
+            if position is not None:
+                rows = self.primary.execute(
+                    f"SELECT * FROM {table} WHERE ({column}, {key}) > (%s, %s) "
+                    f"ORDER BY {column}, {key} LIMIT %s",
+                    position + (batch_size,),
+                )
+            elif since is not None:
+                rows = self.primary.execute(
+                    f"SELECT * FROM {table} WHERE {column} >= %s ORDER BY {column}, {key} LIMIT %s",
+                    (since, batch_size),
+                )
+            else:
+                rows = self.primary.execute(
+                    f"SELECT * FROM {table} WHERE {column} IS NOT NULL "
+                    f"ORDER BY {column}, {key} LIMIT %s",
+                    (batch_size,),
+                )
+            if not rows:
+                break
+
+            documents = [to_document(row) for row in rows]
+            if not self._index_leads(documents, summary):
+                # Keep the watermark so the next run retries this batch
+                break
+
+            position = (rows[-1][column], rows[-1][key])
+            self.state["leads"] = {
+                "updated_at": documents[-1][column],
+                "key": documents[-1][key],
+                "synced_at": time.time(),
+            }
+            self._save_state()
+            if len(rows) < batch_size:
+                break
+
+        if "error" not in summary:
+            self._sync_unversioned_leads(summary)
+        summary["elapsed"] = round(time.time() - start, 3)
+        return summary
+
+    def _sync_unversioned_leads(self, summary: Dict) -> None:
+        """Re-index leads with no updated_at, which no watermark can track"""
+        table = self.config["leads_table"]
+        key = self.config["leads_key"]
+        column = self.config["updated_column"]
+        batch_size = self.config["batch_size"]
+        last_key = None
+        while True:
+            if last_key is None:
+                rows = self.primary.execute(
+                    f"SELECT * FROM {table} WHERE {column} IS NULL ORDER BY {key} LIMIT %s",
+                    (batch_size,),
+                )
+            else:
+                rows = self.primary.execute(
+                    f"SELECT * FROM {table} WHERE {column} IS NULL AND {key} > %s "
+                    f"ORDER BY {key} LIMIT %s",
+                    (last_key, batch_size),
+                )
+            if not rows:
+                return
+            summary["unversioned"] = summary.get("unversioned", 0) + len(rows)
+            if not self._index_leads([to_document(row) for row in rows], summary):
+                return
+            last_key = rows[-1][key]
+            if len(rows) < batch_size:
+                return
+
+    def _index_leads(self, documents: List[Dict], summary: Dict) -> bool:
+        """Bulk index one batch of leads, recording the outcome in summary"""
+        result = self.search.bulk_index(self.leads_index, documents, id_field=self.config["leads_key"])
+        summary["batches"] += 1
+        summary["indexed"] += result.get("indexed", 0)
+        summary["failed"] += result.get("failed", 0)
+        if result.get("failed") or result.get("error"):
+            summary["error"] = result.get("error") or f"{result['failed']} documents failed"
+            return False
+        return True
+
+    def sync_tilda(self, full: bool = False) -> Dict:
+        """Index changed Tilda projects/pages and delete removed ones"""
+        if self.tilda_fetcher is None:
+            return {"error": "No Tilda fetcher configured (set TILDA_PUBLIC_KEY)"}
+
+        start = time.time()
+        try:
+            documents = list(self.tilda_fetcher())
+        except Exception as e:
+            logger.error(f"❌ Tilda fetch failed: {e}")
+            return {"error": str(e)}
+
+        previous = {} if full else self.state.get("tilda", {}).get("hashes", {})
+        hashes = {document["id"]: document_hash(document) for document in documents}
+        changed = [document for document in documents if previous.get(document["id"]) != hashes[document["id"]]]
+        removed = [doc_id for doc_id in previous if doc_id not in hashes]
+
+        summary = {"indexed": 0, "failed": 0, "deleted": 0, "unchanged": len(documents) - len(changed)}
+        if changed:
+            result = self.search.bulk_index(self.tilda_index, changed, id_field="id")
+            summary["indexed"] = result.get("indexed", 0)
+            summary["failed"] = result.get("failed", 0)
+            if result.get("failed") or result.get("error"):
+                summary["error"] = result.get("error") or f"{result['failed']} documents failed"
+                summary["elapsed"] = round(time.time() - start, 3)
+                return summary
+
+        for doc_id in removed:
+            if self.search.delete_document(self.tilda_index, doc_id):
+                summary["deleted"] += 1
+            else:
+                hashes[doc_id] = previous[doc_id]
+
+        self.state["tilda"] = {"hashes": hashes, "synced_at": time.time()}
+        self._save_state()
+        summary["elapsed"] = round(time.time() - start, 3)
+        return summary
+
+    def sync(self, sources: Iterable[str] = ("leads", "tilda"), full: bool = False) -> Dict:
+        """Sync the given sources into the search index"""
+        if not self.ensure_indices():
+            return {"error": "Could not create search indexes"}
+        results = {}
+        if "leads" in sources:
+            results["leads"] = self.sync_leads(full=full)
+        if "tilda" in sources:
+            results["tilda"] = self.sync_tilda(full=full)
+        return results
+
+    # ---- queries ----
+
+    def search_text(
+        self,
+        text: str,
+        size: int = 10,
+        sources: Iterable[str] = ("leads", "tilda"),
+        cursor: Optional[str] = None,
+    ) -> Dict:
+        """Full-text search over leads and Tilda content"""
+        indexes = {"leads": self.leads_index, "tilda": self.tilda_index}
+        index_names = ",".join(indexes[source] for source in sources)
+        query = {
+            "query": {
+                "multi_match": {
+                    "query": text,
+                    "fields": SEARCH_FIELDS,
+                    "fuzziness": "AUTO",
+                    "lenient": True,
+                }
+            }
+        }
+
+        start = time.time()
+        page = self.search.search_page(index_names, query, page_size=size, cursor=cursor)
+        results = []
+        for hit in page["hits"]:
+            result = dict(hit["_source"] or {})
+            result["_type"] = "lead" if hit["_index"] == self.leads_index else "tilda"
+            result["_score"] = hit["_score"]
+            results.append(result)
+        return {
+            "query": text,
+            "total": page["total"],
+            "results": results,
+            "cursor": page["cursor"],
+            "took_ms": round((time.time() - start) * 1000, 1),
+        }
+
+    def get_status(self) -> Dict:
+        """Get index sizes and sync progress"""
+        return {
+            "leads": {
+                "index": self.leads_index,
+                "documents": self.search.count(self.leads_index),
+                "watermark": self.state.get("leads", {}).get("updated_at"),
+                "synced_at": self.state.get("leads", {}).get("synced_at"),
+            },
+            "tilda": {
+                "index": self.tilda_index,
+                "documents": self.search.count(self.tilda_index),
+                "tracked": len(self.state.get("tilda", {}).get("hashes", {})),
+                "synced_at": self.state.get("tilda", {}).get("synced_at"),
+            },
+        }
+
+
+def create_indexer(manager, **kwargs) -> SearchIndexer:
+    """Build an indexer over the configured primary and search databases"""
+    if DatabaseConfig.DATABASE_SELECTION.get("primary", "postgresql").lower() == "mysql":
+        primary = manager.mysql
+    else:
+        primary = manager.postgresql
+    search = manager.search
+    if search is None:
+        raise RuntimeError("No search database available")
+    return SearchIndexer(search, primary, **kwargs)
@@ -0,0 +1,752 @@
+# Local Search Manager
+# Embedded full-text search on SQLite FTS5 with the ElasticsearchManager surface
+#
+# Each index is a documents table (JSON _source) plus an FTS5 table holding
+# one column per mapped "text" field and an _all column with every string
+# value. Queries use a subset of the Elasticsearch query DSL:
+#   match_all, match, match_phrase, match_phrase_prefix, multi_match,
+#   query_string / simple_query_string (as match), term, terms, ids, range,
+#   exists, bool (must / should / filter / must_not)
+# Relevance is FTS5 bm25 weighted by multi_match field boosts; fuzziness is
+# ignored.
+
+import os
+import re
+import json
+import time
+import uuid
+import base64
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator
+
+from db_config import DatabaseConfig
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_.-]*$")
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+ALL_COLUMN = "_all"
+# Keyword sub-fields resolve to the parent value in _source
+SUBFIELD_SUFFIXES = (".raw", ".keyword")
+# Mapping types compared by exact value; these fields get an expression index
+INDEXED_TYPES = ("keyword", "long", "integer", "short", "byte", "double", "float", "date", "boolean")
+
+
+def text_fields(mapping: Optional[Dict]) -> List[str]:
+    """List 'text' fields (dotted paths) in an index mapping"""
+    fields = []
+
+    def walk(properties: Dict, prefix: str) -> None:
+        for name, spec in properties.items():
+            if spec.get("type") == "text":
+                fields.append(prefix + name)
+            if "properties" in spec:
+                walk(spec["properties"], f"{prefix}{name}.")
+
+    walk(((mapping or {}).get("mappings") or {}).get("properties") or {}, "")
+    return fields
+
+
+def field_value(source: Dict, path: str) -> Any:
+    """Get a dotted path from a document"""
+    value = source
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def string_values(value: Any) -> Iterator[str]:
+    """Yield every string leaf of a value"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from string_values(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from string_values(item)
+
+
+def json_path(field: str) -> str:
+    """Build a SQLite JSON path for a dotted field"""
+    for suffix in SUBFIELD_SUFFIXES:
+        if field.endswith(suffix):
+            field = field[: -len(suffix)]
+    return "$." + ".".join(f'"{part}"' for part in field.split("."))
+
+
+def json_field(field: str, table: str = "d.") -> str:
+    """SQL expression for a document field
+
+    The path is inlined (not bound) so it matches the expression indexes
+    created for keyword, numeric and date fields.
+    """
+    path = json_path(field).replace("'", "''")
+    return f"json_extract({table}source, '{path}')"
+
+
+def indexed_fields(mapping: Optional[Dict]) -> List[str]:
+    """List top-level fields that get an expression index (exact-value types)"""
+    properties = ((mapping or {}).get("mappings") or {}).get("properties") or {}
+    return [name for name, spec in properties.items() if spec.get("type") in INDEXED_TYPES]
+
+
+class _Schema:
+    """Table names and FTS columns of one index"""
+
+    def __init__(self, name: str, fields: List[str]):
+        self.name = name
+        self.docs = f'"docs:{name}"'
+        self.fts = f'"fts:{name}"'
+        self.fields = fields
+        # FTS5 column names must be plain identifiers
+        self.columns = {field: "f_" + re.sub(r"\W", "_", field) for field in fields}
+        self.column_order = [self.columns[field] for field in fields] + [ALL_COLUMN]
+
+    def row(self, source: Dict) -> List[str]:
+        """FTS column values for a document"""
+        values = [" ".join(string_values(field_value(source, field))) for field in self.fields]
+        values.append(" ".join(string_values(source)))
+        return values
+
+
+class _QueryCompiler:
+    """Compile an Elasticsearch query into SQL over one index"""
+
+    def __init__(self, schema: _Schema):
+        self.schema = schema
+        self.scoring: List[str] = []
+        self.weights: Dict[str, float] = {}
+        # SQL of plain full-text clauses -> their MATCH expression
+        self.pure: Dict[str, str] = {}
+
+    def compile(self, query: Optional[Dict]) -> Tuple[str, List]:
+        """Compile a query node into (sql, params)"""
+        if not query:
+            return "1", []
+        (kind, body), = query.items()
+        method = getattr(self, f"_{kind}", None)
+        if method is None:
+            raise ValueError(f"Unsupported query type for local search: {kind}")
+        return method(body)
+
+    # ---- full text ----
+
+    def _fts(self, text: Any, fields: Optional[List[str]], operator: str = "or", phrase: bool = False,
+             prefix: bool = False) -> Tuple[str, List]:
+        """Match text against fields; non-text fields compare exactly"""
+        tokens = TOKEN_RE.findall(str(text))
+        if not tokens:
+            return "0", []
+
+        if phrase:
+            expr = '"' + " ".join(tokens) + '"' + (" *" if prefix else "")
+        else:
+            joiner = " AND " if str(operator).lower() == "and" else " OR "
+            expr = joiner.join(f'"{token}"' for token in tokens)
+
+        columns, exact = [], []
+        for spec in fields or ["*"]:
+            field, _, boost = spec.partition("^")
+            if field in ("*", ALL_COLUMN):
+                column = ALL_COLUMN
+            else:
+                base = field
+                for suffix in SUBFIELD_SUFFIXES:
+                    if base.endswith(suffix):
+                        base = base[: -len(suffix)]
+                column = self.schema.columns.get(base)
+            if column is None:
+                exact.append(field)
+                continue
+            columns.append(column)
+            if boost:
+                self.weights[column] = max(self.weights.get(column, 1.0), float(boost))
+
+        clauses, params = [], []
+        if columns:
+            match = "{" + " ".join(dict.fromkeys(columns)) + "} : (" + expr + ")"
+            self.scoring.append(match)
+            clauses.append(
+                f"d.rowid IN (SELECT rowid FROM {self.schema.fts} WHERE {self.schema.fts} MATCH ?)"
+            )
+            params.append(match)
+        for field in exact:
+            clauses.append(f"{json_field(field)} = ?")
+            params.append(text)
+        sql = "(" + " OR ".join(clauses) + ")"
+        if not exact:
+            self.pure[sql] = match
+        return sql, params
+
+    def _match_all(self, body: Dict) -> Tuple[str, List]:
+        return "1", []
+
+    def _match_none(self, body: Dict) -> Tuple[str, List]:
+        return "0", []
+
+    def _match(self, body: Dict) -> Tuple[str, List]:
+        (field, spec), = body.items()
+        if isinstance(spec, dict):
+            return self._fts(spec.get("query", ""), [field], spec.get("operator", "or"))
+        return self._fts(spec, [field])
+
+    def _match_phrase(self, body: Dict) -> Tuple[str, List]:
+        (field, spec), = body.items()
+        text = spec.get("query", "") if isinstance(spec, dict) else spec
+        return self._fts(text, [field], phrase=True)
+
+    def _match_phrase_prefix(self, body: Dict) -> Tuple[str, List]:
+        (field, spec), = body.items()
+        text = spec.get("query", "") if isinstance(spec, dict) else spec
+        return self._fts(text, [field], phrase=True, prefix=True)
+
+    def _multi_match(self, body: Dict) -> Tuple[str, List]:
+        phrase = body.get("type") in ("phrase", "phrase_prefix")
+        return self._fts(
+            body.get("query", ""),
+            body.get("fields"),
+            body.get("operator", "or"),
+            phrase=phrase,
+            prefix=body.get("type") == "phrase_prefix",
+        )
+
+    def _query_string(self, body: Dict) -> Tuple[str, List]:
+        fields = body.get("fields") or ([body["default_field"]] if body.get("default_field") else None)
+        return self._fts(body.get("query", ""), fields, body.get("default_operator", "or"))
+
+    _simple_query_string = _query_string
+
+    # ---- structured ----
+
+    def _term(self, body: Dict) -> Tuple[str, List]:
+        (field, spec), = body.items()
+        value = spec.get("value") if isinstance(spec, dict) else spec
+        if field == "_id":
+            return "d.doc_id = ?", [str(value)]
+        return f"{json_field(field)} = ?", [value]
+
+    def _terms(self, body: Dict) -> Tuple[str, List]:
+        (field, values), = body.items()
+        if not values:
+            return "0", []
+        marks = ", ".join("?" for _ in values)
+        if field == "_id":
+            return f"d.doc_id IN ({marks})", [str(value) for value in values]
+        return f"{json_field(field)} IN ({marks})", list(values)
+
+    def _ids(self, body: Dict) -> Tuple[str, List]:
+        return self._terms({"_id": body.get("values", [])})
+
+    def _range(self, body: Dict) -> Tuple[str, List]:
+        (field, spec), = body.items()
+        operators = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+        clauses, params = [], []
+        for name, operator in operators.items():
+            if name in spec:
+                clauses.append(f"{json_field(field)} {operator} ?")
+                params.append(spec[name])
+        return "(" + (" AND ".join(clauses) or "1") + ")", params
+
+    def _exists(self, body: Dict) -> Tuple[str, List]:
+        return f"{json_field(body['field'])} IS NOT NULL", []
+
+    def _bool(self, body: Dict) -> Tuple[str, List]:
+        def clauses(name: str) -> List[Dict]:
+            value = body.get(name) or []
+            return value if isinstance(value, list) else [value]
+
+        parts, params = [], []
+        for clause in clauses("must"):
+            sql, clause_params = self.compile(clause)
+            parts.append(sql)
+            params.extend(clause_params)
+
+        # Filter and must_not clauses never contribute to the score
+        scoring = self.scoring
+        self.scoring = []
+        for clause in clauses("filter"):
+            sql, clause_params = self.compile(clause)
+            parts.append(sql)
+            params.extend(clause_params)
+        for clause in clauses("must_not"):
+            sql, clause_params = self.compile(clause)
+            parts.append(f"NOT {sql}")
+            params.extend(clause_params)
+        self.scoring = scoring
+
+        should = [self.compile(clause) for clause in clauses("should")]
+        if should:
+            minimum = str(body.get("minimum_should_match", 0 if parts else 1)).rstrip("%")
+            if int(minimum or 0) >= 1:
+                parts.append("(" + " OR ".join(sql for sql, _ in should) + ")")
+                for _, clause_params in should:
+                    params.extend(clause_params)
+        return "(" + (" AND ".join(parts) or "1") + ")", params
+
+
+class LocalSearchManager:
+    """Embedded search engine with the ElasticsearchManager interface"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """Initialize local search manager"""
+        self.config = config or DatabaseConfig.get_local_search_config()
+        self.path = self.config.get("path", "search.db")
+        self.client = None
+        self.lock = threading.RLock()
+        self.schemas: Dict[str, _Schema] = {}
+
+    def connect(self) -> bool:
+        """Open (or create) the search database"""
+        try:
+            if self.path != ":memory:" and os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.client = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self.client.execute("PRAGMA journal_mode=WAL")
+            self.client.execute("PRAGMA synchronous=NORMAL")
+            self.client.execute(
+                "CREATE TABLE IF NOT EXISTS search_indices "
+                "(name TEXT PRIMARY KEY, mapping TEXT, fields TEXT, created_at REAL)"
+            )
+            # Fails early on SQLite builds without FTS5
+            self.client.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts_probe USING fts5(x)")
+            self._load_schemas()
+            logger.info(f"✅ Local search ready at {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Local search connection failed: {e}")
+            self.client = None
+            return False
+
+    def _load_schemas(self) -> None:
+        """Load index definitions"""
+        self.schemas = {
+            name: _Schema(name, json.loads(fields))
+            for name, fields in self.client.execute("SELECT name, fields FROM search_indices")
+        }
+
+    def _schemas_for(self, index_name: str) -> List[_Schema]:
+        """Resolve a comma-separated index expression"""
+        schemas = []
+        for name in index_name.split(","):
+            name = name.strip()
+            if name in ("_all", "*"):
+                schemas.extend(self.schemas.values())
+            elif name not in self.schemas:
+                raise KeyError(f"no such index [{name}]")
+            else:
+                schemas.append(self.schemas[name])
+        return schemas
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in one write transaction"""
+        with self.lock:
+            self.client.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.client
+                self.client.execute("COMMIT")
+            except Exception:
+                self.client.execute("ROLLBACK")
+                raise
+
+    # ---- indexes ----
+
+    def create_index(self, index_name: str, mapping: Optional[Dict] = None) -> bool:
+        """Create an index"""
+        try:
+            if not INDEX_NAME_RE.match(index_name):
+                raise ValueError(f"Invalid index name '{index_name}'")
+            if index_name in self.schemas:
+                raise ValueError(f"index [{index_name}] already exists")
+            schema = _Schema(index_name, text_fields(mapping))
+            tokenizer = self.config.get("tokenizer", "unicode61 remove_diacritics 2").replace("'", "")
+            with self._transaction() as conn:
+                conn.execute(
+                    f"CREATE TABLE {schema.docs} "
+                    "(rowid INTEGER PRIMARY KEY, doc_id TEXT NOT NULL UNIQUE, source TEXT NOT NULL)"
+                )
+                for field in indexed_fields(mapping):
+                    conn.execute(
+                        f'CREATE INDEX "idx:{index_name}:{field}" '
+                        f"ON {schema.docs} ({json_field(field, table='')})"
+                    )
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE {schema.fts} USING fts5("
+                    f"{', '.join(schema.column_order)}, tokenize='{tokenizer}')"
+                )
+                conn.execute(
+                    "INSERT INTO search_indices VALUES (?, ?, ?, ?)",
+                    (index_name, json.dumps(mapping or {}), json.dumps(schema.fields), time.time()),
+                )
+            self.schemas[index_name] = schema
+            logger.info(f"✅ Index '{index_name}' created")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Create index failed: {e}")
+            return False
+
+    def delete_index(self, index_name: str) -> bool:
+        """Delete an index"""
+        try:
+            schema = self._schemas_for(index_name)[0]
+            with self._transaction() as conn:
+                conn.execute(f"DROP TABLE {schema.fts}")
+                conn.execute(f"DROP TABLE {schema.docs}")
+                conn.execute("DELETE FROM search_indices WHERE name = ?", (index_name,))
+            del self.schemas[index_name]
+            logger.info(f"✅ Index '{index_name}' deleted")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Delete index failed: {e}")
+            return False
+
+    def index_exists(self, index_name: str) -> bool:
+        """Check whether an index exists"""
+        return index_name in self.schemas
+
+    # ---- documents ----
+
+    def _upsert(self, conn, schema: _Schema, doc_id: Optional[str], document: Dict) -> None:
+        """Insert or replace one document and its FTS row"""
+        doc_id = str(doc_id) if doc_id is not None else uuid.uuid4().hex
+        source = json.dumps(document, default=str)
+        row = conn.execute(f"SELECT rowid FROM {schema.docs} WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row:
+            rowid = row[0]
+            conn.execute(f"UPDATE {schema.docs} SET source = ? WHERE rowid = ?", (source, rowid))
+            conn.execute(f"DELETE FROM {schema.fts} WHERE rowid = ?", (rowid,))
+        else:
+            rowid = conn.execute(
+                f"INSERT INTO {schema.docs} (doc_id, source) VALUES (?, ?)", (doc_id, source)
+            ).lastrowid
+        marks = ", ".join("?" for _ in schema.column_order)
+        conn.execute(
+            f"INSERT INTO {schema.fts} (rowid, {', '.join(schema.column_order)}) VALUES (?, {marks})",
+            [rowid] + schema.row(json.loads(source)),
+        )
+
+    def index_document(self, index_name: str, doc_id: str, document: Dict) -> bool:
+        """Index a document"""
+        try:
+            if index_name not in self.schemas:
+                # Elasticsearch creates missing indexes on first write
+                self.create_index(index_name)
+            schema = self.schemas[index_name]
+            with self._transaction() as conn:
+                self._upsert(conn, schema, doc_id, document)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Index document failed: {e}")
+            return False
+
+    def delete_document(self, index_name: str, doc_id: str) -> bool:
+        """Delete a document"""
+        try:
+            schema = self._schemas_for(index_name)[0]
+            with self._transaction() as conn:
+                row = conn.execute(
+                    f"SELECT rowid FROM {schema.docs} WHERE doc_id = ?", (str(doc_id),)
+                ).fetchone()
+                if row:
+                    conn.execute(f"DELETE FROM {schema.fts} WHERE rowid = ?", (row[0],))
+                    conn.execute(f"DELETE FROM {schema.docs} WHERE rowid = ?", (row[0],))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Delete document failed: {e}")
+            return False
+
+    def bulk_index(
+        self,
+        index_name: str,
+        documents: Iterable[Dict],
+        id_field: Optional[str] = "id",
+        chunk_size: Optional[int] = None,
+        max_errors: int = 100,
+        **kwargs,
+    ) -> Dict:
+        """Index documents in chunked transactions (same summary as Elasticsearch)
+
+        Elasticsearch-only options (max_in_flight, fast_load, ...) are accepted
+        and ignored.
+        """
+        chunk_size = chunk_size or 1000
+        summary = {"indexed": 0, "failed": 0, "retries": 0, "chunks": 0, "errors": []}
+        start = time.time()
+
+        def write(chunk: List[Dict]) -> None:
+            with self._transaction() as conn:
+                for document in chunk:
+                    try:
+                        if "_source" in document:
+                            self._upsert(conn, schema, document.get("_id"), document["_source"])
+                        else:
+                            doc_id = document.get(id_field) if id_field else None
+                            self._upsert(conn, schema, doc_id, document)
+                        summary["indexed"] += 1
+                    except Exception as e:
+                        summary["failed"] += 1
+                        if len(summary["errors"]) < max_errors:
+                            summary["errors"].append({"_id": None, "status": 400, "error": str(e)})
+            summary["chunks"] += 1
+
+        try:
+            if index_name not in self.schemas:
+                self.create_index(index_name)
+            schema = self.schemas[index_name]
+            chunk = []
+            for document in documents:
+                chunk.append(document)
+                if len(chunk) >= chunk_size:
+                    write(chunk)
+                    chunk = []
+            if chunk:
+                write(chunk)
+        except Exception as e:
+            logger.error(f"❌ Bulk index failed: {e}")
+            summary["error"] = str(e)
+
+        summary["elapsed"] = round(time.time() - start, 3)
+        summary["docs_per_second"] = round(summary["indexed"] / summary["elapsed"]) if summary["elapsed"] else 0
+        return summary
+
+    @contextmanager
+    def bulk_load_settings(self, index_name: str, enabled: bool = True):
+        """No-op: there is no refresh or replication to disable locally"""
+        yield
+
+    # ---- search ----
+
+    def _select(self, schema: _Schema, query: Optional[Dict], sort: List) -> Tuple[str, List]:
+        """Build a SELECT of (index, id, source, score, sort values) for one index"""
+        compiler = _QueryCompiler(schema)
+        where, params = compiler.compile(query)
+
+        score = "1.0"
+        join = ""
+        join_params = []
+        if compiler.scoring:
+            weights = ", ".join(str(compiler.weights.get(column, 1.0)) for column in schema.column_order)
+            scored = (
+                f"(SELECT rowid AS r, -bm25({schema.fts}, {weights}) AS score "
+                f"FROM {schema.fts} WHERE {schema.fts} MATCH ?) s ON s.r = d.rowid"
+            )
+            join_params = [" OR ".join(f"({expr})" for expr in compiler.scoring)]
+            score = "COALESCE(s.score, 0.0)"
+            if len(compiler.scoring) == 1 and compiler.pure.get(where) == compiler.scoring[0]:
+                # Plain full-text query: run the match once as a join
+                join = f"JOIN {scored}"
+                where, params = "1", []
+            else:
+                join = f"LEFT JOIN {scored}"
+
+        columns = [f"? AS _index", "d.doc_id AS _id", "d.source AS _source", f"{score} AS _score"]
+        column_params = [schema.name]
+        for position, (field, _) in enumerate(sort):
+            if field == "_score":
+                expression = score
+            elif field in ("_doc", "_shard_doc"):
+                expression = "d.rowid"
+            elif field == "_id":
+                expression = "d.doc_id"
+            else:
+                expression = json_field(field)
+            columns.append(f"{expression} AS sort_{position}")
+
+        sql = f"SELECT {', '.join(columns)} FROM {schema.docs} d {join} WHERE {where}"
+        return sql, column_params + join_params + params
+
+    @staticmethod
+    def _sort_spec(sort: Optional[List]) -> List[Tuple[str, str]]:
+        """Normalize an Elasticsearch sort into (field, direction) pairs"""
+        spec = []
+        for item in sort or [{"_score": "desc"}]:
+            if isinstance(item, str):
+                spec.append((item, "desc" if item == "_score" else "asc"))
+            else:
+                (field, order), = item.items()
+                if isinstance(order, dict):
+                    order = order.get("order", "asc")
+                spec.append((field, str(order).lower()))
+        if not any(field in ("_doc", "_shard_doc") for field, _ in spec):
+            spec.append(("_doc", "asc"))
+        return spec
+
+    def _query(self, conn, index_name: str, body: Optional[Dict], size: Optional[int], offset: int = 0):
+        """Run a search body and return (cursor, sort spec)"""
+        body = body or {}
+        sort = self._sort_spec(body.get("sort"))
+        selects, params = [], []
+        for schema in self._schemas_for(index_name):
+            sql, select_params = self._select(schema, body.get("query"), sort)
+            selects.append(sql)
+            params.extend(select_params)
+        order = ", ".join(f"sort_{position} {direction.upper()}" for position, (_, direction) in enumerate(sort))
+        sql = " UNION ALL ".join(selects) + f" ORDER BY {order}"
+        if size is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([size, offset])
+        return conn.execute(sql, params), sort
+
+    @staticmethod
+    def _hit(row: Tuple, sort: List) -> Dict:
+        """Turn a result row into a hit"""
+        return {
+            "_id": row[1],
+            "_index": row[0],
+            "_score": row[3],
+            "sort": list(row[4 : 4 + len(sort)]),
+            "_source": json.loads(row[2]),
+        }
+
+    def search(self, index_name: str, query: Dict) -> List[Dict]:
+        """Search documents"""
+        try:
+            with self.lock:
+                cursor, sort = self._query(
+                    self.client, index_name, query, query.get("size", 10), query.get("from", 0)
+                )
+                return [json.loads(row[2]) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"❌ Search failed: {e}")
+            return []
+
+    def search_iter(
+        self,
+        index_name: str,
+        query: Optional[Dict] = None,
+        page_size: int = 1000,
+        keep_alive: str = "1m",
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """Yield every matching hit lazily
+
+        File-backed indexes stream from a separate read connection, so the
+        results are a consistent snapshot (like a point-in-time).
+        """
+        body = dict(query or {})
+        body.pop("size", None)
+        body.pop("from", None)
+        if "sort" not in body:
+            body["sort"] = [{"_doc": "asc"}]
+        yielded = 0
+        try:
+            if self.path == ":memory:":
+                while limit is None or yielded < limit:
+                    with self.lock:
+                        cursor, sort = self._query(self.client, index_name, body, page_size, yielded)
+                        rows = cursor.fetchall()
+                    for row in rows:
+                        if limit is not None and yielded >= limit:
+                            return
+                        yielded += 1
+                        yield self._hit(row, sort)
+                    if len(rows) < page_size:
+                        return
+                return
+
+            conn = sqlite3.connect(self.path)
+            try:
+                conn.execute("BEGIN")
+                cursor, sort = self._query(conn, index_name, body, None)
+                while True:
+                    rows = cursor.fetchmany(page_size)
+                    if not rows:
+                        return
+                    for row in rows:
+                        if limit is not None and yielded >= limit:
+                            return
+                        yielded += 1
+                        yield self._hit(row, sort)
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"❌ Streaming search failed: {e}")
+
+    @staticmethod
+    def encode_cursor(offset: int) -> str:
+        """Encode a page offset as an opaque cursor"""
+        return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        """Decode a cursor produced by encode_cursor"""
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["offset"])
+
+    def search_page(
+        self,
+        index_name: str,
+        query: Optional[Dict] = None,
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        sort: Optional[List] = None,
+        track_total_hits: Any = 10000,
+    ) -> Dict:
+        """Get one page of hits with the total count and a cursor for the next page"""
+        empty = {"hits": [], "total": 0, "total_relation": "eq", "cursor": None}
+        try:
+            body = dict(query or {})
+            if sort:
+                body["sort"] = sort
+            offset = self.decode_cursor(cursor) if cursor else 0
+            with self.lock:
+                rows_cursor, sort_spec = self._query(self.client, index_name, body, page_size + 1, offset)
+                rows = rows_cursor.fetchall()
+                total = self.count(index_name, body)
+
+            page = rows[:page_size]
+            next_cursor = self.encode_cursor(offset + page_size) if len(rows) > page_size else None
+            return {
+                "hits": [self._hit(row, sort_spec) for row in page],
+                "total": total,
+                "total_relation": "eq",
+                "cursor": next_cursor,
+            }
+        except Exception as e:
+            logger.error(f"❌ Paged search failed: {e}")
+            return empty
+
+    def count(self, index_name: str, query: Optional[Dict] = None) -> int:
+        """Count documents matching a query"""
+        try:
+            total = 0
+            with self.lock:
+                for schema in self._schemas_for(index_name):
+                    where, params = _QueryCompiler(schema).compile((query or {}).get("query"))
+                    total += self.client.execute(
+                        f"SELECT COUNT(*) FROM {schema.docs} d WHERE {where}", params
+                    ).fetchone()[0]
+            return total
+        except Exception as e:
+            logger.error(f"❌ Count failed: {e}")
+            return 0
+
+    def get_stats(self) -> Dict:
+        """Get local search statistics"""
+        try:
+            documents = sum(self.count(name) for name in self.schemas)
+            size = os.path.getsize(self.path) if self.path != ":memory:" and os.path.exists(self.path) else 0
+            return {
+                "status": "green",
+                "engine": "sqlite-fts5",
+                "nodes": 1,
+                "indices": len(self.schemas),
+                "documents": documents,
+                "size_bytes": size,
+            }
+        except Exception as e:
+            logger.error(f"❌ Get stats failed: {e}")
+            return {}
+
+    def close(self):
+        """Close the search database"""
+        if self.client:
+            self.client.close()
+            self.client = None
+            logger.info("✅ Local search closed")
@@ -0,0 +1,400 @@
+# Lock-Wait Analysis
+# Who blocks whom: wait-for graphs, root blockers and an optional cancel policy
+#
+# PostgreSQL: pg_blocking_pids() of every session waiting on a lock gives
+# the edges; it takes the lock manager's partition locks briefly, so it is
+# only called for sessions whose wait_event_type is Lock. MySQL 8.0:
+# performance_schema.data_lock_waits gives InnoDB row-lock edges and
+# pending metadata locks are paired with the granted ones on the same
+# table (as sys.schema_table_lock_waits does), so an ALTER TABLE stuck
+# behind an open transaction shows up too.
+#
+# A root blocker holds locks others wait for while waiting on nothing
+# itself; clearing it unblocks its whole subtree. Sessions that wait only
+# on each other form a deadlock, which the server resolves by itself.
+#
+# The cancel policy (DB_LOCK_CANCEL) acts on root blockers only, once the
+# oldest wait behind them reaches DB_LOCK_CANCEL_AFTER seconds:
+# DB_LOCK_CANCEL_ACTION=cancel stops the running statement
+# (pg_cancel_backend, which aborts the transaction and frees its locks;
+# MySQL KILL QUERY, which keeps locks taken by earlier statements),
+# terminate ends the session. A root that is idle in transaction has no
+# statement to cancel and is only ended with terminate. A PostgreSQL
+# cancel only fires if the pid still runs the same transaction it had
+# when the graph was read, so a reused pid is never hit.
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from db_config import DatabaseConfig
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_CHARS = 1000
+
+POSTGRESQL_LOCK_WAITS = f"""
+WITH waiting AS (
+    SELECT pid, pg_blocking_pids(pid) AS blocked_by
+    FROM pg_stat_activity
+    WHERE wait_event_type = 'Lock' AND pid <> pg_backend_pid()
+)
+SELECT
+    a.pid,
+    a.usename,
+    a.application_name,
+    a.client_addr::text AS client_addr,
+    a.backend_type,
+    a.state,
+    a.backend_start,
+    a.xact_start,
+    EXTRACT(EPOCH FROM clock_timestamp() - a.query_start) AS query_s,
+    EXTRACT(EPOCH FROM clock_timestamp() - a.xact_start) AS xact_s,
+    left(a.query, {QUERY_CHARS}) AS query,
+    w.blocked_by,
+    (
+        SELECT l.mode || ' on ' || COALESCE(l.relation::regclass::text, l.locktype)
+        FROM pg_locks l
+        WHERE l.pid = a.pid AND NOT l.granted
+        LIMIT 1
+    ) AS waiting_for
+FROM pg_stat_activity a
+LEFT JOIN waiting w ON w.pid = a.pid
+WHERE w.pid IS NOT NULL OR a.pid IN (SELECT unnest(blocked_by) FROM waiting)
+"""
+
+MYSQL_LOCK_WAITS = """
+SELECT
+    r.PROCESSLIST_ID AS waiting_id,
+    b.PROCESSLIST_ID AS blocking_id,
+    CONCAT(l.LOCK_MODE, ' ', l.LOCK_TYPE, ' lock on ', l.OBJECT_SCHEMA, '.', l.OBJECT_NAME) AS waiting_for
+FROM performance_schema.data_lock_waits w
+JOIN performance_schema.threads r ON r.THREAD_ID = w.REQUESTING_THREAD_ID
+JOIN performance_schema.threads b ON b.THREAD_ID = w.BLOCKING_THREAD_ID
+LEFT JOIN performance_schema.data_locks l
+    ON l.ENGINE = w.ENGINE AND l.ENGINE_LOCK_ID = w.REQUESTING_ENGINE_LOCK_ID
+UNION ALL
+SELECT
+    r.PROCESSLIST_ID,
+    b.PROCESSLIST_ID,
+    CONCAT(p.LOCK_TYPE, ' metadata lock on ', p.OBJECT_SCHEMA, '.', p.OBJECT_NAME)
+FROM performance_schema.metadata_locks p
+JOIN performance_schema.metadata_locks g
+    ON g.OBJECT_TYPE = p.OBJECT_TYPE
+    AND g.OBJECT_SCHEMA <=> p.OBJECT_SCHEMA
+    AND g.OBJECT_NAME <=> p.OBJECT_NAME
+    AND g.LOCK_STATUS = 'GRANTED'
+    AND g.OWNER_THREAD_ID <> p.OWNER_THREAD_ID
+JOIN performance_schema.threads r ON r.THREAD_ID = p.OWNER_THREAD_ID
+JOIN performance_schema.threads b ON b.THREAD_ID = g.OWNER_THREAD_ID
+WHERE p.LOCK_STATUS = 'PENDING' AND p.OBJECT_TYPE = 'TABLE'
+"""
+
+MYSQL_SESSIONS = f"""
+SELECT
+    p.ID AS id,
+    p.USER AS user,
+    p.HOST AS host,
+    p.COMMAND AS command,
+    p.STATE AS state,
+    p.TIME AS time_s,
+    LEFT(COALESCE(p.INFO, (
+        SELECT s.SQL_TEXT
+        FROM performance_schema.events_statements_current s
+        JOIN performance_schema.threads t ON t.THREAD_ID = s.THREAD_ID
+        WHERE t.PROCESSLIST_ID = p.ID
+        LIMIT 1
+    )), {QUERY_CHARS}) AS query,
+    TIMESTAMPDIFF(SECOND, x.trx_started, NOW()) AS xact_s,
+    TIMESTAMPDIFF(SECOND, x.trx_wait_started, NOW()) AS wait_s
+FROM information_schema.processlist p
+LEFT JOIN information_schema.innodb_trx x ON x.trx_mysql_thread_id = p.ID
+WHERE p.ID IN ({{ids}})
+"""
+
+
+def seconds(value) -> Optional[float]:
+    """Driver interval value as seconds (Decimal, int, None)"""
+    return None if value is None else round(float(value), 1)
+
+
+def build_graph(db: str, sessions: Dict[int, Dict], edges: List[Tuple[int, int, Optional[str]]]) -> Dict:
+    """Wait-for graph of one database from (waiter, blocker, waiting_for) edges
+
+    Returns {"db", "sessions", "waits", "roots", "deadlocked", "waiters"}:
+    one wait per waiting session with its direct blockers and the root
+    blockers behind them, and the roots with the sessions they hold up,
+    how deep the chain goes and how long its oldest wait is (blocking_s),
+    most harmful first. waiters maps each blocker to its direct waiters.
+    """
+    blockers: Dict[int, List[int]] = {}
+    waiters: Dict[int, List[int]] = {}
+    waiting_for: Dict[int, str] = {}
+    for waiter, blocker, what in edges:
+        if waiter is None or blocker is None or waiter == blocker:
+            continue
+        if blocker not in blockers.setdefault(waiter, []):
+            blockers[waiter].append(blocker)
+            waiters.setdefault(blocker, []).append(waiter)
+        if what and waiter not in waiting_for:
+            waiting_for[waiter] = what
+
+    roots = []
+    root_of: Dict[int, List[int]] = {}
+    for root in sorted(set(waiters) - set(blockers)):
+        blocked, depth, level = [], 0, [root]
+        seen = {root}
+        while level:
+            following = []
+            for pid in level:
+                for waiter in waiters.get(pid, []):
+                    if waiter not in seen:
+                        seen.add(waiter)
+                        following.append(waiter)
+            if following:
+                depth += 1
+                blocked.extend(following)
+            level = following
+        for waiter in blocked:
+            root_of.setdefault(waiter, []).append(root)
+        waits = [sessions.get(waiter, {}).get("wait_s") or 0.0 for waiter in blocked]
+        roots.append(
+            dict(
+                sessions.get(root, {"id": root}),
+                blocked=blocked,
+                blocked_count=len(blocked),
+                depth=depth,
+                blocking_s=max(waits) if waits else 0.0,
+            )
+        )
+    roots.sort(key=lambda r: (r["blocked_count"], r["blocking_s"]), reverse=True)
+
+    waits = []
+    for waiter in blockers:
+        waits.append(
+            dict(
+                sessions.get(waiter, {"id": waiter}),
+                blocked_by=blockers[waiter],
+                roots=root_of.get(waiter, []),
+                waiting_for=waiting_for.get(waiter),
+            )
+        )
+    waits.sort(key=lambda w: w.get("wait_s") or 0.0, reverse=True)
+
+    return {
+        "db": db,
+        "sessions": sessions,
+        "waits": waits,
+        "roots": roots,
+        # Behind no root: a lock cycle the server has not broken yet (or queued on one)
+        "deadlocked": sorted(pid for pid in blockers if pid not in root_of),
+        "waiters": waiters,
+    }
+
+
+def postgresql_graph(manager) -> Dict:
+    """Wait-for graph of a PostgreSQLManager's server"""
+    sessions: Dict[int, Dict] = {}
+    edges = []
+    for row in manager.execute(POSTGRESQL_LOCK_WAITS):
+        pid = row["pid"]
+        state = row["state"] or ""
+        waiting = row["blocked_by"] is not None
+        sessions[pid] = {
+            "id": pid,
+            "user": row["usename"],
+            "client": row["client_addr"],
+            "application": row["application_name"],
+            "backend_type": row["backend_type"],
+            "state": state,
+            "idle": state.startswith("idle in transaction"),
+            "query": row["query"],
+            "query_s": seconds(row["query_s"]),
+            "xact_s": seconds(row["xact_s"]),
+            # A lock waiter is still in the statement that asked for the lock
+            "wait_s": seconds(row["query_s"]) if waiting else None,
+            "backend_start": row["backend_start"],
+            "xact_start": row["xact_start"],
+        }
+        for blocker in row["blocked_by"] or []:
+            edges.append((pid, blocker, row["waiting_for"]))
+    return build_graph("postgresql", sessions, edges)
+
+
+def mysql_graph(manager) -> Dict:
+    """Wait-for graph of a MySQLManager's server (MySQL 8.0+)"""
+    edges = [
+        (row["waiting_id"], row["blocking_id"], row["waiting_for"])
+        for row in manager.execute(MYSQL_LOCK_WAITS)
+        if row["waiting_id"] is not None and row["blocking_id"] is not None
+    ]
+    ids = sorted({pid for edge in edges for pid in edge[:2]})
+    sessions: Dict[int, Dict] = {}
+    if ids:
+        query = MYSQL_SESSIONS.format(ids=", ".join(["%s"] * len(ids)))
+        waiting = {edge[0] for edge in edges}
+        for row in manager.execute(query, tuple(ids)):
+            pid = row["id"]
+            sessions[pid] = {
+                "id": pid,
+                "user": row["user"],
+                "client": row["host"],
+                "state": f"{row['command']}: {row['state']}" if row["state"] else row["command"],
+                "idle": row["command"] == "Sleep",
+                "query": row["query"],
+                "query_s": seconds(row["time_s"]),
+                "xact_s": seconds(row["xact_s"]),
+                # Metadata lock waits have no InnoDB wait start; use time in state
+                "wait_s": seconds(row["wait_s"] if row["wait_s"] is not None else row["time_s"])
+                if pid in waiting
+                else None,
+            }
+    return build_graph("mysql", sessions, edges)
+
+
+def lock_graphs(manager, databases: Optional[List[str]] = None) -> List[Dict]:
+    """Wait-for graphs of the live SQL backends of a DatabaseManager"""
+    graphs = []
+    builders = (("postgresql", postgresql_graph), ("mysql", mysql_graph))
+    for name, build in builders:
+        if databases is not None and name not in databases:
+            continue
+        if not manager.is_live(name):
+            continue
+        try:
+            graphs.append(build(getattr(manager, name)))
+        except Exception as e:
+            logger.error(f"❌ Lock analysis failed for {name}: {e}")
+    return graphs
+
+
+def skip_reason(root: Dict, policy: Dict) -> Optional[str]:
+    """Why the cancel policy leaves a root blocker alone, None to act"""
+    if "state" not in root:
+        return "session details unavailable"
+    if root.get("blocking_s", 0.0) < policy["cancel_after"]:
+        return f"oldest wait {root.get('blocking_s', 0.0)}s < {policy['cancel_after']:g}s"
+    if root.get("blocked_count", 0) < policy["min_blocked"]:
+        return f"blocks {root.get('blocked_count', 0)} < {policy['min_blocked']} sessions"
+    if root.get("user") in policy["exclude_users"]:
+        return f"user {root['user']} is excluded"
+    if root.get("backend_type") not in (None, "client backend"):
+        return f"{root['backend_type']} is not a client session"
+    if root.get("idle") and policy["action"] != "terminate":
+        return "idle in transaction: no statement to cancel (DB_LOCK_CANCEL_ACTION=terminate ends it)"
+    return None
+
+
+def cancel_session(manager, db: str, root: Dict, action: str) -> bool:
+    """Cancel a root blocker's statement or end its session"""
+    if db == "postgresql":
+        function = "pg_terminate_backend" if action == "terminate" else "pg_cancel_backend"
+        rows = manager.execute(
+            f"SELECT {function}(pid) AS done FROM pg_stat_activity "
+            "WHERE pid = %s AND backend_start = %s AND xact_start IS NOT DISTINCT FROM %s",
+            (root["id"], root["backend_start"], root["xact_start"]),
+        )
+        return bool(rows and rows[0]["done"])
+
+    statement = f"KILL {int(root['id'])}" if action == "terminate" else f"KILL QUERY {int(root['id'])}"
+    cursor = manager.connection.cursor()
+    try:
+        cursor.execute(statement)
+        return True
+    except Exception as e:
+        logger.error(f"❌ {statement} failed: {e}")
+        return False
+    finally:
+        cursor.close()
+
+
+def cancel_blockers(
+    manager, graphs: List[Dict], policy: Optional[Dict] = None, dry_run: bool = False
+) -> List[Dict]:
+    """Apply the cancel policy to the root blockers of each graph
+
+    Returns one action per root blocker: {"db", "id", "user", "query",
+    "blocked_count", "blocking_s", "action", "done", "skipped"}; with
+    dry_run nothing is executed and done stays False.
+    """
+    policy = policy or DatabaseConfig.get_locks_config()
+    actions = []
+    for graph in graphs:
+        db = graph["db"]
+        for root in graph["roots"]:
+            action = {
+                "db": db,
+                "id": root["id"],
+                "user": root.get("user"),
+                "query": root.get("query"),
+                "blocked_count": root["blocked_count"],
+                "blocking_s": root["blocking_s"],
+                "action": policy["action"],
+                "done": False,
+                "skipped": skip_reason(root, policy),
+            }
+            actions.append(action)
+            if action["skipped"] or dry_run:
+                continue
+            try:
+                action["done"] = cancel_session(getattr(manager, db), db, root, policy["action"])
+            except Exception as e:
+                logger.error(f"❌ Cancelling {db} session {root['id']} failed: {e}")
+            if action["done"]:
+                verb = "Terminated" if policy["action"] == "terminate" else "Cancelled"
+                logger.warning(
+                    f"⚠️  {verb} {db} session {root['id']} ({root.get('user')}) blocking "
+                    f"{root['blocked_count']} sessions for {root['blocking_s']}s: "
+                    f"{(root.get('query') or '')[:120]}"
+                )
+            else:
+                action["skipped"] = "not cancelled (session ended or moved to another transaction)"
+    return actions
+
+
+def describe(session: Dict) -> str:
+    """One-line summary of a session"""
+    who = session.get("user") or "?"
+    if session.get("client"):
+        who += f"@{session['client']}"
+    parts = [f"{who}", session.get("state") or "unknown state"]
+    if session.get("xact_s") is not None:
+        parts.append(f"transaction {session['xact_s']}s")
+    return ", ".join(parts)
+
+
+def format_lock_tree(graph: Dict, width: int = 100) -> List[str]:
+    """Root blockers and the sessions waiting behind them, as indented lines"""
+
+    def text(query: Optional[str]) -> str:
+        query = " ".join((query or "").split())
+        return query if len(query) <= width else query[: width - 1] + "…"
+
+    sessions, waiters = graph["sessions"], graph["waiters"]
+    waits = {w["id"]: w for w in graph["waits"]}
+    lines = []
+
+    def branch(pid: int, indent: str, seen: set) -> None:
+        children = [waiter for waiter in waiters.get(pid, []) if waiter not in seen]
+        seen.update(children)
+        for n, waiter in enumerate(children):
+            last = n == len(children) - 1
+            wait = waits.get(waiter, {})
+            lines.append(
+                f"{indent}{'└─' if last else '├─'} {waiter} waiting {wait.get('wait_s')}s"
+                + (f" for {wait['waiting_for']}" if wait.get("waiting_for") else "")
+            )
+            child_indent = indent + ("   " if last else "│  ")
+            lines.append(f"{child_indent}   {text(sessions.get(waiter, {}).get('query'))}")
+            branch(waiter, child_indent, seen)
+
+    for root in graph["roots"]:
+        lines.append(
+            f"🔒 {root['id']} ({describe(root)}) blocks {root['blocked_count']} "
+            f"for {root['blocking_s']}s"
+        )
+        lines.append(f"   {text(root.get('query'))}")
+        branch(root["id"], "   ", {root["id"]})
+    if graph["deadlocked"]:
+        lines.append(f"💀 Deadlocked (the server will abort one): {', '.join(map(str, graph['deadlocked']))}")
+    return lines
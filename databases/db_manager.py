@@ -1,16 +1,131 @@
 # Main Database Manager
 # Handles connections and operations for all databases
 
+import os
+import re
+import base64
+import time
+import random
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator
 from contextlib import contextmanager
 import json
 from datetime import datetime
 from db_config import DatabaseConfig, DatabaseURLBuilder
+from db_codecs import ValueSerializer
+from db_metrics import timed, failed, sql_label, key_label, index_label
+from db_explain import ExplainCapture
 
 
 logger = logging.getLogger(__name__)
 
+# Statement types the server can prepare (PREPARE / COM_STMT_PREPARE)
+PREPARABLE_STATEMENTS = ("select", "insert", "update", "delete", "with", "values")
+
+# Errors meaning a cached statement is stale (schema change, deallocated)
+POSTGRES_REPREPARE_CODES = ("0A000", "26000")
+MYSQL_REPREPARE_ERRNOS = (1243, 1615)
+# Remembered query texts that PostgreSQL could not prepare
+UNPREPARABLE_CACHE_SIZE = 1000
+
+# Manager-only options that must not be passed to mysql.connector
+MYSQL_MANAGER_OPTIONS = ("max_overflow", "pool_recycle", "prepared_cache_size")
+
+# Bulk item statuses worth retrying (rejected by a full write queue)
+ES_BULK_RETRY_STATUSES = (429,)
+
+# Default ordering for paged search; put a unique field last for stable cursors
+ES_DEFAULT_SORT = [{"_score": "desc"}, {"_doc": "asc"}]
+
+_PYFORMAT_RE = re.compile(r"%%|%s")
+# A placeholder inside a string literal: psycopg2 substitutes it, PREPARE does not
+_QUOTED_PLACEHOLDER_RE = re.compile(r"'[^']*%s[^']*'")
+
+
+def is_preparable(query: str) -> bool:
+    """Check whether a statement can be server-side prepared"""
+    words = query.lstrip().split(None, 1)
+    return (
+        bool(words)
+        and words[0].lower() in PREPARABLE_STATEMENTS
+        and not _QUOTED_PLACEHOLDER_RE.search(query)
+    )
+
+
+def to_numeric_placeholders(query: str) -> Tuple[str, int]:
+    """Convert %s placeholders to $1..$n, returning the query and count"""
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group(0) == "%%":
+            return "%"
+        count += 1
+        return f"${count}"
+
+    return _PYFORMAT_RE.sub(replace, query), count
+
+
+class PreparedStatementCache:
+    """LRU cache of prepared statements for a single connection"""
+
+    def __init__(self, max_size: int = 100):
+        """Initialize statement cache"""
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, query: str) -> Optional[Any]:
+        """Get the cached statement for a query, counting hits and misses"""
+        entry = self.entries.get(query)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(query)
+        self.hits += 1
+        return entry
+
+    def put(self, query: str, entry: Any) -> List[Any]:
+        """Cache a statement, returning evicted entries to be released"""
+        self.entries[query] = entry
+        self.entries.move_to_end(query)
+        evicted = []
+        while len(self.entries) > self.max_size:
+            _, old = self.entries.popitem(last=False)
+            evicted.append(old)
+            self.evictions += 1
+        return evicted
+
+    def invalidate(self, query: str) -> Optional[Any]:
+        """Drop a stale statement, returning it to be released"""
+        self.invalidations += 1
+        return self.entries.pop(query, None)
+
+    def clear(self) -> List[Any]:
+        """Drop all statements, returning them to be released"""
+        entries = list(self.entries.values())
+        self.entries.clear()
+        return entries
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
 
 class MySQLManager:
     """MySQL/MariaDB connection and query manager"""
@@ -18,8 +133,15 @@ class MySQLManager:
     def __init__(self, config: Optional[Dict] = None):
         """Initialize MySQL manager"""
         self.config = config or DatabaseConfig.get_mysql_config()
+        # Serializes threads sharing the single connection and cursor;
+        # reentrant so callers can hold it across several calls
+        self.lock = threading.RLock()
+        self.pool = None
         self.connection = None
         self.cursor = None
+        cache_size = self.config.get("prepared_cache_size", 0)
+        self.statement_cache = PreparedStatementCache(cache_size) if cache_size else None
+        self.explain = ExplainCapture.for_manager(self, "mysql")
 
     def connect(self) -> bool:
         """Connect to MySQL database"""
@@ -27,7 +149,10 @@ class MySQLManager:
             import mysql.connector
             from mysql.connector import pooling
 
-            self.pool = pooling.MySQLConnectionPool(**self.config)
+            pool_config = {
+                k: v for k, v in self.config.items() if k not in MYSQL_MANAGER_OPTIONS
+            }
+            self.pool = pooling.MySQLConnectionPool(**pool_config)
             self.connection = self.pool.get_connection()
             self.cursor = self.connection.cursor(dictionary=True)
             logger.info("✅ Connected to MySQL successfully")
@@ -36,38 +161,100 @@ class MySQLManager:
             logger.error(f"❌ MySQL connection failed: {e}")
             return False
 
-    def execute(self, query: str, params: Optional[Tuple] = None) -> List[Dict]:
-        """Execute a SELECT query"""
+    def _get_prepared_cursor(self, query: str):
+        """Get the server-side prepared cursor for a query"""
+        cursor = self.statement_cache.get(query)
+        if cursor is None:
+            cursor = self.connection.cursor(prepared=True)
+            for evicted in self.statement_cache.put(query, cursor):
+                evicted.close()
+        return cursor
+
+    def _execute_prepared(self, query: str, params: Tuple):
+        """Execute a query through the prepared statement cache"""
+        from mysql.connector import errors
+
+        cursor = self._get_prepared_cursor(query)
         try:
+            cursor.execute(query, params)
+        except errors.Error as e:
+            if e.errno not in MYSQL_REPREPARE_ERRNOS:
+                raise
+            # Table definition changed or statement was dropped: re-prepare once
+            logger.warning(f"⚠️  Re-preparing stale MySQL statement: {e}")
+            stale = self.statement_cache.invalidate(query)
+            if stale is not None:
+                stale.close()
+            cursor = self._get_prepared_cursor(query)
+            cursor.execute(query, params)
+        return cursor
+
+    def _run(self, query: str, params: Optional[Tuple] = None):
+        """Run a query, returning the cursor holding its results"""
+        started = time.perf_counter() if self.explain else None
+        if (
+            params
+            and self.statement_cache is not None
+            and isinstance(params, (tuple, list))
+            and is_preparable(query)
+        ):
+            cursor = self._execute_prepared(query, tuple(params))
+        else:
             if params:
                 self.cursor.execute(query, params)
             else:
                 self.cursor.execute(query)
-            return self.cursor.fetchall()
-        except Exception as e:
-            logger.error(f"❌ Query execution failed: {e}")
-            return []
+            cursor = self.cursor
+        if started is not None:
+            self.explain.observe(query, params, time.perf_counter() - started)
+        return cursor
 
+    @timed("mysql", "execute", label=sql_label)
+    def execute(self, query: str, params: Optional[Tuple] = None) -> List[Dict]:
+        """Execute a SELECT query"""
+        with self.lock:
+            try:
+                cursor = self._run(query, params)
+                if cursor is self.cursor:
+                    return cursor.fetchall()
+                columns = cursor.column_names
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            except Exception as e:
+                failed()
+                logger.error(f"❌ Query execution failed: {e}")
+                return []
+
+    @timed("mysql", "execute_update", label=sql_label)
     def execute_update(self, query: str, params: Optional[Tuple] = None) -> int:
         """Execute INSERT/UPDATE/DELETE query"""
-        try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            return self.cursor.rowcount
-        except Exception as e:
-            self.connection.rollback()
-            logger.error(f"❌ Update failed: {e}")
-            return 0
+        with self.lock:
+            try:
+                cursor = self._run(query, params)
+                self.connection.commit()
+                return cursor.rowcount
+            except Exception as e:
+                failed()
+                self.connection.rollback()
+                logger.error(f"❌ Update failed: {e}")
+                return 0
+
+    def get_statement_cache_stats(self) -> Dict:
+        """Get prepared statement cache statistics"""
+        if self.statement_cache is None:
+            return {}
+        return self.statement_cache.get_stats()
 
     def close(self):
         """Close database connection"""
+        if self.statement_cache is not None:
+            for cursor in self.statement_cache.clear():
+                cursor.close()
         if self.cursor:
             self.cursor.close()
         if self.connection:
             self.connection.close()
+        if self.explain is not None:
+            self.explain.close()
         logger.info("MySQL connection closed")
 
     def __enter__(self):
@@ -84,8 +271,18 @@ class PostgreSQLManager:
     def __init__(self, config: Optional[Dict] = None):
         """Initialize PostgreSQL manager"""
         self.config = config or DatabaseConfig.get_postgresql_config()
+        # Serializes threads sharing the single connection and cursor;
+        # reentrant so callers can hold it across several calls
+        self.lock = threading.RLock()
+        self.pool = None
         self.connection = None
         self.cursor = None
+        cache_size = self.config.get("prepared_cache_size", 0)
+        self.statement_cache = PreparedStatementCache(cache_size) if cache_size else None
+        self._statement_seq = 0
+        # Query texts PREPARE rejected; they run through cursor.execute
+        self.unpreparable: set = set()
+        self.explain = ExplainCapture.for_manager(self, "postgresql")
 
     def connect(self) -> bool:
         """Connect to PostgreSQL database"""
@@ -111,44 +308,149 @@ class PostgreSQLManager:
             logger.error(f"❌ PostgreSQL connection failed: {e}")
             return False
 
-    def execute(self, query: str, params: Optional[Tuple] = None) -> List[Dict]:
-        """Execute a SELECT query"""
+    def _prepare(self, query: str, params: Tuple) -> Optional[str]:
+        """PREPARE a query on the server, returning the statement name
+
+        Returns None (and remembers the text) when the query cannot be
+        prepared: tuple parameters (psycopg2 expands them for IN %s), a
+        placeholder count that does not match the parameters, or a
+        PREPARE the server rejects. A savepoint keeps a rejected PREPARE
+        from aborting the caller's transaction.
+        """
+        import psycopg2
+
+        name = self.statement_cache.get(query)
+        if name is not None:
+            return name
+        numbered, count = to_numeric_placeholders(query)
+        if count != len(params) or any(isinstance(param, tuple) for param in params):
+            self._mark_unpreparable(query)
+            return None
+        self._statement_seq += 1
+        name = f"moai_ps_{self._statement_seq}"
         try:
-            if params:
+            self.cursor.execute(
+                f"SAVEPOINT moai_prepare; PREPARE {name} AS {numbered}; RELEASE SAVEPOINT moai_prepare"
+            )
+        except psycopg2.Error as e:
+            self.cursor.execute("ROLLBACK TO SAVEPOINT moai_prepare")
+            logger.warning(f"⚠️  Running statement unprepared, PREPARE failed: {e}")
+            self._mark_unpreparable(query)
+            return None
+        for evicted in self.statement_cache.put(query, name):
+            self.cursor.execute(f"DEALLOCATE {evicted}")
+        return name
+
+    def _mark_unpreparable(self, query: str) -> None:
+        """Remember a query text that must run unprepared (bounded)"""
+        if len(self.unpreparable) >= UNPREPARABLE_CACHE_SIZE:
+            self.unpreparable.clear()
+        self.unpreparable.add(query)
+
+    def _execute_prepared(self, query: str, params: Tuple) -> None:
+        """Execute a query through the prepared statement cache"""
+        import psycopg2
+
+        placeholders = ", ".join(["%s"] * len(params))
+        name = self._prepare(query, params)
+        if name is None:
+            self.cursor.execute(query, params)
+            return
+        try:
+            self.cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+        except psycopg2.Error as e:
+            if e.pgcode not in POSTGRES_REPREPARE_CODES:
+                raise
+            # Cached plan no longer matches the schema: re-prepare once
+            logger.warning(f"⚠️  Re-preparing stale PostgreSQL statement: {e}")
+            self.connection.rollback()
+            stale = self.statement_cache.invalidate(query)
+            if stale is not None and e.pgcode != "26000":
+                # 26000 means the statement is already gone from the server
+                self.cursor.execute(f"DEALLOCATE {stale}")
+            name = self._prepare(query, params)
+            if name is None:
                 self.cursor.execute(query, params)
             else:
-                self.cursor.execute(query)
-
-            # Convert results to list of dictionaries
-            columns = [desc[0] for desc in self.cursor.description]
-            results = []
-            for row in self.cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            return results
-        except Exception as e:
-            logger.error(f"❌ Query execution failed: {e}")
-            return []
-
+                self.cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+
+    def _run(self, query: str, params: Optional[Tuple] = None) -> None:
+        """Run a query on the manager cursor"""
+        started = time.perf_counter() if self.explain else None
+        if (
+            params
+            and self.statement_cache is not None
+            and isinstance(params, (tuple, list))
+            and query not in self.unpreparable
+            and is_preparable(query)
+        ):
+            self._execute_prepared(query, tuple(params))
+        elif params:
+            self.cursor.execute(query, params)
+        else:
+            self.cursor.execute(query)
+        if started is not None:
+            self.explain.observe(query, params, time.perf_counter() - started)
+
+    @timed("postgresql", "execute", label=sql_label)
+    def execute(self, query: str, params: Optional[Tuple] = None) -> List[Dict]:
+        """Execute a SELECT query"""
+        with self.lock:
+            try:
+                self._run(query, params)
+
+                # Convert results to list of dictionaries
+                columns = [desc[0] for desc in self.cursor.description]
+                results = []
+                for row in self.cursor.fetchall():
+                    results.append(dict(zip(columns, row)))
+                return results
+            except Exception as e:
+                failed()
+                # Leave the shared connection usable, not in an aborted transaction
+                if self.connection is not None:
+                    try:
+                        self.connection.rollback()
+                    except Exception as rollback_error:
+                        logger.warning(f"⚠️  Rollback after failed query failed: {rollback_error}")
+                logger.error(f"❌ Query execution failed: {e}")
+                return []
+
+    @timed("postgresql", "execute_update", label=sql_label)
     def execute_update(self, query: str, params: Optional[Tuple] = None) -> int:
         """Execute INSERT/UPDATE/DELETE query"""
-        try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            return self.cursor.rowcount
-        except Exception as e:
-            self.connection.rollback()
-            logger.error(f"❌ Update failed: {e}")
-            return 0
+        with self.lock:
+            try:
+                self._run(query, params)
+                self.connection.commit()
+                return self.cursor.rowcount
+            except Exception as e:
+                failed()
+                self.connection.rollback()
+                logger.error(f"❌ Update failed: {e}")
+                return 0
+
+    def get_statement_cache_stats(self) -> Dict:
+        """Get prepared statement cache statistics"""
+        if self.statement_cache is None:
+            return {}
+        return self.statement_cache.get_stats()
 
     def close(self):
         """Close database connection"""
+        if self.statement_cache is not None and self.statement_cache.clear():
+            # Pooled connections outlive this manager: drop its statements
+            try:
+                self.connection.rollback()
+                self.cursor.execute("DEALLOCATE ALL")
+            except Exception as e:
+                logger.warning(f"⚠️  Could not deallocate prepared statements: {e}")
         if self.cursor:
             self.cursor.close()
         if self.connection:
             self.pool.putconn(self.connection)
+        if self.explain is not None:
+            self.explain.close()
         logger.info("PostgreSQL connection closed")
 
     def __enter__(self):
@@ -159,6 +461,153 @@ class PostgreSQLManager:
         self.close()
 
 
+# Process-wide Redis pools keyed by (pid, url); children rebuild after fork
+_redis_pools: Dict[Tuple[int, str], Any] = {}
+_redis_pools_lock = threading.Lock()
+_metered_pool_class = None
+# Message of the ConnectionError BlockingConnectionPool raises when it times out
+REDIS_POOL_EXHAUSTED = "No connection available."
+
+
+def _reset_redis_pools() -> None:
+    """Forget pools inherited from the parent process"""
+    global _redis_pools_lock
+    _redis_pools.clear()
+    _redis_pools_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_redis_pools)
+
+
+def _get_metered_pool_class():
+    """Build a BlockingConnectionPool subclass that records saturation"""
+    global _metered_pool_class
+    if _metered_pool_class is not None:
+        return _metered_pool_class
+
+    import redis
+
+    class MeteredBlockingConnectionPool(redis.BlockingConnectionPool):
+        """Blocking pool that tracks checkouts, waits and exhaustion"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.metrics_lock = threading.Lock()
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connect_errors = 0
+            # Connections handed out and not yet released
+            self.checked_out = set()
+            self.in_use = 0
+            self.peak_in_use = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+        def get_connection(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                connection = super().get_connection(*args, **kwargs)
+            except redis.ConnectionError as e:
+                with self.metrics_lock:
+                    # Only an exhausted pool is a timeout; refused/DNS errors are not
+                    if str(e) == REDIS_POOL_EXHAUSTED:
+                        self.timeouts += 1
+                    else:
+                        self.connect_errors += 1
+                raise
+            waited = time.perf_counter() - start
+            with self.metrics_lock:
+                self.checkouts += 1
+                self.checked_out.add(connection)
+                self.in_use = len(self.checked_out)
+                self.peak_in_use = max(self.peak_in_use, self.in_use)
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            return connection
+
+        def release(self, connection):
+            # A failed connect releases a connection that was never handed out
+            with self.metrics_lock:
+                self.checked_out.discard(connection)
+                self.in_use = len(self.checked_out)
+            super().release(connection)
+
+        def get_stats(self) -> Dict:
+            """Get pool saturation metrics"""
+            with self.metrics_lock:
+                return {
+                    "max_connections": self.max_connections,
+                    "created_connections": len(self._connections),
+                    "in_use": self.in_use,
+                    "peak_in_use": self.peak_in_use,
+                    "utilization": round(self.in_use / self.max_connections, 4),
+                    "checkouts": self.checkouts,
+                    "timeouts": self.timeouts,
+                    "connect_errors": self.connect_errors,
+                    "avg_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 3)
+                    if self.checkouts
+                    else 0.0,
+                    "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                }
+
+    _metered_pool_class = MeteredBlockingConnectionPool
+    return _metered_pool_class
+
+
+def get_redis_pool(config: Optional[Dict] = None):
+    """Get the process-wide blocking connection pool for a Redis config"""
+    import redis
+
+    config = config or DatabaseConfig.get_redis_config()
+    key = (os.getpid(), DatabaseURLBuilder.build_redis_url(config))
+    with _redis_pools_lock:
+        pool = _redis_pools.get(key)
+        if pool is None:
+            connection_kwargs = {}
+            if config.get("ssl"):
+                connection_kwargs = {
+                    "connection_class": redis.SSLConnection,
+                    "ssl_certfile": config.get("ssl_certfile"),
+                    "ssl_keyfile": config.get("ssl_keyfile"),
+                    "ssl_ca_certs": config.get("ssl_ca_certs"),
+                }
+            pool = _get_metered_pool_class()(
+                max_connections=config.get("max_connections", 50),
+                timeout=config.get("pool_timeout", 5),
+                host=config["host"],
+                port=config["port"],
+                db=config.get("db", 0),
+                password=config.get("password"),
+                socket_keepalive=config.get("socket_keepalive", True),
+                socket_connect_timeout=config.get("socket_connect_timeout", 5),
+                socket_timeout=config.get("socket_timeout", 5),
+                retry_on_timeout=config.get("retry_on_timeout", True),
+                # Values may be binary (msgpack, pickle, compressed)
+                decode_responses=False,
+                **connection_kwargs,
+            )
+            _redis_pools[key] = pool
+        return pool
+
+
+def get_redis_pool_stats() -> Dict[str, Dict]:
+    """Get saturation metrics for every Redis pool in this process"""
+    pid = os.getpid()
+    with _redis_pools_lock:
+        pools = [(url, pool) for (owner, url), pool in _redis_pools.items() if owner == pid]
+    return {url: pool.get_stats() for url, pool in pools}
+
+
+def disconnect_redis_pools() -> None:
+    """Close all Redis pool connections owned by this process"""
+    with _redis_pools_lock:
+        pools = list(_redis_pools.values())
+        _redis_pools.clear()
+    for pool in pools:
+        pool.disconnect()
+
+
 class RedisManager:
     """Redis connection and cache manager"""
 
@@ -166,23 +615,15 @@ class RedisManager:
         """Initialize Redis manager"""
         self.config = config or DatabaseConfig.get_redis_config()
         self.client = None
+        self.serializer = ValueSerializer.from_config(self.config)
 
     def connect(self) -> bool:
         """Connect to Redis"""
         try:
             import redis
 
-            self.client = redis.Redis(
-                host=self.config["host"],
-                port=self.config["port"],
-                db=self.config.get("db", 0),
-                password=self.config.get("password"),
-                ssl=self.config.get("ssl", False),
-                socket_connect_timeout=self.config.get("socket_connect_timeout", 5),
-                socket_timeout=self.config.get("socket_timeout", 5),
-                retry_on_timeout=self.config.get("retry_on_timeout", True),
-                decode_responses=True,
-            )
+            # All managers in this process share one pool per server
+            self.client = redis.Redis(connection_pool=get_redis_pool(self.config))
             # Test connection
             self.client.ping()
             logger.info("✅ Connected to Redis successfully")
@@ -191,33 +632,96 @@ class RedisManager:
             logger.error(f"❌ Redis connection failed: {e}")
             return False
 
+    def _encode(self, key: str, value: Any) -> bytes:
+        """Serialize a value with the codec for its key namespace"""
+        return self.serializer.dumps(key, value)
+
+    def _decode(self, key: str, value: Optional[bytes]) -> Optional[Any]:
+        """Deserialize a value stored under key"""
+        return self.serializer.loads(key, value)
+
+    def _batches(self, items: List) -> List[List]:
+        """Split items into chunks of the configured batch size"""
+        size = max(1, self.config.get("batch_size", 500))
+        return [items[i : i + size] for i in range(0, len(items), size)]
+
+    @timed("redis", "set", label=key_label, rows=None)
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Set a value in Redis"""
         try:
             if ttl:
-                self.client.setex(key, ttl, json.dumps(value))
+                self.client.setex(key, ttl, self._encode(key, value))
             else:
-                self.client.set(key, json.dumps(value))
+                self.client.set(key, self._encode(key, value))
             return True
         except Exception as e:
+            failed()
             logger.error(f"❌ Set failed: {e}")
             return False
 
+    @timed("redis", "get", label=key_label, rows=None)
     def get(self, key: str) -> Optional[Any]:
         """Get a value from Redis"""
         try:
-            value = self.client.get(key)
-            return json.loads(value) if value else None
+            return self._decode(key, self.client.get(key))
         except Exception as e:
+            failed()
             logger.error(f"❌ Get failed: {e}")
             return None
 
+    @timed("redis", "mget", label=key_label)
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get many values, one round trip per batch"""
+        try:
+            values = []
+            for batch in self._batches(list(keys)):
+                values.extend(self._decode(k, v) for k, v in zip(batch, self.client.mget(batch)))
+            return values
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Mget failed: {e}")
+            return [None] * len(keys)
+
+    @timed("redis", "mset", label=key_label, rows=None)
+    def mset(self, mapping: Dict[str, Any]) -> bool:
+        """Set many values without expiry, one round trip per batch"""
+        try:
+            for batch in self._batches(list(mapping.items())):
+                self.client.mset({key: self._encode(key, value) for key, value in batch})
+            return True
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Mset failed: {e}")
+            return False
+
+    @timed("redis", "set_many_with_ttl", label=key_label, rows=None)
+    def set_many_with_ttl(self, mapping: Dict[str, Any], ttl: int) -> bool:
+        """Set many values with a shared TTL, one round trip per batch"""
+        try:
+            with self.pipeline() as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, value, ttl)
+            return True
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Set many failed: {e}")
+            return False
+
+    @contextmanager
+    def pipeline(self, batch_size: Optional[int] = None, transaction: bool = False):
+        """Queue commands and send them in batched round trips"""
+        batch = RedisBatch(self, batch_size or self.config.get("batch_size", 500), transaction)
+        yield batch
+        batch.flush()
+
+    @timed("redis", "delete", label=key_label, rows=None)
     def delete(self, key: str) -> bool:
         """Delete a key from Redis"""
         try:
             self.client.delete(key)
             return True
         except Exception as e:
+            failed()
             logger.error(f"❌ Delete failed: {e}")
             return False
 
@@ -239,13 +743,21 @@ class RedisManager:
                 "connected_clients": info.get("connected_clients"),
                 "total_commands": info.get("total_commands_processed"),
                 "uptime": info.get("uptime_in_seconds"),
+                "pool": self.get_pool_stats(),
             }
         except Exception as e:
             logger.error(f"❌ Get stats failed: {e}")
             return {}
 
+    def get_pool_stats(self) -> Dict:
+        """Get saturation metrics of the shared connection pool"""
+        pool = getattr(self.client, "connection_pool", None)
+        if pool is None or not hasattr(pool, "get_stats"):
+            return {}
+        return pool.get_stats()
+
     def close(self):
-        """Close Redis connection"""
+        """Release the client; the shared pool stays open for other managers"""
         if self.client:
             self.client.close()
         logger.info("Redis connection closed")
@@ -258,6 +770,81 @@ class RedisManager:
         self.close()
 
 
+class RedisBatch:
+    """Pipelined Redis commands flushed every batch_size commands"""
+
+    def __init__(self, manager: RedisManager, batch_size: int = 500, transaction: bool = False):
+        """Initialize command batch"""
+        self.manager = manager
+        self.batch_size = max(1, batch_size)
+        self.pipe = manager.client.pipeline(transaction=transaction)
+        self.decoders = []
+        self.results = []
+
+    def _queued(self, decoder=None) -> None:
+        """Track a queued command and flush when the batch is full"""
+        self.decoders.append(decoder)
+        if len(self.decoders) >= self.batch_size:
+            self.flush()
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Queue a SET (SETEX when ttl is given)"""
+        if ttl:
+            self.pipe.setex(key, ttl, self.manager._encode(key, value))
+        else:
+            self.pipe.set(key, self.manager._encode(key, value))
+        self._queued()
+
+    def get(self, key: str) -> None:
+        """Queue a GET; the decoded value is appended to results"""
+        self.pipe.get(key)
+        self._queued(lambda value: self.manager._decode(key, value))
+
+    def delete(self, *keys: str) -> None:
+        """Queue a DEL"""
+        self.pipe.delete(*keys)
+        self._queued()
+
+    def expire(self, key: str, ttl: int) -> None:
+        """Queue an EXPIRE"""
+        self.pipe.expire(key, ttl)
+        self._queued()
+
+    def flush(self) -> List[Any]:
+        """Send queued commands in one round trip"""
+        if not self.decoders:
+            return self.results
+        replies = self.pipe.execute()
+        for decoder, reply in zip(self.decoders, replies):
+            self.results.append(decoder(reply) if decoder else reply)
+        self.decoders = []
+        return self.results
+
+
+def elasticsearch_connection_params(config: Dict) -> Dict:
+    """Build Elasticsearch client keyword arguments from config"""
+    hosts = config.get("hosts", [{"host": "localhost", "port": 9200}])
+    connection_params = {
+        "hosts": hosts,
+        "timeout": config.get("request_timeout", 30),
+        "max_retries": config.get("max_retries", 3),
+        "retry_on_timeout": config.get("retry_on_timeout", True),
+    }
+
+    if config.get("username"):
+        connection_params["basic_auth"] = (
+            config["username"],
+            config.get("password", ""),
+        )
+
+    if config.get("verify_certs") == False:
+        connection_params["verify_certs"] = False
+    if config.get("ca_certs"):
+        connection_params["ca_certs"] = config["ca_certs"]
+
+    return connection_params
+
+
 class ElasticsearchManager:
     """ElasticSearch connection and search manager"""
 
@@ -271,24 +858,7 @@ class ElasticsearchManager:
         try:
             from elasticsearch import Elasticsearch
 
-            hosts = self.config.get("hosts", [{"host": "localhost", "port": 9200}])
-            connection_params = {
-                "hosts": hosts,
-                "timeout": self.config.get("request_timeout", 30),
-                "max_retries": self.config.get("max_retries", 3),
-                "retry_on_timeout": self.config.get("retry_on_timeout", True),
-            }
-
-            if self.config.get("username"):
-                connection_params["basic_auth"] = (
-                    self.config["username"],
-                    self.config.get("password", ""),
-                )
-
-            if self.config.get("verify_certs") == False:
-                connection_params["verify_certs"] = False
-
-            self.client = Elasticsearch(**connection_params)
+            self.client = Elasticsearch(**elasticsearch_connection_params(self.config))
             # Test connection
             self.client.info()
             logger.info("✅ Connected to ElasticSearch successfully")
@@ -320,24 +890,396 @@ class ElasticsearchManager:
             logger.error(f"❌ Delete index failed: {e}")
             return False
 
+    @timed("elasticsearch", "index_document", label=index_label, rows=None)
     def index_document(self, index_name: str, doc_id: str, document: Dict) -> bool:
         """Index a document"""
         try:
             self.client.index(index=index_name, id=doc_id, body=document)
             return True
         except Exception as e:
+            failed()
             logger.error(f"❌ Index document failed: {e}")
             return False
 
+    def delete_document(self, index_name: str, doc_id: str) -> bool:
+        """Delete a document"""
+        try:
+            self.client.delete(index=index_name, id=doc_id)
+            return True
+        except Exception as e:
+            if self._error_status(e) == 404:
+                return True
+            logger.error(f"❌ Delete document failed: {e}")
+            return False
+
+    @timed("elasticsearch", "count", label=index_label, rows=None)
+    def count(self, index_name: str, query: Optional[Dict] = None) -> int:
+        """Count documents matching a query"""
+        try:
+            body = {"query": query["query"]} if query and "query" in query else None
+            return self.client.count(index=index_name, body=body)["count"]
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Count failed: {e}")
+            return 0
+
+    def index_exists(self, index_name: str) -> bool:
+        """Check whether an index exists"""
+        try:
+            return bool(self.client.indices.exists(index=index_name))
+        except Exception as e:
+            logger.error(f"❌ Index exists check failed: {e}")
+            return False
+
+    @staticmethod
+    def _bulk_lines(index_name: str, documents: Iterable[Dict], id_field: Optional[str]) -> Iterator[Tuple[bytes, bytes]]:
+        """Serialize documents into (action, source) NDJSON line pairs
+
+        Documents are either plain sources (id taken from id_field) or
+        {"_id": ..., "_source": {...}} envelopes.
+        """
+        for document in documents:
+            if "_source" in document:
+                doc_id = document.get("_id")
+                source = document["_source"]
+            else:
+                doc_id = document.get(id_field) if id_field else None
+                source = document
+            action = {"_index": index_name}
+            if doc_id is not None:
+                action["_id"] = str(doc_id)
+            yield (
+                json.dumps({"index": action}).encode("utf-8") + b"\n",
+                json.dumps(source, default=str).encode("utf-8") + b"\n",
+            )
+
+    @staticmethod
+    def _bulk_chunks(lines: Iterator[Tuple[bytes, bytes]], chunk_size: int, max_bytes: int) -> Iterator[List]:
+        """Group line pairs into chunks bounded by document count and bytes"""
+        chunk, size = [], 0
+        for pair in lines:
+            pair_size = len(pair[0]) + len(pair[1])
+            if chunk and (len(chunk) >= chunk_size or size + pair_size > max_bytes):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(pair)
+            size += pair_size
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _error_status(error: Exception) -> Optional[int]:
+        """Get the HTTP status of a client error (7.x and 8.x clients)"""
+        status = getattr(error, "status_code", None)
+        if not isinstance(status, int):
+            status = getattr(getattr(error, "meta", None), "status", None)
+        return status if isinstance(status, int) else None
+
+    def _send_bulk_chunk(self, chunk: List, max_retries: int, initial_backoff: float, max_backoff: float) -> Dict:
+        """Send one chunk, retrying rejected items with exponential backoff"""
+        result = {"indexed": 0, "failed": 0, "retries": 0, "errors": []}
+        pending = chunk
+        for attempt in range(max_retries + 1):
+            if attempt:
+                delay = min(max_backoff, initial_backoff * (2 ** (attempt - 1)))
+                time.sleep(random.uniform(delay / 2, delay))
+                result["retries"] += 1
+
+            try:
+                response = self.client.bulk(body=b"".join(line for pair in pending for line in pair))
+            except Exception as e:
+                status = self._error_status(e)
+                if status in ES_BULK_RETRY_STATUSES and attempt < max_retries:
+                    continue
+                result["failed"] += len(pending)
+                result["errors"].append({"_id": None, "status": status, "error": str(e), "count": len(pending)})
+                return result
+
+            if not response.get("errors"):
+                result["indexed"] += len(pending)
+                return result
+
+            retry = []
+            for pair, entry in zip(pending, response["items"]):
+                item = next(iter(entry.values()))
+                status = item.get("status", 500)
+                if status < 300:
+                    result["indexed"] += 1
+                elif status in ES_BULK_RETRY_STATUSES and attempt < max_retries:
+                    retry.append(pair)
+                else:
+                    result["failed"] += 1
+                    result["errors"].append({"_id": item.get("_id"), "status": status, "error": item.get("error")})
+            if not retry:
+                return result
+            pending = retry
+        return result
+
+    def bulk_index(
+        self,
+        index_name: str,
+        documents: Iterable[Dict],
+        id_field: Optional[str] = "id",
+        chunk_size: Optional[int] = None,
+        max_chunk_bytes: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        fast_load: bool = False,
+        max_errors: int = 100,
+    ) -> Dict:
+        """Index documents through the _bulk endpoint
+
+        documents may be any iterable (e.g. a generator); it is consumed
+        lazily, so at most max_in_flight + 1 chunks are held in memory.
+        Items rejected with 429 are retried with backoff; other per-item
+        failures are collected (up to max_errors) in the summary.
+        fast_load disables refresh and replicas for the duration of the load.
+        """
+        chunk_size = chunk_size or self.config.get("bulk_chunk_size", 500)
+        max_chunk_bytes = max_chunk_bytes or self.config.get("bulk_max_bytes", 10 * 1024 * 1024)
+        max_in_flight = max(1, max_in_flight or self.config.get("bulk_concurrency", 4))
+        if max_retries is None:
+            max_retries = self.config.get("bulk_max_retries", 5)
+
+        summary = {"indexed": 0, "failed": 0, "retries": 0, "chunks": 0, "errors": []}
+
+        def merge(result: Dict) -> None:
+            summary["chunks"] += 1
+            for name in ("indexed", "failed", "retries"):
+                summary[name] += result[name]
+            room = max_errors - len(summary["errors"])
+            if room > 0:
+                summary["errors"].extend(result["errors"][:room])
+
+        start = time.time()
+        try:
+            chunks = self._bulk_chunks(
+                self._bulk_lines(index_name, documents, id_field), chunk_size, max_chunk_bytes
+            )
+            with self.bulk_load_settings(index_name, enabled=fast_load):
+                with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+                    in_flight = set()
+                    for chunk in chunks:
+                        if len(in_flight) >= max_in_flight:
+                            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                merge(future.result())
+                        in_flight.add(
+                            executor.submit(self._send_bulk_chunk, chunk, max_retries, initial_backoff, max_backoff)
+                        )
+                    for future in wait(in_flight).done:
+                        merge(future.result())
+        except Exception as e:
+            logger.error(f"❌ Bulk index failed: {e}")
+            summary["error"] = str(e)
+
+        summary["elapsed"] = round(time.time() - start, 3)
+        summary["docs_per_second"] = round(summary["indexed"] / summary["elapsed"]) if summary["elapsed"] else 0
+        if summary["failed"]:
+            logger.warning(f"⚠️  Bulk index into '{index_name}': {summary['failed']} documents failed")
+        return summary
+
+    @contextmanager
+    def bulk_load_settings(self, index_name: str, enabled: bool = True):
+        """Disable refresh and replicas during a large load, restoring them afterwards"""
+        previous = None
+        if enabled:
+            try:
+                settings = self.client.indices.get_settings(index=index_name, flat_settings=True)
+                current = next(iter(settings.values()))["settings"]
+                previous = {
+                    "refresh_interval": current.get("index.refresh_interval"),
+                    "number_of_replicas": current.get("index.number_of_replicas"),
+                }
+                self.client.indices.put_settings(
+                    index=index_name,
+                    body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}},
+                )
+                logger.info(f"✅ Refresh and replicas disabled on '{index_name}' for bulk load")
+            except Exception as e:
+                logger.warning(f"⚠️  Could not apply bulk load settings to '{index_name}': {e}")
+                previous = None
+        try:
+            yield
+        finally:
+            if previous is not None:
+                try:
+                    # None resets refresh_interval to the cluster default
+                    self.client.indices.put_settings(index=index_name, body={"index": previous})
+                    self.client.indices.refresh(index=index_name)
+                    logger.info(f"✅ Index settings restored on '{index_name}'")
+                except Exception as e:
+                    logger.error(f"❌ Restore index settings failed: {e}")
+
+    @timed("elasticsearch", "search", label=index_label)
     def search(self, index_name: str, query: Dict) -> List[Dict]:
         """Search documents"""
         try:
             results = self.client.search(index=index_name, body=query)
             return [hit["_source"] for hit in results["hits"]["hits"]]
         except Exception as e:
+            failed()
             logger.error(f"❌ Search failed: {e}")
             return []
 
+    @staticmethod
+    def _format_hit(hit: Dict) -> Dict:
+        """Keep the parts of a hit callers need"""
+        return {
+            "_id": hit.get("_id"),
+            "_index": hit.get("_index"),
+            "_score": hit.get("_score"),
+            "sort": hit.get("sort"),
+            "_source": hit.get("_source"),
+        }
+
+    @staticmethod
+    def _search_body(query: Optional[Dict]) -> Dict:
+        """Copy a search body without paging keys"""
+        body = dict(query or {"query": {"match_all": {}}})
+        for name in ("from", "size", "search_after", "pit"):
+            body.pop(name, None)
+        return body
+
+    def search_iter(
+        self,
+        index_name: str,
+        query: Optional[Dict] = None,
+        page_size: int = 1000,
+        keep_alive: str = "1m",
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """Yield every matching hit lazily, one page in memory at a time
+
+        Uses a point-in-time with search_after (consistent snapshot, sorted by
+        _shard_doc unless the query has a sort) and falls back to the scroll
+        API on clusters without point-in-time support.
+        """
+        body = self._search_body(query)
+        pit_id = None
+        try:
+            pit_id = self.client.open_point_in_time(index=index_name, keep_alive=keep_alive)["id"]
+        except Exception as e:
+            logger.warning(f"⚠️  Point-in-time unavailable, using scroll: {e}")
+
+        if pit_id is None:
+            yield from self._scroll_iter(index_name, body, page_size, keep_alive, limit)
+            return
+
+        body["sort"] = list(body.get("sort") or []) + [{"_shard_doc": "asc"}]
+        yielded = 0
+        search_after = None
+        try:
+            while limit is None or yielded < limit:
+                page = dict(body, size=page_size, pit={"id": pit_id, "keep_alive": keep_alive})
+                if search_after is not None:
+                    page["search_after"] = search_after
+                results = self.client.search(body=page)
+                pit_id = results.get("pit_id", pit_id)
+                hits = results["hits"]["hits"]
+                for hit in hits:
+                    if limit is not None and yielded >= limit:
+                        return
+                    yielded += 1
+                    yield self._format_hit(hit)
+                if len(hits) < page_size:
+                    return
+                search_after = hits[-1]["sort"]
+        except Exception as e:
+            logger.error(f"❌ Streaming search failed: {e}")
+        finally:
+            try:
+                self.client.close_point_in_time(id=pit_id)
+            except Exception as e:
+                logger.warning(f"⚠️  Close point-in-time failed: {e}")
+
+    def _scroll_iter(
+        self, index_name: str, body: Dict, page_size: int, keep_alive: str, limit: Optional[int]
+    ) -> Iterator[Dict]:
+        """Yield hits through the scroll API"""
+        scroll_id = None
+        yielded = 0
+        try:
+            results = self.client.search(index=index_name, body=dict(body, size=page_size), scroll=keep_alive)
+            while True:
+                scroll_id = results.get("_scroll_id", scroll_id)
+                hits = results["hits"]["hits"]
+                for hit in hits:
+                    if limit is not None and yielded >= limit:
+                        return
+                    yielded += 1
+                    yield self._format_hit(hit)
+                if not hits:
+                    return
+                results = self.client.scroll(scroll_id=scroll_id, scroll=keep_alive)
+        except Exception as e:
+            logger.error(f"❌ Scroll search failed: {e}")
+        finally:
+            if scroll_id:
+                try:
+                    self.client.clear_scroll(scroll_id=scroll_id)
+                except Exception as e:
+                    logger.warning(f"⚠️  Clear scroll failed: {e}")
+
+    @staticmethod
+    def encode_cursor(sort_values: List) -> str:
+        """Encode search_after values as an opaque URL-safe cursor"""
+        return base64.urlsafe_b64encode(json.dumps(sort_values).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> List:
+        """Decode a cursor produced by encode_cursor"""
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+
+    @timed("elasticsearch", "search_page", label=index_label, rows=lambda page: len(page["hits"]))
+    def search_page(
+        self,
+        index_name: str,
+        query: Optional[Dict] = None,
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        sort: Optional[List] = None,
+        track_total_hits: Any = 10000,
+    ) -> Dict:
+        """Get one page of hits with the total count and a cursor for the next page
+
+        Pages are stateless (search_after on the sort values), so cursors stay
+        valid between requests. The last sort field should be unique for
+        stable paging; cursor is None on the last page.
+        """
+        empty = {"hits": [], "total": 0, "total_relation": "eq", "cursor": None}
+        try:
+            body = self._search_body(query)
+            body["sort"] = sort or body.get("sort") or ES_DEFAULT_SORT
+            # One extra hit tells us whether a next page exists
+            body["size"] = page_size + 1
+            body["track_total_hits"] = track_total_hits
+            if cursor:
+                body["search_after"] = self.decode_cursor(cursor)
+
+            results = self.client.search(index=index_name, body=body)
+            hits = results["hits"]["hits"]
+            total = results["hits"].get("total") or {}
+            if isinstance(total, int):
+                total = {"value": total, "relation": "eq"}
+
+            page = hits[:page_size]
+            next_cursor = None
+            if len(hits) > page_size and page:
+                next_cursor = self.encode_cursor(page[-1]["sort"])
+            return {
+                "hits": [self._format_hit(hit) for hit in page],
+                "total": total.get("value", 0),
+                "total_relation": total.get("relation", "eq"),
+                "cursor": next_cursor,
+            }
+        except Exception as e:
+            failed()
+            logger.error(f"❌ Paged search failed: {e}")
+            return empty
+
     def get_stats(self) -> Dict:
         """Get ElasticSearch statistics"""
         try:
@@ -368,100 +1310,369 @@ class ElasticsearchManager:
         self.close()
 
 
-class DatabaseManager:
-    """Universal database manager for all supported databases"""
+BACKENDS = ("mysql", "postgresql", "redis", "elasticsearch")
+
 
-    def __init__(self):
-        """Initialize database manager"""
-        self.mysql = None
-        self.postgresql = None
-        self.redis = None
-        self.elasticsearch = None
+def _lazy_backend(name: str) -> property:
+    """Manager attribute that connects on first access"""
+
+    def getter(self):
+        return self._get_backend(name)
+
+    def setter(self, manager):
+        self._store(name, manager, manager is not None)
+
+    return property(getter, setter, doc=f"{name} manager, connected on first access (None if unavailable)")
+
+
+class DatabaseManager:
+    """Universal database manager for all supported databases
+
+    Backends are created lazily: the first access to manager.mysql (or
+    postgresql, redis, elasticsearch, search) connects it and returns None if
+    it is unreachable, retrying only after DB_RETRY_BACKOFF seconds. Set
+    DB_WARMUP to connect backends in the background at startup.
+    """
+
+    mysql = _lazy_backend("mysql")
+    postgresql = _lazy_backend("postgresql")
+    redis = _lazy_backend("redis")
+    elasticsearch = _lazy_backend("elasticsearch")
+    search = _lazy_backend("search")
+
+    def __init__(self, warm_up: Optional[bool] = None):
+        """Initialize database manager
+
+        warm_up=None follows DB_WARMUP; False never connects until first use.
+        """
+        self._backends: Dict[str, Any] = {}
+        self._live = set()
+        self._failed_at: Dict[str, float] = {}
+        self._locks = {name: threading.RLock() for name in BACKENDS + ("search",)}
+        self._connection_config = DatabaseConfig.get_connection_config()
+        self._health_lock = threading.Lock()
+        self._health_cache = None
+
+        if warm_up is not False and self._connection_config["warmup"].strip():
+            self.warm_up()
+
+    # ---- lazy connections ----
+
+    def _store(self, name: str, manager, live: bool) -> None:
+        """Record a backend manager and whether it connected"""
+        if manager is None:
+            self._backends.pop(name, None)
+        else:
+            self._backends[name] = manager
+        if live:
+            self._live.add(name)
+            self._failed_at.pop(name, None)
+        else:
+            self._live.discard(name)
+            self._failed_at[name] = time.time()
+
+    def _create(self, name: str, config: Optional[Dict] = None):
+        """Create and connect one backend, returning (manager, connected)"""
+        if name == "search":
+            search = self._create_search(config)
+            return search, search is not None
+        manager_class = {
+            "mysql": MySQLManager,
+            "postgresql": PostgreSQLManager,
+            "redis": RedisManager,
+            "elasticsearch": ElasticsearchManager,
+        }[name]
+        manager = manager_class(config)
+        return manager, bool(manager.connect())
+
+    def _create_search(self, config: Optional[Dict] = None):
+        """Connect the search database selected by SEARCH_DB (None if unavailable)"""
+        from db_local_search import LocalSearchManager
+
+        local_config = DatabaseConfig.get_local_search_config()
+        if DatabaseConfig.DATABASE_SELECTION.get("search", "elasticsearch").lower() == "local":
+            search = LocalSearchManager(config or local_config)
+            return search if search.connect() else None
+
+        if config is None:
+            elasticsearch = self._get_backend("elasticsearch")
+        else:
+            elasticsearch = ElasticsearchManager(config)
+            if not elasticsearch.connect():
+                elasticsearch = None
+        if elasticsearch is not None:
+            return elasticsearch
+
+        if local_config.get("fallback"):
+            logger.warning("⚠️  ElasticSearch unavailable, using local search")
+            search = LocalSearchManager(local_config)
+            return search if search.connect() else None
+        return None
+
+    def _get_backend(self, name: str):
+        """Return a connected backend, connecting it on first use"""
+        manager = self._backends.get(name)
+        if manager is not None:
+            return manager
+        with self._locks[name]:
+            manager = self._backends.get(name)
+            if manager is not None:
+                return manager
+            failed_at = self._failed_at.get(name)
+            if failed_at and time.time() - failed_at < self._connection_config["retry_backoff"]:
+                return None
+            manager, connected = self._create(name)
+            self._store(name, manager if connected else None, connected)
+            return manager if connected else None
+
+    def _init(self, name: str, config: Optional[Dict] = None):
+        """Explicitly (re)connect a backend; the manager is kept even if it failed"""
+        with self._locks[name]:
+            manager, connected = self._create(name, config)
+            self._store(name, manager, connected)
+            return manager
 
     def init_mysql(self, config: Optional[Dict] = None) -> MySQLManager:
         """Initialize MySQL manager"""
-        self.mysql = MySQLManager(config)
-        self.mysql.connect()
-        return self.mysql
+        return self._init("mysql", config)
 
     def init_postgresql(self, config: Optional[Dict] = None) -> PostgreSQLManager:
         """Initialize PostgreSQL manager"""
-        self.postgresql = PostgreSQLManager(config)
-        self.postgresql.connect()
-        return self.postgresql
+        return self._init("postgresql", config)
 
     def init_redis(self, config: Optional[Dict] = None) -> RedisManager:
         """Initialize Redis manager"""
-        self.redis = RedisManager(config)
-        self.redis.connect()
-        return self.redis
+        return self._init("redis", config)
 
     def init_elasticsearch(self, config: Optional[Dict] = None) -> ElasticsearchManager:
         """Initialize ElasticSearch manager"""
-        self.elasticsearch = ElasticsearchManager(config)
-        self.elasticsearch.connect()
-        return self.elasticsearch
-
-    def health_check(self) -> Dict[str, bool]:
-        """Check health of all databases"""
-        status = {}
-
-        # Check MySQL
+        return self._init("elasticsearch", config)
+
+    def init_search(self, config: Optional[Dict] = None):
+        """Initialize the search database selected by SEARCH_DB
+
+        "local" uses the embedded SQLite engine; "elasticsearch" falls back to
+        it when ElasticSearch is unreachable and LOCAL_SEARCH_FALLBACK is on.
+        Returns None if no search backend is available.
+        """
+        return self._init("search", config)
+
+    def live_backends(self) -> List[str]:
+        """Names of backends that are connected, without connecting any"""
+        return [name for name in BACKENDS + ("search",) if name in self._live]
+
+    def is_live(self, name: str) -> bool:
+        """Whether a backend is connected, without connecting it"""
+        return name in self._live
+
+    def warm_up(
+        self,
+        backends: Optional[Iterable[str]] = None,
+        block: bool = False,
+        timeout: Optional[float] = None,
+    ) -> List[str]:
+        """Connect backends in parallel background threads
+
+        backends defaults to DB_WARMUP ("all" or a comma list), or every
+        backend when DB_WARMUP is empty. With block=True, waits until they have
+        connected or the timeout (DB_WARMUP_TIMEOUT) passes. Returns the live
+        backends at that point.
+        """
+        if backends is None:
+            setting = self._connection_config["warmup"].strip().lower()
+            backends = BACKENDS if setting in ("", "all") else [b.strip() for b in setting.split(",") if b.strip()]
+        unknown = [name for name in backends if name not in self._locks]
+        if unknown:
+            logger.warning(f"⚠️  Unknown backends skipped in warm-up: {', '.join(unknown)}")
+
+        threads = []
+        for name in backends:
+            if name in self._locks:
+                thread = threading.Thread(
+                    target=self._get_backend, args=(name,), name=f"warmup-{name}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        if block:
+            timeout = self._connection_config["warmup_timeout"] if timeout is None else timeout
+            deadline = time.time() + timeout
+            for thread in threads:
+                thread.join(max(0.0, deadline - time.time()))
+        return self.live_backends()
+
+    # ---- health checks ----
+
+    def _probe_mysql(self, timeout: float) -> bool:
+        """Ping MySQL on a pooled connection, or one short-lived connection"""
+        import mysql.connector
+
+        mysql_manager = self._backends.get("mysql")
+        if mysql_manager and mysql_manager.pool:
+            connection = mysql_manager.pool.get_connection()
+        else:
+            config = {
+                k: v
+                for k, v in DatabaseConfig.get_mysql_config().items()
+                if k not in MYSQL_MANAGER_OPTIONS and k != "pool_size"
+            }
+            connection = mysql.connector.connect(connection_timeout=max(1, int(timeout)), **config)
         try:
-            import mysql.connector
-
-            mysql_mgr = MySQLManager()
-            status["mysql"] = mysql_mgr.connect()
-            if mysql_mgr.connection:
-                mysql_mgr.close()
-        except:
-            status["mysql"] = False
-
-        # Check PostgreSQL
+            connection.ping(reconnect=False)
+            return True
+        finally:
+            connection.close()
+
+    def _probe_postgresql(self, timeout: float) -> bool:
+        """Run SELECT 1 on a pooled connection, or one short-lived connection"""
+        import psycopg2
+
+        postgresql = self._backends.get("postgresql")
+        pool = postgresql.pool if postgresql else None
+        if pool:
+            connection = pool.getconn()
+        else:
+            config = DatabaseConfig.get_postgresql_config()
+            connection = psycopg2.connect(
+                host=config["host"],
+                port=config["port"],
+                database=config["database"],
+                user=config["user"],
+                password=config["password"],
+                connect_timeout=max(1, int(timeout)),
+            )
         try:
-            import psycopg2
-
-            pg_mgr = PostgreSQLManager()
-            status["postgresql"] = pg_mgr.connect()
-            if pg_mgr.connection:
-                pg_mgr.close()
-        except:
-            status["postgresql"] = False
-
-        # Check Redis
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        finally:
+            if pool:
+                pool.putconn(connection)
+            else:
+                connection.close()
+
+    def _probe_redis(self, timeout: float) -> bool:
+        """Ping Redis through the shared pool, or with a one-off client"""
+        import redis
+
+        redis_manager = self._backends.get("redis")
+        if redis_manager and redis_manager.client:
+            return bool(redis_manager.client.ping())
+        # Not initialized: do not create the process-wide pool just to probe
+        config = DatabaseConfig.get_redis_config()
+        ssl_kwargs = {}
+        if config.get("ssl"):
+            ssl_kwargs = {
+                "ssl": True,
+                "ssl_certfile": config.get("ssl_certfile"),
+                "ssl_keyfile": config.get("ssl_keyfile"),
+                "ssl_ca_certs": config.get("ssl_ca_certs"),
+            }
+        client = redis.Redis(
+            host=config["host"],
+            port=config["port"],
+            db=config.get("db", 0),
+            password=config.get("password"),
+            socket_connect_timeout=timeout,
+            socket_timeout=timeout,
+            **ssl_kwargs,
+        )
         try:
-            import redis
-
-            redis_mgr = RedisManager()
-            status["redis"] = redis_mgr.connect()
-            if redis_mgr.client:
-                redis_mgr.close()
-        except:
-            status["redis"] = False
-
-        # Check ElasticSearch
+            return bool(client.ping())
+        finally:
+            client.close()
+
+    def _probe_elasticsearch(self, timeout: float) -> bool:
+        """Ping ElasticSearch with the existing client, or a one-off client"""
+        from elasticsearch import Elasticsearch
+
+        elasticsearch = self._backends.get("elasticsearch")
+        if elasticsearch and elasticsearch.client:
+            return bool(elasticsearch.client.ping())
+        params = elasticsearch_connection_params(DatabaseConfig.get_elasticsearch_config())
+        params.update(timeout=timeout, max_retries=0, retry_on_timeout=False)
+        client = Elasticsearch(**params)
         try:
-            from elasticsearch import Elasticsearch
+            return bool(client.ping())
+        finally:
+            client.close()
 
-            es_mgr = ElasticsearchManager()
-            status["elasticsearch"] = es_mgr.connect()
-            if es_mgr.client:
-                es_mgr.close()
-        except:
-            status["elasticsearch"] = False
+    def _probe_search(self, timeout: float) -> bool:
+        """Check the embedded search engine"""
+        return bool(self._backends["search"].get_stats())
 
-        return status
+    def _run_probe(self, probe, timeout: float) -> Dict:
+        """Run one probe, timing it and capturing errors"""
+        start = time.time()
+        try:
+            healthy, error = probe(timeout), None
+        except Exception as e:
+            healthy, error = False, str(e)
+        return {"healthy": healthy, "latency_ms": round((time.time() - start) * 1000, 1), "error": error}
+
+    def health_details(self, timeout: Optional[float] = None, max_age: Optional[float] = None) -> Dict[str, Dict]:
+        """Probe all databases concurrently within one deadline
+
+        Initialized managers are probed on their pooled connections; others get
+        a single short-lived connection (no pools are created). Results are
+        reused for max_age seconds, and concurrent callers share one round of
+        probes, so a /health endpoint can be polled cheaply.
+        """
+        config = DatabaseConfig.get_health_check_config()
+        timeout = config["timeout"] if timeout is None else timeout
+        max_age = config["ttl"] if max_age is None else max_age
+
+        with self._health_lock:
+            if self._health_cache and time.time() - self._health_cache[0] < max_age:
+                return {name: dict(result, cached=True) for name, result in self._health_cache[1].items()}
+
+            probes = {
+                "mysql": self._probe_mysql,
+                "postgresql": self._probe_postgresql,
+                "redis": self._probe_redis,
+                "elasticsearch": self._probe_elasticsearch,
+            }
+            search = self._backends.get("search")
+            if search is not None and search is not self._backends.get("elasticsearch"):
+                probes["search"] = self._probe_search
+
+            # Not a with-block: a hung probe must not hold up the response
+            executor = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="health")
+            futures = {executor.submit(self._run_probe, probe, timeout): name for name, probe in probes.items()}
+            done, _ = wait(futures, timeout=timeout)
+            executor.shutdown(wait=False)
+
+            results = {}
+            for future, name in futures.items():
+                if future in done:
+                    results[name] = future.result()
+                else:
+                    results[name] = {
+                        "healthy": False,
+                        "latency_ms": round(timeout * 1000, 1),
+                        "error": f"timed out after {timeout}s",
+                    }
+            self._health_cache = (time.time(), results)
+            return {name: dict(result, cached=False) for name, result in results.items()}
+
+    def health_check(self, timeout: Optional[float] = None) -> Dict[str, bool]:
+        """Check health of all databases"""
+        return {name: result["healthy"] for name, result in self.health_details(timeout).items()}
 
     def close_all(self):
-        """Close all database connections"""
-        if self.mysql:
-            self.mysql.close()
-        if self.postgresql:
-            self.postgresql.close()
-        if self.redis:
-            self.redis.close()
-        if self.elasticsearch:
-            self.elasticsearch.close()
+        """Close all database connections
+
+        Closed backends are forgotten, so the next access reconnects lazily.
+        """
+        closed = []
+        for name in BACKENDS + ("search",):
+            with self._locks[name]:
+                manager = self._backends.pop(name, None)
+                self._live.discard(name)
+            if manager is not None and not any(manager is other for other in closed):
+                manager.close()
+                closed.append(manager)
 
     def __enter__(self):
         return self
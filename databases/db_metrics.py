@@ -0,0 +1,426 @@
+# Client-Side Query Metrics
+# Latency histograms for every manager call, as the application sees them
+#
+# Manager methods are wrapped with @timed(backend, operation). The wrapper
+# reads perf_counter_ns() around the call and records into a table owned
+# by the calling thread, so the hot path takes no lock and makes no extra
+# function call. Each series (backend, operation, label) keeps count,
+# errors, rows, sum and max plus a sparse log-linear histogram: values
+# below 2**(SUB_BITS+1) ns are exact, larger ones fall in one of
+# 2**SUB_BITS sub-buckets per power of two (relative error under
+# 1/2**SUB_BITS, ~3%), the bucketing HDR histograms use. Labels are query
+# fingerprints for SQL (cached by query text, so normalizing happens once
+# per distinct query), the key namespace for Redis and the index for
+# search. Thread tables are merged when metrics are read.
+#
+# A table belongs to its thread; once the thread has exited its series are
+# folded into a shared retired table, so per-request threads (the backend's
+# ThreadingHTTPServer) do not grow the registry.
+#
+# Managers still swallow their exceptions; they call failed() in their
+# except branches so the wrapper counts the call as an error.
+#
+# DB_METRICS=false makes @timed return the method unchanged.
+
+import time
+import json
+import logging
+import weakref
+import threading
+import functools
+import inspect
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from db_config import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+
+SUB_BITS = 5
+SUB_MASK = (1 << SUB_BITS) - 1
+EXACT_BITS = SUB_BITS + 1
+QUANTILES = (0.5, 0.95, 0.99)
+OTHER = "other"
+# Tables registered before exited threads are folded away (doubles with live ones)
+PRUNE_MIN_TABLES = 64
+
+_perf_counter_ns = time.perf_counter_ns
+_get_ident = threading.get_ident
+# Threads whose current call failed (set by failed(), cleared when recorded)
+_failed: Dict[int, bool] = {}
+
+
+def bucket_index(value: int) -> int:
+    """Histogram bucket of a non-negative integer"""
+    shift = value.bit_length() - EXACT_BITS
+    if shift <= 0:
+        return value
+    return ((shift + 1) << SUB_BITS) | ((value >> shift) & SUB_MASK)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """Lowest value and width of a bucket"""
+    if index < (1 << EXACT_BITS):
+        return index, 1
+    shift = (index >> SUB_BITS) - 1
+    return ((1 << SUB_BITS) | (index & SUB_MASK)) << shift, 1 << shift
+
+
+def failed() -> None:
+    """Mark the manager call in progress on this thread as an error"""
+    _failed[_get_ident()] = True
+
+
+class Series:
+    """Counters and latency histogram of one (backend, operation, label)"""
+
+    __slots__ = ("label", "count", "errors", "rows", "total_ns", "max_ns", "buckets")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets: Dict[int, int] = {}
+
+    def record(self, elapsed_ns: int, rows: int = 0) -> None:
+        """Add one call (the timed wrapper inlines this)"""
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.rows += rows
+        if _failed and _failed.pop(_get_ident(), None):
+            self.errors += 1
+        index = bucket_index(elapsed_ns)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: "Series") -> None:
+        """Add another series into this one"""
+        self.count += other.count
+        self.errors += other.errors
+        self.rows += other.rows
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        for index, n in dict(other.buckets).items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+
+    def quantile(self, q: float) -> int:
+        """Latency (ns) at quantile q, to the bucket's midpoint"""
+        if not self.count:
+            return 0
+        target = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                low, width = bucket_bounds(index)
+                return min(low + width // 2, self.max_ns)
+        return self.max_ns
+
+
+class MetricsRegistry:
+    """Per-thread series tables of every timed method, merged on read"""
+
+    def __init__(self, max_series: Optional[int] = None):
+        """Initialize registry (max_series labels per operation, then "other")"""
+        config = DatabaseConfig.get_metrics_config()
+        self.max_series = max_series or config["max_series"]
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._tables: List[Tuple[Tuple[str, str], Dict[str, Series], weakref.ref]] = []
+        self._retired: Dict[Tuple[Tuple[str, str], str], Series] = {}
+        self._prune_at = PRUNE_MIN_TABLES
+        self._labels: Dict[Tuple[str, str], set] = {}
+        self._locals: Dict[Tuple[str, str], threading.local] = {}
+        self.queries: Dict[str, str] = {}  # SQL fingerprint -> normalized text
+
+    def table(self, local: threading.local, name: Tuple[str, str]) -> Dict[str, Series]:
+        """Create this thread's table for one timed method"""
+        table: Dict[str, Series] = {}
+        local.table = table
+        with self._lock:
+            self._tables.append((name, table, weakref.ref(threading.current_thread())))
+            if len(self._tables) >= self._prune_at:
+                self._prune()
+        return table
+
+    def _prune(self) -> None:
+        """Fold the tables of exited threads into the retired table (lock held)"""
+        live = []
+        for name, table, owner in self._tables:
+            thread = owner()
+            if thread is not None and thread.is_alive():
+                live.append((name, table, owner))
+                continue
+            for series in {id(s): s for s in table.values()}.values():
+                key = (name, series.label)
+                retired = self._retired.get(key)
+                if retired is None:
+                    retired = self._retired[key] = Series(series.label)
+                retired.merge(series)
+        self._tables = live
+        self._prune_at = max(PRUNE_MIN_TABLES, 2 * len(live))
+
+    def series(self, table: Dict[str, Series], name: Tuple[str, str], label: str) -> Series:
+        """Create a series, folding labels past max_series into "other"
+
+        A folded label stays in the table as an alias of the "other"
+        series, so later calls with it skip this slow path.
+        """
+        with self._lock:
+            labels = self._labels.setdefault(name, set())
+            series_label = label
+            if label not in labels:
+                if len(labels) >= self.max_series:
+                    series_label = OTHER
+                labels.add(series_label)
+        series = table.get(series_label)
+        if series is None:
+            series = table[series_label] = Series(series_label)
+        table[label] = series
+        return series
+
+    def observe(self, name: Tuple[str, str], label: str, elapsed_ns: int, rows: int = 0) -> None:
+        """Record a call timed outside @timed"""
+        local = self._locals.get(name)
+        if local is None:
+            with self._lock:
+                local = self._locals.setdefault(name, threading.local())
+        try:
+            table = local.table
+        except AttributeError:
+            table = self.table(local, name)
+        (table.get(label) or self.series(table, name, label)).record(elapsed_ns, rows)
+
+    def merged(self) -> Dict[Tuple[Tuple[str, str], str], Series]:
+        """All thread tables added together"""
+        result: Dict[Tuple[Tuple[str, str], str], Series] = {}
+        with self._lock:
+            self._prune()
+            tables = list(self._tables)
+            for key, series in self._retired.items():
+                result.setdefault(key, Series(series.label)).merge(series)
+        for name, table, _ in tables:
+            # Aliases point at the same series; count each once
+            for series in {id(s): s for s in dict(table).values()}.values():
+                key = (name, series.label)
+                result.setdefault(key, Series(series.label)).merge(series)
+        return result
+
+    def reset(self) -> None:
+        """Drop all recorded data"""
+        with self._lock:
+            for _, table, _ in self._tables:
+                table.clear()
+            self._retired.clear()
+            self._labels.clear()
+
+    def snapshot(
+        self, order: str = "total_ms", limit: Optional[int] = None, buckets: bool = False
+    ) -> List[Dict]:
+        """Series as dicts with p50/p95/p99 (and raw buckets), sorted by order"""
+        rows = []
+        for ((backend, operation), label), series in self.merged().items():
+            if not series.count:
+                continue
+            p50, p95, p99 = (series.quantile(q) for q in QUANTILES)
+            rows.append(
+                {
+                    "backend": backend,
+                    "operation": operation,
+                    "label": label,
+                    "query": self.queries.get(label),
+                    "count": series.count,
+                    "errors": series.errors,
+                    "rows": series.rows,
+                    "total_ms": round(series.total_ns / 1e6, 3),
+                    "mean_ms": round(series.total_ns / series.count / 1e6, 4),
+                    "p50_ms": round(p50 / 1e6, 4),
+                    "p95_ms": round(p95 / 1e6, 4),
+                    "p99_ms": round(p99 / 1e6, 4),
+                    "max_ms": round(series.max_ns / 1e6, 4),
+                }
+            )
+            if buckets:
+                rows[-1]["buckets"] = dict(series.buckets)
+        rows.sort(key=lambda row: row[order], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def prometheus(self, prefix: str = "moai_db_client") -> str:
+        """Prometheus text exposition of every series"""
+        latency, errors, rows = [], [], []
+        for ((backend, operation), label), series in sorted(self.merged().items()):
+            labels = (
+                f'backend="{_escape(backend)}",operation="{_escape(operation)}",'
+                f'label="{_escape(label)}"'
+            )
+            for q in QUANTILES:
+                latency.append(f'{prefix}_latency_seconds{{{labels},quantile="{q}"}} {series.quantile(q) / 1e9:.9f}')
+            latency.append(f"{prefix}_latency_seconds_sum{{{labels}}} {series.total_ns / 1e9:.9f}")
+            latency.append(f"{prefix}_latency_seconds_count{{{labels}}} {series.count}")
+            errors.append(f"{prefix}_errors_total{{{labels}}} {series.errors}")
+            rows.append(f"{prefix}_rows_total{{{labels}}} {series.rows}")
+        lines = [
+            f"# HELP {prefix}_latency_seconds Database manager call latency seen by the application",
+            f"# TYPE {prefix}_latency_seconds summary",
+            *latency,
+            f"# HELP {prefix}_errors_total Database manager calls that failed",
+            f"# TYPE {prefix}_errors_total counter",
+            *errors,
+            f"# HELP {prefix}_rows_total Rows returned or affected by database manager calls",
+            f"# TYPE {prefix}_rows_total counter",
+            *rows,
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def fetch_snapshot(url: Optional[str] = None, buckets: bool = False) -> Tuple[str, List[Dict]]:
+    """Series from the app's /metrics endpoint, else this process's registry"""
+    import urllib.request
+
+    url = url or DatabaseConfig.get_metrics_config()["url"]
+    if url:
+        query = "format=json&buckets=1" if buckets else "format=json"
+        try:
+            with urllib.request.urlopen(f"{url}?{query}", timeout=2) as response:
+                return url, json.loads(response.read().decode())["series"]
+        except Exception as e:
+            logger.debug(f"Metrics endpoint {url} unavailable: {e}")
+    return "this process", registry.snapshot(buckets=buckets)
+
+
+_fingerprints: Dict[str, str] = {}
+FINGERPRINT_CACHE_SIZE = 10000
+
+
+def sql_label(query: str) -> str:
+    """Fingerprint of a SQL query, normalized once per distinct text"""
+    label = _fingerprints.get(query)
+    if label is None:
+        from db_utils import DatabaseUtils
+
+        normalized = DatabaseUtils.normalize_query(query)
+        label = DatabaseUtils.fingerprint_query(query)
+        if len(_fingerprints) >= FINGERPRINT_CACHE_SIZE:
+            _fingerprints.clear()
+        _fingerprints[query] = label
+        registry.queries.setdefault(label, normalized)
+    return label
+
+
+def key_label(key: Any) -> str:
+    """Namespace of a Redis key ("cache:leads:1" -> "cache")"""
+    if key.__class__ is str:
+        return key.partition(":")[0]
+    if isinstance(key, (list, tuple, dict)):
+        key = next(iter(key), "")
+    key = key.decode() if isinstance(key, bytes) else str(key)
+    return key.partition(":")[0]
+
+
+def index_label(index: Any) -> str:
+    """Search index name"""
+    return str(index)
+
+
+def count_rows(result: Any) -> int:
+    """Rows in a list result, or an affected-row count"""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return max(result, 0)
+    return 0
+
+
+def timed(
+    backend: str,
+    operation: str,
+    label: Optional[Callable[[Any], str]] = None,
+    rows: Optional[Callable[[Any], int]] = count_rows,
+):
+    """Time a manager method whose first argument identifies the series"""
+
+    def decorate(func):
+        if not DatabaseConfig.get_metrics_config()["enabled"]:
+            return func
+        name = (backend, operation)
+        # The argument after self names the series; it may be passed by keyword
+        parameters = list(inspect.signature(func).parameters)
+        first_name = parameters[1] if len(parameters) > 1 else None
+        local = threading.local()
+        new_table = registry.table
+        new_series = registry.series
+
+        def record(first: Any, elapsed: int, result: Any) -> None:
+            try:
+                table = local.table
+            except AttributeError:
+                table = new_table(local, name)
+            key = label(first) if label else ""
+            series = table.get(key) or new_series(table, name, key)
+            series.record(elapsed, rows(result) if rows and result is not None else 0)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                first = args[0] if args else kwargs.get(first_name)
+                start = _perf_counter_ns()
+                try:
+                    result = await func(self, *args, **kwargs)
+                except BaseException:
+                    failed()
+                    record(first, _perf_counter_ns() - start, None)
+                    raise
+                record(first, _perf_counter_ns() - start, result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = _perf_counter_ns()
+            try:
+                result = func(self, *args, **kwargs)
+            except BaseException:
+                failed()
+                record(args[0] if args else kwargs.get(first_name), _perf_counter_ns() - start, None)
+                raise
+            elapsed = _perf_counter_ns() - start
+
+            # Series.record, inlined: this runs on every manager call
+            try:
+                table = local.table
+            except AttributeError:
+                table = new_table(local, name)
+            key = label(args[0] if args else kwargs.get(first_name)) if label else ""
+            series = table.get(key)
+            if series is None:
+                series = new_series(table, name, key)
+            series.count += 1
+            series.total_ns += elapsed
+            if elapsed > series.max_ns:
+                series.max_ns = elapsed
+            if rows:
+                series.rows += rows(result)
+            if _failed and _failed.pop(_get_ident(), None):
+                series.errors += 1
+            shift = elapsed.bit_length() - EXACT_BITS
+            index = elapsed if shift <= 0 else ((shift + 1) << SUB_BITS) | ((elapsed >> shift) & SUB_MASK)
+            buckets = series.buckets
+            buckets[index] = buckets.get(index, 0) + 1
+            return result
+
+        return wrapper
+
+    return decorate
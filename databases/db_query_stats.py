@@ -0,0 +1,319 @@
+# Query Analytics
+# Periodic snapshots of pg_stat_statements / MySQL statement digests in SQLite
+#
+# pg_stat_statements and performance_schema.events_statements_summary_by_digest
+# hold cumulative counters since the last reset. Each snapshot stores the
+# counters per source entry and records the difference to the previous
+# snapshot, grouped by query fingerprint (DatabaseUtils.fingerprint_query),
+# so variants that differ only in literals or IN-list length add up. A
+# counter that went down means the stats were reset (or the entry was
+# evicted and re-added); its current value is then taken as the delta. The
+# first snapshot of a database only sets the baseline.
+#
+# Rankings and trends aggregate these deltas over any window, so
+# "what consumed the most time yesterday" works long after the server's
+# counters moved on.
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from db_config import DatabaseConfig
+from db_utils import DatabaseUtils
+
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("calls", "total_ms", "rows", "rows_examined", "blks_hit", "blks_read")
+ORDERS = ("total_ms", "calls", "mean_ms", "rows", "rows_examined", "blks_read")
+
+PG_STATEMENTS_SQL = (
+    "SELECT userid, dbid, queryid, query, calls, {total} AS total_ms, rows, "
+    "shared_blks_hit AS blks_hit, shared_blks_read AS blks_read "
+    "FROM pg_stat_statements WHERE queryid IS NOT NULL"
+)
+
+MYSQL_DIGESTS_SQL = (
+    "SELECT SCHEMA_NAME AS schema_name, DIGEST AS digest, DIGEST_TEXT AS query, "
+    "COUNT_STAR AS calls, SUM_TIMER_WAIT / 1000000000 AS total_ms, "
+    "SUM_ROWS_SENT + SUM_ROWS_AFFECTED AS `rows`, SUM_ROWS_EXAMINED AS rows_examined "
+    "FROM performance_schema.events_statements_summary_by_digest WHERE DIGEST IS NOT NULL"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY, db TEXT, taken_at REAL, interval_s REAL, entries INTEGER
+);
+CREATE TABLE IF NOT EXISTS counters (
+    db TEXT, source_id TEXT, calls REAL, total_ms REAL, rows REAL, rows_examined REAL,
+    blks_hit REAL, blks_read REAL, PRIMARY KEY (db, source_id)
+);
+CREATE TABLE IF NOT EXISTS queries (
+    db TEXT, fingerprint TEXT, query TEXT, first_seen REAL, last_seen REAL,
+    PRIMARY KEY (db, fingerprint)
+);
+CREATE TABLE IF NOT EXISTS deltas (
+    snapshot_id INTEGER, db TEXT, fingerprint TEXT, taken_at REAL, calls REAL, total_ms REAL,
+    rows REAL, rows_examined REAL, blks_hit REAL, blks_read REAL,
+    PRIMARY KEY (snapshot_id, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS deltas_time ON deltas (db, taken_at);
+CREATE INDEX IF NOT EXISTS deltas_fingerprint ON deltas (db, fingerprint, taken_at);
+"""
+
+
+class QueryStats:
+    """Snapshot store and analytics for per-query execution statistics"""
+
+    def __init__(self, path: Optional[str] = None):
+        """Open (or create) the analytics database (default: QUERY_STATS_DB)"""
+        self.config = DatabaseConfig.get_query_stats_config()
+        self.path = path or self.config["path"]
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.client = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.client.row_factory = sqlite3.Row
+        self.client.execute("PRAGMA journal_mode=WAL")
+        self.client.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the analytics database"""
+        self.client.close()
+
+    # Sources
+
+    @staticmethod
+    def read_postgresql(db) -> List[Dict]:
+        """Cumulative pg_stat_statements counters"""
+        try:
+            rows = DatabaseUtils.query_rows(db, PG_STATEMENTS_SQL.format(total="total_exec_time"))
+        except Exception:
+            # PostgreSQL 12 and older
+            rows = DatabaseUtils.query_rows(db, PG_STATEMENTS_SQL.format(total="total_time"))
+        for row in rows:
+            row["source_id"] = f"{row.pop('userid')}:{row.pop('dbid')}:{row.pop('queryid')}"
+            row["rows_examined"] = None
+        return rows
+
+    @staticmethod
+    def read_mysql(db) -> List[Dict]:
+        """Cumulative performance_schema statement digest counters"""
+        rows = DatabaseUtils.query_rows(db, MYSQL_DIGESTS_SQL)
+        for row in rows:
+            row["source_id"] = f"{row.pop('schema_name')}:{row.pop('digest')}"
+            row["blks_hit"] = row["blks_read"] = None
+        return rows
+
+    # Snapshots
+
+    def record(self, db_name: str, rows: List[Dict], taken_at: Optional[float] = None) -> Dict:
+        """Store one set of cumulative counters and the deltas since the last one"""
+        taken_at = taken_at or time.time()
+
+        # Several entries can share a source id (e.g. PG14 toplevel); sum them
+        current: Dict[str, Dict] = {}
+        for row in rows:
+            entry = current.setdefault(row["source_id"], {"query": row["query"], **dict.fromkeys(COUNTERS)})
+            for counter in COUNTERS:
+                if row.get(counter) is not None:
+                    entry[counter] = (entry[counter] or 0) + float(row[counter])
+
+        with self.lock:
+            client = self.client
+            previous_snapshot = client.execute(
+                "SELECT taken_at FROM snapshots WHERE db = ? ORDER BY taken_at DESC LIMIT 1", (db_name,)
+            ).fetchone()
+            previous = {
+                row["source_id"]: row
+                for row in client.execute("SELECT * FROM counters WHERE db = ?", (db_name,))
+            }
+
+            grouped: Dict[str, Dict] = {}
+            if previous_snapshot is not None:
+                for source_id, entry in current.items():
+                    before = previous.get(source_id)
+                    reset = before is None or (entry["calls"] or 0) < (before["calls"] or 0)
+                    delta = {
+                        counter: None
+                        if entry[counter] is None
+                        else entry[counter] - (0 if reset or before[counter] is None else before[counter])
+                        for counter in COUNTERS
+                    }
+                    if not delta["calls"]:
+                        continue
+                    fingerprint = DatabaseUtils.fingerprint_query(entry["query"] or "")
+                    group = grouped.setdefault(fingerprint, {"query": entry["query"], **dict.fromkeys(COUNTERS)})
+                    for counter in COUNTERS:
+                        if delta[counter] is not None:
+                            group[counter] = (group[counter] or 0) + delta[counter]
+
+            interval = taken_at - previous_snapshot["taken_at"] if previous_snapshot else None
+            client.execute("BEGIN")
+            try:
+                snapshot_id = client.execute(
+                    "INSERT INTO snapshots (db, taken_at, interval_s, entries) VALUES (?, ?, ?, ?)",
+                    (db_name, taken_at, interval, len(current)),
+                ).lastrowid
+                for fingerprint, group in grouped.items():
+                    client.execute(
+                        "INSERT INTO deltas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (snapshot_id, db_name, fingerprint, taken_at, *(group[c] for c in COUNTERS)),
+                    )
+                    client.execute(
+                        "INSERT INTO queries VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (db, fingerprint) DO UPDATE SET last_seen = excluded.last_seen",
+                        (db_name, fingerprint, group["query"], taken_at, taken_at),
+                    )
+                client.execute("DELETE FROM counters WHERE db = ?", (db_name,))
+                client.executemany(
+                    "INSERT INTO counters VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(db_name, source_id, *(e[c] for c in COUNTERS)) for source_id, e in current.items()],
+                )
+                client.execute("COMMIT")
+            except Exception:
+                client.execute("ROLLBACK")
+                raise
+
+        return {
+            "db": db_name,
+            "snapshot_id": snapshot_id,
+            "entries": len(current),
+            "fingerprints": len(grouped),
+            "interval_s": interval,
+            "baseline": previous_snapshot is None,
+        }
+
+    def snapshot(self, manager, databases: Tuple[str, ...] = ("postgresql", "mysql")) -> List[Dict]:
+        """Snapshot every live SQL backend of a DatabaseManager"""
+        results = []
+        for name in databases:
+            if not manager.is_live(name):
+                continue
+            try:
+                db = getattr(manager, name)
+                rows = self.read_postgresql(db) if name == "postgresql" else self.read_mysql(db)
+                results.append(self.record(name, rows))
+            except Exception as e:
+                logger.error(f"❌ Query stats snapshot of {name} failed: {e}")
+                results.append({"db": name, "error": str(e)})
+        return results
+
+    def collect(
+        self,
+        manager,
+        interval: Optional[float] = None,
+        count: Optional[int] = None,
+        databases: Tuple[str, ...] = ("postgresql", "mysql"),
+    ) -> None:
+        """Snapshot every interval seconds (forever when count is None), pruning old data"""
+        interval = interval or self.config["interval"]
+        taken = 0
+        while count is None or taken < count:
+            started = time.time()
+            for result in self.snapshot(manager, databases):
+                if "error" not in result:
+                    logger.info(
+                        f"📸 {result['db']}: {result['fingerprints']} active query shapes "
+                        f"({result['entries']} entries)"
+                    )
+            self.prune()
+            taken += 1
+            if count is None or taken < count:
+                time.sleep(max(0.0, interval - (time.time() - started)))
+
+    def prune(self, retention_days: Optional[float] = None) -> int:
+        """Delete snapshots older than the retention period; returns deltas removed"""
+        days = self.config["retention_days"] if retention_days is None else retention_days
+        if not days:
+            return 0
+        cutoff = time.time() - days * 86400
+        with self.lock:
+            removed = self.client.execute("DELETE FROM deltas WHERE taken_at < ?", (cutoff,)).rowcount
+            self.client.execute("DELETE FROM snapshots WHERE taken_at < ?", (cutoff,))
+            self.client.execute("DELETE FROM queries WHERE last_seen < ?", (cutoff,))
+        return removed
+
+    # Analytics
+
+    @staticmethod
+    def _summarize(row: sqlite3.Row, window_ms: Optional[float] = None) -> Dict:
+        """Derived metrics for one aggregated query"""
+        result = dict(row)
+        for counter in ("calls", "rows", "rows_examined", "blks_hit", "blks_read"):
+            if result.get(counter) is not None:
+                result[counter] = int(result[counter])
+        calls = result["calls"] or 0
+        result["mean_ms"] = round(result["total_ms"] / calls, 3) if calls else 0.0
+        result["total_ms"] = round(result["total_ms"], 1)
+        if window_ms is not None:
+            result["percent_time"] = round(100.0 * result["total_ms"] / window_ms, 1) if window_ms else 0.0
+        hits, reads = result.get("blks_hit"), result.get("blks_read")
+        result["hit_ratio"] = round(hits / (hits + reads), 4) if hits is not None and hits + reads else None
+        return result
+
+    def top(
+        self,
+        db: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 10,
+        order: str = "total_ms",
+    ) -> List[Dict]:
+        """Query shapes ranked by time (or calls, mean_ms, rows...) in a window
+
+        since/until are Unix times; the default window is the last 24 hours.
+        """
+        if order not in ORDERS:
+            raise ValueError(f"order must be one of {', '.join(ORDERS)}")
+        since = since if since is not None else time.time() - 86400
+        until = until if until is not None else time.time()
+        where = "d.taken_at >= ? AND d.taken_at <= ?" + (" AND d.db = ?" if db else "")
+        params = (since, until) + ((db,) if db else ())
+        order_sql = "SUM(d.total_ms) / SUM(d.calls)" if order == "mean_ms" else f"SUM(d.{order})"
+
+        with self.lock:
+            window_ms = self.client.execute(
+                f"SELECT SUM(d.total_ms) FROM deltas d WHERE {where}", params
+            ).fetchone()[0] or 0.0
+            rows = self.client.execute(
+                f"""SELECT d.db, d.fingerprint, q.query, SUM(d.calls) AS calls, SUM(d.total_ms) AS total_ms,
+                           SUM(d.rows) AS rows, SUM(d.rows_examined) AS rows_examined,
+                           SUM(d.blks_hit) AS blks_hit, SUM(d.blks_read) AS blks_read,
+                           COUNT(*) AS snapshots
+                    FROM deltas d JOIN queries q ON q.db = d.db AND q.fingerprint = d.fingerprint
+                    WHERE {where}
+                    GROUP BY d.db, d.fingerprint
+                    ORDER BY {order_sql} DESC LIMIT ?""",
+                params + (limit,),
+            ).fetchall()
+        return [self._summarize(row, window_ms) for row in rows]
+
+    def trend(
+        self, fingerprint: str, db: Optional[str] = None, days: float = 7, bucket: str = "day"
+    ) -> List[Dict]:
+        """Calls and time of one query shape per hour or day"""
+        size = {"hour": 3600, "day": 86400}[bucket]
+        where = "fingerprint = ? AND taken_at >= ?" + (" AND db = ?" if db else "")
+        params = (fingerprint, time.time() - days * 86400) + ((db,) if db else ())
+        with self.lock:
+            rows = self.client.execute(
+                f"""SELECT CAST(taken_at / {size} AS INTEGER) * {size} AS bucket_start,
+                           SUM(calls) AS calls, SUM(total_ms) AS total_ms, SUM(rows) AS rows,
+                           SUM(rows_examined) AS rows_examined, SUM(blks_hit) AS blks_hit,
+                           SUM(blks_read) AS blks_read
+                    FROM deltas WHERE {where} GROUP BY bucket_start ORDER BY bucket_start""",
+                params,
+            ).fetchall()
+        return [self._summarize(row) for row in rows]
+
+    def find(self, prefix: str) -> List[Dict]:
+        """Query shapes whose fingerprint starts with prefix"""
+        with self.lock:
+            rows = self.client.execute(
+                "SELECT * FROM queries WHERE fingerprint LIKE ? ORDER BY last_seen DESC", (prefix + "%",)
+            ).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,81 @@
+# Single-Flight Primitives
+# Collapse concurrent loads of the same key: in-process calls share one
+# execution, and a Redis lock keeps other processes from repeating it
+
+import uuid
+import threading
+from typing import Any, Optional, Tuple
+
+
+# Delete the lock only if we still own it
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution"""
+
+    class _Call:
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        """Initialize in-flight call registry"""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: str, func) -> Tuple[Any, bool]:
+        """Run func once per key; returns (result, shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+
+class RedisLock:
+    """Per-key SET NX lock in Redis that only its owner can release"""
+
+    def __init__(self, client, timeout: float):
+        """Initialize lock helper over a redis client"""
+        self.client = client
+        self.timeout = timeout
+        self._release = client.register_script(RELEASE_LOCK_SCRIPT)
+
+    def acquire(self, key: str) -> Optional[str]:
+        """Take the lock, returning the owner token or None if it is held
+
+        Redis errors propagate so callers can decide whether to proceed
+        without the lock.
+        """
+        token = uuid.uuid4().hex
+        if self.client.set(key, token, nx=True, px=int(self.timeout * 1000)):
+            return token
+        return None
+
+    def release(self, key: str, token: str) -> None:
+        """Release the lock if token still owns it"""
+        self._release(keys=[key], args=[token])
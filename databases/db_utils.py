@@ -1,7 +1,9 @@
 # Database Utilities and Helpers
 
 import os
+import re
 import json
+import time
 import hashlib
 import logging
 from typing import Dict, List, Any, Optional
@@ -11,6 +13,8 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+DOLLAR_QUOTE = re.compile(r"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$")
+
 
 class DatabaseUtils:
     """Utility functions for database operations"""
@@ -97,13 +101,147 @@ class DatabaseUtils:
             logger.error(f"DSN parse failed: {e}")
             return {}
 
+    @staticmethod
+    def split_sql_statements(sql: str, backslash_escapes: bool = False) -> List[str]:
+        """Split a SQL script on top-level semicolons
+
+        Semicolons inside quoted strings and identifiers, -- and /* */
+        comments and PostgreSQL $tag$ bodies do not end a statement.
+        backslash_escapes follows MySQL string rules; PostgreSQL E'...'
+        strings always use them.
+        """
+        statements = []
+        start = None  # first code character of the current statement
+        i = 0
+        n = len(sql)
+        while i < n:
+            c = sql[i]
+            if c == "-" and sql.startswith("--", i):
+                end = sql.find("\n", i)
+                i = n if end == -1 else end + 1
+                continue
+            if c == "/" and sql.startswith("/*", i):
+                end = sql.find("*/", i + 2)
+                i = n if end == -1 else end + 2
+                continue
+            if c == ";":
+                if start is not None:
+                    statements.append(sql[start:i].strip())
+                start = None
+                i += 1
+                continue
+            if c.isspace():
+                i += 1
+                continue
+            if start is None:
+                start = i
+            if c in ("'", '"', "`"):
+                # E'...' (not the tail of an identifier like name'...) escapes with backslashes
+                escape_string = (
+                    c == "'"
+                    and i > 0
+                    and sql[i - 1] in "Ee"
+                    and (i < 2 or not (sql[i - 2].isalnum() or sql[i - 2] in "_$"))
+                )
+                escapes = backslash_escapes or escape_string
+                i += 1
+                while i < n:
+                    if escapes and sql[i] == "\\" and c == "'":
+                        i += 2
+                    elif sql[i] == c:
+                        if i + 1 < n and sql[i + 1] == c:
+                            i += 2
+                        else:
+                            break
+                    else:
+                        i += 1
+                i += 1
+                continue
+            if c == "$":
+                tag = DOLLAR_QUOTE.match(sql, i)
+                if tag:
+                    end = sql.find(tag.group(0), i + len(tag.group(0)))
+                    i = n if end == -1 else end + len(tag.group(0))
+                    continue
+            i += 1
+        if start is not None:
+            statements.append(sql[start:].strip())
+        return statements
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Reduce a query to its shape: literals, parameters and IN/VALUES lists become ?"""
+        normalized = re.sub(r"/\*.*?\*/|--[^\n]*", " ", query, flags=re.DOTALL)
+        normalized = re.sub(r"'(?:[^'\\]|\\.|'')*'", "?", normalized)
+        normalized = re.sub(r"%(?:\([^)]*\))?s", "?", normalized)
+        normalized = re.sub(r"\$\d+|\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b", "?", normalized)
+        normalized = re.sub(r"[`\"]", "", normalized)
+        normalized = re.sub(r"(?<![-<>!=:|])\s*(<=|>=|<>|!=|=|<|>)\s*(?![-<>=])", r" \1 ", normalized)
+        normalized = re.sub(r"\s*,\s*", ", ", normalized)
+        normalized = re.sub(r"\(\s+", "(", re.sub(r"\s+\)", ")", normalized))
+        normalized = re.sub(r"\s+", " ", normalized).strip().rstrip(";").strip().lower()
+        # IN (?, ?, ?) and MySQL digests' IN (...) are one shape whatever the length
+        normalized = re.sub(r"\(\s*(?:\.\.\.|\?(?:\s*,\s*\?)*)\s*\)", "(?+)", normalized)
+        # psycopg2 expands a tuple bound to a bare IN %s into the same list
+        normalized = re.sub(r"\bin \?(?![\w(])", "in (?+)", normalized)
+        return re.sub(r"(values \(\?\+\))(?:, \(\?\+\))+", r"\1", normalized)
+
+    @staticmethod
+    def fingerprint_query(query: str) -> str:
+        """Stable id of a query's normalized shape"""
+        return hashlib.sha1(DatabaseUtils.normalize_query(query).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def query_rows(db, query: str, params: Optional[tuple] = None) -> List[Dict]:
+        """Run a SELECT on a MySQL/PostgreSQL manager's connection
+
+        Unlike execute(), errors are raised (after a rollback, so the
+        session stays usable) instead of being logged and returned as [].
+        """
+        cursor = db.connection.cursor()
+        try:
+            cursor.execute(query, params)
+            columns = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            db.connection.commit()
+            return rows
+        except Exception:
+            db.connection.rollback()
+            raise
+        finally:
+            cursor.close()
 
-class DatabaseMigration:
-    """Database migration utilities"""
 
-    def __init__(self, migrations_dir: str = "./migrations"):
-        """Initialize migrations"""
-        self.migrations_dir = migrations_dir
+class DatabaseMigration:
+    """Database migration utilities
+
+    Pending .sql files are applied in filename order, each inside one
+    transaction, and recorded with a sha256 checksum in the migrations
+    table. Files marked "-- moai:no-transaction" run statement by
+    statement in autocommit (CREATE INDEX CONCURRENTLY); there, statements
+    containing {batch_size} are repeated in throttled, separately
+    committed batches until they touch no rows.
+    """
+
+    LOCK_KEY = 7283749  # pg_advisory_lock key / GET_LOCK name suffix
+
+    def __init__(
+        self, migrations_dir: Optional[str] = None, manager=None, db_type: str = "postgresql"
+    ):
+        """Initialize migrations
+
+        manager is a connected MySQLManager or PostgreSQLManager; it is only
+        needed to run migrations or read their status.
+        """
+        from db_config import DatabaseConfig
+
+        self.config = DatabaseConfig.get_migration_config()
+        self.migrations_dir = migrations_dir or self.config["dir"]
+        self.manager = manager
+        self.db_type = db_type
+        self.table = self.config["table"]
+        if not re.match(r"^[A-Za-z_][A-Za-z0-9_.]*$", self.table):
+            raise ValueError(f"Invalid migrations table name: {self.table}")
         self.executed_migrations = []
 
     def create_migration(self, name: str, db_type: str) -> bool:
@@ -118,7 +256,9 @@ class DatabaseMigration:
             with open(filepath, "w") as f:
                 f.write(f"-- Migration: {name}\n")
                 f.write(f"-- Database: {db_type}\n")
-                f.write(f"-- Created: {datetime.now()}\n\n")
+                f.write(f"-- Created: {datetime.now()}\n")
+                f.write("-- Add \"-- moai:no-transaction\" for CREATE INDEX CONCURRENTLY or batched\n")
+                f.write("-- backfills (statements containing {batch_size}, repeated until 0 rows)\n\n")
                 f.write("-- ADD YOUR SQL HERE\n")
 
             logger.info(f"✅ Migration created: {filename}")
@@ -142,6 +282,274 @@ class DatabaseMigration:
             {"name": migration_name, "status": status, "timestamp": DatabaseUtils.get_timestamp()}
         )
 
+    def load_migration(self, filename: str) -> Dict:
+        """Parse a migration file into statements, directives and checksum"""
+        with open(os.path.join(self.migrations_dir, filename), "r") as f:
+            sql = f.read().replace("\r\n", "\n")
+
+        directives = {
+            key.lower(): value.strip()
+            for key, value in re.findall(r"^--\s*moai:([\w-]+)[ \t]*(.*)$", sql, re.MULTILINE)
+        }
+        database = re.search(r"^--\s*Database:\s*(\w+)", sql, re.MULTILINE)
+        statements = DatabaseUtils.split_sql_statements(
+            sql, backslash_escapes=self.db_type == "mysql"
+        )
+        transactional = "no-transaction" not in directives
+        batched = [s for s in statements if "{batch_size}" in s]
+        if batched and transactional:
+            raise ValueError(
+                f"{filename}: {{batch_size}} statements commit per batch and need -- moai:no-transaction"
+            )
+
+        return {
+            "version": filename[:-4],
+            "filename": filename,
+            "database": database.group(1).lower() if database else None,
+            "checksum": hashlib.sha256(sql.encode()).hexdigest(),
+            "statements": statements,
+            "transactional": transactional,
+            "batch_size": int(directives.get("batch-size") or self.config["batch_size"]),
+            "batch_sleep": float(directives.get("batch-sleep") or self.config["batch_sleep"]),
+        }
+
+    def _connection(self):
+        """Raw DB-API connection of the manager"""
+        if self.manager is None or getattr(self.manager, "connection", None) is None:
+            raise RuntimeError(f"{self.db_type} is not connected")
+        return self.manager.connection
+
+    def _execute(self, cursor, statement: str, params: Optional[tuple] = None) -> int:
+        """Execute one statement, draining any result set, and return rowcount"""
+        cursor.execute(statement, params)
+        if cursor.description:
+            cursor.fetchall()
+        return cursor.rowcount
+
+    def ensure_table(self, cursor) -> None:
+        """Create the migrations table if needed"""
+        self._execute(
+            cursor,
+            f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                version VARCHAR(255) PRIMARY KEY,
+                checksum CHAR(64) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                duration_ms INTEGER NOT NULL,
+                transactional BOOLEAN NOT NULL
+            )""",
+        )
+
+    def get_applied(self, cursor) -> Dict[str, Dict]:
+        """Applied migrations keyed by version"""
+        cursor.execute(
+            f"SELECT version, checksum, applied_at, duration_ms FROM {self.table} ORDER BY version"
+        )
+        return {
+            row[0]: {"checksum": row[1], "applied_at": str(row[2]), "duration_ms": row[3]}
+            for row in cursor.fetchall()
+        }
+
+    def _set_lock_timeout(self, cursor, reset: bool = False) -> None:
+        """Bound how long DDL queues behind other sessions' locks"""
+        seconds = self.config["lock_timeout"]
+        if not seconds:
+            return
+        if self.db_type == "postgresql":
+            statement = "RESET lock_timeout" if reset else f"SET lock_timeout = '{int(seconds * 1000)}ms'"
+        else:
+            value = "DEFAULT" if reset else max(1, int(seconds))
+            statement = f"SET SESSION lock_wait_timeout = {value}"
+        self._execute(cursor, statement)
+
+    def _lock(self, cursor, release: bool = False) -> bool:
+        """Take or release the runner lock so concurrent deploys serialize"""
+        if self.db_type == "postgresql":
+            fn = "pg_advisory_unlock" if release else "pg_try_advisory_lock"
+            cursor.execute(f"SELECT {fn}(%s)", (self.LOCK_KEY,))
+        elif release:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (f"moai_migrations_{self.LOCK_KEY}",))
+        else:
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (f"moai_migrations_{self.LOCK_KEY}",))
+        row = cursor.fetchone()
+        return bool(row and row[0])
+
+    def status(self) -> List[Dict]:
+        """Every migration with its state: applied, pending, changed or missing"""
+        connection = self._connection()
+        cursor = connection.cursor()
+        try:
+            autocommit = connection.autocommit
+            connection.autocommit = True
+            self.ensure_table(cursor)
+            applied = self.get_applied(cursor)
+        finally:
+            connection.autocommit = autocommit
+            cursor.close()
+
+        result = []
+        for filename in self.get_migrations():
+            migration = self.load_migration(filename)
+            if migration["database"] not in (None, self.db_type):
+                continue
+            record = applied.pop(migration["version"], None)
+            if record is None:
+                state = "pending"
+            elif record["checksum"] != migration["checksum"]:
+                state = "changed"
+            else:
+                state = "applied"
+            result.append(
+                {
+                    "version": migration["version"],
+                    "state": state,
+                    "transactional": migration["transactional"],
+                    "statements": len(migration["statements"]),
+                    "applied_at": record["applied_at"] if record else None,
+                }
+            )
+        for version, record in applied.items():
+            result.append(
+                {
+                    "version": version,
+                    "state": "missing",
+                    "transactional": None,
+                    "statements": 0,
+                    "applied_at": record["applied_at"],
+                }
+            )
+        return sorted(result, key=lambda m: m["version"])
+
+    def _run_batched(self, cursor, statement: str, size: int, sleep: float) -> int:
+        """Repeat a {batch_size} statement until it touches no rows"""
+        statement = statement.replace("{batch_size}", str(size))
+        total = 0
+        batches = 0
+        while True:
+            rows = self._execute(cursor, statement)
+            if rows <= 0:
+                break
+            total += rows
+            batches += 1
+            if batches % 10 == 0:
+                logger.info(f"   … {total} rows in {batches} batches")
+            time.sleep(sleep)
+        return total
+
+    def _apply(self, connection, migration: Dict) -> int:
+        """Apply one migration and record it; returns duration in ms"""
+        started = time.time()
+        insert = (
+            f"INSERT INTO {self.table} (version, checksum, duration_ms, transactional) "
+            "VALUES (%s, %s, %s, %s)"
+        )
+        cursor = connection.cursor()
+        try:
+            if migration["transactional"]:
+                connection.autocommit = False
+                try:
+                    for statement in migration["statements"]:
+                        self._execute(cursor, statement)
+                    duration_ms = int((time.time() - started) * 1000)
+                    self._execute(
+                        cursor, insert, (migration["version"], migration["checksum"], duration_ms, True)
+                    )
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    raise
+                finally:
+                    connection.autocommit = True
+            else:
+                for statement in migration["statements"]:
+                    if "{batch_size}" in statement:
+                        rows = self._run_batched(
+                            cursor, statement, migration["batch_size"], migration["batch_sleep"]
+                        )
+                        logger.info(f"   ✅ Backfilled {rows} rows")
+                    else:
+                        self._execute(cursor, statement)
+                duration_ms = int((time.time() - started) * 1000)
+                self._execute(
+                    cursor, insert, (migration["version"], migration["checksum"], duration_ms, False)
+                )
+            return duration_ms
+        finally:
+            cursor.close()
+
+    def run(self, target: Optional[str] = None, dry_run: bool = False) -> Dict:
+        """Apply pending migrations in order, up to and including target
+
+        Stops at the first failure. Refuses to run when an applied file's
+        checksum has changed. A failed no-transaction migration may be
+        partially applied, so its statements should be idempotent
+        (IF NOT EXISTS, drop INVALID indexes left by CONCURRENTLY).
+        """
+        result = {"applied": [], "pending": [], "changed": [], "failed": None, "error": None}
+        connection = self._connection()
+        autocommit = connection.autocommit
+        cursor = None
+        locked = False
+        try:
+            connection.autocommit = True
+            cursor = connection.cursor()
+            if not self._lock(cursor):
+                result["error"] = "another migration run holds the lock"
+                return result
+            locked = True
+            self.ensure_table(cursor)
+            applied = self.get_applied(cursor)
+
+            pending = []
+            for filename in self.get_migrations():
+                migration = self.load_migration(filename)
+                if migration["database"] not in (None, self.db_type):
+                    continue
+                if target and migration["version"] > target:
+                    break
+                record = applied.get(migration["version"])
+                if record is None:
+                    pending.append(migration)
+                elif record["checksum"] != migration["checksum"]:
+                    result["changed"].append(migration["version"])
+            result["pending"] = [m["version"] for m in pending]
+
+            if result["changed"]:
+                result["error"] = "applied migrations were modified: " + ", ".join(result["changed"])
+                return result
+            if dry_run:
+                return result
+
+            self._set_lock_timeout(cursor)
+            for migration in pending:
+                mode = "transaction" if migration["transactional"] else "no-transaction"
+                logger.info(f"▶️  Applying {migration['filename']} ({mode})")
+                try:
+                    duration_ms = self._apply(connection, migration)
+                except Exception as e:
+                    self.record_migration(migration["version"], "failed")
+                    result["failed"] = migration["version"]
+                    result["error"] = str(e)
+                    logger.error(f"❌ Migration {migration['version']} failed: {e}")
+                    break
+                self.record_migration(migration["version"], "applied")
+                result["applied"].append(migration["version"])
+                logger.info(f"✅ Applied {migration['version']} in {duration_ms}ms")
+            return result
+        except Exception as e:
+            result["error"] = str(e)
+            logger.error(f"❌ Migration run failed: {e}")
+            return result
+        finally:
+            if cursor is not None:
+                try:
+                    if locked:
+                        self._set_lock_timeout(cursor, reset=True)
+                        self._lock(cursor, release=True)
+                    cursor.close()
+                except Exception as e:
+                    logger.warning(f"⚠️  Migration lock release failed: {e}")
+            connection.autocommit = autocommit
+
 
 class DatabaseBackup:
     """Database backup utilities"""
@@ -198,27 +606,33 @@ class DatabaseBackup:
 
     @staticmethod
     def backup_redis(redis_client, output_file: str) -> bool:
-        """Backup Redis database"""
-        try:
-            # Get all keys
-            all_data = {}
-            for key in redis_client.keys():
-                value = redis_client.get(key)
-                all_data[key] = value
+        """Backup Redis database (SCAN + pipelined DUMP, all data types)"""
+        from db_backup import BackupEngine
 
-            with open(output_file, "w") as f:
-                json.dump(all_data, f, indent=2)
-
-            logger.info(f"✅ Redis backup created: {output_file}")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Redis backup failed: {e}")
-            return False
+        return bool(BackupEngine().backup_redis(redis_client, output_file))
 
     @staticmethod
-    def restore_from_backup(db_type: str, config: Dict, backup_file: str) -> bool:
-        """Restore database from backup"""
+    def restore_from_backup(
+        db_type: str, config: Dict, backup_file: str, jobs: Optional[int] = None, verify: bool = True
+    ) -> bool:
+        """Restore database from backup
+
+        Compressed, manifest-backed and directory backups made by BackupEngine
+        are verified and restored through it.
+        """
         try:
+            from db_backup import BackupEngine, manifest_path
+
+            if db_type in ("mysql", "postgresql") and (
+                backup_file.endswith((".gz", ".zst"))
+                or os.path.isdir(backup_file)
+                or os.path.exists(manifest_path(backup_file))
+            ):
+                engine = BackupEngine(jobs=jobs)
+                if db_type == "mysql":
+                    return bool(engine.restore_mysql(config, backup_file, verify=verify))
+                return bool(engine.restore_postgresql(config, backup_file, verify=verify))
+
             if db_type == "mysql":
                 import subprocess
 
@@ -257,13 +671,32 @@ class DatabaseBackup:
                     )
 
             elif db_type == "redis":
-                import redis
-
-                with open(backup_file, "r") as f:
-                    data = json.load(f)
-                    client = redis.Redis(**config)
-                    for key, value in data.items():
-                        client.set(key, value)
+                from db_manager import RedisManager
+
+                redis_mgr = RedisManager(config)
+                if not redis_mgr.connect():
+                    return False
+                try:
+                    if os.path.exists(manifest_path(backup_file)):
+                        result = BackupEngine(jobs=jobs).restore_redis(redis_mgr.client, backup_file, verify=verify)
+                        return bool(result) and not result["failed"]
+
+                    # JSON backups of string keys from older versions
+                    with open(backup_file, "r") as f:
+                        data = json.load(f)
+                    with redis_mgr.client.pipeline(transaction=False) as pipe:
+                        for i, (key, value) in enumerate(data.items(), 1):
+                            if value is None:
+                                continue
+                            pipe.set(
+                                key.encode("utf-8", "surrogateescape"),
+                                value.encode("utf-8", "surrogateescape"),
+                            )
+                            if i % 1000 == 0:
+                                pipe.execute()
+                        pipe.execute()
+                finally:
+                    redis_mgr.close()
 
             logger.info(f"✅ Database restored from: {backup_file}")
             return True
@@ -284,7 +717,7 @@ class DatabaseMonitoring:
         }
 
         # MySQL info
-        if manager.mysql:
+        if manager.is_live("mysql"):
             try:
                 result = manager.mysql.execute(
                     "SELECT database() as db, "
@@ -296,7 +729,7 @@ class DatabaseMonitoring:
                 pass
 
         # PostgreSQL info
-        if manager.postgresql:
+        if manager.is_live("postgresql"):
             try:
                 result = manager.postgresql.execute(
                     "SELECT datname, "
@@ -308,14 +741,14 @@ class DatabaseMonitoring:
                 pass
 
         # Redis info
-        if manager.redis:
+        if manager.is_live("redis"):
             try:
                 info["databases"]["redis"] = manager.redis.get_stats()
             except:
                 pass
 
         # ElasticSearch info
-        if manager.elasticsearch:
+        if manager.is_live("elasticsearch"):
             try:
                 info["databases"]["elasticsearch"] = manager.elasticsearch.get_stats()
             except:
@@ -329,7 +762,7 @@ class DatabaseMonitoring:
         slow_queries = []
 
         # MySQL slow queries
-        if manager.mysql:
+        if manager.is_live("mysql"):
             try:
                 result = manager.mysql.execute(
                     "SELECT * FROM mysql.slow_log WHERE start_time > "
@@ -341,7 +774,7 @@ class DatabaseMonitoring:
                 pass
 
         # PostgreSQL slow queries
-        if manager.postgresql:
+        if manager.is_live("postgresql"):
             try:
                 result = manager.postgresql.execute(
                     "SELECT query, mean_exec_time FROM pg_stat_statements "
@@ -356,34 +789,70 @@ class DatabaseMonitoring:
         return slow_queries
 
     @staticmethod
-    def check_database_locks(manager) -> List[Dict]:
-        """Check for database locks"""
-        locks = []
+    def top_queries(
+        hours: float = 24, limit: int = 10, db: Optional[str] = None, order: str = "total_ms"
+    ) -> List[Dict]:
+        """Query shapes ranked by time consumed, from the query analytics store
+
+        Returns [] until "db_cli.py query-stats collect" has taken snapshots.
+        """
+        from db_config import DatabaseConfig
+        from db_query_stats import QueryStats
+
+        path = DatabaseConfig.get_query_stats_config()["path"]
+        if not os.path.exists(path):
+            return []
+        stats = QueryStats(path)
+        try:
+            return stats.top(db=db, since=time.time() - hours * 3600, limit=limit, order=order)
+        finally:
+            stats.close()
 
-        # MySQL locks
-        if manager.mysql:
-            try:
-                result = manager.mysql.execute(
-                    "SELECT * FROM information_schema.processlist "
-                    "WHERE state LIKE '%lock%' OR state LIKE '%wait%'"
-                )
-                for lock in result:
-                    locks.append({"db": "mysql", "lock": lock})
-            except:
-                pass
+    @staticmethod
+    def plan_regressions(hours: float = 24, limit: int = 10, db: Optional[str] = None) -> List[Dict]:
+        """Latest captured plans with regression flags, from the plan store
 
-        # PostgreSQL locks
-        if manager.postgresql:
-            try:
-                result = manager.postgresql.execute(
-                    "SELECT * FROM pg_locks WHERE NOT granted"
-                )
-                for lock in result:
-                    locks.append({"db": "postgresql", "lock": lock})
-            except:
-                pass
+        Returns [] unless DB_EXPLAIN has captured plans of slow queries.
+        """
+        from db_config import DatabaseConfig
+        from db_explain import ExplainStore
+
+        path = DatabaseConfig.get_explain_config()["path"]
+        if not os.path.exists(path):
+            return []
+        store = ExplainStore(path)
+        try:
+            return store.latest(db=db, since=time.time() - hours * 3600, limit=limit, flagged=True)
+        finally:
+            store.close()
+
+    @staticmethod
+    def lock_graphs(manager, databases: Optional[List[str]] = None) -> List[Dict]:
+        """Wait-for graphs (who blocks whom) of the live SQL backends
+
+        Each graph lists the waiting sessions and the root blockers behind
+        them with their queries and durations; see db_locks.
+        """
+        from db_locks import lock_graphs
+
+        return lock_graphs(manager, databases)
+
+    @staticmethod
+    def check_database_locks(manager, cancel: Optional[bool] = None) -> List[Dict]:
+        """Check for database locks
+
+        Returns one entry per waiting session, {"db", "lock"}, where lock
+        holds the session with blocked_by, roots and waiting_for. With
+        DB_LOCK_CANCEL=true (or cancel=True) root blockers matching the
+        cancel policy are cancelled.
+        """
+        from db_config import DatabaseConfig
+        from db_locks import lock_graphs, cancel_blockers
 
-        return locks
+        graphs = lock_graphs(manager)
+        if DatabaseConfig.get_locks_config()["cancel"] if cancel is None else cancel:
+            cancel_blockers(manager, graphs)
+        return [{"db": graph["db"], "lock": wait} for graph in graphs for wait in graph["waits"]]
 
 
 def create_env_file(output_file: str = ".env") -> bool:
@@ -401,6 +870,7 @@ MYSQL_DATABASE=moai_db
 MYSQL_POOL_SIZE=5
 MYSQL_MAX_OVERFLOW=10
 MYSQL_POOL_RECYCLE=3600
+MYSQL_PREPARED_CACHE_SIZE=100
 
 # PostgreSQL Configuration
 POSTGRES_HOST=localhost
@@ -412,6 +882,7 @@ POSTGRES_SSLMODE=prefer
 POSTGRES_POOL_SIZE=5
 POSTGRES_MAX_OVERFLOW=10
 POSTGRES_POOL_RECYCLE=3600
+POSTGRES_PREPARED_CACHE_SIZE=100
 POSTGRES_TIMEOUT=10
 
 # Redis Configuration
@@ -424,10 +895,17 @@ REDIS_SSL_CERTFILE=
 REDIS_SSL_KEYFILE=
 REDIS_SSL_CA_CERTS=
 REDIS_MAX_CONNECTIONS=50
+REDIS_POOL_TIMEOUT=5
 REDIS_KEEPALIVE=true
 REDIS_CONNECT_TIMEOUT=5
 REDIS_SOCKET_TIMEOUT=5
 REDIS_RETRY_ON_TIMEOUT=true
+REDIS_BATCH_SIZE=500
+REDIS_CODEC=json
+REDIS_CODEC_NAMESPACES=
+REDIS_ALLOW_PICKLE=false
+REDIS_COMPRESSION=none
+REDIS_COMPRESSION_THRESHOLD=1024
 
 # ElasticSearch Configuration
 ELASTICSEARCH_HOST=localhost
@@ -442,6 +920,122 @@ ELASTICSEARCH_MAX_RETRIES=3
 ELASTICSEARCH_RETRY_ON_TIMEOUT=true
 ELASTICSEARCH_MIN_DELAY=0.1
 ELASTICSEARCH_MAX_DELAY=10.0
+ELASTICSEARCH_BULK_CHUNK_SIZE=500
+ELASTICSEARCH_BULK_MAX_BYTES=10485760
+ELASTICSEARCH_BULK_CONCURRENCY=4
+ELASTICSEARCH_BULK_MAX_RETRIES=5
+
+# Local Search Configuration (SEARCH_DB=local, or fallback when ElasticSearch is down)
+LOCAL_SEARCH_PATH=search.db
+LOCAL_SEARCH_TOKENIZER=unicode61 remove_diacritics 2
+LOCAL_SEARCH_FALLBACK=true
+
+# Cache Layer Configuration
+CACHE_NAMESPACE=cache
+CACHE_DEFAULT_TTL=300
+CACHE_TABLE_TTLS=leads=600,tilda_pages=3600
+CACHE_NEGATIVE_TTL=30
+CACHE_LOCK_TIMEOUT=5
+CACHE_WRITE_BEHIND=false
+CACHE_WRITE_BEHIND_INTERVAL=1.0
+CACHE_WRITE_BEHIND_BATCH=500
+
+# Search Index Configuration
+SEARCH_INDEX_PREFIX=moai_
+SEARCH_INDEX_STATE=search_index_state.json
+SEARCH_LEADS_TABLE=leads
+SEARCH_LEADS_KEY=id
+SEARCH_UPDATED_COLUMN=updated_at
+SEARCH_SYNC_BATCH=1000
+SEARCH_WATERMARK_OVERLAP=60.0
+TILDA_PUBLIC_KEY=
+TILDA_SECRET_KEY=
+
+# Backup Configuration
+BACKUP_DIR=backups
+BACKUP_COMPRESSION=zstd
+BACKUP_COMPRESSION_LEVEL=0
+BACKUP_JOBS=0
+BACKUP_CHUNK_SIZE=16777216
+BACKUP_FORMAT=plain
+BACKUP_REDIS_BATCH=1000
+BACKUP_INCREMENTAL_MODE=logical
+BACKUP_INCREMENTAL_TABLES=leads
+BACKUP_KEY_COLUMN=id
+BACKUP_UPDATED_COLUMN=updated_at
+BACKUP_WATERMARK_OVERLAP=60.0
+BACKUP_TRACK_DELETES=true
+BACKUP_WAL_SLOT=moai_backup
+BACKUP_PARALLEL=3
+BACKUP_BACKEND_JOBS=postgresql=4,mysql=2,redis=2
+BACKUP_IO_LIMIT_MB=0
+BACKUP_LOW_PRIORITY=true
+BACKUP_RETENTION_COUNT=7
+BACKUP_RETENTION_DAYS=0
+
+# Migration Configuration
+MIGRATIONS_DIR=./migrations
+MIGRATIONS_TABLE=schema_migrations
+MIGRATION_LOCK_TIMEOUT=5.0
+MIGRATION_BATCH_SIZE=1000
+MIGRATION_BATCH_SLEEP=0.1
+
+# Backfill Configuration
+BACKFILL_DIR=backfills
+BACKFILL_BATCH_SIZE=1000
+BACKFILL_MIN_BATCH=100
+BACKFILL_MAX_BATCH=50000
+BACKFILL_BATCH_STEP=500
+BACKFILL_TARGET_MS=250
+BACKFILL_MAX_LAG=5.0
+BACKFILL_REPLICA=
+BACKFILL_SLEEP=0.05
+
+# Query Analytics Configuration
+QUERY_STATS_DB=query_stats.db
+QUERY_STATS_INTERVAL=300
+QUERY_STATS_RETENTION_DAYS=30
+
+# Client Metrics Configuration
+DB_METRICS=true
+DB_METRICS_MAX_SERIES=500
+DB_METRICS_URL=http://localhost:8888/metrics
+
+# Slow Query Plan Capture (sampled EXPLAIN ANALYZE of slow queries)
+DB_EXPLAIN=false
+DB_EXPLAIN_DB=explain_plans.db
+DB_EXPLAIN_THRESHOLD_MS=500
+DB_EXPLAIN_SAMPLE_RATE=0.1
+DB_EXPLAIN_MIN_INTERVAL=600
+DB_EXPLAIN_TIMEOUT_MS=30000
+DB_EXPLAIN_LARGE_TABLE_ROWS=10000
+DB_EXPLAIN_ESTIMATE_FACTOR=10
+
+# Index Advisor (db_cli.py advise)
+DB_ADVISOR_HOURS=168
+DB_ADVISOR_MAX_QUERIES=50
+DB_ADVISOR_MIN_TABLE_ROWS=10000
+DB_ADVISOR_MAX_COLUMNS=3
+
+# Live Dashboard (db_cli.py monitor --live)
+DB_DASHBOARD_INTERVAL=2.0
+DB_DASHBOARD_SAMPLE_TIMEOUT=1.5
+
+# Lock Waits (cancel policy for root blockers; off by default)
+DB_LOCK_CANCEL=false
+DB_LOCK_CANCEL_ACTION=cancel
+DB_LOCK_CANCEL_AFTER=300
+DB_LOCK_CANCEL_MIN_BLOCKED=1
+DB_LOCK_CANCEL_EXCLUDE_USERS=
+
+# Connection Configuration (backends connect lazily on first use)
+DB_WARMUP=
+DB_WARMUP_TIMEOUT=10.0
+DB_RETRY_BACKOFF=30.0
+
+# Health Check Configuration
+HEALTH_CHECK_TIMEOUT=3.0
+HEALTH_CHECK_TTL=5.0
 
 # Database Selection
 PRIMARY_DB=postgresql
@@ -6,17 +6,24 @@ Executes ACTUAL commands and connects to REAL cloud services
 
 import asyncio
 import json
+import hashlib
 import subprocess
 import os
 import sys
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import threading
 import requests
 import shutil
 from pathlib import Path
 
+from request_coalescer import coalescer, succeeded
+
+# Seconds upstream results are shared between console requests
+TILDA_CACHE_TTL = int(os.environ.get("TILDA_CACHE_TTL", 60))
+BIGQUERY_CACHE_TTL = int(os.environ.get("BIGQUERY_CACHE_TTL", 300))
+
 # Import Acrobat Project configuration
 try:
     from acrobat_project_config import AcrobatProjectConfig, AcrobatMLIntegration, get_acrobat_status
@@ -25,6 +32,38 @@ except ImportError:
     ACROBAT_AVAILABLE = False
     print("⚠️  Acrobat project config not available")
 
+# Search index over leads and Tilda content (databases/ modules import by bare name)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "databases"))
+try:
+    from db_config import DatabaseConfig
+    from db_manager import DatabaseManager
+    from db_indexer import SearchIndexer
+    from db_metrics import registry as metrics_registry
+    DB_AVAILABLE = True
+except ImportError:
+    DB_AVAILABLE = False
+    print("⚠️  Database modules not available")
+
+_search_indexer = None
+_search_indexer_lock = threading.Lock()
+# Shared so /health polls reuse connections and the cached probe results;
+# backends connect on first use (or in the background with DB_WARMUP)
+_database_manager = DatabaseManager() if DB_AVAILABLE else None
+
+
+def get_search_indexer():
+    """Get the shared search indexer, connecting on first use"""
+    global _search_indexer
+    if not DB_AVAILABLE:
+        return None
+    with _search_indexer_lock:
+        if _search_indexer is None:
+            # ElasticSearch, or the embedded engine (SEARCH_DB=local / fallback)
+            search = _database_manager.search
+            if search is not None:
+                _search_indexer = SearchIndexer(search)
+        return _search_indexer
+
 class RealCommandExecutor:
     def __init__(self):
         self.tilda_public_key = "b9j7w8eka0dwsizitkix"
@@ -115,7 +154,16 @@ class RealCommandExecutor:
         return f"{size_bytes:.1f} {size_names[i]}"
     
     def get_real_tilda_projects(self):
-        """Get REAL Tilda projects using your API key"""
+        """Get REAL Tilda projects, sharing one upstream call between requests"""
+        return coalescer.call(
+            f"tilda:projects:{self.tilda_public_key}",
+            self.fetch_tilda_projects,
+            ttl=TILDA_CACHE_TTL,
+            should_cache=succeeded,
+        )
+
+    def fetch_tilda_projects(self):
+        """Fetch REAL Tilda projects using your API key"""
         try:
             url = f"http://api.tildacdn.info/v1/getprojectslist/?publickey={self.tilda_public_key}&secretkey={self.tilda_secret_key}"
             response = requests.get(url, timeout=10)
@@ -142,6 +190,13 @@ class RealCommandExecutor:
         except Exception as e:
             return {"success": False, "error": f"Connection error: {str(e)}"}
     
+    def search_index(self, text):
+        """Search leads and Tilda content in the search index"""
+        indexer = get_search_indexer()
+        if indexer is None:
+            return {"success": False, "error": "Search index not available (run: python db_cli.py index sync)"}
+        return indexer.search_text(text)
+
     def search_google_drive_files(self, query=""):
         """Search REAL Google Drive files (requires OAuth setup)"""
         # Note: This would require proper Google Drive API setup with OAuth
@@ -185,8 +240,18 @@ class RealCommandExecutor:
         
         return {"success": False, "error": "All Gemini keys failed or quota exceeded"}
     
-    def execute_bigquery_query(self, query):
-        """Execute REAL BigQuery query with fallback keys"""
+    def execute_bigquery_query(self, query, ttl=0):
+        """Execute REAL BigQuery query; identical concurrent queries share one call"""
+        query_hash = hashlib.sha1(query.encode()).hexdigest()
+        return coalescer.call(
+            f"bigquery:{self.bigquery_project_id}:{query_hash}",
+            lambda: self.run_bigquery_query(query),
+            ttl=ttl,
+            should_cache=succeeded,
+        )
+
+    def run_bigquery_query(self, query):
+        """Run REAL BigQuery query with fallback keys"""
         for i, key in enumerate(self.bigquery_keys):
             try:
                 # Try using REST API first
@@ -233,6 +298,9 @@ class RealCommandExecutor:
             else:
                 return {"type": "acrobat", "data": {"error": "Acrobat project not configured"}, "success": False}
         
+        if cmd_lower.startswith('search '):
+            return {"type": "search", "data": self.search_index(command[len('search '):].strip()), "success": True}
+
         if any(word in cmd_lower for word in ['file', 'show', 'list', 'find']):
             if 'cloud' in cmd_lower or 'drive' in cmd_lower:
                 return self.search_google_drive_files()
@@ -252,7 +320,7 @@ class RealCommandExecutor:
                 return {"type": "bigquery", "data": result, "success": True}
             else:
                 default_query = "SELECT COUNT(*) as total_rows FROM `aimo-460701.masterdata_leads.leads` LIMIT 10"
-                result = self.execute_bigquery_query(default_query)
+                result = self.execute_bigquery_query(default_query, ttl=BIGQUERY_CACHE_TTL)
                 return {"type": "bigquery", "data": result, "success": True}
                 
         elif any(word in cmd_lower for word in ['terminal', 'run', 'execute', 'command']):
@@ -271,7 +339,46 @@ class RealCommandExecutor:
             return {"type": "ai", "data": f"I understand you want: '{command}'. This is a real AI response processing your natural language input.", "success": True}
 
 class RealAPIHandler(BaseHTTPRequestHandler):
+    def send_health(self):
+        """Database health (probed concurrently, cached for HEALTH_CHECK_TTL)"""
+        if _database_manager is None:
+            checks, healthy = {"error": "Database modules not available"}, False
+        else:
+            checks = _database_manager.health_details()
+            # Healthy when the configured primary and cache databases answer
+            required = [DatabaseConfig.DATABASE_SELECTION[role].lower() for role in ("primary", "cache")]
+            healthy = all(checks.get(name, {}).get("healthy") for name in required)
+        self.send_response(200 if healthy else 503)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(json.dumps({"healthy": healthy, "checks": checks}).encode())
+
+    def send_metrics(self):
+        """Client-side database latency (Prometheus text, or JSON with ?format=json)"""
+        if not DB_AVAILABLE:
+            body, content_type = json.dumps({"error": "Database modules not available"}), 'application/json'
+        elif parse_qs(urlparse(self.path).query).get('format', [''])[0] == 'json':
+            buckets = parse_qs(urlparse(self.path).query).get('buckets', [''])[0] == '1'
+            body = json.dumps({
+                "started_at": metrics_registry.started_at,
+                "series": metrics_registry.snapshot(buckets=buckets),
+            })
+            content_type = 'application/json'
+        else:
+            body, content_type = metrics_registry.prometheus(), 'text/plain; version=0.0.4'
+        self.send_response(200 if DB_AVAILABLE else 503)
+        self.send_header('Content-type', content_type)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
     def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            return self.send_health()
+        if urlparse(self.path).path == '/metrics':
+            return self.send_metrics()
+
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -321,7 +428,8 @@ class RealAPIHandler(BaseHTTPRequestHandler):
 def run_server():
     """Run the real API server"""
     server_address = ('localhost', 8888)
-    httpd = HTTPServer(server_address, RealAPIHandler)
+    # Threaded so slow upstream calls don't queue other requests
+    httpd = ThreadingHTTPServer(server_address, RealAPIHandler)
     print(f"🚀 REAL AI Console API Server running at http://localhost:8888")
     print(f"📡 Ready to execute REAL commands and access REAL cloud services")
     print(f"🔑 Tilda API Key: {RealCommandExecutor().tilda_public_key}")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Request Coalescing for Upstream API Calls
+Collapses concurrent identical calls (Tilda, BigQuery, ...) into one request,
+within a process and across processes through Redis
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# Single-flight primitives are shared with the database cache layer
+DATABASES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "databases")
+if DATABASES_DIR not in sys.path:
+    sys.path.append(DATABASES_DIR)
+
+from db_singleflight import SingleFlight, RedisLock
+
+logger = logging.getLogger(__name__)
+
+# Results kept in memory per process (least recently used are dropped)
+LOCAL_CACHE_SIZE = int(os.environ.get("COALESCE_LOCAL_CACHE_SIZE", "1000"))
+
+
+def encode(value: Any) -> Any:
+    """Round-trip a result through the JSON codec used for Redis
+
+    Every caller sees the same types (datetimes, decimals -> strings)
+    whether the result came from this process, Redis or the upstream call.
+    """
+    return json.loads(json.dumps(value, default=str))
+
+
+class RequestCoalescer:
+    """Single-flight calls with a shared result cache and early refresh
+
+    - Concurrent callers asking for the same key in one process share a
+      single upstream call.
+    - With Redis configured (COALESCE_REDIS_URL or REDIS_URL), results are
+      shared across processes and a Redis lock keeps other processes from
+      issuing the same call; they wait for the result instead.
+    - Cached results are refreshed early with probability rising as expiry
+      approaches (XFetch), so popular keys don't all expire at once.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "coalesce",
+        redis_url: Optional[str] = None,
+        beta: float = 1.0,
+        lock_timeout: float = 30.0,
+        local_size: int = LOCAL_CACHE_SIZE,
+    ):
+        self.namespace = namespace
+        self.beta = beta
+        self.lock_timeout = lock_timeout
+        self.lock = threading.Lock()
+        self.flights = SingleFlight()
+        self.local: "OrderedDict[str, Dict]" = OrderedDict()
+        self.local_size = local_size
+        self.stats = {
+            "calls": 0,
+            "hits": 0,
+            "early_refreshes": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+            "lock_waits": 0,
+        }
+
+        self.redis = None
+        self.locks = None
+        redis_url = redis_url or os.environ.get("COALESCE_REDIS_URL") or os.environ.get("REDIS_URL")
+        if redis_url:
+            try:
+                import redis
+
+                self.redis = redis.Redis.from_url(
+                    redis_url, socket_connect_timeout=2, socket_timeout=2
+                )
+                self.locks = RedisLock(self.redis, lock_timeout)
+            except Exception as e:
+                logger.warning(f"⚠️  Coalescer running without Redis: {e}")
+                self.redis = None
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] += 1
+
+    # ---- cached results ----
+
+    def _read(self, key: str) -> Optional[Dict]:
+        """Get a live cache entry from memory, then Redis"""
+        now = time.time()
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is not None:
+                if entry["expiry"] > now:
+                    self.local.move_to_end(key)
+                    return entry
+                del self.local[key]
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(f"{self.namespace}:{key}")
+                if raw:
+                    entry = json.loads(raw)
+                    if entry["expiry"] > now:
+                        self._remember(key, entry)
+                        return entry
+            except Exception as e:
+                logger.warning(f"⚠️  Coalescer cache read failed: {e}")
+        return None
+
+    def _remember(self, key: str, entry: Dict) -> None:
+        """Keep an entry in the bounded in-process cache"""
+        with self.lock:
+            self.local[key] = entry
+            self.local.move_to_end(key)
+            while len(self.local) > self.local_size:
+                self.local.popitem(last=False)
+
+    def _write(self, key: str, value: Any, ttl: float, delta: float) -> Dict:
+        """Store a result in memory and Redis, returning the stored entry"""
+        entry = encode({"value": value, "delta": delta, "expiry": time.time() + ttl})
+        self._remember(key, entry)
+        if self.redis is not None:
+            try:
+                self.redis.set(f"{self.namespace}:{key}", json.dumps(entry), px=int(ttl * 1000))
+            except Exception as e:
+                logger.warning(f"⚠️  Coalescer cache write failed: {e}")
+        return entry
+
+    def _should_refresh_early(self, entry: Dict) -> bool:
+        """XFetch: refresh before expiry with probability ~ exp(-remaining/delta)"""
+        gap = -entry["delta"] * self.beta * math.log(1.0 - random.random())
+        return time.time() + gap >= entry["expiry"]
+
+    # ---- cross-process lock ----
+
+    def _acquire(self, key: str) -> Optional[str]:
+        """Take the Redis lock for a key; '' when Redis is not configured"""
+        if self.locks is None:
+            return ""
+        try:
+            return self.locks.acquire(f"{self.namespace}:lock:{key}")
+        except Exception as e:
+            logger.warning(f"⚠️  Coalescer lock failed, calling upstream: {e}")
+            return ""
+
+    def _release(self, key: str, token: str) -> None:
+        if token:
+            try:
+                self.locks.release(f"{self.namespace}:lock:{key}", token)
+            except Exception as e:
+                logger.warning(f"⚠️  Coalescer unlock failed: {e}")
+
+    def _wait_for_result(self, key: str) -> Optional[Dict]:
+        """Wait for the process holding the lock to publish its result"""
+        self._count("lock_waits")
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            time.sleep(0.05)
+            entry = self._read(key)
+            if entry:
+                return entry
+            try:
+                if not self.redis.exists(f"{self.namespace}:lock:{key}"):
+                    break
+            except Exception:
+                break
+        return None
+
+    # ---- calls ----
+
+    def _fetch(self, key: str, func: Callable, ttl: float, should_cache, stale: Optional[Dict]):
+        """Run the upstream call once across processes"""
+        token = self._acquire(key) if ttl > 0 else ""
+        if token is None:
+            if stale is not None:
+                # Another process is already refreshing; the cached value is still valid
+                return stale["value"]
+            entry = self._wait_for_result(key)
+            if entry is not None:
+                return entry["value"]
+
+        try:
+            start = time.time()
+            self._count("upstream_calls")
+            value = func()
+            if ttl > 0 and (should_cache is None or should_cache(value)):
+                return self._write(key, value, ttl, time.time() - start)["value"]
+            return value
+        finally:
+            self._release(key, token)
+
+    def call(
+        self,
+        key: str,
+        func: Callable[[], Any],
+        ttl: float = 0,
+        should_cache: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return func()'s result, sharing it with concurrent/recent callers
+
+        ttl=0 only coalesces calls that are in flight at the same time.
+        should_cache decides whether a result (e.g. an error) may be reused.
+        """
+        self._count("calls")
+        stale = self._read(key) if ttl > 0 else None
+        if stale is not None:
+            if not self._should_refresh_early(stale):
+                self._count("hits")
+                return stale["value"]
+            self._count("early_refreshes")
+
+        value, shared = self.flights.do(
+            key, lambda: self._fetch(key, func, ttl, should_cache, stale)
+        )
+        if shared:
+            self._count("coalesced")
+        return value
+
+    def get_stats(self) -> Dict:
+        """Get coalescing statistics"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats["redis"] = self.redis is not None
+        return stats
+
+
+def succeeded(result: Any) -> bool:
+    """Cache only results that don't report an error"""
+    return isinstance(result, dict) and result.get("success", True) and "error" not in result
+
+
+# Shared coalescer instance
+coalescer = RequestCoalescer()